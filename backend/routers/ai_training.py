@@ -1409,6 +1409,44 @@ def get_confidence_gate_stats():
         return {"success": False, "error": str(e)}
 
 
+@router.get("/prediction-batcher/stats")
+def get_prediction_batcher_stats():
+    """
+    Batch sizes / latency of the coalesced setup-prediction and forecast paths.
+    """
+    try:
+        from services.ai_modules.timeseries_service import get_timeseries_ai
+        return {"success": True, "batchers": get_timeseries_ai().prediction_batch_stats()}
+    except Exception as e:
+        return {"success": False, "error": str(e)}
+
+
+@router.get("/market-context-cache/stats")
+def get_market_context_cache_stats():
+    """
+    Hit / revalidation / recompute counters for the regime + MTF feature
+    cache used by setup-model predictions.
+    """
+    try:
+        from services.ai_modules.market_context_cache import get_market_context_cache
+        return {"success": True, **get_market_context_cache().stats()}
+    except Exception as e:
+        return {"success": False, "error": str(e)}
+
+
+@router.get("/model-registry/stats")
+def get_model_registry_stats():
+    """
+    Entries, memory, hit/miss and load-time counters for the process-wide
+    model registry shared by the gate, ensemble and setup-model paths.
+    """
+    try:
+        from services.ai_modules.model_registry import get_model_registry
+        return {"success": True, **get_model_registry().stats()}
+    except Exception as e:
+        return {"success": False, "error": str(e)}
+
+
 @router.post("/confidence-gate/evaluate")
 async def evaluate_trade_confidence(symbol: str, setup_type: str, direction: str = "long", quality_score: int = 70):
     """
@@ -1592,7 +1630,8 @@ def cnn_predict(symbol: str, bar_size: str = "1 day", setup_type: str = "BREAKOU
         
         # Generate chart tensor from latest bars
         window_size = CNN_WINDOW_SIZES.get(setup_type, DEFAULT_WINDOW_SIZE)
-        tensor, chart_meta = generate_live_chart_tensor(mongo_db, symbol, bar_size, window_size)
+        tensor, chart_meta = generate_live_chart_tensor(
+            mongo_db, symbol, bar_size, window_size, renderer=metadata.get("chart_renderer"))
         
         if tensor is None:
             return {
@@ -87,6 +87,17 @@ async def get_pipeline_funnel(days: int = Query(1, ge=1, le=30)) -> Dict[str, An
     return {"success": True, **build_pipeline_funnel(_db, days=days)}
 
 
+@router.get("/rollup-stats")
+async def get_rollup_stats() -> Dict[str, Any]:
+    """Decision-trail rollup counters (rollup days read, raw edges
+    scanned, compactions, drift) — see `services/decision_rollups.py`."""
+    try:
+        from services import decision_rollups
+        return {"success": True, **decision_rollups.stats()}
+    except Exception as e:
+        return {"success": False, "error": str(e)}
+
+
 @router.get("/export-report", response_class=PlainTextResponse)
 async def export_report(
     days: int = Query(1, ge=1, le=30),
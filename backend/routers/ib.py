@@ -4,7 +4,7 @@ Endpoints for IB connection, account info, trading, and market data
 NO MOCK DATA - Only real verified data from IB Gateway or cached data with timestamps
 """
 from fastapi import APIRouter, HTTPException, Request, Response
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, PrivateAttr
 from typing import Any, Dict, Optional, List
 from datetime import datetime, timezone, timedelta
 import asyncio
@@ -127,6 +127,9 @@ class IBPushDataRequest(BaseModel):
     #   status, limit_price, stop_price, aux_price, oca_group,
     #   submitted_at.
     orders: list = Field(default=[], description="Open orders snapshot from IB Gateway")
+    # Set by /push-data-bin: quotes were already scattered into the
+    # columnar quote table, so the shared handler must not re-ingest them.
+    _quotes_in_table: bool = PrivateAttr(default=False)
 
 
 # In-memory storage for pushed IB data
@@ -608,6 +611,16 @@ def get_pending_orders() -> list:
         return list(_order_queue_legacy["pending"].values())
 
 
+async def _get_pending_orders_async() -> list:
+    """`get_pending_orders` for the long-poll endpoint: pooled Motor read
+    instead of a default-executor thread per pusher poll."""
+    try:
+        return await get_order_queue_service().get_pending_orders_async()
+    except Exception as e:
+        logger.warning(f"MongoDB get_pending failed, using legacy: {e}")
+        return list(_order_queue_legacy["pending"].values())
+
+
 def mark_order_executing(order_id: str) -> bool:
     """Mark an order as being executed (claim it)"""
     try:
@@ -871,6 +884,15 @@ async def receive_pushed_ib_data(request: IBPushDataRequest, response: Response)
                     _q["pushed_at"] = _push_iso
             _pushed_ib_data["quotes"].update(request.quotes)
 
+            # Columnar quote table (services/quote_table.py) — the binary
+            # endpoint has already written it.
+            if not request._quotes_in_table:
+                try:
+                    from services.quote_table import get_quote_table
+                    get_quote_table().ingest_dicts(request.quotes, _t.time())
+                except Exception as _qt_exc:
+                    logger.debug(f"quote_table ingest skipped: {_qt_exc}")
+
             # v19.34 (2026-05-04) — Publish to the in-memory L1 quote
             # tick bus so the manage-loop's mid-bar stop-eval (Phase 3)
             # can react within ~50ms instead of waiting for the next
@@ -969,12 +991,12 @@ async def receive_pushed_ib_data(request: IBPushDataRequest, response: Response)
                     "account": _pushed_ib_data.get("account", {}),
                     "positions": _pushed_ib_data.get("positions", []),
                 }
-                await asyncio.to_thread(
-                    lambda: _db["ib_live_snapshot"].update_one(
-                        {"_id": "current"},
-                        {"$set": _snapshot_payload},
-                        upsert=True,
-                    )
+                # Pooled Motor upsert (worker-thread fallback) — keeps the
+                # push storm off the default executor.
+                from services.async_mongo import call as _mongo_call
+                await _mongo_call(
+                    _db, "ib_live_snapshot", "update_one",
+                    {"_id": "current"}, {"$set": _snapshot_payload}, upsert=True,
                 )
         except Exception as snap_err:
             logger.debug(f"IB snapshot write skipped: {snap_err}")
@@ -1018,6 +1040,53 @@ async def receive_pushed_ib_data(request: IBPushDataRequest, response: Response)
             _push_in_flight = 0
 
 
+
+@router.post("/push-data-bin")
+async def receive_pushed_ib_data_binary(request: Request, response: Response):
+    """
+    Compact binary variant of `/push-data` the pusher can opt into
+    (`Content-Type: application/msgpack`, see services/quote_table.py for
+    the wire format).
+
+    Quotes arrive as one fixed-schema struct array that is scattered into
+    the columnar quote table with a handful of vectorized writes — no
+    JSON parse, no pydantic validation of 100+ quote dicts. The legacy
+    quote dicts are then built from the table in one pass and the rest of
+    the push (persister, tick bus, snapshot, account/positions/orders)
+    runs through the same handler as `/push-data`, including its
+    backpressure accounting.
+    """
+    global _push_dropped_503_total
+
+    # Same gate as /push-data, checked before decoding so a rejected push
+    # costs nothing.
+    if _push_in_flight >= _PUSH_DATA_MAX_CONCURRENT:
+        _push_dropped_503_total += 1
+        response.status_code = 503
+        response.headers["Retry-After"] = "5"
+        return {
+            "success": False,
+            "error": "backpressure",
+            "in_flight": _push_in_flight,
+            "max": _PUSH_DATA_MAX_CONCURRENT,
+            "dropped_total": _push_dropped_503_total,
+        }
+
+    from services.quote_table import QuoteDecodeError, decode_push, get_quote_table
+    try:
+        payload = decode_push(await request.body())
+    except QuoteDecodeError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    import time as _t
+    table = get_quote_table()
+    symbols = table.ingest_records(payload.pop("quotes"), _t.time())
+    fields = {k: v for k, v in payload.items() if k in IBPushDataRequest.model_fields}
+    fields.setdefault("timestamp", datetime.now(timezone.utc).isoformat())
+    push = IBPushDataRequest.model_construct(quotes=table.to_dicts(symbols), **fields)
+    push._quotes_in_table = True
+    return await receive_pushed_ib_data(push, response)
+
 @router.get("/pushed-data")
 async def get_pushed_ib_data():
     """
@@ -1886,18 +1955,34 @@ def queue_order_for_execution(request: QueuedOrderRequest):
     }
 
 
+# Upper bound on a single long-poll hold, below the pusher's HTTP timeout.
+_ORDERS_LONG_POLL_MAX_S = 30.0
+
+
 @router.get("/orders/pending")
-async def get_pending_orders_endpoint():
+async def get_pending_orders_endpoint(wait: float = 0.0, version: int = -1):
     """
     Get all pending orders waiting for execution.
     The local pusher polls this endpoint to get orders to execute.
+
+    Long-poll: with `wait > 0` the request is held until `queue_order`
+    queues something newer than `version` (the value echoed from the
+    previous response) or `wait` seconds pass, so new orders reach the
+    pusher in milliseconds instead of on its next poll tick. `wait=0`
+    (the default) keeps the legacy immediate response.
     """
-    pending = await asyncio.to_thread(get_pending_orders)
-    
+    service = get_order_queue_service()
+    wait = max(0.0, min(float(wait or 0.0), _ORDERS_LONG_POLL_MAX_S))
+    if wait > 0 and version >= service.dispatch_version:
+        await service.wait_for_orders_async(version, wait)
+    current = service.dispatch_version
+    pending = await _get_pending_orders_async()
+
     return {
         "success": True,
         "orders": pending,
-        "count": len(pending)
+        "count": len(pending),
+        "version": current,
     }
 
 
@@ -2974,6 +3059,7 @@ async def report_historical_data_result(request: Request):
             async def _store_bars_async(bars, sym, bs):
                 try:
                     from services.ib_historical_collector import get_ib_collector
+                    from services import bar_catalog
                     from pymongo import UpdateOne
                     collector = get_ib_collector()
                     if collector._data_col is not None:
@@ -2988,6 +3074,11 @@ async def report_historical_data_result(request: Request):
                             collector._data_col.bulk_write, ops, ordered=False
                         )
                         stored = result.upserted_count + result.modified_count
+                        await asyncio.to_thread(
+                            bar_catalog.record_writes, collector._db,
+                            [(b["symbol"], b["bar_size"], b["date"]) for b in bars],
+                            bar_catalog.upserted_indexes(result), bars[0]["collected_at"],
+                        )
                         logger.info(f"Async stored {stored} bars for {sym} ({bs})")
                 except Exception as e:
                     logger.warning(f"Async bulk write error for {sym}: {e}")
@@ -3033,6 +3124,7 @@ async def report_historical_data_batch_result(request: Request):
         
         # Collect all bulk operations across all results
         all_bulk_operations = []
+        catalog_keys = []  # (symbol, bar_size, date) per op, for the bar catalog
         from datetime import datetime, timezone
         now = datetime.now(timezone.utc).isoformat()
         
@@ -3091,6 +3183,7 @@ async def report_historical_data_batch_result(request: Request):
                                 upsert=True
                             )
                         )
+                        catalog_keys.append((symbol, bar_size, date_val))
                 
                 processed += 1
                 
@@ -3104,6 +3197,10 @@ async def report_historical_data_batch_result(request: Request):
                 result = collector._data_col.bulk_write(all_bulk_operations, ordered=False)
                 bars_stored = result.upserted_count + result.modified_count
                 logger.info(f"Batch bulk stored {bars_stored} bars (upserted: {result.upserted_count}, modified: {result.modified_count})")
+                from services import bar_catalog
+                bar_catalog.record_writes(
+                    collector._db, catalog_keys, bar_catalog.upserted_indexes(result), now
+                )
             except Exception as e:
                 logger.warning(f"Batch bulk write error: {e}")
         
@@ -6722,6 +6819,17 @@ def get_historical_data_queue_stats():
         return {"pending": 0, "completed": 0, "failed": 0, "total": 0, "progress_pct": 0}
 
 
+@router.get("/quote-table-stats")
+def get_quote_table_stats():
+    """Introspection for the columnar L1 quote table fed by /push-data and
+    /push-data-bin (resident symbols, ingest count, last ingest cost)."""
+    try:
+        from services.quote_table import get_quote_table
+        return {"success": True, **get_quote_table().stats()}
+    except Exception as e:
+        return {"success": False, "error": str(e)[:200]}
+
+
 @router.get("/tick-persister-stats")
 def get_tick_persister_stats():
     """
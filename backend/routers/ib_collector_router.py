@@ -10,6 +10,7 @@ from typing import Optional, List, Dict
 from datetime import datetime, timezone
 import logging
 
+from services import bar_catalog
 from services.ib_historical_collector import get_ib_collector
 
 logger = logging.getLogger(__name__)
@@ -141,26 +142,36 @@ async def get_data_coverage():
 
             all_timeframes = ["1 min", "5 mins", "15 mins", "30 mins", "1 hour", "1 day", "1 week"]
 
-            # Per-timeframe global stats — DISTINCT_SCAN on compound index.
-            # Much faster than $group on 178M rows (seconds vs minutes).
+            # Per-timeframe global stats — from the bar catalog once seeded
+            # (totals + date range included), else DISTINCT_SCAN on the
+            # compound index. Much faster than $group on 178M rows.
             timeframe_stats = []
             symbols_by_tf = {}  # tf -> set(symbols) for tier reuse
+            use_catalog = bar_catalog.is_ready(db)
             for tf in all_timeframes:
+                total_bars = earliest = latest = None
                 try:
-                    syms = data_col.distinct("symbol", {"bar_size": tf})
+                    if use_catalog:
+                        rows = bar_catalog.entries(db, tf)
+                        syms = [r["symbol"] for r in rows]
+                        if rows:
+                            total_bars = sum(int(r.get("bars") or 0) for r in rows)
+                            earliest = min((str(r["earliest"]) for r in rows if r.get("earliest") is not None), default=None)
+                            latest = max((str(r["latest"]) for r in rows if r.get("latest") is not None), default=None)
+                    else:
+                        syms = data_col.distinct("symbol", {"bar_size": tf})
                 except Exception as e:
-                    logger.warning(f"distinct failed for {tf}: {e}")
+                    logger.warning(f"coverage lookup failed for {tf}: {e}")
                     syms = []
                 symbols_by_tf[tf] = set(syms)
                 timeframe_stats.append({
                     "timeframe": tf,
                     "symbols": len(syms),
-                    # total_bars / date range are expensive on 178M rows — omitted
-                    # here to keep this endpoint fast. Use /queue-progress or
-                    # /stats for raw totals if needed.
-                    "total_bars": None,
-                    "earliest_date": None,
-                    "latest_date": None,
+                    # total_bars / date range are expensive on 178M rows —
+                    # only reported when the catalog has them.
+                    "total_bars": total_bars,
+                    "earliest_date": earliest,
+                    "latest_date": latest,
                 })
 
             # Per-tier stats — reuse symbols_by_tf to avoid re-querying.
@@ -278,7 +289,6 @@ async def fill_gaps(
             return {"success": False, "error": "Database not initialized"}
         
         adv_col = db["symbol_adv_cache"]
-        data_col = db["ib_historical_data"]
         
         # Define tiers and their timeframes (same as coverage endpoint)
         tiers = {
@@ -352,14 +362,7 @@ async def fill_gaps(
                     # Single pipeline that returns max_date per symbol —
                     # catches both "no bars at all" AND "bars exist but
                     # latest is too old to be useful".
-                    pipeline = [
-                        {"$match": {"bar_size": tf, "symbol": {"$in": tier_symbols}}},
-                        {"$group": {"_id": "$symbol", "max_date": {"$max": "$date"}}},
-                    ]
-                    max_date_map = {
-                        doc["_id"]: doc.get("max_date")
-                        for doc in data_col.aggregate(pipeline, allowDiskUse=True)
-                    }
+                    max_date_map = bar_catalog.latest_dates(db, tf, tier_symbols)
 
                     missing_symbols = [s for s in tier_symbols if s not in max_date_map]
                     stale_symbols = [
@@ -585,7 +588,6 @@ async def get_gap_analysis(tier_filter: Optional[str] = None):
 
         def _analyze():
             adv_col = db["symbol_adv_cache"]
-            data_col = db["ib_historical_data"]
 
             tiers = {
                 "intraday": {
@@ -633,14 +635,7 @@ async def get_gap_analysis(tier_filter: Optional[str] = None):
             needed_tfs = {tf for cfg in selected.values() for tf in cfg["timeframes"]}
             for tf in needed_tfs:
                 try:
-                    rows = data_col.aggregate(
-                        [
-                            {"$match": {"bar_size": tf}},
-                            {"$group": {"_id": "$symbol", "max_date": {"$max": "$date"}}},
-                        ],
-                        allowDiskUse=True,
-                    )
-                    max_date_by_tf[tf] = {r["_id"]: r.get("max_date") for r in rows if r.get("_id")}
+                    max_date_by_tf[tf] = bar_catalog.latest_dates(db, tf)
                 except Exception as e:
                     logger.warning(f"max-date aggregate failed for {tf}: {e}")
                     max_date_by_tf[tf] = {}
@@ -920,7 +915,6 @@ async def universe_freshness_health(
         crit_list = [s.strip().upper() for s in critical_symbols.split(",") if s.strip()]
 
         def _rollup():
-            data_col = db["ib_historical_data"]
             adv_col = db["symbol_adv_cache"]
 
             # Mirror the same tier config + STALE_DAYS used everywhere else
@@ -960,14 +954,7 @@ async def universe_freshness_health(
             needed_tfs = {tf for cfg in tiers.values() for tf in cfg["timeframes"]}
             max_date_by_tf = {}
             for tf in needed_tfs:
-                rows = data_col.aggregate(
-                    [
-                        {"$match": {"bar_size": tf}},
-                        {"$group": {"_id": "$symbol", "max_date": {"$max": "$date"}}},
-                    ],
-                    allowDiskUse=True,
-                )
-                max_date_by_tf[tf] = {r["_id"]: r.get("max_date") for r in rows if r.get("_id")}
+                max_date_by_tf[tf] = bar_catalog.latest_dates(db, tf)
 
             # Per-tier fresh/stale/missing counts
             tier_rollup = []
@@ -3121,6 +3108,57 @@ def get_symbol_inventory(symbol: str):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/bar-catalog/stats")
+def get_bar_catalog_stats():
+    """Bar catalog health: seed / last reconcile info + write/read counters."""
+    try:
+        db = get_ib_collector()._db
+        return {
+            "success": True,
+            "ready": bar_catalog.is_ready(db),
+            "seed": bar_catalog.seed_info(db) if db is not None else None,
+            **bar_catalog.stats(),
+        }
+    except Exception as e:
+        return {"success": False, "error": str(e)}
+
+
+@router.get("/bar-catalog/symbol/{symbol}")
+def get_bar_catalog_symbol(symbol: str, gap_limit: int = 50):
+    """Per-bar_size catalog entries for one symbol, with weekday gap days
+    decoded from the coverage map."""
+    try:
+        db = get_ib_collector()._db
+        if db is None:
+            raise HTTPException(status_code=503, detail="Database not initialized")
+        rows = bar_catalog.describe(db, symbol, gap_limit=gap_limit)
+        if not rows:
+            return {"success": False, "symbol": symbol.upper(), "error": "Not in bar catalog"}
+        return {"success": True, "symbol": symbol.upper(), "entries": rows}
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error querying bar catalog: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/bar-catalog/rebuild")
+async def rebuild_bar_catalog():
+    """Seed / reconcile the bar catalog from ib_historical_data (one full
+    $group — run off-hours). Runs in a thread."""
+    import asyncio
+    try:
+        db = get_ib_collector()._db
+        if db is None:
+            raise HTTPException(status_code=503, detail="Database not initialized")
+        return await asyncio.to_thread(bar_catalog.rebuild, db)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error rebuilding bar catalog: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @router.get("/deep-gap-analysis")
 def deep_gap_analysis(tier: str = None):
     """
@@ -134,6 +134,7 @@ async def report_historical_data_result(request: Request):
                     
                     # Build bulk operations list
                     bulk_operations = []
+                    catalog_keys = []
                     for bar in data:
                         date_val = bar.get("date") or bar.get("time")
                         if not date_val:
@@ -168,12 +169,17 @@ async def report_historical_data_result(request: Request):
                                 upsert=True
                             )
                         )
+                        catalog_keys.append((symbol, bar_size, date_val))
                     
                     # Execute bulk write in single operation
                     if bulk_operations:
                         result = collector._data_col.bulk_write(bulk_operations, ordered=False)
                         bars_stored = result.upserted_count + result.modified_count
                         logger.info(f"Bulk stored {bars_stored} bars for {symbol} (upserted: {result.upserted_count}, modified: {result.modified_count})")
+                        from services import bar_catalog
+                        bar_catalog.record_writes(
+                            collector._db, catalog_keys, bar_catalog.upserted_indexes(result), now
+                        )
                         
             except Exception as e:
                 logger.warning(f"Bulk write error for {symbol}: {e}")
@@ -215,6 +221,7 @@ async def report_historical_data_batch_result(request: Request):
         
         # Collect all bulk operations across all results
         all_bulk_operations = []
+        catalog_keys = []  # (symbol, bar_size, date) per op, for the bar catalog
         now = datetime.now(timezone.utc).isoformat()
         
         for result in results:
@@ -272,6 +279,7 @@ async def report_historical_data_batch_result(request: Request):
                                 upsert=True
                             )
                         )
+                        catalog_keys.append((symbol, bar_size, date_val))
                 
                 processed += 1
                 
@@ -285,6 +293,10 @@ async def report_historical_data_batch_result(request: Request):
                 result = collector._data_col.bulk_write(all_bulk_operations, ordered=False)
                 bars_stored = result.upserted_count + result.modified_count
                 logger.info(f"Batch bulk stored {bars_stored} bars (upserted: {result.upserted_count}, modified: {result.modified_count})")
+                from services import bar_catalog
+                bar_catalog.record_writes(
+                    collector._db, catalog_keys, bar_catalog.upserted_indexes(result), now
+                )
             except Exception as e:
                 logger.warning(f"Batch bulk write error: {e}")
         
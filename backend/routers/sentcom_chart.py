@@ -1888,6 +1888,67 @@ async def warm_chart_cache(req: ChartWarmRequest = Body(...)) -> Dict[str, Any]:
 from fastapi import WebSocket, WebSocketDisconnect
 
 
+# RTH-aware tick interval.
+def _chart_ws_tick_s() -> float:
+    import os as _os3
+    try:
+        return float(_os3.environ.get("CHART_WS_TICK_S") or 0) or _chart_ws_default_tick_s()
+    except Exception:
+        return _chart_ws_default_tick_s()
+
+
+def _chart_ws_default_tick_s() -> float:
+    from routers.ib_collector_router import _rth_throttle_decision
+    try:
+        policy = _rth_throttle_decision()
+        return 2.0 if policy.get("rth_active") else 30.0
+    except Exception:
+        return 5.0
+
+
+async def _chart_tail_hub_fetch(symbol: str, timeframe: str, session: str,
+                                since: int, fresh: bool) -> Dict[str, Any]:
+    """Fetcher for the chart-tail fan-out hub (services/chart_tail_hub.py).
+    One call per (symbol, timeframe, session) per tick, shared by every
+    socket on that chart. `fresh` is set right after a bar-close event:
+    drop the symbol's cached /chart payload so the new bar isn't hidden
+    behind the response-cache TTL (the recompute re-warms it for
+    everyone)."""
+    if fresh:
+        try:
+            from services.chart_response_cache import get_chart_response_cache
+            await get_chart_response_cache(db=_db).invalidate(symbol)
+        except Exception as e:
+            logger.debug(f"[v19.33 CHART-WS] cache invalidate failed sym={symbol}: {e}")
+    return await get_chart_tail(
+        symbol=symbol, timeframe=timeframe, since=since,
+        session=session, rth_only=None, cap=50,
+    )
+
+
+async def _chart_tail_ws_via_hub(websocket: WebSocket, symbol: str, timeframe: str,
+                                 session: str, since: int) -> None:
+    """Attach an accepted socket to the shared tail publisher for its
+    chart and hold it open until the client goes away. The hub does all
+    fetching, framing and heartbeats."""
+    from services.chart_tail_hub import get_chart_tail_hub
+    hub = get_chart_tail_hub()
+    hub.configure(_chart_tail_hub_fetch, _chart_ws_tick_s)
+    token = hub.subscribe(symbol, timeframe, session, since, websocket.send_json)
+    try:
+        while True:
+            msg = await websocket.receive()
+            if msg.get("type") == "websocket.disconnect":
+                break
+        logger.info(f"[v19.33 CHART-WS] disconnect sym={symbol} tf={timeframe}")
+    except WebSocketDisconnect:
+        logger.info(f"[v19.33 CHART-WS] disconnect sym={symbol} tf={timeframe}")
+    except Exception as e:
+        logger.warning(f"[v19.33 CHART-WS] error sym={symbol}: {e}")
+    finally:
+        hub.unsubscribe(token)
+
+
 @router.websocket("/ws/chart-tail")
 async def chart_tail_ws(websocket: WebSocket):
     """v19.33 — WebSocket-pushed chart tail. Drop-in for the 5s polling
@@ -1928,27 +1989,17 @@ async def chart_tail_ws(websocket: WebSocket):
     await websocket.accept()
     logger.info(f"[v19.33 CHART-WS] open sym={symbol} tf={timeframe} since={since}")
 
+    from services.chart_tail_hub import is_enabled as _hub_enabled
+    if _hub_enabled():
+        await _chart_tail_ws_via_hub(websocket, symbol, timeframe, session, since)
+        return
+
     last_sent_time = since
     last_heartbeat = datetime.now(timezone.utc)
 
-    # RTH-aware tick interval.
-    def _tick_seconds():
-        try:
-            return float(_os3.environ.get("CHART_WS_TICK_S") or 0) or _default_tick_s()
-        except Exception:
-            return _default_tick_s()
-
-    def _default_tick_s():
-        from routers.ib_collector_router import _rth_throttle_decision
-        try:
-            policy = _rth_throttle_decision()
-            return 2.0 if policy.get("rth_active") else 30.0
-        except Exception:
-            return 5.0
-
     try:
         while True:
-            tick_s = _tick_seconds()
+            tick_s = _chart_ws_tick_s()
 
             # Pull a tail payload by reusing the REST handler's logic —
             # cache hits are virtually free, and on miss the upstream
@@ -1994,3 +2045,14 @@ async def chart_tail_ws(websocket: WebSocket):
             await websocket.close(code=1011, reason="server_error")
         except Exception:
             pass
+
+
+@router.get("/chart-tail/hub-stats")
+async def chart_tail_hub_stats():
+    """Fan-out hub counters: live publishers / subscribers and how many
+    tail fetches served how many frames."""
+    try:
+        from services.chart_tail_hub import get_chart_tail_hub
+        return {"success": True, **get_chart_tail_hub().stats()}
+    except Exception as e:
+        return {"success": False, "error": str(e)}
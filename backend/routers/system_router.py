@@ -77,6 +77,17 @@ async def health_check():
     return {"status": "healthy", "timestamp": datetime.now(timezone.utc).isoformat()}
 
 
+@router.get("/api/system/async-mongo-stats")
+async def async_mongo_stats():
+    """Pooled Motor repository: pool settings, thread fallbacks and
+    per-collection latency (ops / errors / mean / p50 / p95 / max ms)."""
+    try:
+        from services import async_mongo
+        return {"success": True, **async_mongo.stats()}
+    except Exception as e:
+        return {"success": False, "error": str(e)}
+
+
 @router.get("/api/cache-status")
 def cache_status():
     """Check streaming cache health — async, no threads."""
@@ -12,6 +12,39 @@ logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/api/technicals", tags=["Real-Time Technicals"])
 
 
+@router.get("/bar-store/stats")
+async def get_bar_store_stats():
+    """Introspection for the in-process bar store (hit rate, resident
+    windows, last bulk hydrate per bar size)."""
+    try:
+        from services.bar_store import get_bar_store
+        return {"success": True, **get_bar_store().stats()}
+    except Exception as e:
+        return {"success": False, "error": str(e)[:200]}
+
+
+@router.get("/incremental-indicators/stats")
+async def get_incremental_indicator_stats():
+    """Introspection for the incremental indicator state (reads served
+    incrementally, reseeds, verification mismatches)."""
+    try:
+        from services.incremental_indicators import get_incremental_indicators
+        return {"success": True, **get_incremental_indicators().stats()}
+    except Exception as e:
+        return {"success": False, "error": str(e)[:200]}
+
+
+@router.get("/liquidity-table/stats")
+async def get_liquidity_table_stats():
+    """Introspection for the session liquidity table (resident symbols,
+    volume profiles, hit rate, last build)."""
+    try:
+        from services.liquidity_table import get_liquidity_table
+        return {"success": True, **get_liquidity_table().stats()}
+    except Exception as e:
+        return {"success": False, "error": str(e)[:200]}
+
+
 @router.get("/{symbol}")
 async def get_technical_snapshot(symbol: str):
     """
@@ -611,7 +611,19 @@ def _init_all_services():
     # 1m/5m/15m/1h bars, upserted on bar-close. See
     # services/tick_to_bar_persister.py for the rationale.
     from services.tick_to_bar_persister import init_tick_to_bar_persister
-    init_tick_to_bar_persister(db)
+    _tick_persister = init_tick_to_bar_persister(db)
+
+    # In-process columnar bar store — bar-close events from the persister
+    # advance the resident 5-min windows so technical snapshots read
+    # memory instead of ib_historical_data. See services/bar_store.py.
+    from services.bar_store import get_bar_store
+    _tick_persister.add_bar_close_listener(get_bar_store().on_bars_closed)
+    # ...and the incremental indicator state (O(1) snapshot indicators).
+    from services.incremental_indicators import get_incremental_indicators
+    _tick_persister.add_bar_close_listener(get_incremental_indicators().on_bars_closed)
+    # ...and the /ws/chart-tail fan-out hub (push new bars on bar close).
+    from services.chart_tail_hub import get_chart_tail_hub
+    _tick_persister.add_bar_close_listener(get_chart_tail_hub().on_bars_closed)
 
     # Initialize market intel service (moved here to wire smart_watchlist)
     market_intel_service = get_market_intel_service()
@@ -3862,6 +3874,17 @@ def _run_adv_recalc():
 async def startup_event():
     """Initialize services and start background streaming tasks"""
     
+    # Step 0: Pooled Motor repository for the hot collections (scanner,
+    # gate, push, order-queue paths) — bound to THIS loop and mirroring
+    # the sync `db` handle; callers fall back to to_thread without it.
+    try:
+        from services.async_mongo import init_async_mongo
+        if init_async_mongo(os.environ.get("MONGO_URL"),
+                            os.environ.get("DB_NAME", "tradecommand"), mirror_of=db):
+            print("[STARTUP] Async Mongo repository ready")
+    except Exception as _e:
+        print(f"[STARTUP] WARN: async Mongo repository unavailable: {_e}")
+
     # Step 1: Initialize all services (runs in thread pool to not block event loop)
     print("[STARTUP] Initializing services...")
     await asyncio.to_thread(_init_all_services)
@@ -4164,6 +4187,12 @@ async def startup_event():
     except Exception as _wd_err:
         print(f"[memory-watchdog] failed to start: {_wd_err}")
 
+    # Bar catalog: seed it once in the background if no rebuild has completed
+    # yet, so coverage readers stop scanning ib_historical_data after a deploy
+    # instead of after the weekly reconcile.
+    from services import bar_catalog
+    asyncio.create_task(bar_catalog.seed_if_unready(db), name="_bar_catalog_seed")
+
     # v19.34.35 — ADV cache health guard (auto-rebuild if corrupted)
     from services.ib_historical_collector import _adv_cache_startup_guard
     asyncio.create_task(_adv_cache_startup_guard(), name="_adv_cache_startup_guard")
@@ -4225,6 +4254,8 @@ async def startup_event():
     # Order-queue dead-letter reconciler (P1 2026-04-23) — scans every 30s
     # for orders stuck in PENDING/CLAIMED/EXECUTING and times them out so
     # silent broker rejects / pusher crashes don't leave orphan rows.
+    # Also owns the stale CLAIMED / IB_PENDING expiry sweeps that used to
+    # run inside every /api/ib/orders/pending poll.
     async def _order_dead_letter_loop():
         import asyncio as _asyncio
         await _asyncio.sleep(15)  # stagger from other startup tasks
@@ -4234,6 +4265,7 @@ async def startup_event():
                 svc = get_order_queue_service()
                 if not svc._initialized:
                     svc.initialize()
+                await _asyncio.to_thread(svc.sweep_stale_orders)
                 summary = await _asyncio.to_thread(
                     svc.reconcile_dead_letters,
                     pending_timeout_sec=120,
@@ -4275,6 +4307,24 @@ async def startup_event():
     except Exception as _persist_exc:
         print(f"v19.34.315 [IB-EXEC PERSISTER] start failed: {_persist_exc}")
 
+    # In-process bar store: bulk hydrate at boot, then periodic bulk refresh
+    # (daily windows + symbols the pusher isn't streaming).
+    try:
+        from services.bar_store import bar_store_refresh_loop
+        asyncio.create_task(bar_store_refresh_loop(db), name="bar_store_refresh")
+        print("[BAR-STORE] bulk hydrate + refresh loop started")
+    except Exception as _bs_exc:
+        print(f"[BAR-STORE] start failed: {_bs_exc}")
+
+    # Session liquidity table (ADV / dollar ADV / ADR% / TOD volume profile):
+    # one bulk build per ET session, served from memory to the scanner.
+    try:
+        from services.liquidity_table import liquidity_table_refresh_loop
+        asyncio.create_task(liquidity_table_refresh_loop(db), name="liquidity_table_refresh")
+        print("[LIQUIDITY-TABLE] per-session rebuild loop started")
+    except Exception as _lt_exc:
+        print(f"[LIQUIDITY-TABLE] start failed: {_lt_exc}")
+
     # Start market intel scheduler (auto-generates reports at scheduled times)
     asyncio.create_task(market_intel_service.start_scheduler())
     print("Market intel scheduler started")
@@ -4605,6 +4655,18 @@ async def shutdown_event():
             print("[SENT-REFRESH] APScheduler stopped")
     except Exception:
         pass
+    try:
+        # Drain live-tick bars still queued for Mongo before the loop dies.
+        from services.tick_to_bar_persister import get_tick_to_bar_persister
+        drained = await asyncio.to_thread(get_tick_to_bar_persister().close, 10.0)
+        print(f"[TICK-PERSIST] write-behind queue drained={drained}")
+    except Exception:
+        pass
+    try:
+        from services.async_mongo import close_async_mongo
+        close_async_mongo()
+    except Exception:
+        pass
 
     # Kill any training subprocesses we spawned
     _kill_orphan_processes()
@@ -0,0 +1,303 @@
+"""
+NumPy Candlestick Rasterizer — draws CNN chart inputs straight into uint8
+arrays, no matplotlib.
+
+Why?
+    `generate_chart_image` builds a DataFrame, lays out an mplfinance figure,
+    encodes it to PNG and `image_bytes_to_tensor` decodes the PNG again —
+    ~85ms per chart. Training-set generation renders thousands of windows
+    per setup, and the confidence gate pays the same cost per live CNN
+    signal.
+
+How
+    The layout mirrors `generate_chart_image` (nightclouds colours, price
+    panel over a 5:2 volume panel, 9/20 EMA overlays, mplfinance's
+    tight-layout x/y limits and candle/volume width table). Geometry that
+    depends only on the window length — candle centres, body/wick/volume
+    column spans, EMA segment interpolation — is computed once per
+    (window, image size) and cached. Per-window values become pixel rows,
+    and every element is painted for a whole batch of windows at once with
+    broadcast row/column masks into a uint8 palette canvas that is expanded
+    to RGB once at the end (~1ms per chart). Windows are processed in
+    chunks of `CNN_RASTER_CHUNK` (default 64) to bound the mask memory.
+
+    Output is `(N, S, S, 3)` uint8 RGB at `CNN_IMAGE_SIZE`; `images_to_tensor`
+    applies the same ImageNet normalisation as `get_image_transform`. Pixels
+    are not bit-identical to the PNG path (no anti-aliasing), but panel
+    geometry, colours and candle placement line up — see
+    tests/test_candle_raster.py.
+"""
+import os
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from services.ai_modules.chart_pattern_cnn import CNN_IMAGE_SIZE
+
+BG_RGB = (10, 10, 10)            # '#0a0a0a'
+UP_RGB = (38, 166, 154)          # '#26a69a'
+DOWN_RGB = (239, 83, 80)         # '#ef5350'
+VOLUME_EDGE_RGB = (31, 119, 180)  # nightclouds 'vcedge' '#1f77b4'
+EMA_COLORS = ((9, (255, 213, 79)),    # '#ffd54f'
+              (20, (66, 165, 245)))   # '#42a5f5'
+
+# Canvas palette indices; `_PALETTE[canvas]` expands to RGB once per chunk.
+_UP, _DOWN, _EDGE, _EMA0 = 1, 2, 3, 4
+_PALETTE = np.array([BG_RGB, UP_RGB, DOWN_RGB, VOLUME_EDGE_RGB] + [rgb for _, rgb in EMA_COLORS],
+                    dtype=np.uint8)
+
+IMAGENET_MEAN = np.array([0.485, 0.456, 0.406], dtype=np.float32)
+IMAGENET_STD = np.array([0.229, 0.224, 0.225], dtype=np.float32)
+
+# mplfinance `_widths` table (datalen → candle / volume width in bar units).
+_WIDTH_POINTS = np.array([30, 60, 90, 120, 150, 180, 210, 240], dtype=float)
+_CANDLE_WIDTHS = np.array([0.650, 0.575, 0.500, 0.445, 0.435, 0.425, 0.420, 0.415])
+_VOLUME_WIDTHS = np.array([0.980, 0.960, 0.950, 0.925, 0.900, 0.900, 0.875, 0.825])
+
+# Fractions of the image height, measured from the tight-bbox PNG output.
+_PAD_FRAC = 0.012
+_PRICE_FRAC = 0.68
+_GAP_FRAC = 0.012
+
+# mplfinance strokes candle bodies and volume bars with a ~1px edge line.
+_EDGE_PX = 1.0
+
+_MIN_BARS = 5
+_EMA_MIN_BARS = 20
+
+
+def _chunk_size() -> int:
+    try:
+        return max(1, int(os.environ.get("CNN_RASTER_CHUNK", 64)))
+    except ValueError:
+        return 64
+
+
+def ohlcv_arrays(bars: List[Dict]) -> Optional[np.ndarray]:
+    """`(5, n)` open/high/low/close/volume for one window, or None.
+
+    Applies the row filtering of `bars_to_dataframe`: bars without a
+    timestamp and repeated timestamps are dropped, as are rows with
+    non-positive open/close. Needs at least 5 rows left.
+    """
+    if not bars or len(bars) < _MIN_BARS:
+        return None
+    rows = []
+    seen = set()
+    for b in bars:
+        ts = b.get("date") or b.get("timestamp") or b.get("t")
+        if ts is None or ts in seen:
+            continue
+        seen.add(ts)
+        rows.append((
+            float(b.get("open", b.get("o", 0)) or 0),
+            float(b.get("high", b.get("h", 0)) or 0),
+            float(b.get("low", b.get("l", 0)) or 0),
+            float(b.get("close", b.get("c", 0)) or 0),
+            float(b.get("volume", b.get("v", 0)) or 0),
+        ))
+    if not rows:
+        return None
+    arr = np.asarray(rows, dtype=np.float64).T
+    keep = (arr[3] > 0) & (arr[0] > 0)
+    arr = arr[:, keep]
+    return arr if arr.shape[1] >= _MIN_BARS else None
+
+
+def ema(x: np.ndarray, span: int) -> np.ndarray:
+    """Row-wise `ewm(span, adjust=False).mean()` for a `(N, W)` array."""
+    alpha = 2.0 / (span + 1.0)
+    out = np.empty_like(x, dtype=np.float64)
+    out[:, 0] = x[:, 0]
+    for t in range(1, x.shape[1]):
+        out[:, t] = alpha * x[:, t] + (1.0 - alpha) * out[:, t - 1]
+    return out
+
+
+@lru_cache(maxsize=64)
+def _layout(n: int, size: int, include_volume: bool):
+    """Pixel geometry shared by every window of length `n`."""
+    pad = max(1, int(round(_PAD_FRAC * size)))
+    left, width = pad, size - 2 * pad
+    if include_volume:
+        p0 = pad
+        p1 = pad + int(round(_PRICE_FRAC * size))
+        v0 = p1 + max(1, int(round(_GAP_FRAC * size)))
+        v1 = size - pad
+    else:
+        p0, p1 = pad, size - pad
+        v0 = v1 = p1
+
+    avg = (n - 1) / float(n)
+    xmin, xmax = -0.45 * avg, (n - 1) + 0.45 * avg
+    if n == 1:
+        xmin, xmax = xmin - 0.75, xmax + 0.75
+    scale = width / (xmax - xmin)
+    centers = left + (np.arange(n) - xmin) * scale
+
+    def spans(w_units: float) -> np.ndarray:
+        """Column → bar index for bars `w_units` wide (-1 where empty)."""
+        owner = np.full(size, -1, dtype=np.int64)
+        half = max(0.5, (w_units * scale + _EDGE_PX) / 2.0)
+        for i, c in enumerate(centers):
+            a = int(np.floor(c - half + 0.5))
+            b = max(a, int(np.ceil(c + half - 0.5)) - 1)
+            owner[max(a, 0):min(b, size - 1) + 1] = i
+        return owner
+
+    cw = float(np.interp(n, _WIDTH_POINTS, _CANDLE_WIDTHS))
+    vw = float(np.interp(n, _WIDTH_POINTS, _VOLUME_WIDTHS))
+    body_owner = spans(cw)
+    volume_owner = spans(vw)
+    volume_edge = np.zeros(size, dtype=bool)
+    if include_volume:
+        inside = volume_owner >= 0
+        shifted_l = np.r_[-2, volume_owner[:-1]]
+        shifted_r = np.r_[volume_owner[1:], -2]
+        volume_edge = inside & ((shifted_l != volume_owner) | (shifted_r != volume_owner))
+    wick_owner = np.full(size, -1, dtype=np.int64)
+    wick_owner[np.clip(np.round(centers).astype(int), 0, size - 1)] = np.arange(n)
+
+    # EMA polyline: every column between the first and last centre, with the
+    # bracketing bar indices and interpolation weight.
+    c0, c1 = int(np.ceil(centers[0])), int(np.floor(centers[-1]))
+    line_cols = np.arange(c0, c1 + 1)
+    seg = np.clip(np.searchsorted(centers, line_cols, side="right") - 1, 0, max(n - 2, 0))
+    nxt = np.minimum(seg + 1, n - 1)
+    denom = np.where(nxt > seg, centers[nxt] - centers[seg], 1.0)
+    frac = np.clip((line_cols - centers[seg]) / denom, 0.0, 1.0)
+
+    line_owner = np.full(size, -1, dtype=np.int64)
+    line_owner[line_cols] = np.arange(line_cols.size)
+
+    return {
+        "price": (p0, p1), "volume": (v0, v1),
+        "body_owner": body_owner, "wick_owner": wick_owner,
+        "volume_owner": volume_owner, "volume_edge": volume_edge,
+        "line_cols": line_cols, "line_owner": line_owner, "line_seg": seg, "line_next": nxt, "line_frac": frac,
+    }
+
+
+def _price_rows(values: np.ndarray, lo: np.ndarray, hi: np.ndarray, p0: int, p1: int) -> np.ndarray:
+    """Map prices to pixel rows with mplfinance's tight-layout y-limits."""
+    rng = hi - lo
+    delta = 0.01 * rng
+    ymin = np.where(lo > 0, np.maximum(0.9 * lo, lo - delta), lo - delta)
+    ymax = hi + delta
+    span = np.where(ymax > ymin, ymax - ymin, np.maximum(np.abs(hi) * 1e-3, 1e-9))
+    ymin = np.where(ymax > ymin, ymin, ymin - span / 2)
+    frac = (values - ymin[:, None]) / span[:, None]
+    return np.clip(np.round((p1 - 1) - frac * (p1 - 1 - p0)), p0, p1 - 1).astype(np.int32)
+
+
+def _paint_runs(band, r0, owner, top, bottom, value) -> None:
+    """Fill rows `top..bottom` of each owned column of a palette band.
+
+    `band` is `(N, R, S)` palette indices for image rows `r0..r0+R`;
+    `owner` maps column → bar index (-1 = not drawn); `top`/`bottom` are
+    `(N, W)` image rows per bar; `value` is a palette index or an `(N, W)`
+    array of per-bar indices.
+    """
+    owned = owner >= 0
+    if not owned.any():
+        return
+    idx = np.where(owned, owner, 0)
+    t = np.where(owned[None, :], top[:, idx] - r0, band.shape[1])[:, None, :]
+    b = (bottom[:, idx] - r0)[:, None, :]
+    rows = np.arange(band.shape[1], dtype=np.int32)[None, :, None]
+    mask = (rows >= t) & (rows <= b)
+    if np.isscalar(value):
+        band[mask] = value
+    else:
+        np.copyto(band, value[:, idx][:, None, :], where=mask)
+
+
+def _render_chunk(o, h, l, c, v, size, include_volume, include_emas) -> np.ndarray:
+    n_win, n = c.shape
+    lay = _layout(n, size, include_volume)
+    canvas = np.zeros((n_win, size, size), dtype=np.uint8)  # palette indices, 0 = background
+    colour = np.where(c >= o, _UP, _DOWN).astype(np.uint8)
+
+    if include_volume:
+        v0, v1 = lay["volume"]
+        band = canvas[:, v0:v1]
+        vmin = 0.3 * np.nanmin(v, axis=1)
+        vmax = 1.1 * np.nanmax(v, axis=1)
+        vspan = np.where(vmax > vmin, vmax - vmin, 1.0)
+        vfrac = np.clip((v - vmin[:, None]) / vspan[:, None], 0.0, 1.0)
+        vtop = np.round((v1 - 1) - vfrac * (v1 - 1 - v0)).astype(np.int32)
+        vbot = np.full_like(vtop, v1 - 1)
+        owner = lay["volume_owner"]
+        _paint_runs(band, v0, owner, vtop, vbot, colour)
+        _paint_runs(band, v0, np.where(lay["volume_edge"], owner, -1), vtop, vbot, _EDGE)
+        cols = np.nonzero(owner >= 0)[0]
+        band[np.arange(n_win)[:, None], vtop[:, owner[cols]] - v0, cols[None, :]] = _EDGE
+
+    p0, p1 = lay["price"]
+    band = canvas[:, p0:p1]
+    lo, hi = np.nanmin(l, axis=1), np.nanmax(h, axis=1)
+    r_open = _price_rows(o, lo, hi, p0, p1)
+    r_close = _price_rows(c, lo, hi, p0, p1)
+    _paint_runs(band, p0, lay["wick_owner"],
+                _price_rows(h, lo, hi, p0, p1), _price_rows(l, lo, hi, p0, p1), colour)
+    _paint_runs(band, p0, lay["body_owner"],
+                np.minimum(r_open, r_close), np.maximum(r_open, r_close), colour)
+
+    if include_emas and n >= _EMA_MIN_BARS and lay["line_cols"].size > 1:
+        seg, nxt, frac = lay["line_seg"], lay["line_next"], lay["line_frac"]
+        for k, (span, _) in enumerate(EMA_COLORS):
+            e = _price_rows(ema(c, span), lo, hi, p0, p1).astype(np.float64)
+            y = e[:, seg] * (1.0 - frac) + e[:, nxt] * frac
+            y_next = np.concatenate([y[:, 1:], y[:, -1:]], axis=1)
+            _paint_runs(band, p0, lay["line_owner"],
+                        np.round(np.minimum(y, y_next)).astype(np.int32),
+                        np.round(np.maximum(y, y_next)).astype(np.int32), _EMA0 + k)
+    return _PALETTE[canvas]
+
+
+def rasterize_windows(
+    ohlcv: np.ndarray,
+    image_size: int = CNN_IMAGE_SIZE,
+    include_volume: bool = True,
+    include_emas: bool = True,
+) -> np.ndarray:
+    """Render a batch of equal-length windows.
+
+    Args:
+        ohlcv: `(N, 5, W)` open/high/low/close/volume (see `ohlcv_arrays`).
+
+    Returns:
+        `(N, image_size, image_size, 3)` uint8 RGB images.
+    """
+    ohlcv = np.asarray(ohlcv, dtype=np.float64)
+    if ohlcv.ndim == 2:
+        ohlcv = ohlcv[None]
+    n_win = ohlcv.shape[0]
+    out = np.empty((n_win, image_size, image_size, 3), dtype=np.uint8)
+    step = _chunk_size()
+    for s in range(0, n_win, step):
+        o, h, l, c, v = (ohlcv[s:s + step, k] for k in range(5))
+        out[s:s + step] = _render_chunk(o, h, l, c, v, image_size, include_volume, include_emas)
+    return out
+
+
+def rasterize_bars(bars: List[Dict], image_size: int = CNN_IMAGE_SIZE) -> Optional[np.ndarray]:
+    """One window of Mongo bars → `(S, S, 3)` uint8 image, or None."""
+    arr = ohlcv_arrays(bars)
+    if arr is None:
+        return None
+    return rasterize_windows(arr[None], image_size)[0]
+
+
+def images_to_tensor(images: np.ndarray):
+    """`(N, S, S, 3)` or `(S, S, 3)` uint8 → normalised float tensor, CHW.
+
+    Equivalent to `get_image_transform()` (ToTensor + ImageNet Normalize)
+    for images already at CNN_IMAGE_SIZE.
+    """
+    import torch
+    x = np.asarray(images, dtype=np.float32) / 255.0
+    x = (x - IMAGENET_MEAN) / IMAGENET_STD
+    x = np.ascontiguousarray(np.moveaxis(x, -1, -3))
+    return torch.from_numpy(x)
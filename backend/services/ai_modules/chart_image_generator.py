@@ -4,12 +4,21 @@ for CNN training and inference.
 
 Uses mplfinance to generate consistent 224x224 dark-theme candlestick charts
 with volume bars and moving average overlays.
+
+Training-set generation goes through the NumPy rasterizer in `candle_raster`
+by default (same layout, no PNG round-trip). Set CNN_CHART_RENDERER=mplfinance
+to use the PNG path instead. Live tensors are drawn with the renderer the
+model was trained on (its `chart_renderer` metadata); models saved before the
+rasterizer have none and keep getting mplfinance charts.
 """
 import io
 import logging
+import os
 from typing import Dict, List, Optional
 from datetime import datetime
 
+import numpy as np
+
 import pandas as pd
 import matplotlib
 matplotlib.use('Agg')
@@ -49,6 +58,60 @@ CHART_STYLE = mpf.make_mpf_style(
 CNN_IMAGE_SIZE = 224
 
 
+RENDERER_NUMPY = "numpy"
+RENDERER_MPLFINANCE = "mplfinance"
+
+
+def training_renderer() -> str:
+    """Renderer for new training sets (CNN_CHART_RENDERER, default numpy)."""
+    val = os.environ.get("CNN_CHART_RENDERER", RENDERER_NUMPY).strip().lower()
+    return RENDERER_MPLFINANCE if val == RENDERER_MPLFINANCE else RENDERER_NUMPY
+
+
+def sample_renderer(sample: Dict) -> str:
+    """Renderer that produced a training sample (raster array vs PNG bytes)."""
+    return RENDERER_NUMPY if sample.get("image") is not None else RENDERER_MPLFINANCE
+
+
+def _use_raster(renderer: Optional[str] = None) -> bool:
+    return (renderer or training_renderer()) == RENDERER_NUMPY
+
+
+def _render_windows_raster(all_bars: List[Dict], starts: List[int], window_size: int) -> List[Optional[np.ndarray]]:
+    """Rasterize `all_bars[i:i+window_size]` for each start in one batch.
+
+    Windows whose bars are all clean (timestamp present and unique, positive
+    open/close) are cut from one OHLCV matrix and rendered together; any
+    other window goes through `ohlcv_arrays` so it is filtered exactly like
+    `bars_to_dataframe` would.
+    """
+    from services.ai_modules.candle_raster import ohlcv_arrays, rasterize_windows
+
+    images: List[Optional[np.ndarray]] = [None] * len(starts)
+    if not starts:
+        return images
+    ohlcv = np.array([[float(b.get(k, 0) or 0) for k in ("open", "high", "low", "close", "volume")]
+                      for b in all_bars], dtype=np.float64).T
+    dates = [b.get("date") for b in all_bars]
+    clean = (ohlcv[0] > 0) & (ohlcv[3] > 0) & np.array([d is not None for d in dates])
+    clean[1:] &= np.array([a != b for a, b in zip(dates[:-1], dates[1:])], dtype=bool)
+    bad_prefix = np.concatenate([[0], np.cumsum(~clean)])
+
+    fast, slow = [], []
+    for k, i in enumerate(starts):
+        (fast if bad_prefix[i + window_size] == bad_prefix[i] else slow).append(k)
+    if fast:
+        windows = np.lib.stride_tricks.sliding_window_view(ohlcv, window_size, axis=1)
+        batch = windows[:, [starts[k] for k in fast]].transpose(1, 0, 2)
+        for k, img in zip(fast, rasterize_windows(batch, CNN_IMAGE_SIZE)):
+            images[k] = img
+    for k in slow:
+        arr = ohlcv_arrays(all_bars[starts[k]: starts[k] + window_size])
+        if arr is not None:
+            images[k] = rasterize_windows(arr[None], CNN_IMAGE_SIZE)[0]
+    return images
+
+
 def bars_to_dataframe(bars: List[Dict], bar_size: str = "1 day") -> Optional[pd.DataFrame]:
     """
     Convert IB historical bars (from MongoDB) to mplfinance-compatible DataFrame.
@@ -181,7 +244,8 @@ def generate_training_images_from_bars(
       1. Generates a candlestick chart image for the window
       2. Labels the pattern using setup_pattern_detector
       3. Computes forward return for WIN/LOSS label
-      4. Returns list of {image_bytes, label, win, forward_return, symbol, bar_size}
+      4. Returns list of {image (uint8 HxWx3) or image_bytes (PNG), label, win,
+         forward_return, symbol, bar_size}
 
     Args:
         db: MongoDB database
@@ -225,6 +289,7 @@ def generate_training_images_from_bars(
     symbols = [doc["_id"] for doc in bars_col.aggregate(pipeline)]
     logger.info(f"CNN image generation: {len(symbols)} symbols for {setup_type}/{bar_size} (window={window_size})")
 
+    raster = _use_raster()
     training_samples = []
     for sym_idx, symbol in enumerate(symbols):
         if sym_idx % 10 == 0:
@@ -262,6 +327,7 @@ def generate_training_images_from_bars(
             step = max(total_possible // max_windows_per_symbol, base_step)
         else:
             step = base_step
+        pending = []
         for i in range(0, len(all_bars) - window_size - forecast_horizon, step):
             window_bars = all_bars[i: i + window_size]
             future_bars = all_bars[i + window_size: i + window_size + forecast_horizon]
@@ -295,6 +361,21 @@ def generate_training_images_from_bars(
             else:
                 outcome = "SCRATCH"
 
+            sample = {
+                "setup_type": setup_type,
+                "bar_size": bar_size,
+                "outcome": outcome,
+                "forward_return": round(forward_return, 6),
+                "symbol": symbol,
+                "window_start": str(window_bars[0].get("date", "")),
+                "window_end": str(window_bars[-1].get("date", "")),
+                "entry_price": entry_price,
+            }
+            if raster:
+                # Rendered below in one batch per symbol.
+                pending.append((i, sample))
+                continue
+
             # Generate chart image
             df = bars_to_dataframe(window_bars, bar_size)
             if df is None:
@@ -304,17 +385,15 @@ def generate_training_images_from_bars(
             if image_bytes is None:
                 continue
 
-            training_samples.append({
-                "image_bytes": image_bytes,
-                "setup_type": setup_type,
-                "bar_size": bar_size,
-                "outcome": outcome,
-                "forward_return": round(forward_return, 6),
-                "symbol": symbol,
-                "window_start": str(window_bars[0].get("date", "")),
-                "window_end": str(window_bars[-1].get("date", "")),
-                "entry_price": entry_price,
-            })
+            sample["image_bytes"] = image_bytes
+            training_samples.append(sample)
+
+        if pending:
+            images = _render_windows_raster(all_bars, [i for i, _ in pending], window_size)
+            for (_, sample), image in zip(pending, images):
+                if image is not None:
+                    sample["image"] = image
+                    training_samples.append(sample)
 
     logger.info(f"CNN image generation complete: {len(training_samples)} samples for {setup_type}/{bar_size}")
     win_count = sum(1 for s in training_samples if s["outcome"] == "WIN")
@@ -325,6 +404,14 @@ def generate_training_images_from_bars(
     return training_samples
 
 
+def sample_to_tensor(sample: Dict):
+    """Preprocessed tensor for a training sample (raster array or PNG bytes)."""
+    if sample.get("image") is not None:
+        from services.ai_modules.candle_raster import images_to_tensor
+        return images_to_tensor(sample["image"])
+    return image_bytes_to_tensor(sample["image_bytes"])
+
+
 def image_bytes_to_tensor(image_bytes: bytes):
     """Convert PNG bytes to a preprocessed PyTorch tensor for CNN input."""
     from PIL import Image
@@ -335,11 +422,16 @@ def image_bytes_to_tensor(image_bytes: bytes):
     return transform(img)
 
 
-def generate_live_chart_tensor(db, symbol: str, bar_size: str, window_size: int = 50):
+def generate_live_chart_tensor(db, symbol: str, bar_size: str, window_size: int = 50,
+                               renderer: Optional[str] = None):
     """
     Generate a chart image tensor for live inference.
     Pulls the most recent `window_size` bars for the symbol.
 
+    `renderer` is the model's `chart_renderer` metadata, so inference sees
+    the same kind of chart the model was trained on. None (models saved
+    before the rasterizer) means mplfinance.
+
     Returns:
         (tensor, metadata) or (None, None) if insufficient data
     """
@@ -357,20 +449,29 @@ def generate_live_chart_tensor(db, symbol: str, bar_size: str, window_size: int
     # Reverse to chronological order
     bars.reverse()
 
-    df = bars_to_dataframe(bars, bar_size)
-    if df is None:
-        return None, None
+    renderer = renderer or RENDERER_MPLFINANCE
+    if _use_raster(renderer):
+        from services.ai_modules.candle_raster import images_to_tensor, rasterize_bars
+        image = rasterize_bars(bars, CNN_IMAGE_SIZE)
+        if image is None:
+            return None, None
+        tensor = images_to_tensor(image)
+    else:
+        df = bars_to_dataframe(bars, bar_size)
+        if df is None:
+            return None, None
 
-    image_bytes = generate_chart_image(df, CNN_IMAGE_SIZE)
-    if image_bytes is None:
-        return None, None
+        image_bytes = generate_chart_image(df, CNN_IMAGE_SIZE)
+        if image_bytes is None:
+            return None, None
 
-    tensor = image_bytes_to_tensor(image_bytes)
+        tensor = image_bytes_to_tensor(image_bytes)
 
     metadata = {
         "symbol": symbol,
         "bar_size": bar_size,
         "window_size": len(bars),
         "latest_bar": str(bars[-1].get("date", "")),
+        "renderer": renderer,
     }
     return tensor, metadata
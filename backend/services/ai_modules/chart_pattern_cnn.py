@@ -156,8 +156,12 @@ def build_cnn_model(num_classes: int = None):
 
 
 # ── Model Persistence (MongoDB) ─────────────────────────────────
-def save_model_to_db(db, model, setup_type: str, bar_size: str, metrics: Dict):
-    """Save trained CNN model weights and metadata to MongoDB using GridFS for large models."""
+def save_model_to_db(db, model, setup_type: str, bar_size: str, metrics: Dict,
+                     chart_renderer: str = "mplfinance"):
+    """Save trained CNN model weights and metadata to MongoDB using GridFS for large models.
+
+    `chart_renderer` records which chart renderer produced the training
+    images; live inference draws its charts the same way."""
     import torch
     import io
     import gridfs
@@ -190,6 +194,7 @@ def save_model_to_db(db, model, setup_type: str, bar_size: str, metrics: Dict):
         "num_classes": len(SETUP_CLASSES),
         "image_size": CNN_IMAGE_SIZE,
         "window_size": CNN_WINDOW_SIZES.get(setup_type, DEFAULT_WINDOW_SIZE),
+        "chart_renderer": chart_renderer,
         "gpu_info": get_gpu_info(),
         "trained_at": datetime.now(timezone.utc).isoformat(),
     }
@@ -241,6 +246,8 @@ def load_model_from_db(db, setup_type: str, bar_size: str):
         "metrics": doc.get("metrics", {}),
         "trained_at": doc.get("trained_at"),
         "window_size": doc.get("window_size", DEFAULT_WINDOW_SIZE),
+        # Models saved before the NumPy rasterizer were trained on mplfinance PNGs.
+        "chart_renderer": doc.get("chart_renderer", "mplfinance"),
     }
     return model, metadata
 
@@ -207,18 +207,20 @@ def _train_single_model(
         build_cnn_model, save_model_to_db, load_model_from_db,
         CLASS_TO_IDX
     )
-    from services.ai_modules.chart_image_generator import image_bytes_to_tensor
+    from services.ai_modules.chart_image_generator import sample_renderer, sample_to_tensor
 
-    # Build tensors from image bytes
+    # Build tensors from rasterized images (or PNG bytes)
     images = []
+    renderers = set()
     pattern_labels = []
     win_labels = []
     symbols_per_sample = []  # Track symbol for group-based train/val/test split
 
     for s in samples:
         try:
-            tensor = image_bytes_to_tensor(s["image_bytes"])
+            tensor = sample_to_tensor(s)
             images.append(tensor)
+            renderers.add(sample_renderer(s))
             pattern_labels.append(CLASS_TO_IDX.get(s["setup_type"], CLASS_TO_IDX["UNKNOWN"]))
             win_labels.append(1.0 if s["outcome"] == "WIN" else 0.0)
             symbols_per_sample.append(s.get("symbol", "UNKNOWN"))
@@ -482,7 +484,10 @@ def _train_single_model(
         existing_auc = (existing_meta.get("metrics", {}) or {}).get("win_auc", 0) if existing_meta else 0
 
         if win_auc >= existing_auc:
-            model_name = save_model_to_db(db, model, setup_type, bar_size, metrics)
+            # One generator call → one renderer; record it so live charts match.
+            chart_renderer = renderers.pop() if len(renderers) == 1 else "mplfinance"
+            model_name = save_model_to_db(db, model, setup_type, bar_size, metrics,
+                                          chart_renderer=chart_renderer)
             metrics["saved"] = True
             metrics["model_name"] = model_name
             if existing_auc > 0:
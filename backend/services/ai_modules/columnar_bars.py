@@ -0,0 +1,190 @@
+"""
+Columnar Bar Cache
+==================
+On-disk / in-memory columnar form of the OHLCV bar lists the training
+pipeline caches on NVMe between phases.
+
+Why?
+    The NVMe bar cache used to pickle each symbol's `List[Dict]`, so every
+    phase of `run_training_pipeline` re-unpickled millions of small dicts
+    (multi-GB of transient RSS on a full-universe run) just to turn them
+    back into NumPy columns.
+
+How
+    A symbol is stored as two `.npy` files next to each other:
+        <prefix>.ohlcv.npy   float64 (5, n)  rows = open, high, low, close, volume
+        <prefix>.dates.npy   fixed-width unicode (n,)
+    `load()` memory-maps both and returns a `ColumnarBars`, a read-only
+    sequence that still behaves like the old list of dicts (`len`, index,
+    slice, iterate → dict per bar) so untouched phases keep working, while
+    hot paths read whole columns zero-copy via `bar_column()`.
+
+    Pickling a file-backed `ColumnarBars` (e.g. into a ProcessPoolExecutor
+    worker) ships only the paths and slice bounds; the worker re-maps the
+    same page-cache pages instead of receiving a serialized bar list.
+
+    Only "plain" bar lists (exactly date + OHLCV, numeric prices, string
+    dates) are stored columnar; `save()` returns False for anything else
+    and the caller keeps its pickle fallback, so odd rows round-trip
+    exactly as before.
+"""
+
+from __future__ import annotations
+
+import os
+from collections.abc import Sequence
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+BAR_FIELDS = ("open", "high", "low", "close", "volume")
+_FIELD_ROW = {f: i for i, f in enumerate(BAR_FIELDS)}
+_KEYS = frozenset(("date",) + BAR_FIELDS)
+_MISSING = object()
+
+
+def _paths(prefix: str) -> Tuple[str, str]:
+    return f"{prefix}.ohlcv.npy", f"{prefix}.dates.npy"
+
+
+class ColumnarBars(Sequence):
+    """Read-only bar list over a (5, n) OHLCV matrix and a date array."""
+
+    __slots__ = ("_matrix", "_dates", "_start", "_stop", "_prefix")
+
+    def __init__(self, matrix: np.ndarray, dates: np.ndarray, start: int = 0,
+                 stop: Optional[int] = None, prefix: Optional[str] = None) -> None:
+        self._matrix = matrix
+        self._dates = dates
+        self._start = start
+        self._stop = matrix.shape[1] if stop is None else stop
+        self._prefix = prefix
+
+    # ---------- sequence protocol ----------------------------------------
+    def __len__(self) -> int:
+        return self._stop - self._start
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            lo, hi, step = i.indices(len(self))
+            if step != 1:
+                return [self[j] for j in range(lo, hi, step)]
+            hi = max(lo, hi)
+            return ColumnarBars(self._matrix, self._dates, self._start + lo,
+                                self._start + hi, self._prefix)
+        n = len(self)
+        if i < 0:
+            i += n
+        if not 0 <= i < n:
+            raise IndexError("bar index out of range")
+        j = self._start + i
+        bar = {"date": str(self._dates[j])}
+        for f, v in zip(BAR_FIELDS, self._matrix[:, j].tolist()):
+            bar[f] = v
+        return bar
+
+    def __iter__(self):
+        dates = self._dates[self._start:self._stop].tolist()
+        rows = self._matrix[:, self._start:self._stop].T.tolist()
+        for d, row in zip(dates, rows):
+            bar = {"date": d}
+            bar.update(zip(BAR_FIELDS, row))
+            yield bar
+
+    def __repr__(self) -> str:
+        return f"ColumnarBars(n={len(self)}, prefix={self._prefix!r})"
+
+    # ---------- columnar access ------------------------------------------
+    def column(self, name: str) -> np.ndarray:
+        """Read-only float64 view of one OHLCV column."""
+        return self._matrix[_FIELD_ROW[name], self._start:self._stop]
+
+    def dates(self) -> np.ndarray:
+        return self._dates[self._start:self._stop]
+
+    def to_list(self) -> List[Dict]:
+        return list(self)
+
+    # ---------- pickling --------------------------------------------------
+    def __reduce__(self):
+        if self._prefix is not None:
+            return (_reopen, (self._prefix, self._start, self._stop))
+        s = slice(self._start, self._stop)
+        return (ColumnarBars, (np.array(self._matrix[:, s]), np.array(self._dates[s])))
+
+
+def _reopen(prefix: str, start: int, stop: int) -> "ColumnarBars":
+    bars = load(prefix)
+    if bars is None:
+        raise FileNotFoundError(f"columnar bar cache vanished: {prefix}")
+    return bars[start:stop]
+
+
+def from_bars(bars: List[Dict]) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+    """`(matrix, dates)` for a plain bar list, or None if it isn't one."""
+    if not bars:
+        return None
+    dates = []
+    rows = []
+    for b in bars:
+        if b.keys() != _KEYS:
+            return None
+        d = b["date"]
+        if not isinstance(d, str):
+            return None
+        dates.append(d)
+        row = [b["open"], b["high"], b["low"], b["close"], b["volume"]]
+        if None in row:
+            return None  # float64 would silently turn it into NaN
+        rows.append(row)
+    try:
+        matrix = np.array(rows, dtype=np.float64).T.copy()
+    except (TypeError, ValueError):
+        return None  # non-numeric prices: keep the pickle path
+    return matrix, np.array(dates)
+
+
+def save(prefix: str, bars: List[Dict]) -> bool:
+    """Write `bars` columnar at `prefix`. Returns False if not representable.
+
+    The dates file is written first and the OHLCV file last (each via a
+    temp file + rename), so an `.ohlcv.npy` on disk is always complete."""
+    packed = from_bars(bars)
+    if packed is None:
+        return False
+    matrix, dates = packed
+    ohlcv_path, dates_path = _paths(prefix)
+    for path, arr in ((dates_path, dates), (ohlcv_path, matrix)):
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            np.save(f, arr)
+        os.replace(tmp, path)
+    return True
+
+
+def load(prefix: str) -> Optional[ColumnarBars]:
+    """Memory-map a cached symbol; None on miss or unreadable files."""
+    ohlcv_path, dates_path = _paths(prefix)
+    if not os.path.exists(ohlcv_path):
+        return None
+    try:
+        matrix = np.load(ohlcv_path, mmap_mode="r")
+        dates = np.load(dates_path, mmap_mode="r")
+    except (OSError, ValueError):
+        return None
+    if matrix.ndim != 2 or matrix.shape != (len(BAR_FIELDS), len(dates)):
+        return None
+    return ColumnarBars(matrix, dates, prefix=prefix)
+
+
+def bar_column(bars, name: str, dtype=np.float64, default=_MISSING) -> np.ndarray:
+    """One OHLCV column of `bars` as an array.
+
+    Zero-copy slice for `ColumnarBars` (plus a dtype cast when needed);
+    otherwise the usual comprehension — `b[name]` when no default is given
+    (so a missing key still raises), `b.get(name, default)` when it is."""
+    if isinstance(bars, ColumnarBars):
+        return np.asarray(bars.column(name), dtype=dtype)
+    if default is _MISSING:
+        return np.array([b[name] for b in bars], dtype=dtype)
+    return np.array([b.get(name, default) for b in bars], dtype=dtype)
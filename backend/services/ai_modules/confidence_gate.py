@@ -54,6 +54,55 @@ MAX_DECISION_LOG = 200
 # specialized models produce a better edge than the generic ones. Disable with
 # PWIRE_SHADOW=0.
 PWIRE_SHADOW_ENABLED = os.environ.get("PWIRE_SHADOW", "1") not in ("0", "false", "False")
+# Shadows are computed AFTER the gate decision (background task that patches
+# the persisted confidence_gate_log row) so they never add decision latency.
+# PWIRE_SHADOW_DEFERRED=0 computes them inline before the decision (legacy).
+PWIRE_SHADOW_DEFERRED = os.environ.get("PWIRE_SHADOW_DEFERRED", "1") not in ("0", "false", "False")
+
+# Fields the live-prediction / shadow feature paths actually read.
+RECENT_BAR_PROJECTION = {
+    "_id": 0, "bar_size": 1, "date": 1, "timestamp": 1,
+    "open": 1, "high": 1, "low": 1, "close": 1, "volume": 1,
+}
+
+
+def fetch_recent_bars_multi(db, symbol: str, bar_sizes: List[str], limit: int = 200) -> Dict[str, List[Dict]]:
+    """Newest `limit` bars of `symbol` for each bar size in ONE round trip.
+
+    One index-backed `$match/$sort/$limit` branch per bar size, chained with
+    `$unionWith` (a `$facet` would run every branch over the union of all
+    sizes' bars, unindexed). Falls back to one `find` per bar size where
+    `$unionWith` is unavailable (MongoDB < 4.4, test fakes). Returns
+    chronological (oldest first) lists keyed by bar size."""
+    col = db["ib_historical_data"]
+
+    def _branch(bar_size):
+        return [
+            {"$match": {"symbol": symbol, "bar_size": bar_size}},
+            {"$sort": {"date": -1}},
+            {"$limit": limit},
+            {"$project": RECENT_BAR_PROJECTION},
+        ]
+
+    out: Dict[str, List[Dict]] = {bs: [] for bs in bar_sizes}
+    try:
+        pipeline = _branch(bar_sizes[0])
+        for bs in bar_sizes[1:]:
+            pipeline.append({"$unionWith": {"coll": col.name, "pipeline": _branch(bs)}})
+        for row in col.aggregate(pipeline):
+            bucket = out.get(row.pop("bar_size", None))
+            if bucket is not None:
+                bucket.append(row)
+    except Exception:
+        for bs in bar_sizes:
+            out[bs] = list(col.find(
+                {"symbol": symbol, "bar_size": bs}, RECENT_BAR_PROJECTION
+            ).sort("date", -1).limit(limit))
+            for row in out[bs]:
+                row.pop("bar_size", None)
+    for rows in out.values():
+        rows.reverse()
+    return out
 
 # T6: position multiplier applied when an ACTIVE regime suppression soft-benches a
 # setup (data-driven per-setup×regime expectancy gate). Kept in sync with
@@ -190,6 +239,7 @@ class ConfidenceGate:
         self._regime_expectancy = None  # Loaded from setup_regime_expectancy (T6)
         self._regime_suppression_mode = "shadow"  # 'shadow' | 'active' (T6)
         self._finbert_scorer = None  # Lazy-init on first Layer 13 call
+        self._background_tasks: set = set()  # deferred P-WIRE shadow attachers
         self._stats = {
             "total_evaluated": 0,
             "go_count": 0,
@@ -429,7 +479,8 @@ class ConfidenceGate:
                 lambda: self._query_model_consensus(symbol, setup_type, direction),
                 NO_MODELS, "model_consensus"),
             _safe(
-                lambda: self._get_live_prediction(symbol, setup_type, direction),
+                lambda: self._get_live_prediction(
+                    symbol, setup_type, direction, defer_shadows=PWIRE_SHADOW_DEFERRED),
                 NO_PRED, "live_prediction"),
             _safe(
                 lambda: self._get_learning_feedback(setup_type, regime_state),
@@ -603,6 +654,8 @@ class ConfidenceGate:
 
         # --- 2b. LIVE MODEL PREDICTION (max +15 / floor -5, weighted by accuracy) ---
         live_prediction = signals_pre["live_prediction"]
+        # Deferred P-WIRE shadows: attached to the decision after it's logged.
+        shadow_job = live_prediction.pop("_shadow_job", None)
         if live_prediction.get("has_prediction"):
             pred_direction = live_prediction["direction"]
             pred_confidence = live_prediction["confidence"]
@@ -1155,12 +1208,59 @@ class ConfidenceGate:
                 
                 # Force JSON round-trip to convert numpy/non-standard types
                 clean = json.loads(json.dumps(log_data, default=str))
-                self._db["confidence_gate_log"].insert_one(clean)
+                # Pooled Motor write (awaited, so the deferred-shadow update
+                # below can't race ahead of the insert); worker-thread
+                # fallback off the main loop / without the repo.
+                from services.async_mongo import call as _mongo_call
+                await _mongo_call(self._db, "confidence_gate_log", "insert_one", clean)
             except Exception as e:
                 logger.warning(f"Failed to persist confidence gate log: {e}")
 
+        if shadow_job is not None:
+            self._attach_deferred_shadows(result, shadow_job)
+
         return result
 
+    def _attach_deferred_shadows(self, decision: Dict[str, Any], shadow_job) -> None:
+        """Fold P-WIRE shadows computed after the decision into it: the
+        in-memory decision log entry and the persisted confidence_gate_log row
+        (`live_prediction.regime_shadow[s]`, same paths as inline shadows)."""
+        async def _attach():
+            try:
+                shadow, shadows = await shadow_job
+            except Exception as e:
+                logger.debug(f"Deferred regime shadow failed: {e}")
+                return
+            live = decision.get("live_prediction")
+            if live is None or (shadow is None and not shadows):
+                return
+            update = {}
+            if shadow is not None:
+                live["regime_shadow"] = shadow
+                update["live_prediction.regime_shadow"] = shadow
+            if shadows:
+                live["regime_shadows"] = shadows
+                update["live_prediction.regime_shadows"] = shadows
+            if self._db is None:
+                return
+            try:
+                import json
+                clean = json.loads(json.dumps(update, default=str))
+                from services.async_mongo import call as _mongo_call
+                await _mongo_call(
+                    self._db, "confidence_gate_log", "update_one",
+                    {"decision_id": decision["decision_id"]}, {"$set": clean},
+                )
+            except Exception as e:
+                logger.debug(f"Failed to persist deferred regime shadow: {e}")
+
+        tasks = getattr(self, "_background_tasks", None)
+        if tasks is None:
+            tasks = self._background_tasks = set()
+        task = asyncio.ensure_future(_attach())
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+
     async def _get_ai_regime(self) -> str:
         """Get AI regime classification from DB data."""
         if self._db is None:
@@ -1430,7 +1530,8 @@ class ConfidenceGate:
             return result
 
 
-    async def _get_live_prediction(self, symbol: str, setup_type: str, direction: str) -> Dict[str, Any]:
+    async def _get_live_prediction(self, symbol: str, setup_type: str, direction: str,
+                                   defer_shadows: bool = False) -> Dict[str, Any]:
         """
         Run predict_for_setup() to get the model's real-time prediction for this symbol.
         
@@ -1442,8 +1543,12 @@ class ConfidenceGate:
         - Model disagrees → confidence penalty + size reduction
         - Model says flat → slight penalty (no edge detected)
         
-        Runs in a thread pool since predict_for_setup() does synchronous DB queries
-        for regime features.
+        All bar sizes (primary, daily fallback, multi-TF shadows) come from one
+        `fetch_recent_bars_multi` round trip in the thread pool; the inference
+        goes through predict_for_setup_coalesced() so a burst of gate
+        evaluations shares one batched model call. With `defer_shadows` the
+        P-WIRE shadows are not awaited: the pending job rides in
+        `result["_shadow_job"]` for evaluate() to attach after the decision.
         """
         result = {"has_prediction": False}
         
@@ -1462,30 +1567,24 @@ class ConfidenceGate:
             # across bar sizes. Reversible via PWIRE_MULTI_TF_SHADOW=0.
             _multi_tf = _os.environ.get("PWIRE_MULTI_TF_SHADOW", "1") not in ("0", "false", "False")
             _shadow_tfs = ["1 min", "5 mins", "15 mins"]
-            def _fetch_and_predict():
+            _wanted = ["5 mins", "1 day"]
+            if PWIRE_SHADOW_ENABLED and _multi_tf:
+                _wanted += [tf for tf in _shadow_tfs if tf not in _wanted]
+
+            def _fetch_bars():
+                by_size = fetch_recent_bars_multi(ts_ai._db, symbol, _wanted)
+                bar_size_used = "5 mins"
+                bars = by_size["5 mins"]
+                if len(bars) < 50:
+                    # Try daily bars as fallback
+                    bar_size_used = "1 day"
+                    bars = by_size["1 day"]
+                if len(bars) < 50:
+                    return None, None, by_size
+                return bars, bar_size_used, by_size
+
+            def _shadows_for(bars, bar_size_used, by_size, prediction):
                 try:
-                    bar_size_used = "5 mins"
-                    bars = list(ts_ai._db["ib_historical_data"].find(
-                        {"symbol": symbol, "bar_size": "5 mins"},
-                        {"_id": 0}
-                    ).sort("date", -1).limit(200))
-                    
-                    if len(bars) < 50:
-                        # Try daily bars as fallback
-                        bar_size_used = "1 day"
-                        bars = list(ts_ai._db["ib_historical_data"].find(
-                            {"symbol": symbol, "bar_size": "1 day"},
-                            {"_id": 0}
-                        ).sort("date", -1).limit(200))
-                    
-                    if len(bars) < 50:
-                        return None, None, []
-                    
-                    # Reverse to chronological order (oldest first)
-                    bars.reverse()
-                    
-                    # Call predict_for_setup — this is the core ML inference
-                    prediction = ts_ai.predict_for_setup(symbol, bars, setup_type)
                     # v19.34.313 P-WIRE shadow mode (read-only, never affects execution)
                     shadow = self._compute_regime_shadow(
                         ts_ai, symbol, setup_type, bars, bar_size_used, prediction
@@ -1500,13 +1599,9 @@ class ConfidenceGate:
                             if _tf == bar_size_used:
                                 continue  # primary already computed above
                             try:
-                                _tb = list(ts_ai._db["ib_historical_data"].find(
-                                    {"symbol": symbol, "bar_size": _tf},
-                                    {"_id": 0}
-                                ).sort("date", -1).limit(200))
+                                _tb = by_size.get(_tf) or []
                                 if len(_tb) < 50:
                                     continue
-                                _tb.reverse()
                                 _sh = self._compute_regime_shadow(
                                     ts_ai, symbol, setup_type, _tb, _tf, prediction
                                 )
@@ -1514,17 +1609,41 @@ class ConfidenceGate:
                                     shadows.append(_sh)
                             except Exception:
                                 continue
-                    return prediction, shadow, shadows
+                    return shadow, shadows
                 except Exception as e:
-                    logger.debug(f"Live prediction fetch/predict failed for {symbol}: {e}")
-                    return None, None, []
+                    logger.debug(f"Regime shadow failed for {symbol}: {e}")
+                    return None, []
             
-            # Run in thread pool to avoid blocking event loop
+            # Run DB work in thread pool to avoid blocking event loop
             loop = asyncio.get_event_loop()
-            prediction, shadow, shadows = await loop.run_in_executor(None, _fetch_and_predict)
+            try:
+                bars, bar_size_used, by_size = await loop.run_in_executor(None, _fetch_bars)
+                if bars is None:
+                    return result
+                # Call predict_for_setup — this is the core ML inference.
+                # Concurrent gate evaluations are coalesced into one batched
+                # model call (services/ai_modules/prediction_batcher.py).
+                if hasattr(ts_ai, "predict_for_setup_coalesced"):
+                    prediction = await ts_ai.predict_for_setup_coalesced(symbol, bars, setup_type)
+                else:
+                    prediction = await loop.run_in_executor(
+                        None, ts_ai.predict_for_setup, symbol, bars, setup_type
+                    )
+            except Exception as e:
+                logger.debug(f"Live prediction fetch/predict failed for {symbol}: {e}")
+                return result
             
             if prediction is None:
                 return result
+            shadow, shadows = None, []
+            if PWIRE_SHADOW_ENABLED and defer_shadows:
+                result["_shadow_job"] = loop.run_in_executor(
+                    None, _shadows_for, bars, bar_size_used, by_size, prediction
+                )
+            elif PWIRE_SHADOW_ENABLED:
+                shadow, shadows = await loop.run_in_executor(
+                    None, _shadows_for, bars, bar_size_used, by_size, prediction
+                )
             
             result["has_prediction"] = True
             if shadow is not None:
@@ -1668,7 +1787,8 @@ class ConfidenceGate:
 
                     window_size = CNN_WINDOW_SIZES.get(setup_type, DEFAULT_WINDOW_SIZE)
                     tensor, chart_meta = generate_live_chart_tensor(
-                        self._db, symbol, bar_size, window_size
+                        self._db, symbol, bar_size, window_size,
+                        renderer=metadata.get("chart_renderer"),
                     )
                     if tensor is None:
                         return None
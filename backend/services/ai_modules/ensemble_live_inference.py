@@ -38,49 +38,27 @@ import xgboost as xgb
 logger = logging.getLogger(__name__)
 
 
-# ── Model load cache ──────────────────────────────────────────────────────
-# Heavy XGBoost Boosters are loaded from Mongo once and pinned in memory for
-# MODEL_CACHE_TTL_S seconds. This cuts per-eval load from ~30MB decompress +
-# DMatrix setup to a dict lookup. Safe to share across threads since the
-# cached TimeSeriesGBM objects only use their _model for read-only predict().
-import threading
-import time as _time
-
-MODEL_CACHE_TTL_S = 600  # 10 minutes — matches training-cycle cadence
-_MODEL_CACHE: Dict[str, Any] = {}  # {model_name: (timestamp, TimeSeriesGBM)}
-_CACHE_LOCK = threading.Lock()
+# ── Model loading ─────────────────────────────────────────────────────────
+# Heavy XGBoost Boosters come from the process-wide model registry, which
+# keeps one copy per (model_name, version stamp) and only reloads from Mongo
+# when the model doc's version changes. Safe to share across threads since
+# the cached TimeSeriesGBM objects only use their _model for read-only
+# predict().
 
 
 def _cached_gbm_load(db, model_name: str, forecast_horizon: int):
-    """Load a TimeSeriesGBM from cache (or Mongo on miss) and return it.
+    """Load a TimeSeriesGBM through the model registry and return it.
 
     Returns None if the model doesn't exist in Mongo — caller handles that.
     """
-    now = _time.monotonic()
-    with _CACHE_LOCK:
-        entry = _MODEL_CACHE.get(model_name)
-        if entry is not None:
-            ts, gbm = entry
-            if now - ts < MODEL_CACHE_TTL_S:
-                return gbm
-            # expired — fall through and reload
-    # Load outside the lock (Mongo + DMatrix work should not hold the lock)
-    from services.ai_modules.timeseries_gbm import TimeSeriesGBM
-    gbm = TimeSeriesGBM(model_name=model_name, forecast_horizon=forecast_horizon)
-    gbm.set_db(db)
-    if gbm._model is None:
-        return None
-    with _CACHE_LOCK:
-        _MODEL_CACHE[model_name] = (_time.monotonic(), gbm)
-    return gbm
+    from services.ai_modules.model_registry import get_model_registry
+    return get_model_registry().get(db, model_name, forecast_horizon=forecast_horizon)
 
 
 def clear_model_cache() -> int:
     """Evict all cached models. Returns count. Call after retraining."""
-    with _CACHE_LOCK:
-        n = len(_MODEL_CACHE)
-        _MODEL_CACHE.clear()
-    return n
+    from services.ai_modules.model_registry import get_model_registry
+    return get_model_registry().clear()
 
 
 # ── Scanner setup → ensemble config key (mirrors confidence_gate SETUP_TO_MODEL) ──
@@ -27,9 +27,13 @@ def compute_feature_baseline(
     feature_names: List[str],
     max_rows: int = 50000,
     n_bins: int = 10,
+    n_total: Optional[int] = None,
 ) -> Optional[Dict]:
     """Per-feature stats + decile bin edges/fractions for future PSI checks.
 
+    `n_total` is the size of the matrix `X` was drawn from when the caller
+    already subsampled it (out-of-core training); defaults to `len(X)`.
+
     Returns None (never raises) when disabled, inputs are unusable, or any
     unexpected error occurs — baseline capture must never break training.
     """
@@ -72,7 +76,7 @@ def compute_feature_baseline(
             return None
         return {
             "captured_at": datetime.now(timezone.utc).isoformat(),
-            "n_samples_total": int(n),
+            "n_samples_total": int(n if n_total is None else n_total),
             "n_samples_used": int(len(Xa)),
             "n_bins": int(n_bins),
             "features": feats,
@@ -0,0 +1,231 @@
+"""
+Feature Shards (out-of-core training matrices)
+==============================================
+Appends feature / label chunks to on-disk `.npy` shards as extraction
+produces them and feeds XGBoost from the shards through its
+external-memory `DataIter` interface, so the full training matrix is
+never materialized.
+
+Why?
+    `train_full_universe` keeps every batch's float32 features in a list
+    and `np.vstack`s them before building the `DMatrix` — the list, the
+    stacked copy and the DMatrix's own copy all coexist, and 1-min / 5-min
+    full-universe runs are exactly the ones `_check_vstack_memory` exists
+    to refuse. With shards, peak RSS during extraction is one batch and
+    training holds XGBoost's quantized pages instead of the float matrix.
+
+How
+    * `ShardWriter.append(X, y)` writes each chunk as `x_NNNNN.npy` /
+      `y_NNNNN.npy` (split at `TRAIN_SHARD_ROWS`) under a private temp
+      directory; `finish()` returns the `ShardSet`. Row order is append
+      order — the same order `np.vstack` would have produced, so
+      time-ordered splits and embargo offsets are unchanged.
+    * `ShardSet.dmatrix(start, stop, ...)` wraps the global row range
+      `[start, stop)` in a `ShardIter` (`xgboost.DataIter`, one shard
+      slice per batch, memory-mapped) and builds an
+      `ExtMemQuantileDMatrix` (XGBoost ≥ 3.0; sketch pages cached next to
+      the shards) or, on older XGBoost, a `QuantileDMatrix` — still built
+      batch by batch, holding only the 1-byte-per-value quantized matrix.
+    * Labels are one column, so `labels()` loads them whole: class weights,
+      label-health checks and metrics keep their in-memory code.
+      `predict()` scores a row range shard by shard; `take()` gathers the
+      sorted row subsample CPCV and the feature baseline draw anyway
+      (`sample_rows()` reproduces their draws, so results match the
+      in-memory path).
+    * `close()` removes the directory (the writer is a context manager).
+
+Knobs (env)
+    TRAIN_OUT_OF_CORE   "true" → Phase 1 full-universe training streams to shards
+    TRAIN_SHARD_DIR     parent directory for shard dirs (default: system temp)
+    TRAIN_SHARD_ROWS    max rows per shard / iterator batch (default 1,000,000)
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import shutil
+import tempfile
+from typing import Callable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import xgboost as xgb
+
+logger = logging.getLogger(__name__)
+
+_DEFAULT_SHARD_ROWS = 1_000_000
+
+
+def is_enabled() -> bool:
+    val = os.environ.get("TRAIN_OUT_OF_CORE", "false").strip().lower()
+    return val in ("1", "true", "yes", "on")
+
+
+def _shard_rows() -> int:
+    try:
+        return max(1, int(os.environ.get("TRAIN_SHARD_ROWS", _DEFAULT_SHARD_ROWS)))
+    except (TypeError, ValueError):
+        return _DEFAULT_SHARD_ROWS
+
+
+def sample_rows(n: int, max_rows: int, seed: int) -> np.ndarray:
+    """Sorted row indices: all of `range(n)`, or the same
+    `default_rng(seed).choice(n, max_rows)` draw CPCV / the feature
+    baseline make internally when `n > max_rows`."""
+    if n <= max_rows:
+        return np.arange(n)
+    rng = np.random.default_rng(seed)
+    return np.sort(rng.choice(n, size=max_rows, replace=False))
+
+
+class ShardSet:
+    """Read side: shard files with their global row offsets."""
+
+    def __init__(self, root: str, files: List[Tuple[str, str, int]], n_cols: int) -> None:
+        self.root = root
+        self.files = files
+        self.n_cols = n_cols
+        self.offsets = np.cumsum([0] + [f[2] for f in files])
+
+    @property
+    def rows(self) -> int:
+        return int(self.offsets[-1])
+
+    def __len__(self) -> int:
+        return self.rows
+
+    # ---------- reads ---------------------------------------------------
+    def slices(self, start: int = 0, stop: Optional[int] = None):
+        """Yield `(i, lo, hi)` — shard i's local rows inside `[start, stop)`."""
+        stop = self.rows if stop is None else min(stop, self.rows)
+        for i, (_, _, n) in enumerate(self.files):
+            g0 = int(self.offsets[i])
+            lo, hi = max(start - g0, 0), min(stop - g0, n)
+            if lo < hi:
+                yield i, lo, hi
+
+    def features(self, i: int) -> np.ndarray:
+        return np.load(os.path.join(self.root, self.files[i][0]), mmap_mode="r")
+
+    def labels(self, start: int = 0, stop: Optional[int] = None) -> np.ndarray:
+        parts = [np.load(os.path.join(self.root, self.files[i][1]))[lo:hi]
+                 for i, lo, hi in self.slices(start, stop)]
+        return np.concatenate(parts) if parts else np.empty(0, dtype=np.float32)
+
+    def take(self, rows: np.ndarray) -> np.ndarray:
+        """Gather sorted global `rows` into one float32 matrix."""
+        rows = np.asarray(rows, dtype=np.int64)
+        out = np.empty((len(rows), self.n_cols), dtype=np.float32)
+        shard_of = np.searchsorted(self.offsets, rows, side="right") - 1
+        for i in np.unique(shard_of):
+            sel = shard_of == i
+            out[sel] = self.features(int(i))[rows[sel] - self.offsets[i]]
+        return out
+
+    # ---------- XGBoost -------------------------------------------------
+    def dmatrix(self, start: int, stop: int, weight: Optional[np.ndarray] = None,
+                feature_names: Optional[Sequence[str]] = None, max_bin: Optional[int] = None,
+                ref: Optional[xgb.DMatrix] = None) -> xgb.DMatrix:
+        """External-memory DMatrix over rows `[start, stop)`; `weight` is
+        indexed relative to `start`."""
+        it = ShardIter(self, start, stop, weight, feature_names,
+                       cache_prefix=os.path.join(self.root, f"cache_{start}_{stop}"))
+        if hasattr(xgb, "ExtMemQuantileDMatrix"):
+            return xgb.ExtMemQuantileDMatrix(it, max_bin=max_bin, ref=ref)
+        return xgb.QuantileDMatrix(it, max_bin=max_bin, ref=ref)
+
+    def predict(self, booster: xgb.Booster, start: int, stop: int,
+                feature_names: Optional[Sequence[str]] = None) -> np.ndarray:
+        """`booster.predict` over rows `[start, stop)`, one shard at a time."""
+        parts = [
+            booster.predict(xgb.DMatrix(np.asarray(self.features(i)[lo:hi]), feature_names=feature_names))
+            for i, lo, hi in self.slices(start, stop)
+        ]
+        return np.concatenate(parts) if parts else np.empty(0, dtype=np.float32)
+
+    # ---------- lifecycle -----------------------------------------------
+    def close(self) -> None:
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def __enter__(self) -> "ShardSet":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class ShardIter(xgb.DataIter):
+    """`xgboost.DataIter` over a row range of a `ShardSet`."""
+
+    def __init__(self, shards: ShardSet, start: int, stop: int,
+                 weight: Optional[np.ndarray] = None, feature_names: Optional[Sequence[str]] = None,
+                 cache_prefix: Optional[str] = None) -> None:
+        self._shards = shards
+        self._start = start
+        self._parts = list(shards.slices(start, stop))
+        self._weight = weight
+        self._feature_names = list(feature_names) if feature_names is not None else None
+        self._it = 0
+        super().__init__(cache_prefix=cache_prefix)
+
+    def next(self, input_data: Callable) -> bool:
+        if self._it == len(self._parts):
+            return False
+        i, lo, hi = self._parts[self._it]
+        X = np.ascontiguousarray(self._shards.features(i)[lo:hi], dtype=np.float32)
+        y = np.load(os.path.join(self._shards.root, self._shards.files[i][1]))[lo:hi]
+        kwargs = {}
+        if self._weight is not None:
+            g0 = int(self._shards.offsets[i]) + lo - self._start
+            kwargs["weight"] = self._weight[g0:g0 + (hi - lo)]
+        input_data(data=X, label=y, feature_names=self._feature_names, **kwargs)
+        self._it += 1
+        return True
+
+    def reset(self) -> None:
+        self._it = 0
+
+
+class ShardWriter:
+    """Write side: appends `(X, y)` chunks to `.npy` shards."""
+
+    def __init__(self, label: str = "train", root: Optional[str] = None, shard_rows: Optional[int] = None) -> None:
+        parent = root or os.environ.get("TRAIN_SHARD_DIR") or tempfile.gettempdir()
+        os.makedirs(parent, exist_ok=True)
+        safe = "".join(ch if ch.isalnum() else "_" for ch in label)
+        self.root = tempfile.mkdtemp(prefix=f"shards_{safe}_", dir=parent)
+        self.shard_rows = shard_rows or _shard_rows()
+        self.files: List[Tuple[str, str, int]] = []
+        self.n_cols: Optional[int] = None
+        self.rows = 0
+
+    def append(self, X: np.ndarray, y: np.ndarray) -> None:
+        if len(X) != len(y):
+            raise ValueError(f"shard chunk rows differ: X={len(X)} y={len(y)}")
+        if not len(X):
+            return
+        if self.n_cols is None:
+            self.n_cols = X.shape[1]
+        elif X.shape[1] != self.n_cols:
+            raise ValueError(f"shard chunk has {X.shape[1]} columns, expected {self.n_cols}")
+        for lo in range(0, len(X), self.shard_rows):
+            hi = min(lo + self.shard_rows, len(X))
+            k = len(self.files)
+            xf, yf = f"x_{k:05d}.npy", f"y_{k:05d}.npy"
+            np.save(os.path.join(self.root, xf), np.ascontiguousarray(X[lo:hi], dtype=np.float32))
+            np.save(os.path.join(self.root, yf), np.ascontiguousarray(y[lo:hi], dtype=np.float32))
+            self.files.append((xf, yf, hi - lo))
+        self.rows += len(X)
+
+    def finish(self) -> ShardSet:
+        logger.info(f"[feature_shards] {self.rows:,} rows in {len(self.files)} shards under {self.root}")
+        return ShardSet(self.root, list(self.files), self.n_cols or 0)
+
+    def close(self) -> None:
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def __enter__(self) -> "ShardWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
@@ -0,0 +1,238 @@
+"""
+Market Context Feature Cache
+============================
+Session-scoped cache for the daily-bar context features that
+`TimeSeriesAIService.predict_for_setup` appends to setup-model inputs:
+
+  * regime features — `compute_regime_features_from_bars` over SPY / QQQ /
+    IWM daily bars (one entry for the whole process), and
+  * MTF features — `compute_mtf_features_from_daily_bars` over a symbol's
+    own daily bars (one entry per symbol, LRU-bounded).
+
+Why?
+    Each prediction used to pull up to 3,000 daily bars for SPY, QQQ and
+    IWM plus 3,000 of the symbol itself — four heavy Mongo reads — to
+    recompute features that only change when a new daily bar lands. On the
+    confidence-gate path an alert burst multiplied that into hundreds of
+    identical reads.
+
+How
+    An entry is served from memory for `MARKET_CONTEXT_TTL_SEC` (default
+    300s). After that it is *revalidated*, not recomputed: a one-document
+    probe reads the latest daily-bar date of each input symbol, and only a
+    changed date (a new daily bar) triggers the full fetch + recompute.
+    Concurrent misses on the same key wait on a per-key lock so a burst
+    computes once.
+
+Knobs
+    MARKET_CONTEXT_CACHE=0          disable (fetch + compute every call).
+    MARKET_CONTEXT_TTL_SEC          seconds between revalidation probes.
+    MARKET_CONTEXT_MAX_SYMBOLS      per-symbol MTF entries kept (default 2000).
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+REGIME_INDEX_SYMBOLS = ("SPY", "QQQ", "IWM")
+DAILY_BAR_LIMIT = 3000
+MIN_DAILY_BARS = 25
+
+
+def _enabled() -> bool:
+    val = os.environ.get("MARKET_CONTEXT_CACHE", "true").strip().lower()
+    return val not in ("0", "false", "no", "off")
+
+
+def _env_num(name: str, default, cast=float):
+    try:
+        return cast(os.environ.get(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def daily_rows(db, symbol: str, projection: Dict) -> List[Dict]:
+    """Up to DAILY_BAR_LIMIT daily bars, one per calendar date, newest first."""
+    bars = list(db["ib_historical_data"].find(
+        {"symbol": symbol, "bar_size": "1 day"}, projection,
+    ).sort("date", -1).limit(DAILY_BAR_LIMIT))
+    seen = {}
+    for b in bars:
+        dk = str(b.get("date", ""))[:10]
+        if len(dk) == 10 and dk not in seen:
+            seen[dk] = b
+    return sorted(seen.values(), key=lambda x: str(x["date"])[:10], reverse=True)
+
+
+def latest_daily_date(db, symbol: str) -> Optional[str]:
+    """Date of the newest daily bar (the cache's invalidation stamp)."""
+    doc = db["ib_historical_data"].find_one(
+        {"symbol": symbol, "bar_size": "1 day"}, {"_id": 0, "date": 1},
+        sort=[("date", -1)],
+    )
+    return str(doc.get("date")) if doc else None
+
+
+def _index_arrays(db, symbol: str):
+    real = daily_rows(db, symbol, {"_id": 0, "close": 1, "high": 1, "low": 1, "date": 1})
+    if len(real) < MIN_DAILY_BARS:
+        return None, None, None
+    return (
+        np.array([b["close"] for b in real], dtype=float),
+        np.array([b["high"] for b in real], dtype=float),
+        np.array([b["low"] for b in real], dtype=float),
+    )
+
+
+def compute_regime_features(db) -> Optional[Dict[str, float]]:
+    """Regime features from SPY/QQQ/IWM daily bars (None without SPY data)."""
+    from .regime_features import compute_regime_features_from_bars
+    spy_c, spy_h, spy_l = _index_arrays(db, "SPY")
+    qqq_c, qqq_h, qqq_l = _index_arrays(db, "QQQ")
+    iwm_c, iwm_h, iwm_l = _index_arrays(db, "IWM")
+    if spy_c is None:
+        return None
+    return compute_regime_features_from_bars(
+        spy_c, spy_h, spy_l,
+        qqq_c, qqq_h, qqq_l,
+        iwm_c, iwm_h, iwm_l,
+    )
+
+
+def compute_mtf_features(db, symbol: str) -> Optional[Dict[str, float]]:
+    """MTF features from the symbol's daily bars (None below 25 days)."""
+    from .multi_timeframe_features import compute_mtf_features_from_daily_bars
+    real_daily = daily_rows(
+        db, symbol,
+        {"_id": 0, "date": 1, "open": 1, "high": 1, "low": 1, "close": 1, "volume": 1},
+    )
+    if len(real_daily) < MIN_DAILY_BARS:
+        return None
+    return compute_mtf_features_from_daily_bars(
+        np.array([b["close"] for b in real_daily], dtype=float),
+        np.array([b["high"] for b in real_daily], dtype=float),
+        np.array([b["low"] for b in real_daily], dtype=float),
+        np.array([b.get("volume", 0) for b in real_daily], dtype=float),
+        np.array([b.get("open", 0) for b in real_daily], dtype=float),
+    )
+
+
+class MarketContextCache:
+    """Stamp-validated cache of regime and per-symbol MTF feature dicts."""
+
+    def __init__(self, ttl_s: Optional[float] = None, max_symbols: Optional[int] = None) -> None:
+        self.ttl_s = ttl_s if ttl_s is not None else _env_num("MARKET_CONTEXT_TTL_SEC", 300.0)
+        self.max_symbols = max_symbols if max_symbols is not None else _env_num(
+            "MARKET_CONTEXT_MAX_SYMBOLS", 2000, int)
+        # key -> (value, stamp, checked_at_monotonic)
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[Optional[Dict], Tuple, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._key_locks: Dict[Tuple[str, str], threading.Lock] = {}
+        self._hits = 0
+        self._revalidated = 0
+        self._computed = 0
+        self._last_compute_ms = 0.0
+
+    # ---------- public ---------------------------------------------------
+    def regime_features(self, db) -> Optional[Dict[str, float]]:
+        if not _enabled():
+            return compute_regime_features(db)
+        return self._get(("regime", "*"), db, REGIME_INDEX_SYMBOLS,
+                         lambda: compute_regime_features(db))
+
+    def mtf_features(self, db, symbol: str) -> Optional[Dict[str, float]]:
+        if not _enabled():
+            return compute_mtf_features(db, symbol)
+        return self._get(("mtf", symbol), db, (symbol,),
+                         lambda: compute_mtf_features(db, symbol))
+
+    def invalidate(self, symbol: Optional[str] = None) -> None:
+        """Drop one symbol's MTF entry, or everything when symbol is None."""
+        with self._lock:
+            if symbol is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(("mtf", symbol), None)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "enabled": _enabled(),
+                "entries": len(self._entries),
+                "regime_cached": ("regime", "*") in self._entries,
+                "ttl_s": self.ttl_s,
+                "max_symbols": self.max_symbols,
+                "hits": self._hits,
+                "revalidated": self._revalidated,
+                "computed": self._computed,
+                "last_compute_ms": round(self._last_compute_ms, 2),
+            }
+
+    # ---------- internals ------------------------------------------------
+    def _fresh(self, key, now: float):
+        entry = self._entries.get(key)
+        if entry is not None and now - entry[2] < self.ttl_s:
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return True, entry[0]
+        return False, entry
+
+    def _get(self, key, db, stamp_symbols, compute: Callable[[], Optional[Dict]]):
+        with self._lock:
+            fresh, val = self._fresh(key, time.monotonic())
+            if fresh:
+                return dict(val) if val is not None else None
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        with key_lock:
+            with self._lock:
+                fresh, entry = self._fresh(key, time.monotonic())
+                if fresh:
+                    return dict(entry) if entry is not None else None
+            stamp = tuple(latest_daily_date(db, s) for s in stamp_symbols)
+            if entry is not None and entry[1] == stamp and stamp[0] is not None:
+                with self._lock:
+                    self._entries[key] = (entry[0], stamp, time.monotonic())
+                    self._revalidated += 1
+                return dict(entry[0]) if entry[0] is not None else None
+
+            t0 = time.perf_counter()
+            value = compute()
+            elapsed_ms = (time.perf_counter() - t0) * 1000
+            with self._lock:
+                self._entries[key] = (value, stamp, time.monotonic())
+                self._entries.move_to_end(key)
+                self._computed += 1
+                self._last_compute_ms = elapsed_ms
+                self._evict()
+            return dict(value) if value is not None else None
+
+    def _evict(self) -> None:
+        mtf_keys = [k for k in self._entries if k[0] == "mtf"]
+        for k in mtf_keys[:max(0, len(mtf_keys) - self.max_symbols)]:
+            self._entries.pop(k, None)
+            self._key_locks.pop(k, None)
+
+
+# ---------------- Module-level singleton ----------------
+
+_cache: Optional[MarketContextCache] = None
+_singleton_lock = threading.Lock()
+
+
+def get_market_context_cache() -> MarketContextCache:
+    """Get or create the process-wide market context cache."""
+    global _cache
+    with _singleton_lock:
+        if _cache is None:
+            _cache = MarketContextCache()
+    return _cache
@@ -0,0 +1,361 @@
+"""
+Process-wide Model Registry
+===========================
+One in-memory home for trained `TimeSeriesGBM` models loaded from
+`timeseries_models`, shared by the confidence gate's P-WIRE shadows, the
+ensemble meta-labeler (`ensemble_live_inference`) and the setup models the
+scanner reaches through `TimeSeriesAIService`.
+
+Why?
+    Each consumer used to keep its own copy: the ensemble path a dict with a
+    fixed 10-minute TTL, the shadow path a per-service dict that never
+    refreshed, the setup loader a third set. Every TTL expiry re-read the
+    20-40MB zlib+base64 XGBoost JSON from Mongo and decompressed it again —
+    even when nothing had been retrained — and the same Booster could sit
+    in RAM two or three times.
+
+How
+    Entries are keyed by `(model_name, stamp)`, scoped per database, where
+    the stamp is the model doc's `(version, updated_at|saved_at,
+    quarantined)`. A cached model is served straight from memory for
+    `MODEL_REGISTRY_POLL_SEC`; after that a one-document projection
+    re-reads the stamp, and only a changed stamp (a promotion, a
+    quarantine) triggers a reload. When the server supports change streams
+    a background watcher marks a model stale the moment its doc changes,
+    so promotions land without waiting for the poll. Concurrent misses on
+    one name wait on a per-name lock and load once. Total size is bounded
+    by `MODEL_REGISTRY_MAX_MB` (estimated from the serialized Booster)
+    with LRU eviction.
+
+    Loads that find no usable model (quarantined, nothing trained) are
+    remembered for one poll interval and are never stored as entries.
+
+Views
+    The canonical object is the one `set_db()` loaded (DB attached, so
+    `predict()` logs as before). Callers that need a detached model
+    (shadow inference) or a different `forecast_horizon` get a shallow copy
+    that shares the same Booster; the copy is cached on the entry.
+
+Knobs
+    MODEL_REGISTRY=0                   load on every call (no caching).
+    MODEL_REGISTRY_POLL_SEC            seconds between stamp probes (default 30).
+    MODEL_REGISTRY_MAX_MB              memory budget for cached models (default 4096).
+    MODEL_REGISTRY_CHANGE_STREAM=0     do not start the change-stream watcher.
+"""
+
+from __future__ import annotations
+
+import copy
+import itertools
+import logging
+import os
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+MODEL_COLLECTION = "timeseries_models"
+STAMP_PROJECTION = {"_id": 0, "version": 1, "updated_at": 1, "saved_at": 1, "quarantined": 1}
+MISSING_STAMP = ("missing",)
+
+
+def _flag(name: str, default: str = "true") -> bool:
+    val = os.environ.get(name, default).strip().lower()
+    return val not in ("0", "false", "no", "off")
+
+
+def _env_num(name: str, default, cast=float):
+    try:
+        return cast(os.environ.get(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def model_stamp(db, model_name: str) -> Optional[Tuple]:
+    """Version stamp of a model doc, MISSING_STAMP if absent, None if the probe failed."""
+    try:
+        doc = db[MODEL_COLLECTION].find_one({"name": model_name}, STAMP_PROJECTION)
+    except Exception as e:
+        logger.debug(f"[model_registry] stamp probe failed for {model_name}: {e}")
+        return None
+    if not isinstance(doc, dict):
+        return MISSING_STAMP
+    return (
+        str(doc.get("version")),
+        str(doc.get("updated_at") or doc.get("saved_at")),
+        bool(doc.get("quarantined")),
+    )
+
+
+def load_gbm(db, model_name: str, forecast_horizon: int = 5, gbm_cls=None):
+    """Default loader: `TimeSeriesGBM.set_db()` → `_load_model()`. None when nothing loaded."""
+    if gbm_cls is None:
+        from services.ai_modules.timeseries_gbm import TimeSeriesGBM as gbm_cls
+    gbm = gbm_cls(model_name=model_name, forecast_horizon=forecast_horizon)
+    gbm.set_db(db)
+    return gbm if gbm._model is not None else None
+
+
+def model_nbytes(model) -> int:
+    """Serialized Booster size — the registry's memory estimate for an entry."""
+    booster = getattr(model, "_model", None)
+    try:
+        return int(len(booster.save_raw(raw_format="ubj")))
+    except Exception:
+        return 0
+
+
+class _Entry:
+    __slots__ = ("model", "horizon", "nbytes", "loaded_at", "hits", "views")
+
+    def __init__(self, model, horizon: int, nbytes: int) -> None:
+        self.model = model
+        self.horizon = horizon
+        self.nbytes = nbytes
+        self.loaded_at = time.time()
+        self.hits = 0
+        self.views: Dict[Tuple[bool, int], Any] = {}
+
+
+class ModelRegistry:
+    """Stamp-validated, memory-bounded LRU of loaded TimeSeriesGBM models."""
+
+    def __init__(self, poll_s: Optional[float] = None, max_bytes: Optional[int] = None) -> None:
+        self.poll_s = poll_s if poll_s is not None else _env_num("MODEL_REGISTRY_POLL_SEC", 30.0)
+        self.max_bytes = max_bytes if max_bytes is not None else int(
+            _env_num("MODEL_REGISTRY_MAX_MB", 4096.0) * 1024 * 1024)
+        # key = (slot, stamp), slot = (db scope, model_name)
+        self._entries: "OrderedDict[Tuple[Tuple[int, str], Hashable], _Entry]" = OrderedDict()
+        # slot -> (key or None for "no usable model", checked_at_monotonic)
+        self._current: Dict[Tuple[int, str], Tuple[Optional[Tuple], float]] = {}
+        self._stale: set = set()
+        self._scopes: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+        self._scope_seq = itertools.count(1)
+        self._lock = threading.Lock()
+        self._name_locks: Dict[Tuple[int, str], threading.Lock] = {}
+        self._watcher: Optional[threading.Thread] = None
+        self._stream_live = False
+        self._hits = 0
+        self._misses = 0
+        self._probes = 0
+        self._version_changes = 0
+        self._evictions = 0
+        self._loads = 0
+        self._load_ms_total = 0.0
+        self._last_load_ms = 0.0
+
+    # ---------- public ---------------------------------------------------
+    def get(self, db, model_name: str, forecast_horizon: int = 5, detached: bool = False,
+            loader: Optional[Callable[..., Any]] = None):
+        """Return the current model for `model_name`, loading it on a miss.
+
+        `detached=True` returns a view with `_db=None` so `predict()` does not
+        write to `timeseries_predictions`. Returns None if no model loads.
+        """
+        if db is None:
+            return None
+        loader = loader or load_gbm
+        if not _flag("MODEL_REGISTRY"):
+            return self._detach(loader(db, model_name, forecast_horizon), forecast_horizon, detached)
+        self._ensure_watcher(db)
+
+        with self._lock:
+            slot = (self._scope(db), model_name)
+            fresh, key = self._fresh(slot, time.monotonic())
+            if fresh:
+                return self._serve(key, forecast_horizon, detached)
+            name_lock = self._name_locks.setdefault(slot, threading.Lock())
+
+        with name_lock:
+            with self._lock:
+                fresh, key = self._fresh(slot, time.monotonic())
+                if fresh:
+                    return self._serve(key, forecast_horizon, detached)
+                self._stale.discard(slot)
+                self._probes += 1
+            stamp = model_stamp(db, model_name)
+            with self._lock:
+                if stamp is None and key is not None and key in self._entries:
+                    # Probe failed — keep serving what we have until the next poll.
+                    self._current[slot] = (key, time.monotonic())
+                    return self._serve(key, forecast_horizon, detached)
+                new_key = (slot, stamp)
+                if new_key in self._entries:
+                    self._current[slot] = (new_key, time.monotonic())
+                    return self._serve(new_key, forecast_horizon, detached)
+
+            t0 = time.perf_counter()
+            try:
+                model = loader(db, model_name, forecast_horizon)
+            except Exception as e:
+                logger.warning(f"[model_registry] load failed for {model_name}: {e}")
+                model = None
+            elapsed_ms = (time.perf_counter() - t0) * 1000
+            nbytes = model_nbytes(model) if model is not None else 0
+
+            with self._lock:
+                self._misses += 1
+                self._loads += 1
+                self._load_ms_total += elapsed_ms
+                self._last_load_ms = elapsed_ms
+                old = self._current.get(slot)
+                if old is not None and old[0] is not None and old[0] != new_key:
+                    # Superseded version: drop it now rather than waiting for LRU.
+                    if self._entries.pop(old[0], None) is not None:
+                        self._version_changes += 1
+                if model is None:
+                    self._current[slot] = (None, time.monotonic())
+                    return None
+                self._entries[new_key] = _Entry(model, forecast_horizon, nbytes)
+                self._current[slot] = (new_key, time.monotonic())
+                self._evict(keep=new_key)
+                logger.info(
+                    f"[model_registry] loaded {model_name} stamp={stamp} "
+                    f"({nbytes / 1024 / 1024:.1f}MB, {elapsed_ms:.0f}ms)")
+                return self._serve(new_key, forecast_horizon, detached, hit=False)
+
+    def invalidate(self, model_name: Optional[str] = None) -> int:
+        """Force a stamp probe on next access (one name, or every name)."""
+        with self._lock:
+            slots = [slot for slot in self._current if model_name in (None, slot[1])]
+            self._stale.update(slots)
+            return len(slots)
+
+    def clear(self) -> int:
+        """Drop every cached model. Returns the number of entries evicted."""
+        with self._lock:
+            n = len(self._entries)
+            self._entries.clear()
+            self._current.clear()
+            self._stale.clear()
+            self._scopes.clear()
+            return n
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "enabled": _flag("MODEL_REGISTRY"),
+                "entries": len(self._entries),
+                "models": sorted({k[0][1] for k in self._entries}),
+                "bytes": sum(e.nbytes for e in self._entries.values()),
+                "max_bytes": self.max_bytes,
+                "poll_s": self.poll_s,
+                "change_stream": self._stream_live,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0,
+                "stamp_probes": self._probes,
+                "version_changes": self._version_changes,
+                "evictions": self._evictions,
+                "loads": self._loads,
+                "avg_load_ms": round(self._load_ms_total / self._loads, 2) if self._loads else 0.0,
+                "last_load_ms": round(self._last_load_ms, 2),
+            }
+
+    # ---------- internals ------------------------------------------------
+    def _scope(self, db) -> int:
+        """Stable token per database, so two databases never share an entry."""
+        try:
+            token = self._scopes.get(db)
+            if token is None:
+                token = self._scopes[db] = next(self._scope_seq)
+            return token
+        except TypeError:  # not hashable / weak-referenceable
+            return id(db)
+
+    def _fresh(self, slot, now: float):
+        cur = self._current.get(slot)
+        if cur is None:
+            return False, None
+        key, checked_at = cur
+        if slot in self._stale or now - checked_at >= self.poll_s:
+            return False, key
+        if key is None:
+            return True, None
+        if key not in self._entries:
+            return False, None
+        return True, key
+
+    def _serve(self, key, forecast_horizon: int, detached: bool, hit: bool = True):
+        if key is None:
+            return None
+        entry = self._entries[key]
+        self._entries.move_to_end(key)
+        if hit:
+            entry.hits += 1
+            self._hits += 1
+        if not detached and forecast_horizon == entry.horizon:
+            return entry.model
+        view_key = (detached, forecast_horizon)
+        view = entry.views.get(view_key)
+        if view is None:
+            view = self._detach(entry.model, forecast_horizon, detached, copy_always=True)
+            entry.views[view_key] = view
+        return view
+
+    @staticmethod
+    def _detach(model, forecast_horizon: int, detached: bool, copy_always: bool = False):
+        if model is None or not (detached or copy_always):
+            return model
+        view = copy.copy(model)
+        view.forecast_horizon = forecast_horizon
+        if detached:
+            view._db = None
+        return view
+
+    def _evict(self, keep) -> None:
+        total = sum(e.nbytes for e in self._entries.values())
+        for key in list(self._entries):
+            if total <= self.max_bytes:
+                break
+            if key == keep:
+                continue
+            total -= self._entries.pop(key).nbytes
+            self._evictions += 1
+            cur = self._current.get(key[0])
+            if cur is not None and cur[0] == key:
+                self._current.pop(key[0], None)
+
+    def _ensure_watcher(self, db) -> None:
+        if self._watcher is not None or not _flag("MODEL_REGISTRY_CHANGE_STREAM"):
+            return
+        with self._lock:
+            if self._watcher is not None:
+                return
+            self._watcher = threading.Thread(
+                target=self._watch, args=(db,), name="model-registry-watch", daemon=True)
+        self._watcher.start()
+
+    def _watch(self, db) -> None:
+        """Mark models stale as their docs change. Exits quietly where change
+        streams are unavailable (standalone mongod) — the stamp poll covers it."""
+        pipeline = [{"$project": {"operationType": 1, "fullDocument.name": 1}}]
+        try:
+            with db[MODEL_COLLECTION].watch(pipeline, full_document="updateLookup") as stream:
+                self._stream_live = True
+                for change in stream:
+                    name = (change.get("fullDocument") or {}).get("name")
+                    self.invalidate(name)
+        except Exception as e:
+            logger.info(f"[model_registry] change stream unavailable, using stamp poll: {e}")
+        finally:
+            self._stream_live = False
+
+
+# ---------------- Module-level singleton ----------------
+
+_registry: Optional[ModelRegistry] = None
+_singleton_lock = threading.Lock()
+
+
+def get_model_registry() -> ModelRegistry:
+    """Get or create the process-wide model registry."""
+    global _registry
+    with _singleton_lock:
+        if _registry is None:
+            _registry = ModelRegistry()
+    return _registry
@@ -0,0 +1,128 @@
+"""
+Prediction Request Coalescer
+============================
+Collects model-inference requests that arrive within a short window on the
+event loop and hands them to a batch function in ONE executor call.
+
+Why?
+    At the open dozens of alerts hit the confidence gate and the scanner's
+    AI enrichment at once, and each ran its own `predict_for_setup` /
+    `TimeSeriesGBM.predict` in a thread: a single-row DMatrix and a full
+    Booster call per alert, plus a thread-pool hop each. Batched inference
+    (`predict_for_setup_batch`, `TimeSeriesGBM.predict_batch`) amortizes
+    that, but only if concurrent callers are gathered first.
+
+How
+    `submit(item)` parks the caller on a future. The first request of a
+    burst arms a `PREDICT_BATCH_WINDOW_MS` timer; when it fires (or
+    `PREDICT_BATCH_MAX` requests are waiting) the pending items run as one
+    `batch_fn(items) -> results` call in the default executor, and each
+    future receives its own result. An exception in `batch_fn` is raised
+    to every caller of that batch.
+
+Knobs
+    PREDICT_BATCH=0            run each request on its own (no window).
+    PREDICT_BATCH_WINDOW_MS    gather window (default 10ms).
+    PREDICT_BATCH_MAX          flush early at this many requests (default 64).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+
+def _enabled() -> bool:
+    val = os.environ.get("PREDICT_BATCH", "true").strip().lower()
+    return val not in ("0", "false", "no", "off")
+
+
+def _env_num(name: str, default, cast=float):
+    try:
+        return cast(os.environ.get(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+class PredictionBatcher:
+    """Event-loop request coalescer in front of a synchronous batch function."""
+
+    def __init__(self, batch_fn: Callable[[List[Any]], Sequence[Any]], name: str = "",
+                 window_ms: Optional[float] = None, max_batch: Optional[int] = None) -> None:
+        self._batch_fn = batch_fn
+        self.name = name
+        self.window_s = (window_ms if window_ms is not None
+                         else _env_num("PREDICT_BATCH_WINDOW_MS", 10.0)) / 1000.0
+        self.max_batch = max(1, max_batch if max_batch is not None
+                             else _env_num("PREDICT_BATCH_MAX", 64, int))
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._pending: List[Tuple[Any, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: set = set()
+        self._batches = 0
+        self._items = 0
+        self._largest = 0
+        self._last_batch_ms = 0.0
+
+    async def submit(self, item: Any) -> Any:
+        loop = asyncio.get_running_loop()
+        if not _enabled():
+            return (await loop.run_in_executor(None, self._batch_fn, [item]))[0]
+        if self._loop is not loop:
+            # New event loop (tests, restarts): nothing pending can belong to it.
+            self._loop, self._pending, self._timer = loop, [], None
+        fut = loop.create_future()
+        self._pending.append((item, fut))
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window_s, self._flush)
+        return await fut
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = self._loop.create_task(self._run(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: List[Tuple[Any, asyncio.Future]]) -> None:
+        items = [item for item, _ in batch]
+        t0 = time.perf_counter()
+        try:
+            results = await self._loop.run_in_executor(None, self._batch_fn, items)
+            if len(results) != len(items):
+                raise RuntimeError(
+                    f"{self.name or 'batch'} returned {len(results)} results for {len(items)} requests")
+        except Exception as e:
+            for _, fut in batch:
+                if not fut.done():
+                    fut.set_exception(e)
+            return
+        finally:
+            self._batches += 1
+            self._items += len(items)
+            self._largest = max(self._largest, len(items))
+            self._last_batch_ms = (time.perf_counter() - t0) * 1000
+        for (_, fut), result in zip(batch, results):
+            if not fut.done():
+                fut.set_result(result)
+
+    def stats(self) -> Dict:
+        return {
+            "name": self.name,
+            "enabled": _enabled(),
+            "window_ms": round(self.window_s * 1000, 2),
+            "max_batch": self.max_batch,
+            "pending": len(self._pending),
+            "batches": self._batches,
+            "requests": self._items,
+            "avg_batch": round(self._items / self._batches, 2) if self._batches else 0.0,
+            "largest_batch": self._largest,
+            "last_batch_ms": round(self._last_batch_ms, 2),
+        }
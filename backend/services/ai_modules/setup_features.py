@@ -7,7 +7,8 @@ learn setup-specific nuances.
 """
 
 import numpy as np
-from typing import Dict, List
+from numpy.lib.stride_tricks import sliding_window_view
+from typing import Dict, List, Optional
 import logging
 
 logger = logging.getLogger(__name__)
@@ -42,6 +43,65 @@ def _compute_atr(highs, lows, closes, period=14):
     return np.mean(tr_vals)
 
 
+# Row-wise twins of the helpers above for the *_bulk extractors. Inputs are
+# (rows, window) matrices, most-recent-first along axis 1; arithmetic stays
+# in the input dtype and follows the scalar op order, so the float32 windows
+# the training workers pass produce the same values row for row.
+
+def _rows_const(ref: np.ndarray, value: float) -> np.ndarray:
+    return np.full(len(ref), value, dtype=np.float64)
+
+
+def _rows_safe_div(a, b, default=0.0):
+    a, b = np.broadcast_arrays(a, b)
+    ok = (b != 0) & np.isfinite(b)
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        r = np.where(ok, a / np.where(ok, b, 1), default)
+    return np.where(np.isfinite(r), r, default)
+
+
+def _rows_div_pos(a, b):
+    """`a / b if b > 0 else 0` per row."""
+    pos = b > 0
+    return np.where(pos, a / np.where(pos, b, 1), 0)
+
+
+def _rows_ema(data: np.ndarray, period: int) -> np.ndarray:
+    if data.shape[1] < period:
+        return data.mean(axis=1) if data.shape[1] > 0 else _rows_const(data, 0)
+    m = 2 / (period + 1)
+    e = data[:, -1]
+    for k in range(data.shape[1] - 2, -1, -1):
+        e = (data[:, k] * m) + (e * (1 - m))
+    return e
+
+
+def _rows_atr(highs, lows, closes, period=14):
+    if closes.shape[1] < period + 1:
+        if highs.shape[1] >= period:
+            return np.mean(highs[:, :period] - lows[:, :period], axis=1)
+        return _rows_const(closes, 0.01)
+    h, l, pc = highs[:, :period], lows[:, :period], closes[:, 1:period + 1]
+    tr = np.maximum(np.maximum(h - l, np.abs(h - pc)), np.abs(l - pc))
+    return np.mean(tr, axis=1)
+
+
+def _rows_streak(cond: np.ndarray) -> np.ndarray:
+    """Leading run of True per row (the `if ...: n += 1 else: break` loops)."""
+    return np.cumprod(cond, axis=1).sum(axis=1)
+
+
+def _rows_rsi(closes, period=14):
+    """`setup_pattern_detector._compute_rsi` per row."""
+    if closes.shape[1] < period + 1:
+        return _rows_const(closes, 50.0)
+    deltas = np.diff(closes[:, :period + 1], axis=1)
+    avg_gain = np.mean(np.where(deltas > 0, deltas, 0), axis=1)
+    avg_loss = np.mean(np.where(deltas < 0, -deltas, 0), axis=1)
+    rs = avg_gain / np.where(avg_loss == 0, 1, avg_loss)
+    return np.where(avg_loss == 0, np.where(avg_gain > 0, 100.0, 50.0), 100 - (100 / (1 + rs)))
+
+
 # ========================================================================
 # SETUP-SPECIFIC FEATURE EXTRACTORS
 # Each returns a dict of feature_name -> value
@@ -666,6 +726,401 @@ def mean_reversion_features(opens, highs, lows, closes, volumes) -> Dict[str, fl
     return f
 
 
+# ========================================================================
+# BULK (MATRIX-WIDE) EXTRACTORS
+# Row-wise twins of the extractors above: each takes (rows, window)
+# matrices — the `sliding_window_view(...)[:, ::-1]` windows the training
+# workers build — and returns feature_name -> (rows,) array.
+# ========================================================================
+
+def breakout_features_bulk(opens, highs, lows, closes, volumes) -> Dict[str, np.ndarray]:
+    f = {}
+    n = closes.shape[1]
+    ranges = highs - lows
+
+    atr = _rows_atr(highs, lows, closes)
+    f['consol_days'] = _rows_streak(ranges[:, 1:min(30, n)] < (atr * 0.8)[:, None])
+
+    if n >= 20:
+        recent_range = np.mean(ranges[:, :5], axis=1)
+        avg_range = np.mean(ranges[:, :20], axis=1)
+        f['range_contraction'] = _rows_safe_div(recent_range, avg_range, 1.0)
+    else:
+        f['range_contraction'] = _rows_const(closes, 1.0)
+
+    if n >= 10:
+        f['vol_at_break'] = _rows_safe_div(volumes[:, 0], np.mean(volumes[:, 1:10], axis=1), 1.0)
+    else:
+        f['vol_at_break'] = _rows_const(closes, 1.0)
+
+    if n >= 20:
+        high_20 = np.max(highs[:, :20], axis=1)
+        f['dist_from_high'] = _rows_safe_div(closes[:, 0] - high_20, high_20, 0)
+    else:
+        f['dist_from_high'] = _rows_const(closes, 0)
+
+    f['break_magnitude'] = np.where(atr > 0, _rows_safe_div(ranges[:, 0], atr, 1.0), 1.0)
+
+    if n >= 40:
+        bands = sliding_window_view(closes[:, :39], 20, axis=1)   # bands[:, i] = closes[:, i:i+20]
+        sma = np.mean(bands, axis=2)
+        std = np.std(bands, axis=2)
+        bb_widths = np.where(sma > 0, 4 * std / np.where(sma > 0, sma, 1), 0)
+        f['squeeze_ratio'] = _rows_safe_div(bb_widths[:, 0], np.mean(bb_widths, axis=1), 1.0)
+    else:
+        f['squeeze_ratio'] = _rows_const(closes, 1.0)
+
+    return f
+
+
+def momentum_features_bulk(opens, highs, lows, closes, volumes) -> Dict[str, np.ndarray]:
+    f = {}
+    n = closes.shape[1]
+    c0 = closes[:, 0]
+
+    ret3 = _rows_div_pos(c0 - closes[:, 3], closes[:, 3]) if n > 3 else 0
+    ret10 = _rows_div_pos(c0 - closes[:, 10], closes[:, 10]) if n > 10 else 0
+    f['momentum_accel'] = ret3 - ret10 + _rows_const(closes, 0)
+
+    m = min(n - 1, 15)
+    f['up_streak'] = _rows_streak(closes[:, :m] > closes[:, 1:m + 1])
+    f['down_streak'] = _rows_streak(closes[:, :m] < closes[:, 1:m + 1])
+
+    ema9 = _rows_ema(closes[:, :9], 9) if n >= 9 else c0
+    ema21 = _rows_ema(closes[:, :21], 21) if n >= 21 else c0
+    sma50 = np.mean(closes[:, :50], axis=1) if n >= 50 else c0
+    above_count = (c0 > ema9).astype(int) + (c0 > ema21) + (c0 > sma50)
+    f['trend_alignment'] = above_count / 3.0
+
+    if n >= 50:
+        f['ema_stack'] = np.where((ema9 > ema21) & (ema21 > sma50), 1.0,
+                                  np.where((ema9 < ema21) & (ema21 < sma50), -1.0, 0.0))
+    else:
+        f['ema_stack'] = _rows_const(closes, 0.0)
+
+    if n >= 5:
+        price_up = c0 > closes[:, 4]
+        vol_up = volumes[:, 0] > np.mean(volumes[:, 1:5], axis=1)
+        f['vol_momentum_align'] = np.where(price_up == vol_up, 1.0, -1.0)
+    else:
+        f['vol_momentum_align'] = _rows_const(closes, 0.0)
+
+    if n >= 20:
+        f['rsi_slope'] = (_rows_rsi(closes) - _rows_rsi(closes[:, 5:])) / 100.0
+    else:
+        f['rsi_slope'] = _rows_const(closes, 0.0)
+
+    return f
+
+
+def scalp_features_bulk(opens, highs, lows, closes, volumes) -> Dict[str, np.ndarray]:
+    f = {}
+    n = closes.shape[1]
+    bar_range = highs[:, 0] - lows[:, 0]
+    has_range = bar_range > 0
+
+    f['intrabar_vol'] = _rows_safe_div(bar_range, closes[:, 0], 0)
+    f['tick_intensity'] = np.where(has_range, _rows_safe_div(volumes[:, 0], bar_range * 1000, 0), 0)
+
+    body = np.abs(closes[:, 0] - opens[:, 0])
+    f['body_dominance'] = np.where(has_range, _rows_safe_div(body, bar_range, 0.5), 0.5)
+
+    if n >= 2:
+        abs_return = np.abs(closes[:, 0] - closes[:, 1])
+        f['price_speed'] = _rows_safe_div(abs_return, volumes[:, 0], 0) * 1e6
+    else:
+        f['price_speed'] = _rows_const(closes, 0)
+
+    if n >= 10:
+        recent_ranges = (highs[:, :5] - lows[:, :5]) / np.maximum(closes[:, :5], 0.01)
+        older_ranges = (highs[:, 5:10] - lows[:, 5:10]) / np.maximum(closes[:, 5:10], 0.01)
+        f['vol_clustering'] = _rows_safe_div(np.mean(recent_ranges, axis=1),
+                                             np.mean(older_ranges, axis=1), 1.0)
+    else:
+        f['vol_clustering'] = _rows_const(closes, 1.0)
+
+    f['spread_proxy'] = np.where(has_range, _rows_safe_div(bar_range - body, bar_range, 0.5), 0.5)
+
+    return f
+
+
+def gap_and_go_features_bulk(opens, highs, lows, closes, volumes) -> Dict[str, np.ndarray]:
+    f = {}
+    n = closes.shape[1]
+
+    if n >= 2:
+        gap = opens[:, 0] - closes[:, 1]
+        gap_pct = _rows_safe_div(gap, closes[:, 1], 0)
+    else:
+        gap = gap_pct = _rows_const(closes, 0)
+    f['gap_size_pct'] = gap_pct
+
+    atr = _rows_atr(highs, lows, closes)
+    f['gap_vs_atr'] = _rows_safe_div(np.abs(gap), atr, 0)
+
+    bull_fill = _rows_safe_div(np.maximum(0, opens[:, 0] - lows[:, 0]), gap, 0)
+    bear_fill = _rows_safe_div(np.maximum(0, highs[:, 0] - opens[:, 0]), np.abs(gap), 0)
+    f['gap_fill_pct'] = np.where(gap > 0, bull_fill, np.where(gap < 0, bear_fill, 0))
+
+    f['post_gap_momentum'] = np.where(
+        gap_pct > 0, _rows_safe_div(closes[:, 0] - opens[:, 0], opens[:, 0], 0),
+        np.where(gap_pct < 0, _rows_safe_div(opens[:, 0] - closes[:, 0], opens[:, 0], 0), 0))
+
+    if n >= 10:
+        f['gap_vol_ratio'] = _rows_safe_div(volumes[:, 0], np.mean(volumes[:, 1:10], axis=1), 1.0)
+    else:
+        f['gap_vol_ratio'] = _rows_const(closes, 1.0)
+
+    if n >= 2:
+        prior_range = highs[:, 1] - lows[:, 1]
+        f['gap_vs_prior_range'] = np.where(prior_range > 0, _rows_safe_div(np.abs(gap), prior_range, 0), 0)
+    else:
+        f['gap_vs_prior_range'] = _rows_const(closes, 0)
+
+    return f
+
+
+def range_features_bulk(opens, highs, lows, closes, volumes) -> Dict[str, np.ndarray]:
+    f = {}
+    n = closes.shape[1]
+    lookback = min(30, n)
+    h, l, c = highs[:, :lookback], lows[:, :lookback], closes[:, :lookback]
+
+    range_high = np.max(h, axis=1)
+    range_low = np.min(l, axis=1)
+    range_width = range_high - range_low
+    f['range_width_pct'] = _rows_safe_div(range_width, np.mean(c, axis=1), 0)
+    f['range_position'] = _rows_safe_div(c[:, 0] - range_low, range_width, 0.5)
+
+    tolerance = range_width * 0.1
+    f['support_touches'] = np.sum(l < (range_low + tolerance)[:, None], axis=1) / lookback
+    f['resistance_touches'] = np.sum(h > (range_high - tolerance)[:, None], axis=1) / lookback
+
+    inside = (l >= (range_low - tolerance)[:, None]) & (h <= (range_high + tolerance)[:, None])
+    f['range_duration'] = np.sum(inside, axis=1) / lookback
+
+    if lookback >= 10 and lookback - 1 > 2:
+        wide = (range_width > 0)[:, None]
+        positions = np.where(wide, (c[:, :-1] - range_low[:, None]) / np.where(wide, range_width[:, None], 1), 0.5)
+        returns = _rows_div_pos(c[:, :-1] - c[:, 1:], c[:, 1:])
+        usable = (np.std(positions, axis=1) > 0) & (np.std(returns, axis=1) > 0)
+        p = positions.astype(np.float64) - np.mean(positions, axis=1, dtype=np.float64)[:, None]
+        r = returns.astype(np.float64) - np.mean(returns, axis=1, dtype=np.float64)[:, None]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            corr = np.sum(p * r, axis=1) / np.sqrt(np.sum(p * p, axis=1) * np.sum(r * r, axis=1))
+        f['mean_revert_str'] = np.where(usable, -corr, 0)
+    else:
+        f['mean_revert_str'] = _rows_const(closes, 0)
+
+    return f
+
+
+def reversal_features_bulk(opens, highs, lows, closes, volumes) -> Dict[str, np.ndarray]:
+    f = {}
+    n = closes.shape[1]
+    o0, h0, l0, c0 = opens[:, 0], highs[:, 0], lows[:, 0], closes[:, 0]
+
+    if n >= 11:
+        f['prior_trend'] = _rows_safe_div(closes[:, 1] - closes[:, 10], closes[:, 10], 0)
+    else:
+        f['prior_trend'] = _rows_const(closes, 0)
+
+    if n >= 10:
+        f['vol_exhaustion'] = _rows_safe_div(np.mean(volumes[:, :5], axis=1),
+                                             np.mean(volumes[:, 5:10], axis=1), 1.0)
+    else:
+        f['vol_exhaustion'] = _rows_const(closes, 1.0)
+
+    body = np.abs(c0 - o0)
+    bar_range = h0 - l0
+    lower_wick = np.minimum(o0, c0) - l0
+    upper_wick = h0 - np.maximum(o0, c0)
+    hammer = (lower_wick > 2 * body) & (upper_wick < body)
+    star = (upper_wick > 2 * body) & (lower_wick < body)
+    f['reversal_candle'] = np.where(bar_range > 0, np.where(hammer, 1.0, np.where(star, -1.0, 0)), 0)
+
+    if n >= 20:
+        rsi_now = _rows_rsi(closes)
+        rsi_10ago = _rows_rsi(closes[:, 10:])
+        f['bull_divergence'] = ((c0 < closes[:, 10]) & (rsi_now > rsi_10ago)).astype(np.float64)
+        f['bear_divergence'] = ((c0 > closes[:, 10]) & (rsi_now < rsi_10ago)).astype(np.float64)
+    else:
+        f['bull_divergence'] = _rows_const(closes, 0.0)
+        f['bear_divergence'] = _rows_const(closes, 0.0)
+
+    if n >= 20:
+        mean_20 = np.mean(closes[:, :20], axis=1)
+        std_20 = np.std(closes[:, :20], axis=1)
+        f['extension_zscore'] = np.where(std_20 > 0, _rows_safe_div(c0 - mean_20, std_20, 0), 0)
+    else:
+        f['extension_zscore'] = _rows_const(closes, 0)
+
+    return f
+
+
+def trend_continuation_features_bulk(opens, highs, lows, closes, volumes) -> Dict[str, np.ndarray]:
+    f = {}
+    n = closes.shape[1]
+
+    if n >= 15:
+        recent_high = np.max(highs[:, :10], axis=1)
+        trend_range = recent_high - np.min(lows[:, :10], axis=1)
+        f['pullback_depth'] = np.where(trend_range > 0,
+                                       _rows_safe_div(recent_high - closes[:, 0], trend_range, 0), 0)
+    else:
+        f['pullback_depth'] = _rows_const(closes, 0)
+
+    m = min(n - 1, 20)
+    f['trend_duration'] = _rows_streak((highs[:, :m] > highs[:, 1:m + 1]) & (lows[:, :m] > lows[:, 1:m + 1]))
+
+    if n >= 8:
+        f['pullback_vol_ratio'] = _rows_safe_div(np.mean(volumes[:, :3], axis=1),
+                                                 np.mean(volumes[:, 3:8], axis=1), 1.0)
+    else:
+        f['pullback_vol_ratio'] = _rows_const(closes, 1.0)
+
+    bar_range = highs[:, 0] - lows[:, 0]
+    f['bounce_strength'] = np.where(bar_range > 0,
+                                    _rows_safe_div(closes[:, 0] - opens[:, 0], bar_range, 0), 0)
+
+    if n >= 10:
+        # Closed-form least-squares slope (what np.polyfit(x, y, 1)[0] solves)
+        y = closes[:, :min(n, 20)]
+        x = np.arange(y.shape[1], dtype=np.float64)
+        x -= x.mean()
+        y64 = y.astype(np.float64)
+        slope = (y64 - y64.mean(axis=1, keepdims=True)) @ x / np.dot(x, x)
+        f['trend_angle'] = _rows_safe_div(slope, np.mean(y, axis=1), 0) * 100
+    else:
+        f['trend_angle'] = _rows_const(closes, 0)
+
+    return f
+
+
+def orb_features_bulk(opens, highs, lows, closes, volumes) -> Dict[str, np.ndarray]:
+    f = {}
+    n = closes.shape[1]
+    c0 = closes[:, 0]
+
+    if n >= 2:
+        or_high, or_low = highs[:, 1], lows[:, 1]
+        or_range = or_high - or_low
+    else:
+        or_high, or_low = highs[:, 0], lows[:, 0]
+        or_range = _rows_const(closes, 0)
+    has_range = or_range > 0
+
+    f['or_range_size'] = np.where(c0 > 0, _rows_safe_div(or_range, c0, 0), 0)
+
+    f['break_distance'] = np.where(
+        c0 > or_high, np.where(has_range, _rows_safe_div(c0 - or_high, or_range, 0), 0),
+        np.where(c0 < or_low, np.where(has_range, _rows_safe_div(or_low - c0, or_range, 0), 0), 0))
+
+    if n >= 2:
+        f['or_vol_ratio'] = _rows_safe_div(volumes[:, 0], volumes[:, 1], 1.0)
+    else:
+        f['or_vol_ratio'] = _rows_const(closes, 1.0)
+
+    atr = _rows_atr(highs, lows, closes)
+    f['or_vs_atr'] = np.where(atr > 0, _rows_safe_div(or_range, atr, 1.0), 1.0)
+
+    f['close_vs_or'] = np.where(has_range, _rows_safe_div(c0 - or_low, or_range, 0.5), 0.5)
+
+    if n >= 3:
+        f['follow_through'] = _rows_safe_div(c0 - closes[:, 1], closes[:, 1], 0)
+    else:
+        f['follow_through'] = _rows_const(closes, 0)
+
+    return f
+
+
+def vwap_features_bulk(opens, highs, lows, closes, volumes) -> Dict[str, np.ndarray]:
+    f = {}
+    n = closes.shape[1]
+    lookback = min(20, n)
+    h, l, c, v = highs[:, :lookback], lows[:, :lookback], closes[:, :lookback], volumes[:, :lookback]
+
+    tp = (h + l + c) / 3
+    cum_tp_vol = np.cumsum(tp * v, axis=1)
+    cum_vol = np.cumsum(v, axis=1)
+    has_vol = cum_vol > 0
+    vwap_values = np.where(has_vol, cum_tp_vol / np.where(has_vol, cum_vol, 1), c)
+    vwap_now = vwap_values[:, 0]
+
+    f['vwap_distance'] = _rows_safe_div(c[:, 0] - vwap_now, vwap_now, 0)
+
+    if lookback >= 5:
+        f['vwap_slope'] = _rows_safe_div(vwap_now - vwap_values[:, 4], vwap_values[:, 4], 0)
+    else:
+        f['vwap_slope'] = _rows_const(closes, 0)
+
+    f['above_vwap_ratio'] = np.sum(c > vwap_values, axis=1) / lookback
+
+    tolerance = np.mean(h - l, axis=1) * 0.3
+    near = np.abs(c - vwap_values) < tolerance[:, None]
+    n_near = np.sum(near, axis=1)
+    f['vwap_touches'] = n_near / lookback
+
+    n_away = lookback - n_near
+    near_mean = np.sum(np.where(near, v, 0), axis=1) / np.maximum(n_near, 1)
+    away_mean = np.sum(np.where(near, 0, v), axis=1) / np.maximum(n_away, 1)
+    f['vol_at_vwap'] = np.where((n_near > 0) & (n_away > 0), _rows_safe_div(near_mean, away_mean, 1.0), 1.0)
+
+    return f
+
+
+def mean_reversion_features_bulk(opens, highs, lows, closes, volumes) -> Dict[str, np.ndarray]:
+    f = {}
+    n = closes.shape[1]
+    lookback = min(20, n)
+    c0 = closes[:, 0]
+
+    if lookback >= 10:
+        mean_p = np.mean(closes[:, :lookback], axis=1)
+        std_p = np.std(closes[:, :lookback], axis=1)
+        f['zscore'] = np.where(std_p > 0, _rows_safe_div(c0 - mean_p, std_p, 0), 0)
+    else:
+        f['zscore'] = _rows_const(closes, 0)
+
+    if n >= 40:
+        # Same probe points as the scalar `while` loop (every 5th bar from 1)
+        revert_sum = np.zeros(len(closes))
+        revert_cnt = np.zeros(len(closes))
+        for i in range(1, n - 20, 5):
+            local_mean = np.mean(closes[:, i:i + 20], axis=1)
+            local_std = np.std(closes[:, i:i + 20], axis=1)
+            pending = (local_std > 0) & (np.abs(closes[:, i] - local_mean) > 1.5 * local_std)
+            for j in range(i - 1, max(i - 10, 0), -1):
+                hit = pending & (np.abs(closes[:, j] - local_mean) < 0.5 * local_std)
+                revert_sum += np.where(hit, i - j, 0)
+                revert_cnt += hit
+                pending &= ~hit
+        f['reversion_speed'] = np.where(revert_cnt > 0, revert_sum / np.maximum(revert_cnt, 1), 5.0)
+    else:
+        f['reversion_speed'] = _rows_const(closes, 5.0)
+
+    if lookback >= 10:
+        extreme = np.abs(closes[:, :min(n, 10)] - mean_p[:, None]) > (1.5 * std_p)[:, None]
+        f['extreme_duration'] = np.where(std_p > 0, _rows_streak(extreme), 0)
+    else:
+        f['extreme_duration'] = _rows_const(closes, 0)
+
+    if n >= 10:
+        f['vol_at_extreme'] = _rows_safe_div(volumes[:, 0], np.mean(volumes[:, 1:10], axis=1), 1.0)
+    else:
+        f['vol_at_extreme'] = _rows_const(closes, 1.0)
+
+    if n >= 5:
+        recent_change = _rows_div_pos(np.abs(c0 - closes[:, 2]), closes[:, 2])
+        prior_change = _rows_div_pos(np.abs(closes[:, 2] - closes[:, 4]), closes[:, 4])
+        f['change_deceleration'] = np.where(
+            prior_change > 0, _rows_safe_div(prior_change - recent_change, prior_change, 0), 0)
+    else:
+        f['change_deceleration'] = _rows_const(closes, 0)
+
+    return f
+
+
 # ========================================================================
 # REGISTRY & API
 # ========================================================================
@@ -683,13 +1138,32 @@ SETUP_FEATURE_EXTRACTORS = {
     'MEAN_REVERSION': mean_reversion_features,
 }
 
+SETUP_FEATURE_EXTRACTORS_BULK = {
+    'MOMENTUM': momentum_features_bulk,
+    'SCALP': scalp_features_bulk,
+    'BREAKOUT': breakout_features_bulk,
+    'GAP_AND_GO': gap_and_go_features_bulk,
+    'RANGE': range_features_bulk,
+    'REVERSAL': reversal_features_bulk,
+    'TREND_CONTINUATION': trend_continuation_features_bulk,
+    'ORB': orb_features_bulk,
+    'VWAP': vwap_features_bulk,
+    'MEAN_REVERSION': mean_reversion_features_bulk,
+}
+
 # Import short setup extractors and merge
 try:
-    from services.ai_modules.short_setup_features import SHORT_SETUP_FEATURE_EXTRACTORS
+    from services.ai_modules.short_setup_features import (
+        SHORT_SETUP_FEATURE_EXTRACTORS, SHORT_SETUP_FEATURE_EXTRACTORS_BULK,
+    )
     SETUP_FEATURE_EXTRACTORS.update(SHORT_SETUP_FEATURE_EXTRACTORS)
+    SETUP_FEATURE_EXTRACTORS_BULK.update(SHORT_SETUP_FEATURE_EXTRACTORS_BULK)
 except ImportError:
     pass
 
+# Rows per bulk pass — bounds the gathered window copies to a few MB.
+_BULK_CHUNK_ROWS = 8192
+
 
 def get_setup_features(setup_type: str, opens, highs, lows, closes, volumes) -> Dict[str, float]:
     """
@@ -719,3 +1193,53 @@ def get_setup_feature_names(setup_type: str) -> List[str]:
     dummy = np.ones(50)
     features = get_setup_features(setup_type, dummy, dummy, dummy, dummy, dummy)
     return sorted(features.keys())
+
+
+def _features_matrix(extractor, bulk_extractor, names: List[str], opens, highs, lows, closes, volumes,
+                    rows: Optional[np.ndarray] = None) -> np.ndarray:
+    """(len(rows), len(names)) float32 matrix of one setup's features.
+
+    The OHLCV args are (windows, window) matrices (most-recent-first, e.g.
+    reversed `sliding_window_view`s); `rows` selects which windows to
+    extract (default all). Columns follow `names`; NaN/Inf become 0 like
+    `get_setup_features`. A chunk the bulk extractor can't handle falls
+    back to the scalar extractor row by row."""
+    if rows is None:
+        rows = np.arange(len(closes))
+    out = np.zeros((len(rows), len(names)), dtype=np.float32)
+    if not names or (bulk_extractor is None and extractor is None):
+        return out
+    for start in range(0, len(rows), _BULK_CHUNK_ROWS):
+        sel = rows[start:start + _BULK_CHUNK_ROWS]
+        o, h, l, c, v = (np.ascontiguousarray(a[sel]) for a in (opens, highs, lows, closes, volumes))
+        block = out[start:start + len(sel)]
+        try:
+            if bulk_extractor is None:
+                raise KeyError("no bulk extractor")
+            cols = bulk_extractor(o, h, l, c, v)
+            with np.errstate(over="ignore"):
+                for j, name in enumerate(names):
+                    block[:, j] = np.broadcast_to(cols[name], (len(sel),))
+        except Exception as e:
+            logger.debug(f"Bulk setup features fell back to per-row: {e}")
+            for r in range(len(sel)):
+                try:
+                    feats = extractor(o[r], h[r], l[r], c[r], v[r])
+                except Exception:
+                    feats = {}
+                block[r] = [feats.get(name, 0.0) for name in names]
+    out[~np.isfinite(out)] = 0.0
+    return out
+
+
+def get_setup_features_bulk(setup_type: str, opens, highs, lows, closes, volumes,
+                            rows: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Matrix-wide `get_setup_features`: one row per window in `rows`, columns
+    in `get_setup_feature_names(setup_type)` order, float32.
+    """
+    key = setup_type.upper()
+    return _features_matrix(
+        SETUP_FEATURE_EXTRACTORS.get(key), SETUP_FEATURE_EXTRACTORS_BULK.get(key),
+        get_setup_feature_names(setup_type), opens, highs, lows, closes, volumes, rows,
+    )
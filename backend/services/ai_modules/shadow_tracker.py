@@ -141,6 +141,11 @@ class ShadowTracker:
             self._decisions_col.create_index([("outcome_tracked", 1)])
             self._decisions_col.create_index([("was_executed", 1)])
             self._decisions_col.create_index([("created_at", -1)])
+            # Window scans (diagnostics raw tail, recent-decisions rail)
+            # filter / sort on trigger_time without a symbol.
+            self._decisions_col.create_index([("trigger_time", -1)])
+            from services import decision_rollups
+            decision_rollups.ensure_indexes(db)
             
     def set_alpaca_service(self, alpaca_service):
         """Set Alpaca service for price tracking (legacy — superseded
@@ -231,6 +236,9 @@ class ShadowTracker:
             _doc = decision.to_dict()
             _doc.update(_stamps(_doc.get("created_at")))
             self._decisions_col.insert_one(_doc)
+            # Per-day Diagnostics vote/funnel counters (best-effort).
+            from services import decision_rollups
+            decision_rollups.record_decision(self._db, _doc)
             logger.info(f"Shadow: Logged decision for {symbol} - {combined_recommendation} (executed={was_executed})")
             
         return decision
@@ -307,14 +315,26 @@ class ShadowTracker:
         if self._decisions_col is None or not decision_id:
             return {"success": False, "error": "no_db_or_id"}
         try:
+            fields = {
+                "was_executed": True,
+                "trade_id": trade_id or "",
+                "execution_reason": "bot_fired",
+            }
+            # The flip is conditional on the previous state, so of two
+            # concurrent calls only the one that actually flips it bumps the
+            # day's fired_via_shadow counter.
             res = self._decisions_col.update_one(
-                {"id": decision_id},
-                {"$set": {
-                    "was_executed": True,
-                    "trade_id": trade_id or "",
-                    "execution_reason": "bot_fired",
-                }}
+                {"id": decision_id, "was_executed": {"$ne": True}}, {"$set": fields},
             )
+            if res.matched_count > 0:
+                doc = self._decisions_col.find_one(
+                    {"id": decision_id}, {"_id": 0, "trigger_time": 1},
+                )
+                from services import decision_rollups
+                decision_rollups.record_executed(self._db, (doc or {}).get("trigger_time"))
+            else:
+                # Already executed (or unknown id): still link the trade.
+                res = self._decisions_col.update_one({"id": decision_id}, {"$set": fields})
             # Bust the stats cache so the next /shadow/stats reflects the fill.
             if hasattr(self, "_stats_cache_time"):
                 self._stats_cache_time = 0
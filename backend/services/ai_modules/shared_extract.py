@@ -0,0 +1,241 @@
+"""
+Shared-Memory Extraction Transport
+==================================
+Moves a training stream batch between the parent and the extraction
+`ProcessPoolExecutor` through shared memory instead of pickles.
+
+Why?
+    `stream_load_and_extract` and the setup phases submit
+    `(symbol, bars, ...)` tuples, so each symbol's whole `List[Dict]` bar
+    history is pickled into the child and every `(X, y)` result is pickled
+    back — per batch, the bars exist once in the parent, once as pickle
+    bytes and once again in the worker, which is the RSS duplication
+    `_check_vstack_memory` ends up guarding against.
+
+How
+    * `SharedBatch.create(batch_bars, plan)` packs every plain bar list
+      (and every `ColumnarBars`) of the batch into one
+      `shared_bars.SharedBarBlock` — OHLCV columns in
+      `columnar_bars.BAR_FIELDS` order, dates as the timestamp column, the
+      block's `offsets` as the symbol offset table. Tasks carry a
+      `BarRef` (block meta + symbol) instead of the bars; `run_task`
+      attaches the block by name and hands the worker a `ColumnarBars`
+      over its slice — zero-copy, same sequence API, and `bar_column()`
+      reads columns straight out of the segment.
+    * `plan(symbol, n_bars)` sizes each symbol's results as
+      `{key: (max_rows, cols)}`; the batch preallocates one float32
+      `SharedArray` arena with an `X` (max_rows × cols) and a `y`
+      (max_rows) region per slot. Workers write their rows in place and
+      return only the row counts (`SharedResult`); results that don't fit
+      their slot spill back as arrays. `collect()` copies the used rows
+      out before `close()` unlinks both segments.
+    * Sizes are checked against free /dev/shm first (containers often
+      mount 64 MB); whatever doesn't fit — or any bar list that isn't
+      plain — keeps the pickled path, so results are identical either way.
+
+Knobs (env)
+    TRAIN_SHM_TRANSPORT   "false" → tasks carry pickled bars / results
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+from typing import Any, Callable, Dict, Hashable, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from services.ai_modules.columnar_bars import BAR_FIELDS, ColumnarBars, from_bars
+from services.shared_bars import SharedArray, SharedBarBlock, shm_free_bytes
+
+logger = logging.getLogger(__name__)
+
+# Fraction of free /dev/shm one batch may claim.
+_SHM_BUDGET = 0.8
+
+Plan = Callable[[str, int], Dict[Hashable, Tuple[int, int]]]
+
+
+def is_enabled() -> bool:
+    val = os.environ.get("TRAIN_SHM_TRANSPORT", "true").strip().lower()
+    return val not in ("0", "false", "no", "off")
+
+
+class BarRef(NamedTuple):
+    """Task-arg stand-in for one symbol's bars inside a `SharedBarBlock`."""
+    meta: Dict[str, Any]
+    key: str
+
+
+class OutRef(NamedTuple):
+    """A symbol's output slots: arena meta + {key: (offset, max_rows, cols)}."""
+    meta: Dict[str, Any]
+    slots: Dict[Hashable, Tuple[int, int, int]]
+
+
+class SharedResult(NamedTuple):
+    """Worker return value when it wrote into the arena."""
+    counts: Dict[Hashable, int]
+    spill: Dict[Hashable, Tuple[np.ndarray, np.ndarray]]
+
+
+# ─── Worker side ────────────────────────────────────────────────────────────
+
+def open_bars(ref: Any) -> Tuple[Any, Optional[SharedBarBlock]]:
+    """`(bars, block)` — a `ColumnarBars` over the attached block for a
+    `BarRef`; anything else is already the bars."""
+    if not isinstance(ref, BarRef):
+        return ref, None
+    block = SharedBarBlock.attach(ref.meta)
+    matrix, dates, start, stop = block.series(ref.key)
+    return ColumnarBars(matrix, dates, start, stop), block
+
+
+def _write_slot(flat: np.ndarray, slot: Tuple[int, int, int], X: np.ndarray, y: np.ndarray) -> bool:
+    off, max_rows, cols = slot
+    k = len(X)
+    if X.ndim != 2 or X.shape[1] != cols or k > max_rows or len(y) != k:
+        return False
+    flat[off:off + k * cols].reshape(k, cols)[:] = X
+    y_off = off + max_rows * cols
+    flat[y_off:y_off + k] = y
+    return True
+
+
+def run_task(worker: Callable, args: tuple, out: Optional[OutRef] = None):
+    """Run `worker(args)` with a `BarRef` in `args[1]` resolved to bars.
+
+    With `out`, the worker's `{key: (X, y)}` result is written into the
+    arena and a `SharedResult` is returned instead of the arrays."""
+    bars, block = open_bars(args[1])
+    arena = None
+    try:
+        res = worker((args[0], bars) + tuple(args[2:]))
+        if out is None or not res:
+            return res
+        arena = SharedArray.attach(out.meta)
+        counts: Dict[Hashable, int] = {}
+        spill: Dict[Hashable, Tuple[np.ndarray, np.ndarray]] = {}
+        for key, (X, y) in res.items():
+            slot = out.slots.get(key)
+            if slot is not None and _write_slot(arena.array, slot, X, y):
+                counts[key] = len(X)
+            else:
+                spill[key] = (X, y)
+        return SharedResult(counts, spill)
+    finally:
+        bars = None
+        if arena is not None:
+            arena.close()
+        if block is not None:
+            block.close()
+
+
+# ─── Parent side ────────────────────────────────────────────────────────────
+
+def _columns(bars: Any) -> Optional[Tuple[Dict[str, np.ndarray], np.ndarray]]:
+    if isinstance(bars, ColumnarBars):
+        return {f: bars.column(f) for f in BAR_FIELDS}, np.asarray(bars.dates())
+    packed = from_bars(bars)
+    if packed is None:
+        return None
+    matrix, dates = packed
+    return dict(zip(BAR_FIELDS, matrix)), dates
+
+
+class SharedBatch:
+    """Parent-side handle for one batch: bar block, output arena, slot table.
+
+    Inactive batches (transport disabled, nothing packable, no room in
+    /dev/shm) pass tasks and results through unchanged."""
+
+    def __init__(self, block: Optional[SharedBarBlock] = None, arena: Optional[SharedArray] = None,
+                 slots: Optional[Dict[str, Dict[Hashable, Tuple[int, int, int]]]] = None) -> None:
+        self.block = block
+        self.arena = arena
+        self.slots = slots or {}
+
+    @classmethod
+    def create(cls, batch_bars: Dict[str, Any], plan: Optional[Plan] = None) -> "SharedBatch":
+        """Pack `{symbol: bars}`; `plan(symbol, n_bars)` → `{key: (max_rows, cols)}`."""
+        if not is_enabled() or not batch_bars:
+            return cls()
+        series = []
+        total = 0
+        ts_width = 1
+        for sym, bars in batch_bars.items():
+            packed = _columns(bars)
+            if packed is None or not len(packed[1]):
+                continue
+            cols, dates = packed
+            series.append((sym, dates, cols))
+            total += len(dates)
+            ts_width = max(ts_width, dates.dtype.itemsize // 4)
+        if not series:
+            return cls()
+
+        free = shm_free_bytes()
+        budget = float("inf") if free is None else free * _SHM_BUDGET
+        bar_bytes = SharedBarBlock.nbytes(len(BAR_FIELDS), total, ts_width)
+        if bar_bytes > budget:
+            logger.info(f"[shared_extract] batch bars ({bar_bytes >> 20} MB) exceed /dev/shm budget — pickling")
+            return cls()
+
+        slots: Dict[str, Dict[Hashable, Tuple[int, int, int]]] = {}
+        arena_len = 0
+        if plan is not None:
+            for sym, dates, _ in series:
+                sym_slots = {}
+                for key, (max_rows, n_cols) in plan(sym, len(dates)).items():
+                    max_rows = max(0, int(max_rows))
+                    if max_rows and n_cols:
+                        sym_slots[key] = (arena_len, max_rows, int(n_cols))
+                        arena_len += max_rows * (int(n_cols) + 1)
+                if sym_slots:
+                    slots[sym] = sym_slots
+            if bar_bytes + 4 * arena_len > budget:
+                logger.info(f"[shared_extract] output arena ({(4 * arena_len) >> 20} MB) exceeds "
+                            f"/dev/shm budget — results come back pickled")
+                slots, arena_len = {}, 0
+
+        block = SharedBarBlock.create(series, BAR_FIELDS)
+        arena = SharedArray.create((arena_len,), np.float32) if arena_len else None
+        return cls(block, arena, slots)
+
+    # ---------- task args ------------------------------------------------
+    def args(self, task: tuple) -> tuple:
+        """`task` with its bars (index 1) swapped for a `BarRef` when packed."""
+        if self.block is None or task[0] not in self.block.meta["offsets"]:
+            return task
+        return (task[0], BarRef(self.block.meta, task[0])) + tuple(task[2:])
+
+    def out(self, symbol: str) -> Optional[OutRef]:
+        if self.arena is None or symbol not in self.slots:
+            return None
+        return OutRef(self.arena.meta, self.slots[symbol])
+
+    # ---------- results --------------------------------------------------
+    def collect(self, symbol: str, res: Any) -> Any:
+        """The worker's `{key: (X, y)}`, copied out of the arena if needed."""
+        if not isinstance(res, SharedResult):
+            return res
+        flat = self.arena.array
+        out = dict(res.spill)
+        for key, k in res.counts.items():
+            off, max_rows, cols = self.slots[symbol][key]
+            y_off = off + max_rows * cols
+            out[key] = (flat[off:off + k * cols].reshape(k, cols).copy(), flat[y_off:y_off + k].copy())
+        return out
+
+    # ---------- lifecycle -----------------------------------------------
+    def close(self) -> None:
+        for seg in (self.arena, self.block):
+            if seg is not None:
+                seg.close()
+        self.arena = self.block = None
+
+    def __enter__(self) -> "SharedBatch":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
@@ -23,7 +23,7 @@ Setup types:
 """
 
 import numpy as np
-from typing import Dict, List
+from typing import Dict, List, Optional
 import logging
 
 logger = logging.getLogger(__name__)
@@ -80,6 +80,68 @@ def _compute_rsi(closes, period=14):
     return 100 - (100 / (1 + rs))
 
 
+# Row-wise twins for the *_bulk extractors (see setup_features.py): inputs
+# are (rows, window) matrices, most-recent-first along axis 1.
+
+def _rows_const(ref: np.ndarray, value: float) -> np.ndarray:
+    return np.full(len(ref), value, dtype=np.float64)
+
+
+def _rows_safe_div(a, b, default=0.0):
+    a, b = np.broadcast_arrays(a, b)
+    ok = (b != 0) & np.isfinite(b)
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        r = np.where(ok, a / np.where(ok, b, 1), default)
+    return np.where(np.isfinite(r), r, default)
+
+
+def _rows_div_pos(a, b):
+    pos = b > 0
+    return np.where(pos, a / np.where(pos, b, 1), 0)
+
+
+def _rows_ema(data: np.ndarray, period: int) -> np.ndarray:
+    if data.shape[1] < period:
+        return data.mean(axis=1) if data.shape[1] > 0 else _rows_const(data, 0)
+    m = 2 / (period + 1)
+    e = data[:, -1]
+    for k in range(data.shape[1] - 2, -1, -1):
+        e = (data[:, k] * m) + (e * (1 - m))
+    return e
+
+
+def _rows_atr(highs, lows, closes, period=14):
+    if closes.shape[1] < period + 1:
+        if highs.shape[1] >= period:
+            return np.mean(highs[:, :period] - lows[:, :period], axis=1)
+        return _rows_const(closes, 0.01)
+    h, l, pc = highs[:, :period], lows[:, :period], closes[:, 1:period + 1]
+    tr = np.maximum(np.maximum(h - l, np.abs(h - pc)), np.abs(l - pc))
+    return np.mean(tr, axis=1)
+
+
+def _rows_rsi(closes, period=14):
+    if closes.shape[1] < period + 1:
+        return _rows_const(closes, 50.0)
+    diff = closes[:, :period] - closes[:, 1:period + 1]
+    avg_gain = np.mean(np.where(diff > 0, diff, 0), axis=1, dtype=np.float64)
+    avg_loss = np.mean(np.where(diff > 0, 0, np.abs(diff)), axis=1, dtype=np.float64)
+    rs = avg_gain / np.where(avg_loss == 0, 1, avg_loss)
+    return np.where(avg_loss == 0, 100.0, 100 - (100 / (1 + rs)))
+
+
+def _rows_streak(cond: np.ndarray) -> np.ndarray:
+    return np.cumprod(cond, axis=1).sum(axis=1)
+
+
+def _rows_sum_where(cond: np.ndarray, values: np.ndarray) -> np.ndarray:
+    """`sum(values[i] for i in range(k) if cond[i])` per row, same order."""
+    total = np.zeros(len(values), dtype=values.dtype)
+    for k in range(cond.shape[1]):
+        total = total + np.where(cond[:, k], values[:, k], 0)
+    return total
+
+
 # ========================================================================
 # SHORT-SPECIFIC FEATURE EXTRACTORS
 # ========================================================================
@@ -661,6 +723,381 @@ def short_range_features(opens, highs, lows, closes, volumes) -> Dict[str, float
     return f
 
 
+# ========================================================================
+# BULK (MATRIX-WIDE) EXTRACTORS
+# Row-wise twins of the extractors above; feature_name -> (rows,) array.
+# ========================================================================
+
+def short_breakdown_features_bulk(opens, highs, lows, closes, volumes) -> Dict[str, np.ndarray]:
+    f = {}
+    n = closes.shape[1]
+
+    atr = _rows_atr(highs, lows, closes)
+
+    if n >= 20:
+        low_20 = np.min(lows[:, :20], axis=1)
+        f['dist_from_support'] = _rows_safe_div(closes[:, 0] - low_20, low_20, 0)
+    else:
+        f['dist_from_support'] = _rows_const(closes, 0)
+
+    m = min(n - 1, 15)
+    f['lower_low_streak'] = _rows_streak(lows[:, :m] < lows[:, 1:m + 1])
+    f['lower_high_streak'] = _rows_streak(highs[:, :m] < highs[:, 1:m + 1])
+
+    if n >= 10:
+        red = closes[:, :10] < opens[:, :10]
+        down_vol = _rows_sum_where(red, volumes[:, :10])
+        up_vol = _rows_sum_where(~red, volumes[:, :10])
+        f['down_vs_up_volume'] = _rows_safe_div(down_vol, np.maximum(up_vol, 1), 1.0)
+    else:
+        f['down_vs_up_volume'] = _rows_const(closes, 1.0)
+
+    f['breakdown_magnitude'] = np.where(atr > 0, _rows_safe_div(lows[:, 0] - closes[:, 0], atr, 0) * -1, 0)
+
+    bar_range = highs[:, 0] - lows[:, 0]
+    upper_wick = highs[:, 0] - np.maximum(opens[:, 0], closes[:, 0])
+    f['upper_wick_ratio'] = np.where(bar_range > 0, _rows_safe_div(upper_wick, bar_range, 0), 0)
+
+    return f
+
+
+def short_momentum_features_bulk(opens, highs, lows, closes, volumes) -> Dict[str, np.ndarray]:
+    f = {}
+    n = closes.shape[1]
+    c0 = closes[:, 0]
+
+    ret3 = _rows_div_pos(c0 - closes[:, 3], closes[:, 3]) if n > 3 else 0
+    ret10 = _rows_div_pos(c0 - closes[:, 10], closes[:, 10]) if n > 10 else 0
+    f['bearish_momentum_accel'] = ret10 - ret3 + _rows_const(closes, 0)
+
+    m = min(n - 1, 15)
+    f['down_streak'] = _rows_streak(closes[:, :m] < closes[:, 1:m + 1])
+
+    ema9 = _rows_ema(closes[:, :9], 9) if n >= 9 else c0
+    ema21 = _rows_ema(closes[:, :21], 21) if n >= 21 else c0
+    sma50 = np.mean(closes[:, :50], axis=1) if n >= 50 else c0
+
+    if n >= 50:
+        f['ema_stack_bearish'] = np.where((ema9 < ema21) & (ema21 < sma50), 1.0,
+                                          np.where(ema9 < ema21, 0.5, 0.0))
+    else:
+        f['ema_stack_bearish'] = _rows_const(closes, 0.0)
+
+    below_count = (c0 < ema9).astype(int) + (c0 < ema21) + (c0 < sma50)
+    f['below_ema_count'] = below_count / 3.0
+
+    if n >= 5:
+        red = closes[:, :5] < opens[:, :5]
+        down_vol = _rows_sum_where(red, volumes[:, :5])
+        up_vol = _rows_sum_where(~red, volumes[:, :5])
+        f['bearish_vol_alignment'] = _rows_safe_div(down_vol, np.maximum(up_vol, 1), 1.0)
+    else:
+        f['bearish_vol_alignment'] = _rows_const(closes, 1.0)
+
+    if n >= 20:
+        f['rsi_decline'] = (_rows_rsi(closes[:, 5:]) - _rows_rsi(closes)) / 100.0
+    else:
+        f['rsi_decline'] = _rows_const(closes, 0.0)
+
+    return f
+
+
+def short_reversal_features_bulk(opens, highs, lows, closes, volumes) -> Dict[str, np.ndarray]:
+    f = {}
+    n = closes.shape[1]
+    o0, h0, c0 = opens[:, 0], highs[:, 0], closes[:, 0]
+
+    rsi = _rows_rsi(closes) if n >= 15 else _rows_const(closes, 50)
+    f['overbought_rsi'] = np.maximum(0, rsi - 50) / 50.0
+
+    if n >= 10:
+        high_10 = np.max(highs[:, :10], axis=1)
+        f['dist_from_recent_high'] = _rows_safe_div(c0 - high_10, high_10, 0)
+    else:
+        f['dist_from_recent_high'] = _rows_const(closes, 0)
+
+    if n >= 2:
+        engulfing = ((closes[:, 1] > opens[:, 1]) & (c0 < o0)
+                     & (o0 >= closes[:, 1]) & (c0 <= opens[:, 1]))
+        f['bearish_engulfing'] = engulfing.astype(np.float64)
+    else:
+        f['bearish_engulfing'] = _rows_const(closes, 0.0)
+
+    bar_range = h0 - lows[:, 0]
+    upper_wick = h0 - np.maximum(o0, c0)
+    body = np.abs(c0 - o0)
+    f['shooting_star'] = ((bar_range > 0) & (upper_wick > 2 * body) & (c0 < o0)).astype(np.float64)
+
+    if n >= 10:
+        f['volume_climax'] = _rows_safe_div(volumes[:, 0], np.mean(volumes[:, 1:10], axis=1), 1.0)
+    else:
+        f['volume_climax'] = _rows_const(closes, 1.0)
+
+    if n >= 20:
+        near_high = c0 > np.percentile(closes[:, :20], 80, axis=1)
+        rsi_declining = _rows_rsi(closes) < _rows_rsi(closes[:, 5:])
+        f['bearish_divergence'] = (near_high & rsi_declining).astype(np.float64)
+    else:
+        f['bearish_divergence'] = _rows_const(closes, 0.0)
+
+    return f
+
+
+def short_gap_fade_features_bulk(opens, highs, lows, closes, volumes) -> Dict[str, np.ndarray]:
+    f = {}
+    n = closes.shape[1]
+    o0, c0 = opens[:, 0], closes[:, 0]
+
+    if n >= 2:
+        gap = o0 - closes[:, 1]
+        gap_pct = _rows_safe_div(gap, closes[:, 1], 0)
+    else:
+        gap = gap_pct = _rows_const(closes, 0)
+    f['gap_up_size'] = np.maximum(0, gap_pct)
+
+    f['gap_fill_pct'] = np.where(gap > 0, _rows_safe_div(o0 - c0, gap, 0), 0)
+
+    f['post_gap_bearish'] = ((c0 < o0) & (gap_pct > 0.005)).astype(np.float64)
+
+    atr = _rows_atr(highs, lows, closes)
+    if n >= 5:
+        f['gap_vs_atr'] = np.where(atr > 0, _rows_safe_div(np.abs(gap), atr, 0), 0)
+    else:
+        f['gap_vs_atr'] = _rows_const(closes, 0)
+
+    if n >= 2:
+        f['gap_rejection'] = ((gap_pct > 0.003) & (c0 < closes[:, 1])).astype(np.float64)
+    else:
+        f['gap_rejection'] = _rows_const(closes, 0.0)
+
+    if n >= 5:
+        f['fade_volume_ratio'] = _rows_safe_div(volumes[:, 0], np.mean(volumes[:, 1:5], axis=1), 1.0)
+    else:
+        f['fade_volume_ratio'] = _rows_const(closes, 1.0)
+
+    return f
+
+
+def short_vwap_features_bulk(opens, highs, lows, closes, volumes) -> Dict[str, np.ndarray]:
+    f = {}
+    n = closes.shape[1]
+    c0 = closes[:, 0]
+
+    if n >= 10:
+        cum_vol = np.cumsum(volumes, axis=1)
+        cum_pv = np.cumsum(closes * volumes, axis=1)
+        has_vol = cum_vol > 0
+        running = np.where(has_vol, cum_pv / np.where(has_vol, cum_vol, 1), closes)
+        vwap = np.where(has_vol[:, -1], running[:, -1], c0)
+
+        f['price_vs_vwap'] = _rows_safe_div(c0 - vwap, vwap, 0)
+
+        m = min(n, 20)
+        f['below_vwap_duration'] = np.sum(closes[:, :m] < running[:, :m], axis=1)
+
+        if n >= 20:
+            f['vwap_slope'] = _rows_safe_div(running[:, 4] - running[:, 14], running[:, 14], 0)
+        else:
+            f['vwap_slope'] = _rows_const(closes, 0)
+
+        below = closes[:, :m] < vwap[:, None]
+        vol_below = _rows_sum_where(below, volumes[:, :m])
+        vol_above = _rows_sum_where(~below, volumes[:, :m])
+        f['vol_below_vwap_ratio'] = _rows_safe_div(vol_below, np.maximum(vol_above, 1), 1.0)
+
+        atr = _rows_atr(highs, lows, closes)
+        near_vwap = (atr > 0) & (np.abs(highs[:, 0] - vwap) < atr * 0.3)
+        f['vwap_rejection'] = (near_vwap & (c0 < vwap)).astype(np.float64)
+    else:
+        f['price_vs_vwap'] = _rows_const(closes, 0)
+        f['below_vwap_duration'] = _rows_const(closes, 0)
+        f['vwap_slope'] = _rows_const(closes, 0)
+        f['vol_below_vwap_ratio'] = _rows_const(closes, 1.0)
+        f['vwap_rejection'] = _rows_const(closes, 0.0)
+
+    return f
+
+
+def short_mean_reversion_features_bulk(opens, highs, lows, closes, volumes) -> Dict[str, np.ndarray]:
+    f = {}
+    n = closes.shape[1]
+    lookback = min(20, n)
+    c0 = closes[:, 0]
+
+    if lookback >= 10:
+        mean_p = np.mean(closes[:, :lookback], axis=1)
+        std_p = np.std(closes[:, :lookback], axis=1)
+        f['zscore_high'] = np.where(std_p > 0, _rows_safe_div(c0 - mean_p, std_p, 0), 0)
+    else:
+        f['zscore_high'] = _rows_const(closes, 0)
+
+    if n >= 20:
+        sma20 = np.mean(closes[:, :20], axis=1)
+        std20 = np.std(closes[:, :20], axis=1)
+        upper_bb = sma20 + 2 * std20
+        f['bb_upper_position'] = np.where(std20 > 0, _rows_safe_div(c0 - sma20, upper_bb - sma20, 0), 0)
+    else:
+        f['bb_upper_position'] = _rows_const(closes, 0)
+
+    rsi = _rows_rsi(closes) if n >= 15 else _rows_const(closes, 50)
+    f['rsi_overbought_level'] = np.maximum(0, rsi - 50) / 50.0
+
+    if lookback >= 10:
+        stretched = closes[:, :min(n, 10)] > (mean_p + std_p)[:, None]
+        f['overextension_duration'] = np.where(std_p > 0, _rows_streak(stretched), 0)
+    else:
+        f['overextension_duration'] = _rows_const(closes, 0)
+
+    if n >= 5:
+        recent_change = _rows_div_pos(c0 - closes[:, 2], closes[:, 2])
+        prior_change = _rows_div_pos(closes[:, 2] - closes[:, 4], closes[:, 4])
+        f['momentum_deceleration'] = prior_change - recent_change
+    else:
+        f['momentum_deceleration'] = _rows_const(closes, 0)
+
+    if n >= 10:
+        f['vol_at_high'] = _rows_safe_div(volumes[:, 0], np.mean(volumes[:, 1:10], axis=1), 1.0)
+    else:
+        f['vol_at_high'] = _rows_const(closes, 1.0)
+
+    return f
+
+
+def short_scalp_features_bulk(opens, highs, lows, closes, volumes) -> Dict[str, np.ndarray]:
+    f = {}
+    n = closes.shape[1]
+    o0, l0, c0 = opens[:, 0], lows[:, 0], closes[:, 0]
+
+    bar_range = highs[:, 0] - l0
+    has_range = bar_range > 0
+    body = c0 - o0
+    f['bearish_body'] = np.where(has_range, _rows_safe_div(np.abs(np.minimum(0, body)), bar_range, 0.5), 0)
+
+    f['close_at_low'] = 1.0 - np.where(has_range, _rows_safe_div(c0 - l0, bar_range, 0.5), 0.5)
+
+    if n >= 3:
+        f['decline_speed'] = _rows_safe_div(np.maximum(0, o0 - c0), volumes[:, 0], 0) * 1e6
+    else:
+        f['decline_speed'] = _rows_const(closes, 0)
+
+    red = closes[:, :5] < opens[:, :5]
+    if n >= 5:
+        f['red_bar_ratio'] = np.sum(red, axis=1) / 5.0
+    else:
+        f['red_bar_ratio'] = _rows_const(closes, 0.5)
+
+    if n >= 10:
+        ranges = highs[:, :5] - lows[:, :5]
+        n_down = np.sum(red, axis=1)
+        n_up = 5 - n_down
+        avg_down = np.where(n_down > 0, _rows_sum_where(red, ranges) / np.maximum(n_down, 1).astype(ranges.dtype), 0)
+        avg_up = np.where(n_up > 0, _rows_sum_where(~red, ranges) / np.maximum(n_up, 1).astype(ranges.dtype), 0.01)
+        f['downside_vol_expansion'] = _rows_safe_div(avg_down, avg_up, 1.0)
+    else:
+        f['downside_vol_expansion'] = _rows_const(closes, 1.0)
+
+    total_wicks = np.where(has_range, bar_range - np.abs(body), 0)
+    f['spread_proxy'] = np.where(has_range, _rows_safe_div(total_wicks, bar_range, 0.5), 0.5)
+
+    return f
+
+
+def short_orb_features_bulk(opens, highs, lows, closes, volumes) -> Dict[str, np.ndarray]:
+    f = {}
+    n = closes.shape[1]
+    c0 = closes[:, 0]
+
+    or_bars = min(6, n)
+    if or_bars >= 3:
+        or_high = np.max(highs[:, :or_bars], axis=1)
+        or_low = np.min(lows[:, :or_bars], axis=1)
+        or_range = or_high - or_low
+        f['below_or_low'] = (c0 < or_low).astype(np.float64)
+        f['dist_below_or'] = np.where(or_range > 0, _rows_safe_div(or_low - c0, or_range, 0), 0)
+        f['or_range_pct'] = _rows_safe_div(or_range, c0, 0)
+        f['breakdown_vol_ratio'] = _rows_safe_div(volumes[:, 0], np.mean(volumes[:, :or_bars], axis=1), 1.0)
+    else:
+        f['below_or_low'] = _rows_const(closes, 0)
+        f['dist_below_or'] = _rows_const(closes, 0)
+        f['or_range_pct'] = _rows_const(closes, 0)
+        f['breakdown_vol_ratio'] = _rows_const(closes, 1.0)
+
+    # Oldest bar of the window (the scalar's n == 1 branch reads the same bar)
+    f['first_bar_bearish'] = (closes[:, -1] < opens[:, -1]).astype(np.float64)
+
+    return f
+
+
+def short_trend_features_bulk(opens, highs, lows, closes, volumes) -> Dict[str, np.ndarray]:
+    f = {}
+    n = closes.shape[1]
+    c0 = closes[:, 0]
+
+    if n >= 20:
+        f['bearish_trend_strength'] = np.sum(closes[:, :20] < opens[:, :20], axis=1) / 20.0
+    else:
+        f['bearish_trend_strength'] = _rows_const(closes, 0.5)
+
+    ema9 = _rows_ema(closes[:, :9], 9) if n >= 9 else c0
+    ema21 = _rows_ema(closes[:, :21], 21) if n >= 21 else c0
+    sma50 = np.mean(closes[:, :50], axis=1) if n >= 50 else c0
+    sma200 = np.mean(closes[:, :200], axis=1) if n >= 200 else c0
+    below_count = (c0 < ema9).astype(int) + (c0 < ema21) + (c0 < sma50) + (c0 < sma200)
+    f['below_ma_count'] = below_count / 4.0
+
+    if n >= 21:
+        touched_ema21 = np.abs(highs[:, 0] - ema21) < _rows_atr(highs, lows, closes) * 0.3
+        f['ema21_rejection'] = (touched_ema21 & (c0 < ema21)).astype(np.float64)
+    else:
+        f['ema21_rejection'] = _rows_const(closes, 0.0)
+
+    m = min(n - 1, 10)
+    f['lower_highs_count'] = np.sum(highs[:, :m] < highs[:, 1:m + 1], axis=1)
+
+    if n >= 26:
+        macd_line = _rows_ema(closes[:, :12], 12) - _rows_ema(closes[:, :26], 26)
+        f['macd_bearish'] = _rows_div_pos(-macd_line, c0)
+    else:
+        f['macd_bearish'] = _rows_const(closes, 0)
+
+    return f
+
+
+def short_range_features_bulk(opens, highs, lows, closes, volumes) -> Dict[str, np.ndarray]:
+    f = {}
+    n = closes.shape[1]
+    c0 = closes[:, 0]
+
+    lookback = min(20, n)
+    if lookback >= 10:
+        range_high = np.max(highs[:, :lookback], axis=1)
+        range_low = np.min(lows[:, :lookback], axis=1)
+        range_size = range_high - range_low
+
+        f['range_position'] = np.where(range_size > 0, _rows_safe_div(c0 - range_low, range_size, 0.5), 0.5)
+        f['below_range'] = (c0 < range_low).astype(np.float64)
+
+        in_range = ((lows[:, :lookback] >= (range_low * 0.99)[:, None])
+                    & (highs[:, :lookback] <= (range_high * 1.01)[:, None]))
+        f['time_in_range'] = np.sum(in_range, axis=1) / lookback
+
+        f['breakdown_vol_surge'] = _rows_safe_div(volumes[:, 0], np.mean(volumes[:, :lookback], axis=1), 1.0)
+    else:
+        f['range_position'] = _rows_const(closes, 0.5)
+        f['below_range'] = _rows_const(closes, 0.0)
+        f['time_in_range'] = _rows_const(closes, 0)
+        f['breakdown_vol_surge'] = _rows_const(closes, 1.0)
+
+    if n >= 5 and lookback >= 10:
+        recent_high = np.max(highs[:, :5], axis=1)
+        range_high_20 = np.max(highs[:, :lookback], axis=1)
+        f['failed_upbreak'] = ((recent_high > range_high_20) & (c0 < range_high_20)).astype(np.float64)
+    else:
+        f['failed_upbreak'] = _rows_const(closes, 0.0)
+
+    return f
+
+
 # ========================================================================
 # REGISTRY & API
 # ========================================================================
@@ -678,6 +1115,19 @@ SHORT_SETUP_FEATURE_EXTRACTORS = {
     'SHORT_RANGE': short_range_features,
 }
 
+SHORT_SETUP_FEATURE_EXTRACTORS_BULK = {
+    'SHORT_BREAKDOWN': short_breakdown_features_bulk,
+    'SHORT_MOMENTUM': short_momentum_features_bulk,
+    'SHORT_REVERSAL': short_reversal_features_bulk,
+    'SHORT_GAP_FADE': short_gap_fade_features_bulk,
+    'SHORT_VWAP': short_vwap_features_bulk,
+    'SHORT_MEAN_REVERSION': short_mean_reversion_features_bulk,
+    'SHORT_SCALP': short_scalp_features_bulk,
+    'SHORT_ORB': short_orb_features_bulk,
+    'SHORT_TREND': short_trend_features_bulk,
+    'SHORT_RANGE': short_range_features_bulk,
+}
+
 
 def get_short_setup_features(setup_type: str, opens, highs, lows, closes, volumes) -> Dict[str, float]:
     """
@@ -704,3 +1154,17 @@ def get_short_setup_feature_names(setup_type: str) -> List[str]:
     dummy = np.ones(50)
     features = get_short_setup_features(setup_type, dummy, dummy, dummy, dummy, dummy)
     return sorted(features.keys())
+
+
+def get_short_setup_features_bulk(setup_type: str, opens, highs, lows, closes, volumes,
+                                  rows: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Matrix-wide `get_short_setup_features`: one row per window in `rows`,
+    columns in `get_short_setup_feature_names(setup_type)` order, float32.
+    """
+    from services.ai_modules.setup_features import _features_matrix
+    key = setup_type.upper()
+    return _features_matrix(
+        SHORT_SETUP_FEATURE_EXTRACTORS.get(key), SHORT_SETUP_FEATURE_EXTRACTORS_BULK.get(key),
+        get_short_setup_feature_names(setup_type), opens, highs, lows, closes, volumes, rows,
+    )
@@ -18,6 +18,8 @@ from typing import Dict, List, Optional
 from datetime import datetime, timezone
 from dataclasses import dataclass, field
 
+from .columnar_bars import bar_column
+
 logger = logging.getLogger(__name__)
 
 
@@ -677,11 +679,12 @@ class TimeSeriesFeatureEngineer:
         """Inner implementation (separated so np.errstate context covers all math)."""
 
         # Convert all bars to arrays ONCE
-        opens = np.array([b.get("open", 0) for b in bars], dtype=np.float64)
-        highs = np.array([b.get("high", 0) for b in bars], dtype=np.float64)
-        lows = np.array([b.get("low", 0) for b in bars], dtype=np.float64)
-        closes = np.array([b.get("close", 0) for b in bars], dtype=np.float64)
-        volumes = np.array([b.get("volume", 0) for b in bars], dtype=np.float64)
+        # (zero-copy column views for NVMe-cached ColumnarBars)
+        opens = bar_column(bars, "open", np.float64, 0)
+        highs = bar_column(bars, "high", np.float64, 0)
+        lows = bar_column(bars, "low", np.float64, 0)
+        closes = bar_column(bars, "close", np.float64, 0)
+        volumes = bar_column(bars, "volume", np.float64, 0)
 
         closes = np.where(closes == 0, 1.0, closes)
         opens = np.where(opens == 0, closes, opens)
@@ -19,7 +19,7 @@ import logging
 import base64
 import os
 import numpy as np
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple
 from datetime import datetime, timezone, timedelta
 from dataclasses import dataclass, asdict, field
 import xgboost as xgb
@@ -1669,6 +1669,45 @@ class TimeSeriesGBM:
                 timestamp=datetime.now(timezone.utc).isoformat()
             )
             
+        return self.predict_batch([(bars, symbol)])[0]
+
+    def predict_batch(self, items: List[Tuple[List[Dict], str]]) -> List[Optional[Prediction]]:
+        """`predict` for many `(bars, symbol)` pairs with ONE Booster call.
+
+        Feature rows are built per symbol exactly as `predict` does; the
+        rows are stacked into a single DMatrix so a burst of alerts pays
+        the XGBoost call overhead once. Results keep input order (None
+        where features could not be extracted)."""
+        if self._model is None:
+            return [self.predict(bars, symbol) for bars, symbol in items]
+
+        out: List[Optional[Prediction]] = [None] * len(items)
+        rows, positions, feature_sets = [], [], []
+        for i, (bars, symbol) in enumerate(items):
+            built = self._prediction_row(bars, symbol)
+            if built is None:
+                continue
+            feature_sets.append(built[0])
+            rows.append(built[1])
+            positions.append(i)
+        if not rows:
+            return out
+
+        # Convert to XGBoost DMatrix for prediction
+        dmatrix = xgb.DMatrix(np.vstack(rows), feature_names=self._feature_names)
+
+        # Predict — may be binary (scalar per sample) or multiclass (prob vector)
+        raw_all = self._model.predict(dmatrix)
+        for k, i in enumerate(positions):
+            bars, symbol = items[i]
+            prediction = self._prediction_from_raw(raw_all[k:k + 1], symbol)
+            # Log prediction
+            self._log_prediction(prediction, feature_sets[k], bars)
+            out[i] = prediction
+        return out
+
+    def _prediction_row(self, bars: List[Dict], symbol: str):
+        """(FeatureSet, float32 feature row in model order) or None."""
         # Extract features
         feature_set = self._feature_engineer.extract_features(
             bars,
@@ -1698,16 +1737,13 @@ class TimeSeriesGBM:
                 if name.startswith("ffd_"):
                     feats_dict.setdefault(name, 0.0)
 
-        # Convert to XGBoost DMatrix for prediction
-        feature_vector = np.array([[
+        return feature_set, np.array([
             feats_dict.get(f, 0.0)
             for f in self._feature_names
-        ]], dtype=np.float32)
-        
-        dmatrix = xgb.DMatrix(feature_vector, feature_names=self._feature_names)
-        
-        # Predict — may be binary (scalar per sample) or multiclass (prob vector)
-        raw = self._model.predict(dmatrix)
+        ], dtype=np.float32)
+
+    def _prediction_from_raw(self, raw: np.ndarray, symbol: str) -> Prediction:
+        """Decode one row of Booster output (`raw[k:k+1]`) into a Prediction."""
         prob_flat = 0.0
         if raw.ndim > 1 and raw.shape[1] >= 3:
             # 3-class triple-barrier: [P(DOWN), P(FLAT), P(UP)]
@@ -1749,9 +1785,6 @@ class TimeSeriesGBM:
             timestamp=datetime.now(timezone.utc).isoformat()
         )
         
-        # Log prediction
-        self._log_prediction(prediction, feature_set, bars)
-        
         return prediction
         
     def _log_prediction(self, prediction: Prediction, features: FeatureSet, bars: List[Dict] = None):
@@ -102,6 +102,52 @@ def _xgb_device() -> str:
 
 
 
+class _RegistryModelRef:
+    """Name of a setup model served by the process-wide model registry.
+
+    Stored in `_setup_models` instead of the model object so every read goes
+    through `get_model_registry().get(...)`: predictions follow version
+    changes, and the Booster lives once, inside the registry's LRU budget."""
+
+    __slots__ = ("db", "model_name")
+
+    def __init__(self, db, model_name: str) -> None:
+        self.db = db
+        self.model_name = model_name
+
+    def resolve(self):
+        from functools import partial
+        from services.ai_modules.model_registry import get_model_registry, load_gbm
+        return get_model_registry().get(
+            self.db, self.model_name, loader=partial(load_gbm, gbm_cls=TimeSeriesGBM))
+
+
+class _SetupModelTable(dict):
+    """`_setup_models` dict whose registry-backed values resolve on read.
+
+    Keys behave as before (membership, key resolution); `get`, `[]`,
+    `items()` and `values()` return the live model object, or None when the
+    registry no longer has a usable model (quarantined, load failed)."""
+
+    @staticmethod
+    def _live(value):
+        return value.resolve() if isinstance(value, _RegistryModelRef) else value
+
+    def __getitem__(self, key):
+        return self._live(dict.__getitem__(self, key))
+
+    def get(self, key, default=None):
+        if key not in self:
+            return default
+        return self[key]
+
+    def items(self):
+        return [(k, self[k]) for k in self]
+
+    def values(self):
+        return [self[k] for k in self]
+
+
 class TimeSeriesAIService:
     """
     High-level service for time-series AI predictions.
@@ -168,7 +214,7 @@ class TimeSeriesAIService:
     def __init__(self):
         self._model = get_timeseries_model() if ML_AVAILABLE else None
         self._models = {}  # Cache for multi-timeframe models
-        self._setup_models = {}  # Cache for setup-type-specific models
+        self._setup_models = _SetupModelTable()  # Cache for setup-type-specific models
         self._db = None
         self._historical_service = None
         self._last_train_time = None
@@ -310,7 +356,9 @@ class TimeSeriesAIService:
             return self._empty_forecast(symbol, "Insufficient data")
             
         try:
-            prediction = self._model.predict(bars, symbol)
+            # Coalesced with concurrent forecasts (e.g. a scanner alert burst)
+            # into one TimeSeriesGBM.predict_batch call.
+            prediction = await self._forecast_batcher().submit((bars, symbol))
             
             if prediction is None:
                 return self._empty_forecast(symbol, "Prediction failed")
@@ -337,6 +385,24 @@ class TimeSeriesAIService:
             logger.error(f"Forecast error for {symbol}: {e}")
             return self._empty_forecast(symbol, f"Error: {str(e)[:50]}")
             
+    def _forecast_batcher(self):
+        from .prediction_batcher import PredictionBatcher
+        batcher = getattr(self, "_forecast_batcher_inst", None)
+        if batcher is None:
+            # Resolve self._model per batch — retraining swaps it.
+            batcher = self._forecast_batcher_inst = PredictionBatcher(
+                lambda items: self._model.predict_batch(items), name="forecast")
+        return batcher
+
+    def prediction_batch_stats(self) -> Dict[str, Any]:
+        """Coalescer stats for setup predictions and general forecasts."""
+        out = {}
+        for attr in ("_setup_batcher", "_forecast_batcher_inst"):
+            batcher = getattr(self, attr, None)
+            if batcher is not None:
+                out[batcher.name] = batcher.stats()
+        return out
+
     def _build_signal(self, prediction: Prediction) -> str:
         """Build human-readable signal from prediction"""
         direction = prediction.direction
@@ -791,6 +857,7 @@ class TimeSeriesAIService:
         }
         
         start_time = datetime.now(timezone.utc)
+        shard_writer = None
         
         try:
             # Step 1: Get ALL symbols with data for this timeframe
@@ -847,6 +914,12 @@ class TimeSeriesAIService:
             # For 43M samples x 46 features: ~8 GB (numpy) vs ~74 GB (Python lists).
             feature_chunks = []   # List of numpy arrays, vstacked once at the end
             target_chunks = []    # List of numpy arrays
+            # TRAIN_OUT_OF_CORE: batches go to on-disk shards instead and XGBoost
+            # trains from them through external memory (see feature_shards).
+            from .feature_shards import ShardWriter, is_enabled as _out_of_core
+            if _out_of_core():
+                shard_writer = ShardWriter(model_name)
+                logger.info(f"[FULL UNIVERSE] Out-of-core mode: shards under {shard_writer.root}")
             total_samples = 0
             symbols_processed = 0
             symbols_with_data = 0
@@ -1018,8 +1091,11 @@ class TimeSeriesAIService:
                     batch_X = np.vstack(batch_feat_parts)
                     batch_y = np.concatenate(batch_tgt_parts)
                     batch_samples = len(batch_X)
-                    feature_chunks.append(batch_X)
-                    target_chunks.append(batch_y)
+                    if shard_writer is not None:
+                        shard_writer.append(batch_X, batch_y)
+                    else:
+                        feature_chunks.append(batch_X)
+                        target_chunks.append(batch_y)
                     total_samples += batch_samples
                 else:
                     batch_samples = 0
@@ -1116,15 +1192,26 @@ class TimeSeriesAIService:
             self._training_status[bar_size]["message"] = f"Training on {total_samples:,} samples..."
             
             # Combine numpy chunks into final arrays (single allocation, no Python list overhead)
-            X = np.vstack(feature_chunks).astype(np.float32)
-            y = np.concatenate(target_chunks).astype(np.int64)
-
-            logger.info(f"[FULL UNIVERSE] Arrays created: X shape={X.shape}, y shape={y.shape}")
+            if shard_writer is not None:
+                shards = shard_writer.finish()
+                X = None
+                y = shards.labels().astype(np.int64)
+                n_features = shards.n_cols
+                logger.info(
+                    f"[FULL UNIVERSE] Shards ready: {shards.rows:,} x {n_features} "
+                    f"in {len(shards.files)} shards, y shape={y.shape}"
+                )
+            else:
+                shards = None
+                X = np.vstack(feature_chunks).astype(np.float32)
+                y = np.concatenate(target_chunks).astype(np.int64)
+                n_features = X.shape[1]
+                logger.info(f"[FULL UNIVERSE] Arrays created: X shape={X.shape}, y shape={y.shape}")
             sys.stdout.flush()
 
             # Keep feature_names aligned with X when FFD columns were appended.
             from .feature_augmentors import ffd_enabled, FFD_NAMES
-            if ffd_enabled() and X.shape[1] == len(feature_names) + len(FFD_NAMES):
+            if ffd_enabled() and n_features == len(feature_names) + len(FFD_NAMES):
                 feature_names = list(feature_names) + list(FFD_NAMES)
                 logger.info(f"[FULL UNIVERSE] Extended feature_names to {len(feature_names)} (FFD ON)")
 
@@ -1166,7 +1253,7 @@ class TimeSeriesAIService:
             # TimeSeriesGBM.train_from_features: the last `horizon` training
             # samples have label windows overlapping the validation block.
             validation_split = 0.2
-            split_idx = int(len(X) * (1 - validation_split))
+            split_idx = int(len(y) * (1 - validation_split))
             from .timeseries_gbm import _embargo_size as _emb_size
             _emb = _emb_size(split_idx, int(forecast_horizon), os.environ.get("TB_EMBARGO_BARS"))
             _train_end = split_idx - _emb
@@ -1176,10 +1263,9 @@ class TimeSeriesAIService:
                     f"sample(s) — train[:{_train_end}] | val[{split_idx}:] "
                     f"(horizon={forecast_horizon})"
                 )
-            X_train, X_val = X[:_train_end], X[split_idx:]
             y_train, y_val = y[:_train_end], y[split_idx:]
 
-            logger.info(f"[FULL UNIVERSE] Training samples: {len(X_train):,}, Validation: {len(X_val):,}")
+            logger.info(f"[FULL UNIVERSE] Training samples: {len(y_train):,}, Validation: {len(y_val):,}")
             sys.stdout.flush()
 
             # Create XGBoost DMatrix datasets
@@ -1223,11 +1309,22 @@ class TimeSeriesAIService:
             except Exception as cb_err:  # non-fatal — train without class balance
                 logger.warning(f"[FULL UNIVERSE] class-balance skipped ({cb_err}); training uniform.")
 
-            dtrain = xgb.DMatrix(
-                X_train, label=y_train, feature_names=feature_names,
-                weight=dtrain_weights,
-            )
-            dval = xgb.DMatrix(X_val, label=y_val, feature_names=feature_names)
+            if shards is not None:
+                # max_bin must match xgb_params below: the quantile pages are
+                # cut when the external-memory DMatrix is built.
+                dtrain = shards.dmatrix(
+                    0, len(y_train), weight=dtrain_weights,
+                    feature_names=feature_names, max_bin=256,
+                )
+                dval = shards.dmatrix(
+                    split_idx, len(y), feature_names=feature_names, max_bin=256, ref=dtrain,
+                )
+            else:
+                dtrain = xgb.DMatrix(
+                    X[:_train_end], label=y_train, feature_names=feature_names,
+                    weight=dtrain_weights,
+                )
+                dval = xgb.DMatrix(X[split_idx:], label=y_val, feature_names=feature_names)
 
             # XGBoost device — PROBED at runtime (CPU fallback). Hardcoding
             # 'cuda' made every model die with cudaErrorNoDevice on the Spark
@@ -1263,7 +1360,10 @@ class TimeSeriesAIService:
             sys.stdout.flush()
 
             # Evaluate (3-class)
-            y_pred_proba = trained_model.predict(dval)   # shape (N, 3)
+            if shards is not None:
+                y_pred_proba = shards.predict(trained_model, split_idx, len(y), feature_names)
+            else:
+                y_pred_proba = trained_model.predict(dval)   # shape (N, 3)
             y_pred = np.argmax(y_pred_proba, axis=1)
 
             accuracy = float(np.mean(y_pred == y_val))
@@ -1314,11 +1414,27 @@ class TimeSeriesAIService:
                 )
             except Exception:
                 _cpcv_w = None
+            _cpcv_X, _cpcv_y, _cpcv_iv = X, y, None
+            if shards is not None:
+                # Hand CPCV the same row subsample it would draw itself, with
+                # the intervals of the full row numbering.
+                from .feature_shards import sample_rows
+                from .timeseries_gbm import _cpcv_fallback_intervals
+                try:
+                    _cpcv_cap = int(os.environ.get("TB_GBM_CPCV_MAX_ROWS", "300000"))
+                except (TypeError, ValueError):
+                    _cpcv_cap = 300000
+                _rows = sample_rows(len(y), _cpcv_cap, 42)
+                _cpcv_X, _cpcv_y = shards.take(_rows), y[_rows]
+                _cpcv_iv = _cpcv_fallback_intervals(len(y), int(forecast_horizon))[_rows]
+                if _cpcv_w is not None and len(_cpcv_w) == len(y):
+                    _cpcv_w = _cpcv_w[_rows]
             _cpcv_res = run_gbm_cpcv(
-                X, y, _cpcv_w, None, xgb_params,
+                _cpcv_X, _cpcv_y, _cpcv_w, _cpcv_iv, xgb_params,
                 num_boost_round=300, num_classes=3,
                 forecast_horizon=int(forecast_horizon), model_name=model_name,
             )
+            del _cpcv_X
 
             # Save model — mark as 3-class triple-barrier so metadata persists correctly.
             model._model = trained_model
@@ -1327,7 +1443,14 @@ class TimeSeriesAIService:
             # v321 Tier-3a-lite: training feature distribution baseline
             try:
                 from services.ai_modules.feature_baseline import compute_feature_baseline
-                model._feature_baseline = compute_feature_baseline(X, list(feature_names))
+                if shards is not None:
+                    from .feature_shards import sample_rows
+                    _base_X = shards.take(sample_rows(len(y), 50000, 7))
+                else:
+                    _base_X = X
+                model._feature_baseline = compute_feature_baseline(
+                    _base_X, list(feature_names), n_total=len(y),
+                )
             except Exception:
                 model._feature_baseline = None
             model._version = f"v{datetime.now(timezone.utc).strftime('%Y%m%d_%H%M%S')}"
@@ -1356,8 +1479,8 @@ class TimeSeriesAIService:
                 f1_down=f1_down,
                 calibrated_up_threshold=float(cal_up),
                 calibrated_down_threshold=float(cal_down),
-                training_samples=len(X_train),
-                validation_samples=len(X_val),
+                training_samples=len(y_train),
+                validation_samples=len(y_val),
                 cpcv_n_folds=int(_cpcv_res.get("cpcv_n_folds", 0)),
                 cpcv_oos_acc_mean=float(_cpcv_res.get("cpcv_oos_acc_mean", 0.0)),
                 cpcv_oos_acc_std=float(_cpcv_res.get("cpcv_oos_acc_std", 0.0)),
@@ -1418,8 +1541,8 @@ class TimeSeriesAIService:
                 "precision": precision_up,
                 "recall": recall_up,
                 "f1": f1_up,
-                "training_samples": len(X_train),
-                "validation_samples": len(X_val),
+                "training_samples": len(y_train),
+                "validation_samples": len(y_val),
                 "cpcv": _cpcv_res,
                 "symbols_processed": symbols_with_data,
                 "total_bars": total_bars_processed,
@@ -1439,6 +1562,8 @@ class TimeSeriesAIService:
             
         finally:
             self._training_in_progress = False
+            if shard_writer is not None:
+                shard_writer.close()
             if training_mode_manager:
                 training_mode_manager.exit_training_mode()
             gc.collect()
@@ -2128,17 +2253,21 @@ class TimeSeriesAIService:
                 if not doc:
                     continue
                 try:
-                    gbm = TimeSeriesGBM(model_name=model_name)
-                    gbm.set_db(self._db)  # triggers _load_model() which handles xgboost_json_zlib
-                    if gbm._model is None:
+                    # Shared with the ensemble / shadow paths via the model
+                    # registry: only the name is kept here and resolved on
+                    # every read, so the same Booster isn't held twice and a
+                    # promoted version replaces the old one for predictions.
+                    ref = _RegistryModelRef(self._db, model_name)
+                    gbm = ref.resolve()
+                    if gbm is None:
                         logger.warning(f"Failed to load {model_name} from timeseries_models (model=None after set_db)")
                         continue
-                    self._setup_models[cache_key] = gbm
+                    self._setup_models[cache_key] = ref
                     # Legacy single-key compat so predict_for_setup() direct
                     # dict lookups hit. Only first profile per setup claims the
                     # bare-setup key (matches the existing _load loop behaviour).
                     if setup_type not in self._setup_models:
-                        self._setup_models[setup_type] = gbm
+                        self._setup_models[setup_type] = ref
                     ts_loaded += 1
                     logger.info(
                         f"Loaded setup model from timeseries_models: "
@@ -3078,28 +3207,20 @@ class TimeSeriesAIService:
         return raw
 
     def _get_shadow_model(self, model_name: str):
-        """v19.34.313 P-WIRE: load & cache a TimeSeriesGBM by exact name for shadow
-        inference. Loaded with the DB to fetch weights, then detached
-        (_db=None) so shadow predictions never write to timeseries_predictions
-        or pollute verification stats. Caches misses (None) too so an absent
-        model isn't re-queried every decision. Returns None if not trained."""
-        if not hasattr(self, "_shadow_models"):
-            self._shadow_models = {}
-        if model_name in self._shadow_models:
-            return self._shadow_models[model_name]
-        model = None
+        """v19.34.313 P-WIRE: fetch a TimeSeriesGBM by exact name for shadow
+        inference. Served by the process-wide model registry as a detached
+        view (_db=None) so shadow predictions never write to
+        timeseries_predictions or pollute verification stats. The registry
+        remembers misses for one poll interval so an absent model isn't
+        re-queried every decision. Returns None if not trained."""
+        if self._db is None or not self._ml_available:
+            return None
         try:
-            if self._db is not None and self._ml_available:
-                from services.ai_modules.timeseries_gbm import TimeSeriesGBM
-                gbm = TimeSeriesGBM(model_name=model_name)
-                gbm.set_db(self._db)  # triggers _load_model()
-                if gbm._model is not None:
-                    gbm._db = None  # detach → predict() won't log
-                    model = gbm
+            from services.ai_modules.model_registry import get_model_registry
+            return get_model_registry().get(self._db, model_name, detached=True)
         except Exception as e:
             logger.debug(f"Shadow model load failed for {model_name}: {e}")
-        self._shadow_models[model_name] = model
-        return model
+            return None
 
     def predict_with_named_model(self, symbol: str, bars: list, model_name: str) -> Optional[Dict]:
         """P-WIRE: run one named model's .predict() on the given bars.
@@ -3190,307 +3311,372 @@ class TimeSeriesAIService:
         model = self._setup_models.get(effective_type)
         if model and model._model is not None:
             try:
-                # Extract base features
-                feature_set = model._feature_engineer.extract_features(
-                    bars, symbol=symbol, include_target=False
-                )
-                if feature_set is None:
-                    logger.warning(f"Could not extract base features for {symbol}")
-                    # Fall through to general model
-                else:
-                    # Extract setup-specific features from the bar data
-                    from .setup_features import get_setup_features
-                    if len(bars) >= 20:
-                        opens = np.array([b.get("open", 0) for b in bars])
-                        highs = np.array([b.get("high", 0) for b in bars])
-                        lows = np.array([b.get("low", 0) for b in bars])
-                        closes = np.array([b.get("close", 0) for b in bars])
-                        volumes = np.array([b.get("volume", 0) for b in bars])
-                        setup_feats = get_setup_features(effective_type, opens, highs, lows, closes, volumes)
-                    else:
-                        setup_feats = {}
-                    
-                    # Combine base + setup features in training order
-                    combined = {}
-                    combined.update(feature_set.features)
-                    # Prefix setup features to match training naming
-                    for k, v in setup_feats.items():
-                        combined[f"setup_{k}"] = v
-                    
-                    # Layer 1: Add regime features if model expects them
-                    from .regime_features import REGIME_FEATURE_NAMES
-                    model_expects_regime = any(
-                        f in model._feature_names for f in REGIME_FEATURE_NAMES
-                    )
-                    if model_expects_regime:
-                        try:
-                            from .regime_features import compute_regime_features_from_bars
-                            if self._db is not None:
-                                def _query_index_bars(symbol):
-                                    bars = list(self._db["ib_historical_data"].find(
-                                        {"symbol": symbol, "bar_size": "1 day"},
-                                        {"_id": 0, "close": 1, "high": 1, "low": 1, "date": 1}
-                                    ).sort("date", -1).limit(3000))
-                                    seen = {}
-                                    for b in bars:
-                                        dk = str(b.get("date", ""))[:10]
-                                        if len(dk) == 10 and dk not in seen:
-                                            seen[dk] = b
-                                    real = sorted(seen.values(), key=lambda x: str(x["date"])[:10], reverse=True)
-                                    if len(real) < 25:
-                                        return None, None, None
-                                    return (
-                                        np.array([b["close"] for b in real], dtype=float),
-                                        np.array([b["high"] for b in real], dtype=float),
-                                        np.array([b["low"] for b in real], dtype=float),
-                                    )
-                                spy_c, spy_h, spy_l = _query_index_bars("SPY")
-                                qqq_c, qqq_h, qqq_l = _query_index_bars("QQQ")
-                                iwm_c, iwm_h, iwm_l = _query_index_bars("IWM")
-                                if spy_c is not None:
-                                    regime_feats = compute_regime_features_from_bars(
-                                        spy_c, spy_h, spy_l,
-                                        qqq_c, qqq_h, qqq_l,
-                                        iwm_c, iwm_h, iwm_l,
-                                    )
-                                    combined.update(regime_feats)
-                        except Exception as e:
-                            logger.debug(f"Regime features for prediction failed: {e}")
-                    
-                    # Layer 2: Add MTF features if model expects them
-                    from .multi_timeframe_features import MTF_FEATURE_NAMES
-                    model_expects_mtf = any(
-                        f in model._feature_names for f in MTF_FEATURE_NAMES
-                    )
-                    if model_expects_mtf:
-                        try:
-                            from .multi_timeframe_features import compute_mtf_features_from_daily_bars
-                            if self._db is not None:
-                                daily_bars = list(self._db["ib_historical_data"].find(
-                                    {"symbol": symbol, "bar_size": "1 day"},
-                                    {"_id": 0, "date": 1, "open": 1, "high": 1, "low": 1, "close": 1, "volume": 1}
-                                ).sort("date", -1).limit(3000))
-                                seen_dates = {}
-                                for b in daily_bars:
-                                    dk = str(b.get("date", ""))[:10]
-                                    if len(dk) == 10 and dk not in seen_dates:
-                                        seen_dates[dk] = b
-                                real_daily = sorted(seen_dates.values(), key=lambda x: str(x["date"])[:10], reverse=True)
-                                if len(real_daily) >= 25:
-                                    mtf_feats = compute_mtf_features_from_daily_bars(
-                                        np.array([b["close"] for b in real_daily], dtype=float),
-                                        np.array([b["high"] for b in real_daily], dtype=float),
-                                        np.array([b["low"] for b in real_daily], dtype=float),
-                                        np.array([b.get("volume", 0) for b in real_daily], dtype=float),
-                                        np.array([b.get("open", 0) for b in real_daily], dtype=float),
-                                    )
-                                    combined.update(mtf_feats)
-                        except Exception as e:
-                            logger.debug(f"MTF features for prediction failed: {e}")
-
-                    # Layer 3: Add categorical label features (Bellafiore Setup
-                    # one-hot + multi-index regime one-hot) if the model
-                    # expects them. These are CHEAP — purely lookups against
-                    # already-cached classifier results.
-                    try:
-                        from .composite_label_features import (
-                            ALL_LABEL_FEATURE_NAMES, build_label_features,
-                        )
-                        model_expects_labels = any(
-                            f in model._feature_names for f in ALL_LABEL_FEATURE_NAMES
-                        )
-                        if model_expects_labels:
-                            # Read cached labels populated by
-                            # `_apply_setup_context` upstream in the scanner
-                            # path. Prediction is sync; the classifiers'
-                            # async classify() already ran when the alert
-                            # was generated, so the cache is hot.
-                            from services.market_setup_classifier import (
-                                get_market_setup_classifier, MarketSetup,
-                            )
-                            from services.multi_index_regime_classifier import (
-                                get_multi_index_regime_classifier, MultiIndexRegime,
-                            )
-                            from services.sector_regime_classifier import (
-                                get_sector_regime_classifier, SectorRegime,
-                            )
-                            setup_label = MarketSetup.NEUTRAL
-                            regime_label = MultiIndexRegime.UNKNOWN
-                            sector_label = SectorRegime.UNKNOWN
-                            try:
-                                cached = get_market_setup_classifier()._cache.get(symbol)
-                                if cached is not None:
-                                    setup_label = cached[0].setup
-                                cached_regime = get_multi_index_regime_classifier()._cached_result
-                                if cached_regime is not None:
-                                    regime_label = cached_regime.label
-                                cached_sector = get_sector_regime_classifier()._cached
-                                if cached_sector is not None:
-                                    # Resolve symbol → sector ETF → snapshot
-                                    try:
-                                        from services.sector_tag_service import (
-                                            get_sector_tag_service,
-                                        )
-                                        etf = get_sector_tag_service().tag_symbol(symbol)
-                                        if etf is not None:
-                                            snap = cached_sector.sectors.get(etf)
-                                            if snap is not None:
-                                                sector_label = snap.regime
-                                    except Exception:
-                                        pass
-                            except Exception:
-                                pass
-                            label_feats = build_label_features(
-                                market_setup=setup_label,
-                                multi_index_regime=regime_label,
-                                sector_regime=sector_label,
-                            )
-                            combined.update(label_feats)
-                    except Exception as e:
-                        logger.debug(f"Label features for prediction failed: {e}")
-
-                    # Build feature vector matching model's expected feature order
-                    feature_vector = np.array([[
-                        combined.get(f, 0.0) for f in model._feature_names
-                    ]])
-                    
-                    # Predict using the setup model directly
-                    # v19.34.30 Bug B fix - xgb.Booster requires DMatrix.
-                    try:
-                        import xgboost as _xgb
-                        _is_booster = isinstance(model._model, _xgb.Booster)
-                    except Exception:
-                        _is_booster = False
-                    if _is_booster:
-                        import xgboost as _xgb
-                        _dm = _xgb.DMatrix(
-                            feature_vector.astype(np.float32),
-                            feature_names=list(model._feature_names),
-                        )
-                        pred_raw = model._model.predict(_dm)
-                    else:
-                        pred_raw = model._model.predict(feature_vector)
-                    
-                    if len(pred_raw.shape) > 1 and pred_raw.shape[1] >= 3:
-                        # 3-class: pred_raw shape = (1, 3) → [P(DOWN), P(FLAT), P(UP)]
-                        prob_down = float(pred_raw[0][0])
-                        prob_flat = float(pred_raw[0][1])
-                        prob_up = float(pred_raw[0][2])
-                        
-                        # Direction = highest probability class
-                        max_class = int(np.argmax(pred_raw[0]))
-                        if max_class == 2:
-                            direction = "up"
-                            confidence = prob_up
-                        elif max_class == 0:
-                            direction = "down"
-                            confidence = prob_down
-                        else:
-                            direction = "flat"
-                            confidence = prob_flat
-                    else:
-                        # Binary: pred_raw shape = (1,) → P(UP)
-                        prob_up = float(pred_raw[0]) if pred_raw.ndim == 1 else float(pred_raw[0][0])
-                        prob_down = 1 - prob_up
-                        prob_flat = 0.0
-                        
-                        if prob_up > model.UP_THRESHOLD:
-                            direction = "up"
-                            confidence = min((prob_up - model.UP_THRESHOLD) / (1 - model.UP_THRESHOLD), 1.0)
-                        elif prob_down > 0.55:
-                            direction = "down"
-                            confidence = (prob_down - 0.5) * 2
-                        else:
-                            direction = "flat"
-                            confidence = 0.2
-                    
-                    # Layer 2: Regime-aware confidence adjustment
-                    regime_adjustment = None
-                    try:
-                        from .regime_confidence import adjust_confidence_for_regime
-                        from services.service_registry import get_service_optional
-                        
-                        engine_state = None
-                        scanner_regime = None
-                        
-                        # Try MarketRegimeEngine
-                        regime_engine = get_service_optional('market_regime_engine')
-                        if regime_engine and hasattr(regime_engine, 'current_state'):
-                            engine_state = regime_engine.current_state.value
-                        
-                        # Try scanner's regime
-                        scanner = get_service_optional('enhanced_scanner')
-                        if scanner and hasattr(scanner, '_market_regime'):
-                            scanner_regime = scanner._market_regime.value
-                        
-                        if engine_state or scanner_regime:
-                            regime_adjustment = adjust_confidence_for_regime(
-                                effective_type, confidence,
-                                engine_state=engine_state,
-                                scanner_regime=scanner_regime,
-                            )
-                            confidence = regime_adjustment["adjusted_confidence"]
-                    except Exception as e:
-                        logger.debug(f"Regime confidence adjustment skipped: {e}")
-                    
-                    result = {
-                        "symbol": symbol,
-                        "direction": direction,
-                        "probability_up": prob_up,
-                        "probability_down": prob_down,
-                        "probability_flat": prob_flat,
-                        "confidence": float(confidence),
-                        "model_version": model._version,
-                        "feature_count": len(model._feature_names),
-                        "model_used": f"{effective_type.lower()}_predictor",
-                        "model_type": "setup_specific",
-                        "num_classes": 3 if prob_flat > 0 else 2,
-                        # Expose calibrated thresholds so the confidence gate
-                        # can score CONFIRMS at each model's natural level.
-                        "model_metrics": (
-                            model._metrics.to_dict()
-                            if getattr(model, "_metrics", None) else {}
-                        ),
-                    }
-                    
-                    # Include regime context in result
-                    if regime_adjustment:
-                        result["regime_adjustment"] = regime_adjustment
-                    
-                    return result
+                row = self._setup_feature_row(model, effective_type, symbol, bars)
+                if row is not None:
+                    pred_raw = self._predict_setup_rows(model, np.array([row]))
+                    return self._setup_prediction_result(model, effective_type, symbol, pred_raw)
             except Exception as e:
                 logger.warning(f"Setup model {effective_type} prediction failed: {e}")
         
         # Fall back to general model
         if self._model and self._model._model is not None:
-            # Emit a ONE-TIME info log per process so operators can see which
-            # setups are using the generic fallback vs their own model.
-            if not hasattr(self, "_fallback_logged"):
-                self._fallback_logged = set()
-            if effective_type not in self._fallback_logged:
-                self._fallback_logged.add(effective_type)
-                logger.info(
-                    f"[MODEL FALLBACK] '{setup_type}' → '{effective_type}' has no "
-                    f"setup-specific model in timeseries_models; using generic "
-                    f"direction_predictor_5min until trained."
-                )
+            self._log_model_fallback(setup_type, effective_type)
             try:
-                prediction = self._model.predict(bars, symbol=symbol)
-                if prediction:
-                    result = prediction.to_dict() if hasattr(prediction, 'to_dict') else prediction
-                    result["model_used"] = "general"
-                    result["model_type"] = "general"
-                    # Expose the calibrated thresholds so the gate scores
-                    # CONFIRMS at the generic model's natural level (P1 2026-04-23).
-                    result["model_metrics"] = (
-                        self._model._metrics.to_dict()
-                        if getattr(self._model, "_metrics", None) else {}
-                    )
-                    return result
+                return self._general_prediction_result(self._model.predict(bars, symbol=symbol))
             except Exception as e:
                 logger.warning(f"General model prediction failed: {e}")
         
         return None
+
+    def predict_for_setup_batch(self, requests: List[Dict]) -> List[Optional[Dict]]:
+        """
+        Batched `predict_for_setup` for a burst of alerts.
+
+        Each request is a dict with `symbol`, `bars`, `setup_type` (and
+        optionally `model_name_override`). Requests are grouped by resolved
+        setup-model key; each group builds one feature matrix and makes ONE
+        model `predict` call. Requests that fall back to the general model
+        are batched through `TimeSeriesGBM.predict_batch`. Per-request
+        results (same order, None where no prediction) are identical to
+        calling `predict_for_setup` one by one.
+        """
+        import numpy as np
+        results: List[Optional[Dict]] = [None] * len(requests)
+        groups: Dict[str, List[int]] = {}
+        group_models: Dict[str, Any] = {}  # resolved once per call
+        general: List[int] = []
+        for i, req in enumerate(requests):
+            if req.get("model_name_override"):
+                results[i] = self.predict_with_named_model(
+                    req["symbol"], req["bars"], req["model_name_override"]
+                )
+                continue
+            key = self._resolve_setup_model_key(req.get("setup_type") or "", self._setup_models.keys())
+            model = group_models[key] if key in group_models else self._setup_models.get(key)
+            group_models[key] = model
+            if model and model._model is not None:
+                groups.setdefault(key, []).append(i)
+            else:
+                general.append(i)
+
+        for key, idxs in groups.items():
+            model = group_models[key]
+            rows, ok = [], []
+            for i in idxs:
+                req = requests[i]
+                try:
+                    row = self._setup_feature_row(model, key, req["symbol"], req["bars"])
+                except Exception as e:
+                    logger.warning(f"Setup model {key} prediction failed: {e}")
+                    row = None
+                if row is None:
+                    general.append(i)
+                else:
+                    rows.append(row)
+                    ok.append(i)
+            if not rows:
+                continue
+            try:
+                pred_raw = self._predict_setup_rows(model, np.array(rows))
+                for k, i in enumerate(ok):
+                    results[i] = self._setup_prediction_result(
+                        model, key, requests[i]["symbol"], pred_raw[k:k + 1]
+                    )
+            except Exception as e:
+                logger.warning(f"Setup model {key} batch prediction failed: {e}")
+                general.extend(i for i in ok if results[i] is None)
+
+        if general and self._model and self._model._model is not None:
+            general.sort()
+            for i in general:
+                key = self._resolve_setup_model_key(
+                    requests[i].get("setup_type") or "", self._setup_models.keys()
+                )
+                self._log_model_fallback(requests[i].get("setup_type"), key)
+            try:
+                preds = self._model.predict_batch(
+                    [(requests[i]["bars"], requests[i]["symbol"]) for i in general]
+                )
+                for i, pred in zip(general, preds):
+                    results[i] = self._general_prediction_result(pred)
+            except Exception as e:
+                logger.warning(f"General model batch prediction failed: {e}")
+        return results
+
+    async def predict_for_setup_coalesced(self, symbol: str, bars: list, setup_type: str) -> Optional[Dict]:
+        """`predict_for_setup` via the request coalescer: concurrent callers
+        within PREDICT_BATCH_WINDOW_MS share one `predict_for_setup_batch`."""
+        from .prediction_batcher import PredictionBatcher
+        batcher = getattr(self, "_setup_batcher", None)
+        if batcher is None:
+            batcher = self._setup_batcher = PredictionBatcher(
+                self.predict_for_setup_batch, name="setup")
+        return await batcher.submit({"symbol": symbol, "bars": bars, "setup_type": setup_type})
+
+    def _setup_feature_row(self, model, effective_type: str, symbol: str, bars: list) -> Optional[List[float]]:
+        """Feature row for `model` in its training order, or None when the
+        base features can't be extracted (caller falls back to general)."""
+        import numpy as np
+        # Extract base features
+        feature_set = model._feature_engineer.extract_features(
+            bars, symbol=symbol, include_target=False
+        )
+        if feature_set is None:
+            logger.warning(f"Could not extract base features for {symbol}")
+            return None
+
+        # Extract setup-specific features from the bar data
+        from .setup_features import get_setup_features
+        if len(bars) >= 20:
+            opens = np.array([b.get("open", 0) for b in bars])
+            highs = np.array([b.get("high", 0) for b in bars])
+            lows = np.array([b.get("low", 0) for b in bars])
+            closes = np.array([b.get("close", 0) for b in bars])
+            volumes = np.array([b.get("volume", 0) for b in bars])
+            setup_feats = get_setup_features(effective_type, opens, highs, lows, closes, volumes)
+        else:
+            setup_feats = {}
+        
+        # Combine base + setup features in training order
+        combined = {}
+        combined.update(feature_set.features)
+        # Prefix setup features to match training naming
+        for k, v in setup_feats.items():
+            combined[f"setup_{k}"] = v
+        
+        # Layer 1: Add regime features if model expects them
+        from .regime_features import REGIME_FEATURE_NAMES
+        model_expects_regime = any(
+            f in model._feature_names for f in REGIME_FEATURE_NAMES
+        )
+        if model_expects_regime:
+            try:
+                if self._db is not None:
+                    # Cached per daily bar — no index-bar I/O per call
+                    from .market_context_cache import get_market_context_cache
+                    regime_feats = get_market_context_cache().regime_features(self._db)
+                    if regime_feats is not None:
+                        combined.update(regime_feats)
+            except Exception as e:
+                logger.debug(f"Regime features for prediction failed: {e}")
+        
+        # Layer 2: Add MTF features if model expects them
+        from .multi_timeframe_features import MTF_FEATURE_NAMES
+        model_expects_mtf = any(
+            f in model._feature_names for f in MTF_FEATURE_NAMES
+        )
+        if model_expects_mtf:
+            try:
+                if self._db is not None:
+                    from .market_context_cache import get_market_context_cache
+                    mtf_feats = get_market_context_cache().mtf_features(self._db, symbol)
+                    if mtf_feats is not None:
+                        combined.update(mtf_feats)
+            except Exception as e:
+                logger.debug(f"MTF features for prediction failed: {e}")
+
+        # Layer 3: Add categorical label features (Bellafiore Setup
+        # one-hot + multi-index regime one-hot) if the model
+        # expects them. These are CHEAP — purely lookups against
+        # already-cached classifier results.
+        try:
+            from .composite_label_features import (
+                ALL_LABEL_FEATURE_NAMES, build_label_features,
+            )
+            model_expects_labels = any(
+                f in model._feature_names for f in ALL_LABEL_FEATURE_NAMES
+            )
+            if model_expects_labels:
+                # Read cached labels populated by
+                # `_apply_setup_context` upstream in the scanner
+                # path. Prediction is sync; the classifiers'
+                # async classify() already ran when the alert
+                # was generated, so the cache is hot.
+                from services.market_setup_classifier import (
+                    get_market_setup_classifier, MarketSetup,
+                )
+                from services.multi_index_regime_classifier import (
+                    get_multi_index_regime_classifier, MultiIndexRegime,
+                )
+                from services.sector_regime_classifier import (
+                    get_sector_regime_classifier, SectorRegime,
+                )
+                setup_label = MarketSetup.NEUTRAL
+                regime_label = MultiIndexRegime.UNKNOWN
+                sector_label = SectorRegime.UNKNOWN
+                try:
+                    cached = get_market_setup_classifier()._cache.get(symbol)
+                    if cached is not None:
+                        setup_label = cached[0].setup
+                    cached_regime = get_multi_index_regime_classifier()._cached_result
+                    if cached_regime is not None:
+                        regime_label = cached_regime.label
+                    cached_sector = get_sector_regime_classifier()._cached
+                    if cached_sector is not None:
+                        # Resolve symbol → sector ETF → snapshot
+                        try:
+                            from services.sector_tag_service import (
+                                get_sector_tag_service,
+                            )
+                            etf = get_sector_tag_service().tag_symbol(symbol)
+                            if etf is not None:
+                                snap = cached_sector.sectors.get(etf)
+                                if snap is not None:
+                                    sector_label = snap.regime
+                        except Exception:
+                            pass
+                except Exception:
+                    pass
+                label_feats = build_label_features(
+                    market_setup=setup_label,
+                    multi_index_regime=regime_label,
+                    sector_regime=sector_label,
+                )
+                combined.update(label_feats)
+        except Exception as e:
+            logger.debug(f"Label features for prediction failed: {e}")
+
+        # Feature vector matching model's expected feature order
+        return [combined.get(f, 0.0) for f in model._feature_names]
+
+    @staticmethod
+    def _predict_setup_rows(model, feature_matrix):
+        """One model call for an (n, features) matrix."""
+        import numpy as np
+        # Predict using the setup model directly
+        # v19.34.30 Bug B fix - xgb.Booster requires DMatrix.
+        try:
+            import xgboost as _xgb
+            _is_booster = isinstance(model._model, _xgb.Booster)
+        except Exception:
+            _is_booster = False
+        if _is_booster:
+            import xgboost as _xgb
+            _dm = _xgb.DMatrix(
+                feature_matrix.astype(np.float32),
+                feature_names=list(model._feature_names),
+            )
+            return model._model.predict(_dm)
+        return model._model.predict(feature_matrix)
+
+    def _setup_prediction_result(self, model, effective_type: str, symbol: str, pred_raw) -> Dict:
+        """Decode one row of model output (`pred_raw[k:k+1]`) into the
+        prediction dict, with the Layer-2 regime confidence adjustment."""
+        import numpy as np
+        if len(pred_raw.shape) > 1 and pred_raw.shape[1] >= 3:
+            # 3-class: pred_raw shape = (1, 3) → [P(DOWN), P(FLAT), P(UP)]
+            prob_down = float(pred_raw[0][0])
+            prob_flat = float(pred_raw[0][1])
+            prob_up = float(pred_raw[0][2])
+            
+            # Direction = highest probability class
+            max_class = int(np.argmax(pred_raw[0]))
+            if max_class == 2:
+                direction = "up"
+                confidence = prob_up
+            elif max_class == 0:
+                direction = "down"
+                confidence = prob_down
+            else:
+                direction = "flat"
+                confidence = prob_flat
+        else:
+            # Binary: pred_raw shape = (1,) → P(UP)
+            prob_up = float(pred_raw[0]) if pred_raw.ndim == 1 else float(pred_raw[0][0])
+            prob_down = 1 - prob_up
+            prob_flat = 0.0
+            
+            if prob_up > model.UP_THRESHOLD:
+                direction = "up"
+                confidence = min((prob_up - model.UP_THRESHOLD) / (1 - model.UP_THRESHOLD), 1.0)
+            elif prob_down > 0.55:
+                direction = "down"
+                confidence = (prob_down - 0.5) * 2
+            else:
+                direction = "flat"
+                confidence = 0.2
+        
+        # Layer 2: Regime-aware confidence adjustment
+        regime_adjustment = None
+        try:
+            from .regime_confidence import adjust_confidence_for_regime
+            from services.service_registry import get_service_optional
+            
+            engine_state = None
+            scanner_regime = None
+            
+            # Try MarketRegimeEngine
+            regime_engine = get_service_optional('market_regime_engine')
+            if regime_engine and hasattr(regime_engine, 'current_state'):
+                engine_state = regime_engine.current_state.value
+            
+            # Try scanner's regime
+            scanner = get_service_optional('enhanced_scanner')
+            if scanner and hasattr(scanner, '_market_regime'):
+                scanner_regime = scanner._market_regime.value
+            
+            if engine_state or scanner_regime:
+                regime_adjustment = adjust_confidence_for_regime(
+                    effective_type, confidence,
+                    engine_state=engine_state,
+                    scanner_regime=scanner_regime,
+                )
+                confidence = regime_adjustment["adjusted_confidence"]
+        except Exception as e:
+            logger.debug(f"Regime confidence adjustment skipped: {e}")
+        
+        result = {
+            "symbol": symbol,
+            "direction": direction,
+            "probability_up": prob_up,
+            "probability_down": prob_down,
+            "probability_flat": prob_flat,
+            "confidence": float(confidence),
+            "model_version": model._version,
+            "feature_count": len(model._feature_names),
+            "model_used": f"{effective_type.lower()}_predictor",
+            "model_type": "setup_specific",
+            "num_classes": 3 if prob_flat > 0 else 2,
+            # Expose calibrated thresholds so the confidence gate
+            # can score CONFIRMS at each model's natural level.
+            "model_metrics": (
+                model._metrics.to_dict()
+                if getattr(model, "_metrics", None) else {}
+            ),
+        }
+        
+        # Include regime context in result
+        if regime_adjustment:
+            result["regime_adjustment"] = regime_adjustment
+        
+        return result
+
+    def _log_model_fallback(self, setup_type, effective_type) -> None:
+        # Emit a ONE-TIME info log per process so operators can see which
+        # setups are using the generic fallback vs their own model.
+        if not hasattr(self, "_fallback_logged"):
+            self._fallback_logged = set()
+        if effective_type not in self._fallback_logged:
+            self._fallback_logged.add(effective_type)
+            logger.info(
+                f"[MODEL FALLBACK] '{setup_type}' → '{effective_type}' has no "
+                f"setup-specific model in timeseries_models; using generic "
+                f"direction_predictor_5min until trained."
+            )
+
+    def _general_prediction_result(self, prediction) -> Optional[Dict]:
+        if not prediction:
+            return None
+        result = prediction.to_dict() if hasattr(prediction, 'to_dict') else prediction
+        result["model_used"] = "general"
+        result["model_type"] = "general"
+        # Expose the calibrated thresholds so the gate scores
+        # CONFIRMS at the generic model's natural level (P1 2026-04-23).
+        result["model_metrics"] = (
+            self._model._metrics.to_dict()
+            if getattr(self._model, "_metrics", None) else {}
+        )
+        return result
         
     async def verify_pending_predictions(self) -> Dict[str, Any]:
         """
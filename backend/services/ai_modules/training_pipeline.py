@@ -102,6 +102,10 @@ def clear_symbol_cache():
 import pickle as _pickle
 import os as _os
 
+from services.ai_modules import columnar_bars as _columnar_bars
+from services.ai_modules.columnar_bars import bar_column as _bar_column
+from services.ai_modules.shared_extract import SharedBatch, run_task as _run_shared_task
+
 CACHE_BASE_DIR = "/tmp/training_cache"
 BAR_CACHE_DIR = f"{CACHE_BASE_DIR}/bars"
 FEATURE_CACHE_DIR = f"{CACHE_BASE_DIR}/features"
@@ -150,9 +154,17 @@ def _feature_cache_path(symbol: str, bar_size: str) -> str:
     return f"{bs_dir}/{symbol}{_fh_cache_tag()}.npy"
 
 
+def _bar_column_cache_prefix(symbol: str, bar_size: str) -> str:
+    """Columnar (memory-mapped .npy) twin of `_bar_cache_path`, same _fh tag."""
+    return _bar_cache_path(symbol, bar_size)[:-len(".pkl")]
+
+
 def _cache_bars_to_disk(symbol: str, bar_size: str, bars: List[Dict]):
-    """Write bars to NVMe as pickle."""
+    """Write bars to NVMe — columnar .npy when the bars are plain OHLCV rows,
+    pickle otherwise (see services/ai_modules/columnar_bars.py)."""
     try:
+        if _columnar_bars.save(_bar_column_cache_prefix(symbol, bar_size), bars):
+            return
         path = _bar_cache_path(symbol, bar_size)
         with open(path, "wb") as f:
             _pickle.dump(bars, f, protocol=_pickle.HIGHEST_PROTOCOL)
@@ -161,7 +173,13 @@ def _cache_bars_to_disk(symbol: str, bar_size: str, bars: List[Dict]):
 
 
 def _load_bars_from_disk(symbol: str, bar_size: str) -> Optional[List[Dict]]:
-    """Load bars from NVMe cache. Returns None on miss."""
+    """Load bars from NVMe cache. Returns None on miss.
+
+    Columnar entries come back as a memory-mapped `ColumnarBars` (a
+    read-only, list-of-dicts compatible sequence) — no unpickling."""
+    cached = _columnar_bars.load(_bar_column_cache_prefix(symbol, bar_size))
+    if cached is not None:
+        return cached
     path = _bar_cache_path(symbol, bar_size)
     if not _os.path.exists(path):
         return None
@@ -283,12 +301,22 @@ def _check_resume_model(db, model_name: str, max_age_hours: float = 24.0) -> Opt
 
 # ── Multiprocessing Workers (must be at module scope for pickle) ────────
 
+def _extract_symbol_rows_worker(args):
+    """`_extract_symbol_worker` as `{"rows": (X, y)}` — the result shape
+    `shared_extract.run_task` writes into the output arena."""
+    from services.ai_modules.timeseries_gbm import _extract_symbol_worker
+    res = _extract_symbol_worker(args)
+    if res is None:
+        return None
+    return {"rows": (res[0], res[1])}
+
+
 def _extract_setup_long_worker(args):
     """Phase 2 worker: extract base + setup features for one symbol across all setup types."""
     symbol, bars, setup_configs = args
     # setup_configs: list of (setup_type, forecast_horizon, noise_threshold)
     from services.ai_modules.timeseries_features import TimeSeriesFeatureEngineer
-    from services.ai_modules.setup_features import get_setup_features, get_setup_feature_names
+    from services.ai_modules.setup_features import get_setup_features_bulk, get_setup_feature_names
     from services.ai_modules.timeseries_gbm import _log_flag_state_once
     from numpy.lib.stride_tricks import sliding_window_view
 
@@ -308,11 +336,11 @@ def _extract_setup_long_worker(args):
                 lookback=50, cache_key=f"{symbol}_long",
             )
 
-        closes = np.array([b["close"] for b in bars], dtype=np.float32)
-        highs = np.array([b["high"] for b in bars], dtype=np.float32)
-        lows = np.array([b["low"] for b in bars], dtype=np.float32)
-        volumes = np.array([b.get("volume", 0) for b in bars], dtype=np.float32)
-        opens = np.array([b.get("open", 0) for b in bars], dtype=np.float32)
+        closes = _bar_column(bars, "close", np.float32)
+        highs = _bar_column(bars, "high", np.float32)
+        lows = _bar_column(bars, "low", np.float32)
+        volumes = _bar_column(bars, "volume", np.float32, 0)
+        opens = _bar_column(bars, "open", np.float32, 0)
 
         n = len(bars)
         # Pre-compute ALL reversed sliding windows once (views, no copy)
@@ -342,7 +370,7 @@ def _extract_setup_long_worker(args):
 
             # TRIPLE-BARRIER 3-class labels (López de Prado); per-setup PT/SL/ATR
             # resolved by the caller via triple_barrier_config.get_tb_config.
-            from services.ai_modules.triple_barrier_labeler import triple_barrier_labels, label_to_class_index
+            from services.ai_modules.triple_barrier_labeler import triple_barrier_labels, labels_to_class_indices
             from services.ai_modules.cusum_filter import cusum_enabled, filter_entry_indices
             idx = np.arange(50, 50 + max_rows)
 
@@ -365,27 +393,20 @@ def _extract_setup_long_worker(args):
                 max_bars=fh,
                 atr_period=int(tb_atr),
             )
-            y_all = np.array([label_to_class_index(int(v)) for v in raw_lbl], dtype=np.float32)
-
-            X_buf = np.empty((len(idx), n_base + n_setup), dtype=np.float32)
-            valid = 0
-
-            # Iterate over the (possibly CUSUM-filtered) entry indices.
-            # Each entry i in `idx` corresponds to bar i; base_matrix row is (i - 49).
-            for pos, bar_i in enumerate(idx):
-                row_idx = int(bar_i) - 49
-                if row_idx < 0 or row_idx >= len(base_matrix):
-                    continue
-                win_idx = row_idx   # same alignment as before (was j+1)
-                sf = get_setup_features(setup_type, o_wins[win_idx], h_wins[win_idx], l_wins[win_idx], c_wins[win_idx], v_wins[win_idx])
-                setup_vec = np.array([sf.get(f, 0.0) for f in feat_names], dtype=np.float32)
+            y_all = labels_to_class_indices(raw_lbl).astype(np.float32)
 
-                X_buf[valid, :n_base] = base_matrix[row_idx]
-                X_buf[valid, n_base:] = setup_vec
-                valid += 1
+            # Each entry i in the (possibly CUSUM-filtered) `idx` is bar i;
+            # its base_matrix row and window are both (i - 49).
+            rows = idx.astype(np.intp) - 49
+            rows = rows[(rows >= 0) & (rows < len(base_matrix))]
+            valid = len(rows)
 
             if valid > 0:
-                results[(setup_type, fh)] = (X_buf[:valid].copy(), y_all[:valid].copy())
+                X = np.empty((valid, n_base + n_setup), dtype=np.float32)
+                X[:, :n_base] = base_matrix[rows]
+                X[:, n_base:] = get_setup_features_bulk(
+                    setup_type, o_wins, h_wins, l_wins, c_wins, v_wins, rows=rows)
+                results[(setup_type, fh)] = (X, y_all[:valid].copy())
         return results
     except Exception as e:
         logger.warning(f"Setup worker error for {symbol}: {e}")
@@ -396,7 +417,7 @@ def _extract_setup_short_worker(args):
     """Phase 2.5 worker: extract base + short-setup features for one symbol."""
     symbol, bars, setup_configs = args
     from services.ai_modules.timeseries_features import TimeSeriesFeatureEngineer
-    from services.ai_modules.short_setup_features import get_short_setup_features, get_short_setup_feature_names
+    from services.ai_modules.short_setup_features import get_short_setup_features_bulk, get_short_setup_feature_names
     from services.ai_modules.timeseries_gbm import _log_flag_state_once
     from numpy.lib.stride_tricks import sliding_window_view
 
@@ -415,11 +436,11 @@ def _extract_setup_short_worker(args):
                 lookback=50, cache_key=f"{symbol}_short",
             )
 
-        closes = np.array([b["close"] for b in bars], dtype=np.float32)
-        highs = np.array([b["high"] for b in bars], dtype=np.float32)
-        lows = np.array([b["low"] for b in bars], dtype=np.float32)
-        volumes = np.array([b.get("volume", 0) for b in bars], dtype=np.float32)
-        opens = np.array([b.get("open", 0) for b in bars], dtype=np.float32)
+        closes = _bar_column(bars, "close", np.float32)
+        highs = _bar_column(bars, "high", np.float32)
+        lows = _bar_column(bars, "low", np.float32)
+        volumes = _bar_column(bars, "volume", np.float32, 0)
+        opens = _bar_column(bars, "open", np.float32, 0)
 
         n = len(bars)
         if n < 50:
@@ -447,7 +468,7 @@ def _extract_setup_short_worker(args):
                 continue
 
             # TRIPLE-BARRIER 3-class labels for SHORT trades via negated-series trick.
-            from services.ai_modules.triple_barrier_labeler import triple_barrier_labels, label_to_class_index
+            from services.ai_modules.triple_barrier_labeler import triple_barrier_labels, labels_to_class_indices
             from services.ai_modules.cusum_filter import cusum_enabled, filter_entry_indices
             idx = np.arange(50, 50 + max_rows)
             if cusum_enabled():
@@ -469,25 +490,18 @@ def _extract_setup_short_worker(args):
                 max_bars=fh,
                 atr_period=int(tb_atr),
             )
-            y_all = np.array([label_to_class_index(int(v)) for v in raw_lbl], dtype=np.float32)
+            y_all = labels_to_class_indices(raw_lbl).astype(np.float32)
 
-            X_buf = np.empty((len(idx), n_base + n_setup), dtype=np.float32)
-            valid = 0
-
-            for pos, bar_i in enumerate(idx):
-                row_idx = int(bar_i) - 49
-                if row_idx < 0 or row_idx >= len(base_matrix):
-                    continue
-                win_idx = row_idx
-                sf = get_short_setup_features(setup_type, o_wins[win_idx], h_wins[win_idx], l_wins[win_idx], c_wins[win_idx], v_wins[win_idx])
-                short_vec = np.array([sf.get(f, 0.0) for f in feat_names], dtype=np.float32)
-
-                X_buf[valid, :n_base] = base_matrix[row_idx]
-                X_buf[valid, n_base:] = short_vec
-                valid += 1
+            rows = idx.astype(np.intp) - 49
+            rows = rows[(rows >= 0) & (rows < len(base_matrix))]
+            valid = len(rows)
 
             if valid > 0:
-                results[(setup_type, fh)] = (X_buf[:valid].copy(), y_all[:valid].copy())
+                X = np.empty((valid, n_base + n_setup), dtype=np.float32)
+                X[:, :n_base] = base_matrix[rows]
+                X[:, n_base:] = get_short_setup_features_bulk(
+                    setup_type, o_wins, h_wins, l_wins, c_wins, v_wins, rows=rows)
+                results[(setup_type, fh)] = (X, y_all[:valid].copy())
         return results
     except Exception as e:
         logger.warning(f"Short setup worker error for {symbol}: {e}")
@@ -507,10 +521,10 @@ def _extract_exit_worker(args):
         if base_matrix is None:
             return None
 
-        closes = np.array([b["close"] for b in bars], dtype=np.float32)
-        highs = np.array([b["high"] for b in bars], dtype=np.float32)
-        lows = np.array([b["low"] for b in bars], dtype=np.float32)
-        volumes = np.array([b.get("volume", 0) for b in bars], dtype=np.float32)
+        closes = _bar_column(bars, "close", np.float32)
+        highs = _bar_column(bars, "high", np.float32)
+        lows = _bar_column(bars, "low", np.float32)
+        volumes = _bar_column(bars, "volume", np.float32, 0)
         n_base = base_matrix.shape[1]
         n_exit = len(EXIT_FEATURE_NAMES)
         n = len(bars)
@@ -598,10 +612,10 @@ def _extract_risk_worker(args):
         if base_matrix is None:
             return None
 
-        closes = np.array([b["close"] for b in bars], dtype=np.float32)
-        highs = np.array([b["high"] for b in bars], dtype=np.float32)
-        lows = np.array([b["low"] for b in bars], dtype=np.float32)
-        volumes = np.array([b.get("volume", 0) for b in bars], dtype=np.float32)
+        closes = _bar_column(bars, "close", np.float32)
+        highs = _bar_column(bars, "high", np.float32)
+        lows = _bar_column(bars, "low", np.float32)
+        volumes = _bar_column(bars, "volume", np.float32, 0)
         n_base = base_matrix.shape[1]
         n_risk = len(RISK_FEATURE_NAMES)
         n = len(bars)
@@ -1123,10 +1137,12 @@ async def stream_load_and_extract(
     Returns:
         (X, y) numpy arrays or (None, None) if insufficient data
     """
-    from services.ai_modules.timeseries_gbm import _extract_symbol_worker
+    from services.ai_modules.timeseries_features import TimeSeriesFeatureEngineer
+    from services.ai_modules.feature_augmentors import augmented_feature_names
     from concurrent.futures import ProcessPoolExecutor, as_completed
 
     n_workers = MAX_EXTRACT_WORKERS
+    n_cols = len(augmented_feature_names(TimeSeriesFeatureEngineer(lookback).get_feature_names()))
     all_features = []
     all_targets = []
     total_samples = 0
@@ -1154,26 +1170,37 @@ async def stream_load_and_extract(
                 if len(bars) >= lookback + forecast_horizon:
                     worker_args.append((symbol, bars, lookback, forecast_horizon))
 
-            # Parallel feature extraction across CPU cores
+            # Parallel feature extraction across CPU cores; bars in and rows
+            # out through shared memory (see shared_extract).
             chunk_results = []
+            shared = SharedBatch.create(
+                {args[0]: args[1] for args in worker_args},
+                plan=lambda _sym, n: {"rows": (n - lookback + 1 - forecast_horizon, n_cols)},
+            )
             try:
-                futures = {pool.submit(_extract_symbol_worker, args): args[0] for args in worker_args}
+                futures = {
+                    pool.submit(_run_shared_task, _extract_symbol_rows_worker, shared.args(args), shared.out(args[0])): args[0]
+                    for args in worker_args
+                }
                 for future in as_completed(futures):
                     try:
-                        result = future.result(timeout=300)
-                        if result is not None:
-                            chunk_results.append(result)
+                        result = shared.collect(futures[future], future.result(timeout=300))
+                        if result:
+                            chunk_results.append(result["rows"])
                     except Exception as e:
                         logger.warning(f"Worker failed for {futures[future]}: {e}")
             except Exception as e:
                 logger.warning(f"Multiprocess failed ({e}), falling back to single-process")
                 for args in worker_args:
                     try:
-                        result = _extract_symbol_worker(args)
-                        if result is not None:
-                            chunk_results.append(result)
+                        result = shared.collect(
+                            args[0], _run_shared_task(_extract_symbol_rows_worker, shared.args(args), shared.out(args[0])))
+                        if result:
+                            chunk_results.append(result["rows"])
                     except Exception:
                         pass
+            finally:
+                shared.close()
 
             # Accumulate compact numpy arrays
             for feat_matrix, targets in chunk_results:
@@ -1579,11 +1606,23 @@ async def run_training_pipeline(
                         ]
 
                         chunk_results = []
+                        # Bars go to the workers and X/y come back through shared
+                        # memory; each (setup, fh) slot holds the worker's max rows.
+                        shared = SharedBatch.create(
+                            {a[0]: a[1] for a in worker_args},
+                            plan=lambda _sym, n: {
+                                key: (n - 50 - key[1], len(acc["combined_names"]))
+                                for key, acc in model_accum.items()
+                            },
+                        )
                         try:
-                            futures = {pool.submit(_extract_setup_long_worker, a): a[0] for a in worker_args}
+                            futures = {
+                                pool.submit(_run_shared_task, _extract_setup_long_worker, shared.args(a), shared.out(a[0])): a[0]
+                                for a in worker_args
+                            }
                             for future in as_completed(futures):
                                 try:
-                                    res = future.result(timeout=300)
+                                    res = shared.collect(futures[future], future.result(timeout=300))
                                     if res:
                                         chunk_results.append(res)
                                 except Exception as e:
@@ -1592,11 +1631,14 @@ async def run_training_pipeline(
                             logger.warning(f"ProcessPool failed ({e}), falling back to sequential")
                             for a in worker_args:
                                 try:
-                                    res = _extract_setup_long_worker(a)
+                                    res = shared.collect(
+                                        a[0], _run_shared_task(_extract_setup_long_worker, shared.args(a), shared.out(a[0])))
                                     if res:
                                         chunk_results.append(res)
                                 except Exception:
                                     pass
+                        finally:
+                            shared.close()
 
                         for res_dict in chunk_results:
                             for key, (X_chunk, y_chunk) in res_dict.items():
@@ -1759,11 +1801,23 @@ async def run_training_pipeline(
                         ]
 
                         chunk_results = []
+                        # Bars go to the workers and X/y come back through shared
+                        # memory; each (setup, fh) slot holds the worker's max rows.
+                        shared = SharedBatch.create(
+                            {a[0]: a[1] for a in worker_args},
+                            plan=lambda _sym, n: {
+                                key: (n - 50 - key[1], len(acc["combined_names"]))
+                                for key, acc in model_accum.items()
+                            },
+                        )
                         try:
-                            futures = {pool.submit(_extract_setup_short_worker, a): a[0] for a in worker_args}
+                            futures = {
+                                pool.submit(_run_shared_task, _extract_setup_short_worker, shared.args(a), shared.out(a[0])): a[0]
+                                for a in worker_args
+                            }
                             for future in as_completed(futures):
                                 try:
-                                    res = future.result(timeout=300)
+                                    res = shared.collect(futures[future], future.result(timeout=300))
                                     if res:
                                         chunk_results.append(res)
                                 except Exception as e:
@@ -1772,11 +1826,14 @@ async def run_training_pipeline(
                             logger.warning(f"ProcessPool failed ({e}), falling back to sequential")
                             for a in worker_args:
                                 try:
-                                    res = _extract_setup_short_worker(a)
+                                    res = shared.collect(
+                                        a[0], _run_shared_task(_extract_setup_short_worker, shared.args(a), shared.out(a[0])))
                                     if res:
                                         chunk_results.append(res)
                                 except Exception:
                                     pass
+                        finally:
+                            shared.close()
 
                         for res_dict in chunk_results:
                             for key, (X_chunk, y_chunk) in res_dict.items():
@@ -1927,11 +1984,11 @@ async def run_training_pipeline(
 
                         for sym, bars in batch_bars.items():
 
-                            closes = np.array([b["close"] for b in bars], dtype=np.float32)
-                            highs = np.array([b["high"] for b in bars], dtype=np.float32)
-                            lows = np.array([b["low"] for b in bars], dtype=np.float32)
-                            volumes = np.array([b.get("volume", 0) for b in bars], dtype=np.float32)
-                            opens = np.array([b.get("open", 0) for b in bars], dtype=np.float32)
+                            closes = _bar_column(bars, "close", np.float32)
+                            highs = _bar_column(bars, "high", np.float32)
+                            lows = _bar_column(bars, "low", np.float32)
+                            volumes = _bar_column(bars, "volume", np.float32, 0)
+                            opens = _bar_column(bars, "open", np.float32, 0)
 
                             # Bulk-extract base features ONCE for this symbol (NVMe cached)
                             base_matrix = cached_extract_features_bulk(feature_engineer, bars, sym, bs)
@@ -2280,8 +2337,8 @@ async def run_training_pipeline(
                         etf_bars = await load_symbol_bars(db, etf, bs)
                         if len(etf_bars) >= 50:
                             sector_etf_bars[etf] = {
-                                "closes": np.array([b["close"] for b in etf_bars], dtype=np.float32),
-                                "volumes": np.array([b.get("volume", 0) for b in etf_bars], dtype=np.float32),
+                                "closes": _bar_column(etf_bars, "close", np.float32),
+                                "volumes": _bar_column(etf_bars, "volume", np.float32, 0),
                             }
 
                     # Guard: if none of the sector ETFs have enough bars, every
@@ -2323,8 +2380,8 @@ async def run_training_pipeline(
                             if sector_etf is None or sector_etf not in sector_etf_bars:
                                 continue
 
-                            stock_closes = np.array([b["close"] for b in bars], dtype=np.float32)
-                            stock_volumes = np.array([b.get("volume", 0) for b in bars], dtype=np.float32)
+                            stock_closes = _bar_column(bars, "close", np.float32)
+                            stock_volumes = _bar_column(bars, "volume", np.float32, 0)
                             sec_data = sector_etf_bars[sector_etf]
                             sec_closes = sec_data["closes"]
                             sec_volumes = sec_data["volumes"]
@@ -2499,11 +2556,11 @@ async def run_training_pipeline(
                                 continue
 
                             n_base = base_matrix.shape[1]
-                            closes = np.array([b["close"] for b in bars], dtype=np.float32)
-                            opens = np.array([b["open"] for b in bars], dtype=np.float32)
-                            volumes = np.array([b.get("volume", 0) for b in bars], dtype=np.float32)
-                            highs = np.array([b["high"] for b in bars], dtype=np.float32)
-                            lows = np.array([b["low"] for b in bars], dtype=np.float32)
+                            closes = _bar_column(bars, "close", np.float32)
+                            opens = _bar_column(bars, "open", np.float32)
+                            volumes = _bar_column(bars, "volume", np.float32, 0)
+                            highs = _bar_column(bars, "high", np.float32)
+                            lows = _bar_column(bars, "low", np.float32)
                             bar_dates = [str(b.get("date", "")) for b in bars]
 
                             if len(closes) < 50:
@@ -2820,9 +2877,9 @@ async def run_training_pipeline(
 
                             for sym, bars in batch_bars.items():
 
-                                closes = np.array([b["close"] for b in bars], dtype=np.float32)
-                                highs = np.array([b.get("high", 0) for b in bars], dtype=np.float32)
-                                lows = np.array([b.get("low", 0) for b in bars], dtype=np.float32)
+                                closes = _bar_column(bars, "close", np.float32)
+                                highs = _bar_column(bars, "high", np.float32, 0)
+                                lows = _bar_column(bars, "low", np.float32, 0)
 
                                 # Bulk-extract base features ONCE for this symbol (NVMe cached)
                                 base_matrix = cached_extract_features_bulk(feature_engineer, bars, sym, bs)
@@ -2847,7 +2904,7 @@ async def run_training_pipeline(
                                 if not valid_mask.any():
                                     continue
 
-                                from services.ai_modules.triple_barrier_labeler import triple_barrier_labels, label_to_class_index
+                                from services.ai_modules.triple_barrier_labeler import triple_barrier_labels, labels_to_class_indices
                                 raw_lbl = triple_barrier_labels(
                                     highs.astype(np.float64), lows.astype(np.float64), closes.astype(np.float64),
                                     entry_indices=idx_arr,
@@ -2856,7 +2913,7 @@ async def run_training_pipeline(
                                     max_bars=fh,
                                     atr_period=14,
                                 )
-                                y_all = np.array([label_to_class_index(int(v)) for v in raw_lbl], dtype=np.float32)
+                                y_all = labels_to_class_indices(raw_lbl).astype(np.float32)
 
                                 # base_matrix row indices: i - 49 for i in idx_arr → row = i - 49
                                 base_rows = base_matrix[idx_arr - 49]
@@ -3123,9 +3180,9 @@ async def run_training_pipeline(
                             )
 
                             for sym, bars in batch_bars.items():
-                                closes = np.array([b["close"] for b in bars], dtype=np.float32)
-                                highs_ens = np.array([b.get("high", 0) for b in bars], dtype=np.float64)
-                                lows_ens = np.array([b.get("low", 0) for b in bars], dtype=np.float64)
+                                closes = _bar_column(bars, "close", np.float32)
+                                highs_ens = _bar_column(bars, "high", np.float64, 0)
+                                lows_ens = _bar_column(bars, "low", np.float64, 0)
                                 
                                 # VECTORIZED bulk feature extraction (NVMe cached)
                                 bulk_features = cached_extract_features_bulk(feature_engineer, bars, sym, anchor_bs)
@@ -3162,7 +3219,7 @@ async def run_training_pipeline(
                                     n_usable = features_matrix.shape[0]
                                 
                                 # Pre-compute TRIPLE-BARRIER labels for all usable windows at once
-                                from services.ai_modules.triple_barrier_labeler import triple_barrier_labels, label_to_class_index
+                                from services.ai_modules.triple_barrier_labeler import triple_barrier_labels, labels_to_class_indices
                                 tb_entry_idx = np.arange(n_usable) + (lb - 1)
                                 tb_raw_lbl = triple_barrier_labels(
                                     highs_ens, lows_ens, closes.astype(np.float64),
@@ -3172,10 +3229,7 @@ async def run_training_pipeline(
                                     max_bars=anchor_fh,
                                     atr_period=14,
                                 )
-                                tb_targets = np.array(
-                                    [label_to_class_index(int(v)) for v in tb_raw_lbl],
-                                    dtype=np.int64,
-                                )
+                                tb_targets = labels_to_class_indices(tb_raw_lbl)
                                 
                                 # BATCH predict through all sub-models at once (replaces per-bar predict loop)
                                 # NOTE: TimeSeriesGBM._model is an xgb.Booster — requires DMatrix input,
@@ -35,8 +35,13 @@ Usage:
 """
 
 import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
 from typing import Union
 
+# Upper bound on (entries × max_bars) cells materialised per chunk by the
+# vectorized labeler (~4M cells → two bool matrices of ~4 MB each).
+_LABEL_CHUNK_CELLS = 4_000_000
+
 
 def atr(highs: np.ndarray, lows: np.ndarray, closes: np.ndarray, period: int = 14) -> np.ndarray:
     """True Range rolling mean. Returns array same length as inputs; first `period` values are NaN."""
@@ -46,10 +51,11 @@ def atr(highs: np.ndarray, lows: np.ndarray, closes: np.ndarray, period: int = 1
     tr3 = np.abs(lows - prev_close)
     tr = np.maximum.reduce([tr1, tr2, tr3])
     atr_out = np.full_like(tr, np.nan, dtype=np.float64)
-    if len(tr) >= period:
-        # Simple moving average ATR (Wilder's smoothing is a minor refinement we skip here)
-        for i in range(period - 1, len(tr)):
-            atr_out[i] = np.mean(tr[i - period + 1:i + 1])
+    if period >= 1 and len(tr) >= period:
+        # Simple moving average ATR (Wilder's smoothing is a minor refinement we skip here).
+        # Each window row is contiguous, so the row mean sums in the same
+        # order as np.mean over the slice — identical to the per-bar loop.
+        atr_out[period - 1:] = sliding_window_view(tr, period).mean(axis=1)
     return atr_out
 
 
@@ -106,7 +112,15 @@ def triple_barrier_labels(
     atr_period: int = 14,
 ) -> np.ndarray:
     """
-    Vectorized-ish triple-barrier labeling.
+    Vectorized triple-barrier labeling — same labels as calling
+    `triple_barrier_label_single` per entry, without the per-entry /
+    per-bar Python loops.
+
+    Each entry's future highs / lows (bars entry+1 … entry+max_bars) are a
+    row of a sliding-window view; the first barrier hit is an argmax per
+    row. A bar that crosses both barriers counts as the stop (same
+    conservative convention). Rows are processed in chunks so memory stays
+    bounded on 50k-bar symbols.
 
     Args:
         highs, lows, closes: np.ndarray of OHLC arrays (same length N)
@@ -119,25 +133,61 @@ def triple_barrier_labels(
     Returns:
         np.ndarray of ints (+1 / 0 / -1), one per entry_index.
     """
+    highs = np.asarray(highs, dtype=np.float64)
+    lows = np.asarray(lows, dtype=np.float64)
+    closes = np.asarray(closes, dtype=np.float64)
+    n = len(closes)
     if entry_indices is None:
-        entry_indices = np.arange(atr_period, len(closes) - 1)
+        entry_indices = np.arange(atr_period, n - 1)
+    entries = np.asarray(entry_indices, dtype=np.int64).reshape(-1)
+    labels = np.zeros(len(entries), dtype=np.int64)
+    max_bars = int(max_bars)
+    if len(entries) == 0 or n < 2 or max_bars < 1:
+        return labels
 
     atr_series = atr(highs, lows, closes, period=atr_period)
-    labels = np.zeros(len(entry_indices), dtype=np.int64)
-
-    for j, idx in enumerate(entry_indices):
-        labels[j] = triple_barrier_label_single(
-            highs, lows, closes,
-            entry_idx=int(idx),
-            pt_atr_mult=pt_atr_mult,
-            sl_atr_mult=sl_atr_mult,
-            max_bars=max_bars,
-            atr_value=float(atr_series[idx]) if idx < len(atr_series) else None,
-        )
+    # Entries the single-entry labeler would call time-barrier up front:
+    # no future bar, or no usable ATR.
+    ok = (entries >= 0) & (entries < n - 1)
+    atr_at = np.full(len(entries), np.nan)
+    atr_at[ok] = atr_series[entries[ok]]
+    ok &= np.isfinite(atr_at) & (atr_at > 0)
+    rows = np.flatnonzero(ok)
+    if len(rows) == 0:
+        return labels
+
+    # Pad past the last bar with values that never touch a barrier, so the
+    # window for entry e is always bars e+1 … e+max_bars.
+    fut_h = sliding_window_view(np.concatenate((highs[1:], np.full(max_bars, -np.inf))), max_bars)
+    fut_l = sliding_window_view(np.concatenate((lows[1:], np.full(max_bars, np.inf))), max_bars)
+
+    chunk = max(1, _LABEL_CHUNK_CELLS // max_bars)
+    for lo in range(0, len(rows), chunk):
+        r = rows[lo:lo + chunk]
+        e = entries[r]
+        upper = closes[e] + pt_atr_mult * atr_at[r]
+        lower = closes[e] - sl_atr_mult * atr_at[r]
+        hit_l = fut_l[e] <= lower[:, None]
+        hit_u = fut_h[e] >= upper[:, None]
+        first_l = np.where(hit_l.any(axis=1), hit_l.argmax(axis=1), max_bars)
+        first_u = np.where(hit_u.any(axis=1), hit_u.argmax(axis=1), max_bars)
+        out = np.zeros(len(r), dtype=np.int64)
+        out[first_u < first_l] = 1
+        out[(first_l <= first_u) & (first_l < max_bars)] = -1
+        labels[r] = out
 
     return labels
 
 
+def labels_to_class_indices(labels: np.ndarray) -> np.ndarray:
+    """Vector form of `label_to_class_index` (-1/0/+1 → 0/1/2; anything else → 1)."""
+    labels = np.asarray(labels)
+    out = np.ones(len(labels), dtype=np.int64)
+    out[labels == -1] = 0
+    out[labels == 1] = 2
+    return out
+
+
 def label_to_class_index(label: int) -> int:
     """Map triple-barrier label (-1/0/+1) to 3-class index (0/1/2) for CE loss."""
     return {-1: 0, 0: 1, 1: 2}.get(int(label), 1)
@@ -0,0 +1,363 @@
+"""
+Async Mongo Repository
+======================
+One pooled Motor client for the FastAPI process's hot collections, with
+per-collection latency metrics.
+
+Why?
+    server.py talks to Mongo through a sync `MongoClient`, so every hot
+    path (scanner alert upserts, confidence-gate log writes, technical
+    snapshot bar reads, the IB push snapshot, the order-queue poll)
+    wraps pymongo in `asyncio.to_thread` / `run_in_executor(None, ...)`.
+    Those calls share the loop's default thread pool with IB RPC, model
+    inference and file I/O; under a push storm the pool saturates and the
+    loop wedges waiting for a free worker. Motor's I/O runs on its own
+    pool and awaits natively, so these paths never queue behind the
+    default executor.
+
+How
+    * `init_async_mongo()` (server startup, inside the main loop) builds
+      the client and binds it to that loop and to the sync `db` handle it
+      mirrors. `get_async_repo()` only hands it out on that loop; other
+      loops (scheduler jobs run their own) get None.
+    * `repo["bot_trades"]` → `AsyncCollection`: the usual Motor methods,
+      each timed into per-collection metrics (ops, errors, mean / p50 /
+      p95 / max ms). `find()` returns a timed cursor usable with
+      `async for` and `to_list()`.
+    * `call(sync_db, name, op, ...)` is the adoption helper: it runs `op`
+      through the repo when `sync_db` is the handle the repo mirrors, and
+      otherwise falls back to the sync collection in a worker thread, so
+      tests / scripts that inject their own db (mongomock, fakes) keep
+      their semantics.
+
+Knobs (env)
+    ASYNC_MONGO              "false" → every caller keeps its to_thread path
+    ASYNC_MONGO_MAX_POOL     max pooled connections (default 50)
+    ASYNC_MONGO_MIN_POOL     warm connections kept open (default 5)
+    ASYNC_MONGO_TIMEOUT_MS   server-selection timeout (default 5000)
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Collections the hot paths route through the repo (pre-registered so
+# their metrics show up even before the first op).
+HOT_COLLECTIONS = (
+    "ib_historical_data", "bot_trades", "order_queue", "confidence_gate_log",
+    "live_alerts", "ib_live_snapshot",
+)
+_LATENCY_WINDOW = 512
+
+
+def is_enabled() -> bool:
+    val = os.environ.get("ASYNC_MONGO", "true").strip().lower()
+    return val not in ("0", "false", "no", "off")
+
+
+def _env_num(name: str, default, cast=int):
+    try:
+        return cast(os.environ.get(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+class _CollectionMetrics:
+    __slots__ = ("ops", "errors", "total_ms", "max_ms", "window", "by_op")
+
+    def __init__(self):
+        self.ops = 0
+        self.errors = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.window: Deque[float] = deque(maxlen=_LATENCY_WINDOW)
+        self.by_op: Dict[str, int] = {}
+
+    def record(self, op: str, ms: float, ok: bool) -> None:
+        self.ops += 1
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+        self.window.append(ms)
+        self.by_op[op] = self.by_op.get(op, 0) + 1
+        if not ok:
+            self.errors += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        lat = sorted(self.window)
+
+        def pct(p):
+            return round(lat[min(len(lat) - 1, int(p * len(lat)))], 2) if lat else None
+        return {
+            "ops": self.ops,
+            "errors": self.errors,
+            "mean_ms": round(self.total_ms / self.ops, 2) if self.ops else None,
+            "p50_ms": pct(0.50),
+            "p95_ms": pct(0.95),
+            "max_ms": round(self.max_ms, 2),
+            "by_op": dict(self.by_op),
+        }
+
+
+class _TimedCursor:
+    """Motor cursor proxy: times from the first fetch to exhaustion."""
+
+    def __init__(self, cursor, owner: "AsyncCollection", op: str):
+        self._cursor = cursor
+        self._owner = owner
+        self._op = op
+
+    def sort(self, *a, **k):
+        self._cursor = self._cursor.sort(*a, **k)
+        return self
+
+    def limit(self, n):
+        self._cursor = self._cursor.limit(n)
+        return self
+
+    async def to_list(self, length=None):
+        t0 = time.perf_counter()
+        ok = False
+        try:
+            out = await self._cursor.to_list(length)
+            ok = True
+            return out
+        finally:
+            self._owner._record(self._op, t0, ok)
+
+    async def __aiter__(self):
+        t0 = time.perf_counter()
+        ok = False
+        try:
+            async for doc in self._cursor:
+                yield doc
+            ok = True
+        finally:
+            self._owner._record(self._op, t0, ok)
+
+
+class AsyncCollection:
+    """Timed facade over one Motor collection."""
+
+    def __init__(self, coll, metrics: _CollectionMetrics, lock: threading.Lock):
+        self._coll = coll
+        self._metrics = metrics
+        self._lock = lock
+
+    def _record(self, op: str, t0: float, ok: bool) -> None:
+        ms = (time.perf_counter() - t0) * 1000.0
+        with self._lock:
+            self._metrics.record(op, ms, ok)
+
+    async def _timed(self, op: str, *args, **kwargs):
+        t0 = time.perf_counter()
+        ok = False
+        try:
+            out = await getattr(self._coll, op)(*args, **kwargs)
+            ok = True
+            return out
+        finally:
+            self._record(op, t0, ok)
+
+    def find(self, *args, **kwargs) -> _TimedCursor:
+        return _TimedCursor(self._coll.find(*args, **kwargs), self, "find")
+
+    def aggregate(self, pipeline, **kwargs) -> _TimedCursor:
+        return _TimedCursor(self._coll.aggregate(pipeline, **kwargs), self, "aggregate")
+
+    async def find_list(self, filter=None, projection=None, *, sort=None, limit: int = 0
+                        ) -> List[Dict[str, Any]]:
+        cur = self._coll.find(filter or {}, projection)
+        if sort:
+            cur = cur.sort(sort)
+        if limit:
+            cur = cur.limit(limit)
+        return await _TimedCursor(cur, self, "find").to_list(None)
+
+    async def find_one(self, *a, **k):
+        return await self._timed("find_one", *a, **k)
+
+    async def insert_one(self, *a, **k):
+        return await self._timed("insert_one", *a, **k)
+
+    async def insert_many(self, *a, **k):
+        return await self._timed("insert_many", *a, **k)
+
+    async def update_one(self, *a, **k):
+        return await self._timed("update_one", *a, **k)
+
+    async def update_many(self, *a, **k):
+        return await self._timed("update_many", *a, **k)
+
+    async def replace_one(self, *a, **k):
+        return await self._timed("replace_one", *a, **k)
+
+    async def find_one_and_update(self, *a, **k):
+        return await self._timed("find_one_and_update", *a, **k)
+
+    async def count_documents(self, *a, **k):
+        return await self._timed("count_documents", *a, **k)
+
+    async def bulk_write(self, *a, **k):
+        return await self._timed("bulk_write", *a, **k)
+
+
+class AsyncMongoRepository:
+    def __init__(self, client, db_name: str, mirror_of: Any = None,
+                 loop: Optional[asyncio.AbstractEventLoop] = None, pool: Optional[Dict] = None):
+        self._client = client
+        self._db = client[db_name]
+        self.db_name = db_name
+        self.mirror_of = mirror_of
+        self.loop = loop
+        self._pool = pool or {}
+        self._lock = threading.Lock()
+        self._metrics: Dict[str, _CollectionMetrics] = {n: _CollectionMetrics() for n in HOT_COLLECTIONS}
+        self._colls: Dict[str, AsyncCollection] = {}
+        self._fallbacks = 0
+
+    def __getitem__(self, name: str) -> AsyncCollection:
+        coll = self._colls.get(name)
+        if coll is None:
+            with self._lock:
+                metrics = self._metrics.setdefault(name, _CollectionMetrics())
+            coll = self._colls[name] = AsyncCollection(self._db[name], metrics, self._lock)
+        return coll
+
+    def serves(self, sync_db: Any) -> bool:
+        """True when `sync_db` is the handle this repo mirrors and we're on
+        the loop the Motor client is bound to."""
+        if sync_db is None or sync_db is not self.mirror_of:
+            return False
+        try:
+            return asyncio.get_running_loop() is self.loop
+        except RuntimeError:
+            return False
+
+    def note_fallback(self) -> None:
+        with self._lock:
+            self._fallbacks += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            colls = {n: m.snapshot() for n, m in self._metrics.items()}
+            fallbacks = self._fallbacks
+        return {
+            "enabled": True,
+            "db": self.db_name,
+            "pool": dict(self._pool),
+            "thread_fallbacks": fallbacks,
+            "collections": colls,
+        }
+
+    def close(self) -> None:
+        try:
+            self._client.close()
+        except Exception:
+            pass
+
+
+_repo: Optional[AsyncMongoRepository] = None
+_repo_lock = threading.Lock()
+
+
+def init_async_mongo(mongo_url: Optional[str], db_name: str, mirror_of: Any = None
+                     ) -> Optional[AsyncMongoRepository]:
+    """Build the shared repo on the CURRENT running loop (call from the
+    FastAPI startup hook). Returns None when disabled / motor missing."""
+    global _repo
+    if not is_enabled() or not mongo_url:
+        return None
+    try:
+        from motor.motor_asyncio import AsyncIOMotorClient
+    except ImportError:
+        logger.warning("[async_mongo] motor not installed — hot paths stay on to_thread")
+        return None
+    pool = {
+        "maxPoolSize": _env_num("ASYNC_MONGO_MAX_POOL", 50),
+        "minPoolSize": _env_num("ASYNC_MONGO_MIN_POOL", 5),
+        "serverSelectionTimeoutMS": _env_num("ASYNC_MONGO_TIMEOUT_MS", 5000),
+    }
+    client = AsyncIOMotorClient(mongo_url, **pool)
+    with _repo_lock:
+        if _repo is not None:
+            _repo.close()
+        _repo = AsyncMongoRepository(client, db_name, mirror_of=mirror_of,
+                                     loop=asyncio.get_running_loop(), pool=pool)
+    logger.info("[async_mongo] Motor repository ready (pool %s)", pool)
+    return _repo
+
+
+def get_async_repo() -> Optional[AsyncMongoRepository]:
+    """The shared repo, or None off its loop / before startup."""
+    repo = _repo
+    if repo is None:
+        return None
+    try:
+        if asyncio.get_running_loop() is not repo.loop:
+            return None
+    except RuntimeError:
+        return None
+    return repo
+
+
+def close_async_mongo() -> None:
+    global _repo
+    with _repo_lock:
+        if _repo is not None:
+            _repo.close()
+        _repo = None
+
+
+def stats() -> Dict[str, Any]:
+    repo = _repo
+    if repo is None:
+        return {"enabled": False}
+    return repo.stats()
+
+
+async def call(sync_db: Any, name: str, op: str, *args, **kwargs):
+    """Run `sync_db[name].<op>(*args, **kwargs)` via the async repo when it
+    mirrors `sync_db`, else on the sync collection in a worker thread.
+    Cursor ops aren't supported here — use `find_list` / `aggregate_list`."""
+    repo = _repo
+    if repo is not None and repo.serves(sync_db):
+        return await getattr(repo[name], op)(*args, **kwargs)
+    if repo is not None:
+        repo.note_fallback()
+    return await asyncio.to_thread(getattr(sync_db[name], op), *args, **kwargs)
+
+
+async def find_list(sync_db: Any, name: str, filter=None, projection=None, *,
+                    sort=None, limit: int = 0) -> List[Dict[str, Any]]:
+    repo = _repo
+    if repo is not None and repo.serves(sync_db):
+        return await repo[name].find_list(filter, projection, sort=sort, limit=limit)
+    if repo is not None:
+        repo.note_fallback()
+
+    def _sync():
+        cur = sync_db[name].find(filter or {}, projection)
+        if sort:
+            cur = cur.sort(sort)
+        if limit:
+            cur = cur.limit(limit)
+        return list(cur)
+    return await asyncio.to_thread(_sync)
+
+
+async def aggregate_list(sync_db: Any, name: str, pipeline: List[Dict[str, Any]], **kwargs
+                         ) -> List[Dict[str, Any]]:
+    repo = _repo
+    if repo is not None and repo.serves(sync_db):
+        return await repo[name].aggregate(pipeline, **kwargs).to_list(None)
+    if repo is not None:
+        repo.note_fallback()
+    return await asyncio.to_thread(lambda: list(sync_db[name].aggregate(pipeline, **kwargs)))
@@ -50,6 +50,7 @@ from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait as _fwa
 from datetime import datetime, timezone, timedelta
 from typing import Any, Dict, List
 
+from . import bar_catalog
 from .symbol_universe import get_universe
 
 logger = logging.getLogger(__name__)
@@ -198,17 +199,24 @@ def _check_critical_symbols(db) -> Dict[str, Any]:
     per_symbol: List[Dict[str, Any]] = []
     all_fresh = True
     stale_symbols: List[str] = []
+    catalog = (
+        {tf: bar_catalog.latest_by_symbol(db, tf, CRITICAL_SYMBOLS) for tf in CRITICAL_TIMEFRAMES}
+        if bar_catalog.is_ready(db) else None
+    )
 
     for sym in CRITICAL_SYMBOLS:
         tf_detail = []
         sym_ok = True
         for tf in CRITICAL_TIMEFRAMES:
-            doc = data.find_one(
-                {"symbol": sym, "bar_size": tf},
-                {"_id": 0, "date": 1},
-                sort=[("date", -1)],
-            )
-            latest = doc.get("date") if doc else None
+            if catalog is not None:
+                latest = catalog[tf].get(sym)
+            else:
+                doc = data.find_one(
+                    {"symbol": sym, "bar_size": tf},
+                    {"_id": 0, "date": 1},
+                    sort=[("date", -1)],
+                )
+                latest = doc.get("date") if doc else None
             age = _age_days(latest, now)
             stale_threshold = _adjusted_stale_days(tf, market_state)
             fresh = age is not None and age <= stale_threshold
@@ -361,19 +369,25 @@ def _check_overall_freshness(db) -> Dict[str, Any]:
     total_fresh = total_pairs = 0
     per_tf: List[Dict[str, Any]] = []
     intraday_list = list(intraday_symbols)
-    # Per-symbol find_one with the unique compound index is O(1) per
-    # call (~2-5ms). 2.6k symbols × 5 timeframes = ~13s total — well
-    # under budget — and bypasses the slow $in:[2.6k symbols] aggregation
-    # that timed out at 90s on the user's 85M-row collection.
+    # The bar catalog answers each timeframe with one small read. Before
+    # it's seeded: per-symbol find_one with the unique compound index is
+    # O(1) per call (~2-5ms). 2.6k symbols × 5 timeframes = ~13s total —
+    # well under budget — and bypasses the slow $in:[2.6k symbols]
+    # aggregation that timed out at 90s on the user's 85M-row collection.
+    use_catalog = bar_catalog.is_ready(db)
     PROJ = {"_id": 0, "date": 1}
     SORT = [("date", -1)]
     for tf in CRITICAL_TIMEFRAMES:
         fresh = 0
         # Weekend/overnight-aware threshold (Friday close → Mon open ~2.7d)
         budget = _adjusted_stale_days(tf, market_state)
+        latest = bar_catalog.latest_by_symbol(db, tf) if use_catalog else None
         for s in intraday_list:
-            doc = data.find_one({"symbol": s, "bar_size": tf}, PROJ, sort=SORT)
-            age = _age_days(doc.get("date") if doc else None, now)
+            if latest is not None:
+                age = _age_days(latest.get(s), now)
+            else:
+                doc = data.find_one({"symbol": s, "bar_size": tf}, PROJ, sort=SORT)
+                age = _age_days(doc.get("date") if doc else None, now)
             if age is not None and age <= budget:
                 fresh += 1
         per_tf.append({
@@ -427,17 +441,21 @@ def _check_density_adequate(db) -> Dict[str, Any]:
             "low_density_sample": [],
         }
 
-    # Per-symbol count_documents with a limit-bounded count is O(min(N,
-    # threshold)) per call thanks to the (symbol, bar_size, date) index
-    # — at most 780 index entries scanned per symbol. 2.6k × ~5ms = ~13s
-    # total, replacing the slow $in:[2.6k symbols] aggregation that
+    # The bar catalog carries every symbol's 5-min bar count. Before it's
+    # seeded: per-symbol count_documents with a limit-bounded count is
+    # O(min(N, threshold)) per call thanks to the (symbol, bar_size, date)
+    # index — at most 780 index entries scanned per symbol. 2.6k × ~5ms =
+    # ~13s total, replacing the slow $in:[2.6k symbols] aggregation that
     # timed out at 90s on the user's 85M-row collection.
     counts: Dict[str, int] = {}
-    for s in intraday_symbols:
-        counts[s] = data.count_documents(
-            {"symbol": s, "bar_size": "5 mins"},
-            limit=DENSITY_MIN_5MIN_BARS,
-        )
+    if bar_catalog.is_ready(db):
+        counts = bar_catalog.bar_counts(db, "5 mins")
+    else:
+        for s in intraday_symbols:
+            counts[s] = data.count_documents(
+                {"symbol": s, "bar_size": "5 mins"},
+                limit=DENSITY_MIN_5MIN_BARS,
+            )
 
     low: List[Dict[str, Any]] = []
     dense = 0
@@ -0,0 +1,478 @@
+"""
+Bar Catalog
+===========
+One document per (symbol, bar_size) describing what `ib_historical_data`
+holds: bar count, earliest / latest `date`, last `collected_at` and a
+per-day coverage map — maintained by the writers, so coverage questions
+never scan the bars.
+
+Why?
+    `build_data_inventory` `$group`s the whole ~85M-row collection,
+    backfill readiness runs ~2.6k `count_documents` / `find_one` probes per
+    check (~13s each), and the coverage / freshness routers `$group` max
+    dates per bar size. Every one of them re-derives the same handful of
+    numbers per (symbol, bar_size) that the writers already know at write
+    time.
+
+How
+    * Writers (`TickToBarPersister`, the pusher result endpoints, the IB
+      historical collector's store loops) call `record_writes()` after
+      their upserts with the written `(symbol, bar_size, date)` keys and
+      the indexes Mongo reported as *inserted* (`upserted_indexes()`).
+      One unordered bulk per batch, one op per (symbol, bar_size):
+      `$inc` bars by the inserted count (re-writes of an existing bar
+      don't count), `$min` / `$max` the raw `date` (same ordering the
+      old `$group` used), `$max` last_collected_at, and `$addToSet` the
+      covered day-of-month under `days.<YYYY-MM>`. Every op is idempotent
+      except the `$inc`, which only moves on real inserts.
+    * Deletes can't be folded the same way (the deleter rarely knows
+      which days it removed), so deleters call `record_deletes()` with
+      the (symbol, bar_size) pairs they touched: those entries are
+      marked `dirty` and the next read re-derives each one from its own
+      bars (`refresh()`, an indexed `$match` + `$group`). A delete that
+      can't name its pairs drops the seed instead — readers go back to
+      their scans until the next `rebuild()`.
+    * `coverage_bitmap()` / `gap_days()` decode the day map into a
+      calendar-day bitmap from `earliest` and the weekdays with no bars
+      (exchange holidays show up as gaps — there's no holiday calendar
+      in the tree).
+    * `rebuild()` re-derives every entry from the bars in one `$group`
+      (the seed, and a weekly reconcile from the trading scheduler that
+      also corrects drift from writers outside this contract, e.g.
+      scripts). Readers only trust the catalog once a seed has
+      completed (`is_ready()`); before that they keep their scans. The
+      server runs that seed once in the background at startup when the
+      catalog isn't ready (`seed_if_unready()`), so a fresh deploy doesn't
+      wait for the weekly job.
+
+Knobs (env)
+    BAR_CATALOG   "false" → writers skip the catalog and readers scan
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import threading
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+CATALOG_COLLECTION = "bar_catalog"
+META_COLLECTION = "bar_catalog_meta"
+SOURCE_COLLECTION = "ib_historical_data"
+_SEED_ID = "seed"
+_BULK_CHUNK = 1000
+
+_stats_lock = threading.Lock()
+_stats: Dict[str, int] = {
+    "batches": 0,
+    "entries_touched": 0,
+    "bars_inserted": 0,
+    "write_failures": 0,
+    "rebuilds": 0,
+    "rebuild_drift": 0,
+    "catalog_reads": 0,
+    "scan_fallbacks": 0,
+    "dirty_marks": 0,
+    "dirty_refreshes": 0,
+    "seed_invalidations": 0,
+}
+
+
+def is_enabled() -> bool:
+    val = os.environ.get("BAR_CATALOG", "true").strip().lower()
+    return val not in ("0", "false", "no", "off")
+
+
+def _bump(key: str, n: int = 1) -> None:
+    with _stats_lock:
+        _stats[key] = _stats.get(key, 0) + n
+
+
+def stats() -> Dict[str, Any]:
+    with _stats_lock:
+        return {"enabled": is_enabled(), **_stats}
+
+
+def day_key(date_val: Any) -> Optional[str]:
+    """'YYYY-MM-DD' for any `date` shape the writers store
+    ('2026-06-10', '20260610', '20260610 09:30:00', ISO with offset,
+    datetime). None when unparseable."""
+    if date_val is None:
+        return None
+    if isinstance(date_val, (datetime, date)):
+        return date_val.strftime("%Y-%m-%d")
+    s = str(date_val)[:10].replace("/", "-")
+    if len(s) >= 8 and s[:8].isdigit():
+        s = f"{s[:4]}-{s[4:6]}-{s[6:8]}"
+    try:
+        date.fromisoformat(s[:10])
+    except ValueError:
+        return None
+    return s[:10]
+
+
+# ─── Write path ─────────────────────────────────────────────────────────────
+
+def upserted_indexes(result: Any) -> Set[int]:
+    """Op indexes Mongo reported as inserts, from a `BulkWriteResult`, an
+    `UpdateResult` (index 0) or a `BulkWriteError.details` dict."""
+    if result is None:
+        return set()
+    if isinstance(result, dict):
+        return {u.get("index") for u in result.get("upserted") or [] if u.get("index") is not None}
+    ids = getattr(result, "upserted_ids", None)
+    if ids is not None:
+        return set(ids)
+    return {0} if getattr(result, "upserted_id", None) is not None else set()
+
+
+def record_writes(
+    db,
+    keys: Sequence[Tuple[str, str, Any]],
+    inserted: Iterable[int] = (),
+    collected_at: Optional[str] = None,
+) -> int:
+    """Fold one batch of `ib_historical_data` upserts into the catalog.
+
+    `keys[i]` is the (symbol, bar_size, date) of op i; `inserted` the op
+    indexes that created a new bar. Returns entries touched. Never raises —
+    the bars are already written; a failed fold is drift the weekly
+    `rebuild()` corrects."""
+    if db is None or not keys or not is_enabled():
+        return 0
+    inserted = set(inserted)
+    groups: Dict[Tuple[str, str], Dict[str, Any]] = {}
+    for i, (symbol, bar_size, date_val) in enumerate(keys):
+        if not symbol or not bar_size or date_val is None:
+            continue
+        g = groups.get((symbol, bar_size))
+        if g is None:
+            g = groups[(symbol, bar_size)] = {"n": 0, "lo": date_val, "hi": date_val, "days": {}}
+        if i in inserted:
+            g["n"] += 1
+        if str(date_val) < str(g["lo"]):
+            g["lo"] = date_val
+        if str(date_val) > str(g["hi"]):
+            g["hi"] = date_val
+        dk = day_key(date_val)
+        if dk:
+            g["days"].setdefault(dk[:7], set()).add(int(dk[8:10]))
+    if not groups:
+        return 0
+
+    from pymongo import UpdateOne
+    now = datetime.now(timezone.utc).isoformat()
+    collected_at = collected_at or now
+    ops = []
+    for (symbol, bar_size), g in groups.items():
+        update: Dict[str, Any] = {
+            "$inc": {"bars": g["n"]},
+            "$min": {"earliest": g["lo"]},
+            "$max": {"latest": g["hi"], "last_collected_at": collected_at},
+            "$set": {"updated_at": now},
+        }
+        if g["days"]:
+            update["$addToSet"] = {
+                f"days.{month}": {"$each": sorted(days)} for month, days in g["days"].items()
+            }
+        ops.append(UpdateOne({"symbol": symbol, "bar_size": bar_size}, update, upsert=True))
+    try:
+        db[CATALOG_COLLECTION].bulk_write(ops, ordered=False)
+    except Exception as e:
+        _bump("write_failures")
+        logger.warning(f"[bar_catalog] fold of {len(ops)} entries failed: {e}")
+        return 0
+    _bump("batches")
+    _bump("entries_touched", len(ops))
+    _bump("bars_inserted", sum(g["n"] for g in groups.values()))
+    return len(ops)
+
+
+def record_deletes(db, pairs: Optional[Iterable[Tuple[str, Optional[str]]]]) -> int:
+    """Flag the entries a delete on `ib_historical_data` touched.
+
+    `pairs` are (symbol, bar_size); a None bar_size flags every bar size
+    of the symbol. `pairs=None` means the delete can't say what it hit
+    (e.g. a retention sweep), so the seed is dropped and readers scan
+    until the next `rebuild()`. Returns entries flagged. Never raises."""
+    if db is None or not is_enabled():
+        return 0
+    stamp = datetime.now(timezone.utc).isoformat()
+    if pairs is None:
+        try:
+            db[META_COLLECTION].update_one(
+                {"_id": _SEED_ID},
+                {"$unset": {"completed_at": ""}, "$set": {"invalidated_at": stamp}},
+            )
+        except Exception as e:
+            _bump("write_failures")
+            logger.warning(f"[bar_catalog] seed invalidation failed: {e}")
+            return 0
+        _bump("seed_invalidations")
+        return 0
+    from pymongo import UpdateMany
+    ops = []
+    for symbol, bar_size in {(s, b) for s, b in pairs if s}:
+        query: Dict[str, Any] = {"symbol": symbol}
+        if bar_size:
+            query["bar_size"] = bar_size
+        ops.append(UpdateMany(query, {"$set": {"dirty": stamp}}))
+    if not ops:
+        return 0
+    try:
+        flagged = db[CATALOG_COLLECTION].bulk_write(ops, ordered=False).modified_count
+    except Exception as e:
+        _bump("write_failures")
+        logger.warning(f"[bar_catalog] dirty mark of {len(ops)} pairs failed: {e}")
+        return 0
+    _bump("dirty_marks", flagged)
+    return flagged
+
+
+def _derive(db, match: Dict[str, Any]):
+    """Catalog-shaped rows for the bars matching `match`, one per
+    (symbol, bar_size)."""
+    pipeline = [{"$match": match}, {"$group": {
+        "_id": {"symbol": "$symbol", "bar_size": "$bar_size"},
+        "bars": {"$sum": 1},
+        "earliest": {"$min": "$date"},
+        "latest": {"$max": "$date"},
+        "last_collected_at": {"$max": "$collected_at"},
+        "day_prefixes": {"$addToSet": {"$substr": ["$date", 0, 10]}},
+    }}]
+    for doc in db[SOURCE_COLLECTION].aggregate(pipeline, allowDiskUse=True):
+        symbol, bar_size = doc["_id"].get("symbol"), doc["_id"].get("bar_size")
+        if not symbol or not bar_size:
+            continue
+        days: Dict[str, Set[int]] = {}
+        for prefix in doc.get("day_prefixes") or []:
+            dk = day_key(prefix)
+            if dk:
+                days.setdefault(dk[:7], set()).add(int(dk[8:10]))
+        yield {
+            "symbol": symbol,
+            "bar_size": bar_size,
+            "bars": doc["bars"],
+            "earliest": doc.get("earliest"),
+            "latest": doc.get("latest"),
+            "last_collected_at": doc.get("last_collected_at"),
+            "days": {m: sorted(d) for m, d in days.items()},
+        }
+
+
+def refresh(db, entry: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Re-derive one dirty entry from its bars. Returns the fresh entry,
+    or None when the delete left no bars (the entry is removed).
+
+    The replace only lands if the entry still carries the `dirty` stamp
+    we read, so a delete flagged mid-refresh keeps its flag; bars inserted
+    between the `$group` and the replace wait for the next reconcile, as
+    in `rebuild()`."""
+    symbol, bar_size = entry["symbol"], entry["bar_size"]
+    fresh = next(_derive(db, {"symbol": symbol, "bar_size": bar_size}), None)
+    key = {"symbol": symbol, "bar_size": bar_size, "dirty": entry.get("dirty")}
+    col = db[CATALOG_COLLECTION]
+    if fresh is None:
+        col.delete_one(key)
+    else:
+        fresh["updated_at"] = datetime.now(timezone.utc).isoformat()
+        col.replace_one(key, fresh)
+    _bump("dirty_refreshes")
+    return fresh
+
+
+def ensure_indexes(db) -> None:
+    try:
+        col = db[CATALOG_COLLECTION]
+        col.create_index([("symbol", 1), ("bar_size", 1)], unique=True)
+        col.create_index([("bar_size", 1), ("latest", -1)])
+    except Exception as e:
+        logger.debug(f"[bar_catalog] ensure_indexes failed: {e}")
+
+
+# ─── Read path ──────────────────────────────────────────────────────────────
+
+def is_ready(db) -> bool:
+    """True once a `rebuild()` has seeded the catalog (and it's enabled)."""
+    if db is None or not is_enabled():
+        return False
+    try:
+        meta = db[META_COLLECTION].find_one({"_id": _SEED_ID}, {"completed_at": 1})
+    except Exception:
+        return False
+    return isinstance(meta, dict) and bool(meta.get("completed_at"))
+
+
+def entries(db, bar_size: Optional[str] = None, symbols: Optional[Iterable[str]] = None,
+            with_days: bool = False) -> List[Dict[str, Any]]:
+    query: Dict[str, Any] = {}
+    if bar_size:
+        query["bar_size"] = bar_size
+    if symbols is not None:
+        query["symbol"] = {"$in": list(symbols)}
+    out = []
+    for e in db[CATALOG_COLLECTION].find(query, {"_id": 0}):
+        if e.get("dirty"):
+            e = refresh(db, e)
+            if e is None:
+                continue
+        if not with_days:
+            e.pop("days", None)
+        out.append(e)
+    return out
+
+
+def latest_by_symbol(db, bar_size: str, symbols: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+    """{symbol: latest raw `date`} for one bar size, from the catalog."""
+    _bump("catalog_reads")
+    return {e["symbol"]: e.get("latest") for e in entries(db, bar_size, symbols)}
+
+
+def bar_counts(db, bar_size: str, symbols: Optional[Iterable[str]] = None) -> Dict[str, int]:
+    """{symbol: bars} for one bar size, from the catalog."""
+    _bump("catalog_reads")
+    return {e["symbol"]: int(e.get("bars") or 0) for e in entries(db, bar_size, symbols)}
+
+
+def latest_dates(db, bar_size: str, symbols: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+    """{symbol: max `date`} — the catalog once seeded, else the
+    `$group: {_id: "$symbol", max_date: {$max: "$date"}}` scan it replaces."""
+    if is_ready(db):
+        return latest_by_symbol(db, bar_size, symbols)
+    _bump("scan_fallbacks")
+    match: Dict[str, Any] = {"bar_size": bar_size}
+    if symbols is not None:
+        match["symbol"] = {"$in": list(symbols)}
+    rows = db[SOURCE_COLLECTION].aggregate(
+        [{"$match": match}, {"$group": {"_id": "$symbol", "max_date": {"$max": "$date"}}}],
+        allowDiskUse=True,
+    )
+    return {r["_id"]: r.get("max_date") for r in rows if r.get("_id")}
+
+
+def coverage_bitmap(entry: Dict[str, Any]) -> Tuple[Optional[date], int]:
+    """(first_day, bitmap) where bit i set ⇔ first_day + i has bars."""
+    first = day_key(entry.get("earliest"))
+    if not first:
+        return None, 0
+    start = date.fromisoformat(first)
+    bitmap = 0
+    for month, days in (entry.get("days") or {}).items():
+        try:
+            y, m = int(month[:4]), int(month[5:7])
+        except ValueError:
+            continue
+        for d in days:
+            try:
+                offset = (date(y, m, int(d)) - start).days
+            except ValueError:
+                continue
+            if offset >= 0:
+                bitmap |= 1 << offset
+    return start, bitmap
+
+
+def gap_days(entry: Dict[str, Any], limit: Optional[int] = None) -> List[str]:
+    """Weekdays between earliest and latest with no bars, oldest first."""
+    start, bitmap = coverage_bitmap(entry)
+    last = day_key(entry.get("latest"))
+    if start is None or not last:
+        return []
+    gaps: List[str] = []
+    span = (date.fromisoformat(last) - start).days
+    for i in range(span + 1):
+        d = start + timedelta(days=i)
+        if d.weekday() < 5 and not (bitmap >> i) & 1:
+            gaps.append(d.isoformat())
+            if limit and len(gaps) >= limit:
+                break
+    return gaps
+
+
+def describe(db, symbol: str, gap_limit: int = 50) -> List[Dict[str, Any]]:
+    """Catalog entries for one symbol with decoded gap lists."""
+    out = []
+    for e in sorted(entries(db, symbols=[symbol.upper()], with_days=True), key=lambda x: x["bar_size"]):
+        gaps = gap_days(e)
+        e.pop("days", None)
+        e["gap_days"] = len(gaps)
+        e["gap_sample"] = gaps[:gap_limit]
+        out.append(e)
+    return out
+
+
+# ─── Seed / reconcile ───────────────────────────────────────────────────────
+
+def rebuild(db) -> Dict[str, Any]:
+    """Re-derive every entry from `ib_historical_data` (one `$group`).
+
+    Entries written concurrently with the scan are left alone unless the
+    scan produced them; bars inserted between the scan and the replace are
+    picked up by the next reconcile."""
+    from pymongo import ReplaceOne
+    start = datetime.now(timezone.utc)
+    stamp = start.isoformat()
+    col = db[CATALOG_COLLECTION]
+    ensure_indexes(db)
+
+    previous = {(e["symbol"], e["bar_size"]): int(e.get("bars") or 0)
+                for e in col.find({}, {"_id": 0, "symbol": 1, "bar_size": 1, "bars": 1})}
+    ops = []
+    drift = seen = 0
+    for doc in _derive(db, {}):
+        symbol, bar_size = doc["symbol"], doc["bar_size"]
+        seen += 1
+        if previous.get((symbol, bar_size), doc["bars"]) != doc["bars"]:
+            drift += 1
+        ops.append(ReplaceOne({"symbol": symbol, "bar_size": bar_size},
+                              {**doc, "updated_at": stamp, "rebuilt_at": stamp}, upsert=True))
+        if len(ops) >= _BULK_CHUNK:
+            col.bulk_write(ops, ordered=False)
+            ops = []
+    if ops:
+        col.bulk_write(ops, ordered=False)
+    removed = col.delete_many({"rebuilt_at": {"$ne": stamp}, "updated_at": {"$lt": stamp}}).deleted_count
+
+    duration = (datetime.now(timezone.utc) - start).total_seconds()
+    report = {
+        "entries": seen,
+        "drifted": drift,
+        "removed": removed,
+        "duration_seconds": round(duration, 1),
+    }
+    db[META_COLLECTION].update_one(
+        {"_id": _SEED_ID},
+        {"$set": {"completed_at": datetime.now(timezone.utc).isoformat(), **report}},
+        upsert=True,
+    )
+    _bump("rebuilds")
+    _bump("rebuild_drift", drift)
+    logger.info(f"[bar_catalog] rebuild: {seen} entries, {drift} drifted, {removed} removed in {duration:.1f}s")
+    return {"success": True, **report}
+
+
+async def seed_if_unready(db, delay_s: float = 60.0) -> Optional[Dict[str, Any]]:
+    """Startup one-shot: `rebuild()` in a worker thread unless a seed has
+    already completed. `delay_s` keeps the `$group` clear of the boot rush.
+    Returns the rebuild report, or None when nothing ran."""
+    if delay_s:
+        await asyncio.sleep(delay_s)
+    if db is None or not is_enabled() or await asyncio.to_thread(is_ready, db):
+        return None
+    logger.info("[bar_catalog] not seeded yet — running the initial rebuild")
+    try:
+        return await asyncio.to_thread(rebuild, db)
+    except Exception as e:
+        logger.warning(f"[bar_catalog] startup seed failed (readers keep scanning): {e}")
+        return None
+
+
+def seed_info(db) -> Optional[Dict[str, Any]]:
+    try:
+        return db[META_COLLECTION].find_one({"_id": _SEED_ID}, {"_id": 0})
+    except Exception:
+        return None
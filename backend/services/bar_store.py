@@ -0,0 +1,454 @@
+"""
+In-Process Columnar Bar Store
+=============================
+Process-wide rolling OHLCV windows (NumPy columns) per (symbol, bar_size),
+shared by the scanner's technical snapshots and anything else that only
+needs the trailing N bars of a symbol.
+
+Why?
+    `RealTimeTechnicalService.get_technical_snapshot` used to issue two
+    Mongo round-trips per symbol per scan cycle (a 78-bar 5-min aggregate
+    + a 50-bar daily find). At ~480 symbols per cycle that is ~1,000
+    queries every cycle just to re-read bars we already saw. The store
+    keeps those trailing windows in memory so the scan path slices arrays
+    instead of hitting `ib_historical_data`.
+
+How it stays current:
+    * Bulk hydrate — `hydrate()` loads every requested symbol for a
+      bar_size with one chunked `$sort → $group/$push → $slice`
+      aggregation (same shape as ib_historical_collector's ADV rebuild).
+      Run once at startup and then on the `bar_store_refresh_loop`
+      cadence (BAR_STORE_REFRESH_SEC, default 300s) so daily bars and
+      symbols the pusher does not stream catch up without per-symbol I/O.
+    * Live bar-close — `TickToBarPersister` calls `on_bar_close()` for every
+      finalized bar, so streamed symbols advance the moment a bar closes.
+      Only windows that already exist are advanced: a window seeded by a
+      single live bar would otherwise shadow the Mongo history behind it.
+    * Read-through — a caller that misses (unknown symbol, or a window older
+      than BAR_STORE_MAX_AGE_SEC) falls back to its Mongo path and seeds the
+      window via `load()`, so a dead refresh loop degrades to the old
+      behaviour instead of serving stale bars.
+
+Design notes:
+    * Each window is a fixed-capacity set of contiguous NumPy columns kept
+      in chronological order (append shifts left once full). Reads are
+      zero-copy slices; the shift is a memmove of <= capacity floats.
+    * Timestamps are kept verbatim (IB "YYYYMMDD HH:MM:SS" ET or ISO UTC)
+      for downstream parsers, plus a float epoch column used for ordering,
+      because the two formats do not sort correctly as strings.
+    * `get_bars()` returns the same list-of-dict shape as
+      `_get_intraday_bars_from_db` so the snapshot math is unchanged.
+    * `BAR_STORE_ENABLED=false` (env) turns every read into a miss.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+# bar_size → window capacity. Mirrors the windows the technical snapshot
+# reads (78 five-min bars ≈ one RTH session, 50 daily bars).
+DEFAULT_CAPACITY: Dict[str, int] = {
+    "5 mins": 78,
+    "1 day": 50,
+}
+
+def _is_enabled() -> bool:
+    val = os.environ.get("BAR_STORE_ENABLED", "true").strip().lower()
+    return val not in ("0", "false", "no", "off")
+
+
+def _max_age_sec() -> float:
+    try:
+        return float(os.environ.get("BAR_STORE_MAX_AGE_SEC", "900"))
+    except ValueError:
+        return 900.0
+
+
+def _ts_epoch(ts) -> float:
+    """Best-effort epoch seconds for a bar timestamp (ordering key only).
+
+    IB-format strings ("YYYYMMDD" / "YYYYMMDD HH:MM:SS") carry ET wall
+    time; ISO strings carry their own offset (naive → UTC). Returns 0.0
+    when unparseable so such bars sort first and never displace real ones.
+    """
+    try:
+        if isinstance(ts, datetime):
+            dt = ts if ts.tzinfo else ts.replace(tzinfo=timezone.utc)
+            return dt.timestamp()
+        s = str(ts or "").strip()
+        if not s:
+            return 0.0
+        if "T" in s:
+            dt = datetime.fromisoformat(s.replace("Z", "+00:00"))
+            if dt.tzinfo is None:
+                dt = dt.replace(tzinfo=timezone.utc)
+            return dt.timestamp()
+        if len(s) >= 8 and s[:8].isdigit():
+            from zoneinfo import ZoneInfo
+            fmt = "%Y%m%d %H:%M:%S" if len(s) >= 17 else "%Y%m%d"
+            dt = datetime.strptime(s[:17] if len(s) >= 17 else s[:8], fmt)
+            return dt.replace(tzinfo=ZoneInfo("America/New_York")).timestamp()
+        dt = datetime.strptime(s[:10].replace("/", "-"), "%Y-%m-%d")
+        return dt.replace(tzinfo=timezone.utc).timestamp()
+    except Exception:
+        return 0.0
+
+
+class BarWindow:
+    """Fixed-capacity chronological OHLCV columns for one (symbol, bar_size)."""
+
+    __slots__ = (
+        "capacity",
+        "size",
+        "epoch",
+        "open",
+        "high",
+        "low",
+        "close",
+        "volume",
+        "timestamps",
+        "collected_at",
+        "updated_at",
+    )
+
+    def __init__(self, capacity: int) -> None:
+        self.capacity = capacity
+        self.size = 0
+        self.epoch = np.zeros(capacity, dtype=np.float64)
+        self.open = np.zeros(capacity, dtype=np.float64)
+        self.high = np.zeros(capacity, dtype=np.float64)
+        self.low = np.zeros(capacity, dtype=np.float64)
+        self.close = np.zeros(capacity, dtype=np.float64)
+        self.volume = np.zeros(capacity, dtype=np.float64)
+        self.timestamps = np.empty(capacity, dtype=object)
+        self.collected_at = np.empty(capacity, dtype=object)
+        self.updated_at = time.monotonic()
+
+    def _columns(self):
+        return (
+            self.epoch, self.open, self.high, self.low, self.close,
+            self.volume, self.timestamps, self.collected_at,
+        )
+
+    def _write(self, i: int, bar: Dict, epoch: float) -> None:
+        self.epoch[i] = epoch
+        self.open[i] = float(bar.get("open") or 0)
+        self.high[i] = float(bar.get("high") or 0)
+        self.low[i] = float(bar.get("low") or 0)
+        self.close[i] = float(bar.get("close") or 0)
+        self.volume[i] = float(bar.get("volume") or 0)
+        self.timestamps[i] = bar.get("timestamp", bar.get("date"))
+        self.collected_at[i] = bar.get("collected_at")
+
+    def load(self, bars: Iterable[Dict]) -> None:
+        """Replace the window with `bars` (any order; newest `capacity` kept)."""
+        keyed = []
+        for b in bars:
+            ts = b.get("timestamp", b.get("date"))
+            if ts is None:
+                continue
+            keyed.append((_ts_epoch(ts), b))
+        keyed.sort(key=lambda kb: kb[0])
+        keyed = keyed[-self.capacity:]
+        for i, (ep, b) in enumerate(keyed):
+            self._write(i, b, ep)
+        self.size = len(keyed)
+        self.updated_at = time.monotonic()
+
+    def append(self, bar: Dict) -> bool:
+        """Advance with a closed bar. Same timestamp overwrites the tail
+        (a re-emitted bar); older-than-tail bars are ignored."""
+        ts = bar.get("timestamp", bar.get("date"))
+        if ts is None:
+            return False
+        ep = _ts_epoch(ts)
+        if self.size:
+            last = self.epoch[self.size - 1]
+            if ep < last:
+                return False
+            if ep == last:
+                self._write(self.size - 1, bar, ep)
+                self.updated_at = time.monotonic()
+                return True
+        if self.size == self.capacity:
+            for col in self._columns():
+                col[:-1] = col[1:]
+            self._write(self.capacity - 1, bar, ep)
+        else:
+            self._write(self.size, bar, ep)
+            self.size += 1
+        self.updated_at = time.monotonic()
+        return True
+
+    def arrays(self, limit: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """Zero-copy column views of the trailing `limit` bars."""
+        n = self.size if limit is None else min(limit, self.size)
+        lo, hi = self.size - n, self.size
+        return {
+            "epoch": self.epoch[lo:hi],
+            "open": self.open[lo:hi],
+            "high": self.high[lo:hi],
+            "low": self.low[lo:hi],
+            "close": self.close[lo:hi],
+            "volume": self.volume[lo:hi],
+            "timestamp": self.timestamps[lo:hi],
+        }
+
+    def to_bars(self, limit: Optional[int] = None) -> List[Dict]:
+        """List-of-dict view, oldest first (same shape as the Mongo path)."""
+        n = self.size if limit is None else min(limit, self.size)
+        out: List[Dict] = []
+        for i in range(self.size - n, self.size):
+            vol = float(self.volume[i])
+            bar = {
+                "timestamp": self.timestamps[i],
+                "open": float(self.open[i]),
+                "high": float(self.high[i]),
+                "low": float(self.low[i]),
+                "close": float(self.close[i]),
+                "volume": int(vol) if vol.is_integer() else vol,
+            }
+            if self.collected_at[i] is not None:
+                bar["collected_at"] = self.collected_at[i]
+            out.append(bar)
+        return out
+
+
+class BarStore:
+    """Process-wide map of (symbol, bar_size) → BarWindow. Thread-safe:
+    bar-close events arrive from the push worker thread."""
+
+    def __init__(self, capacity: Optional[Dict[str, int]] = None) -> None:
+        self._capacity: Dict[str, int] = dict(capacity or DEFAULT_CAPACITY)
+        self._windows: Dict[Tuple[str, str], BarWindow] = {}
+        self._lock = threading.Lock()
+        # Stats (read by /api/technicals/bar-store/stats).
+        self._hits = 0
+        self._misses = 0
+        self._live_appends = 0
+        self._last_hydrate: Dict[str, Dict] = {}
+
+    # ---------- configuration -------------------------------------------
+    def capacity_for(self, bar_size: str) -> Optional[int]:
+        return self._capacity.get(bar_size)
+
+    def ensure_capacity(self, bar_size: str, capacity: int) -> None:
+        """Track `bar_size` with at least `capacity` bars. Existing windows
+        keep their bars and are re-seeded at the larger size on next load."""
+        with self._lock:
+            if capacity > self._capacity.get(bar_size, 0):
+                self._capacity[bar_size] = capacity
+
+    # ---------- writes --------------------------------------------------
+    def load(self, symbol: str, bar_size: str, bars: List[Dict]) -> None:
+        """Seed / replace one window (read-through fill or hydrate)."""
+        cap = self._capacity.get(bar_size)
+        if cap is None or not bars:
+            return
+        w = BarWindow(cap)
+        w.load(bars)
+        with self._lock:
+            self._windows[(symbol.upper(), bar_size)] = w
+
+    def on_bar_close(self, bar: Dict) -> bool:
+        """Advance an existing window with a freshly finalized bar."""
+        symbol = (bar.get("symbol") or "").upper()
+        bar_size = bar.get("bar_size")
+        if not symbol or bar_size not in self._capacity:
+            return False
+        with self._lock:
+            w = self._windows.get((symbol, bar_size))
+            if w is None:
+                return False
+            ok = w.append(bar)
+            if ok:
+                self._live_appends += 1
+            return ok
+
+    def on_bars_closed(self, bars: List[Dict]) -> int:
+        """Batch form of `on_bar_close` (TickToBarPersister listener)."""
+        return sum(1 for b in bars if self.on_bar_close(b))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._windows.clear()
+
+    # ---------- reads ---------------------------------------------------
+    def _fresh_window(self, symbol: str, bar_size: str,
+                      max_age_sec: Optional[float]) -> Optional[BarWindow]:
+        if not _is_enabled():
+            return None
+        w = self._windows.get((symbol.upper(), bar_size))
+        age_limit = _max_age_sec() if max_age_sec is None else max_age_sec
+        if w is None or w.size == 0 or time.monotonic() - w.updated_at > age_limit:
+            self._misses += 1
+            return None
+        self._hits += 1
+        return w
+
+    def get_bars(self, symbol: str, bar_size: str, limit: Optional[int] = None,
+                 max_age_sec: Optional[float] = None) -> Optional[List[Dict]]:
+        """Trailing bars oldest-first, or None on a miss (caller falls back)."""
+        with self._lock:
+            w = self._fresh_window(symbol, bar_size, max_age_sec)
+            return w.to_bars(limit) if w is not None else None
+
+    def get_arrays(self, symbol: str, bar_size: str, limit: Optional[int] = None,
+                   max_age_sec: Optional[float] = None) -> Optional[Dict[str, np.ndarray]]:
+        """Column views of the trailing bars, or None on a miss. Callers must
+        treat the arrays as read-only (they alias the live window)."""
+        with self._lock:
+            w = self._fresh_window(symbol, bar_size, max_age_sec)
+            return w.arrays(limit) if w is not None else None
+
+    def symbols(self, bar_size: str) -> List[str]:
+        with self._lock:
+            return [s for (s, bs) in self._windows if bs == bar_size]
+
+    def stale_symbols(self, bar_size: str, older_than_sec: float) -> List[str]:
+        now = time.monotonic()
+        with self._lock:
+            return [
+                s for (s, bs), w in self._windows.items()
+                if bs == bar_size and now - w.updated_at > older_than_sec
+            ]
+
+    def stats(self) -> Dict:
+        with self._lock:
+            by_size: Dict[str, int] = {}
+            for (_s, bs) in self._windows:
+                by_size[bs] = by_size.get(bs, 0) + 1
+            lookups = self._hits + self._misses
+            return {
+                "enabled": _is_enabled(),
+                "windows": len(self._windows),
+                "windows_by_size": by_size,
+                "capacity": dict(self._capacity),
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate_pct": round(100.0 * self._hits / lookups, 2) if lookups else 0.0,
+                "live_appends": self._live_appends,
+                "last_hydrate": dict(self._last_hydrate),
+            }
+
+    # ---------- bulk hydrate ----------------------------------------------
+    def hydrate(self, db, symbols: List[str], bar_size: str,
+                chunk_size: Optional[int] = None) -> Dict:
+        """Load the trailing window for every symbol with chunked bulk
+        aggregations (sync — run via asyncio.to_thread)."""
+        cap = self._capacity.get(bar_size)
+        started = time.monotonic()
+        if db is None or cap is None or not symbols:
+            return {"bar_size": bar_size, "symbols_loaded": 0, "queries": 0}
+        if chunk_size is None:
+            chunk_size = int(os.environ.get("BAR_STORE_HYDRATE_CHUNK", "25"))
+        syms = sorted({s.upper() for s in symbols if s})
+        loaded = 0
+        queries = 0
+        for i in range(0, len(syms), max(1, chunk_size)):
+            chunk = syms[i:i + chunk_size]
+            pipeline = [
+                {"$match": {"symbol": {"$in": chunk}, "bar_size": bar_size}},
+                {"$sort": {"date": -1}},
+                {"$group": {
+                    "_id": "$symbol",
+                    "bars": {"$push": {
+                        "date": "$date", "open": "$open", "high": "$high",
+                        "low": "$low", "close": "$close", "volume": "$volume",
+                        "collected_at": {"$ifNull": ["$collected_at", None]},
+                    }},
+                }},
+                {"$project": {"bars": {"$slice": ["$bars", cap]}}},
+            ]
+            try:
+                rows = list(db["ib_historical_data"].aggregate(pipeline, allowDiskUse=True))
+                queries += 1
+            except Exception as exc:
+                logger.warning(f"bar_store: hydrate {bar_size} chunk failed: {exc}")
+                continue
+            for row in rows:
+                bars = row.get("bars") or []
+                if row.get("_id") and bars:
+                    self.load(row["_id"], bar_size, bars)
+                    loaded += 1
+        summary = {
+            "bar_size": bar_size,
+            "symbols_requested": len(syms),
+            "symbols_loaded": loaded,
+            "queries": queries,
+            "elapsed_ms": round((time.monotonic() - started) * 1000, 1),
+            "at": datetime.now(timezone.utc).isoformat(),
+        }
+        with self._lock:
+            self._last_hydrate[bar_size] = summary
+        return summary
+
+
+# ---------------- Module-level singleton ----------------
+
+_store: Optional[BarStore] = None
+_singleton_lock = threading.Lock()
+
+
+def get_bar_store() -> BarStore:
+    """Get or create the process-wide bar store."""
+    global _store
+    with _singleton_lock:
+        if _store is None:
+            _store = BarStore()
+    return _store
+
+
+def _hydrate_universe(db) -> List[str]:
+    """Symbols to keep resident: the canonical intraday universe."""
+    try:
+        from services.symbol_universe import get_universe
+        syms = get_universe(db, tier="intraday")
+        if syms:
+            return sorted(syms)
+    except Exception as exc:
+        logger.debug(f"bar_store: universe lookup failed: {exc}")
+    return []
+
+
+async def bar_store_refresh_loop(db, interval_s: Optional[float] = None) -> None:
+    """Startup hydrate + periodic bulk refresh (server.py background task).
+
+    Daily windows are re-read every pass (the collectors update today's bar
+    in Mongo). Intraday windows are only re-read when no live bar-close has
+    advanced them within the interval, i.e. symbols the pusher isn't
+    streaming."""
+    store = get_bar_store()
+    if interval_s is None:
+        interval_s = float(os.environ.get("BAR_STORE_REFRESH_SEC", "300"))
+    first = True
+    while True:
+        try:
+            if _is_enabled():
+                universe = await asyncio.to_thread(_hydrate_universe, db)
+                for bar_size in list(store._capacity):
+                    if first or bar_size == "1 day":
+                        targets = universe
+                    else:
+                        known = set(store.symbols(bar_size))
+                        targets = [s for s in universe if s not in known]
+                        targets += store.stale_symbols(bar_size, interval_s)
+                    if targets:
+                        summary = await asyncio.to_thread(store.hydrate, db, targets, bar_size)
+                        if first:
+                            logger.info(f"bar_store: hydrated {summary}")
+                first = False
+        except Exception as exc:
+            logger.warning(f"bar_store: refresh pass failed: {exc}")
+        await asyncio.sleep(interval_s)
@@ -0,0 +1,346 @@
+"""
+Chart Tail Fan-Out Hub
+======================
+One shared tail publisher per (symbol, timeframe, session) for the
+`/api/sentcom/ws/chart-tail` WebSocket.
+
+Why?
+    Every `chart_tail_ws` connection used to run its own loop calling
+    `get_chart_tail` every 2s during RTH, so N browser tabs on SPY 5min
+    meant N identical cache probes / Mongo queries / indicator recomputes
+    per tick. The hub computes the tail ONCE per (symbol, timeframe,
+    session) and broadcasts it to every subscribed socket, so backend
+    chart load is O(symbols) instead of O(connections).
+
+How
+    * `subscribe()` registers a socket's send callable + its own `since`
+      cursor and ref-counts the publisher for that key; the publisher task
+      is started on the first subscriber and cancelled when the last one
+      leaves (`unsubscribe()`), so idle charts cost nothing.
+    * Each publisher tick issues one fetch with `since = min(cursors)` and
+      re-slices the payload per subscriber (`reslice_tail`). Bars are
+      time-ordered, so every subscriber's tail is a suffix of the shared
+      one and the result is identical to a per-socket `get_chart_tail`.
+    * Ticks are driven by `TickToBarPersister` bar-close events
+      (`on_bars_closed`, wired in server.py): a closed "5 mins" bar for
+      SPY wakes only the SPY/5min publishers, after a short settle delay
+      so the persister's write-behind flush lands first. Those wakes ask
+      the fetcher for a fresh read (the router drops the symbol's cached
+      chart payload) so the new bar isn't hidden behind the response
+      cache TTL.
+    * While bar-close events are flowing for a key the publisher only
+      safety-polls every CHART_TAIL_POLL_S; keys the persister doesn't
+      stream (daily bars, pusher offline) fall back to the legacy
+      RTH-aware tick interval so nothing regresses.
+    * New subscribers wake their publisher immediately so the catch-up
+      frame doesn't wait for the next bar close.
+    * Heartbeats stay per-socket: `{type:'ping'}` after 15s of silence.
+
+Knobs (env)
+    CHART_TAIL_HUB            "false" → every socket polls on its own (legacy)
+    CHART_TAIL_POLL_S         safety poll while events flow (default 30)
+    CHART_TAIL_EVENT_GRACE_S  how long a bar-close keeps a key in event
+                              mode before falling back to ticks (default 180)
+    CHART_TAIL_SETTLE_S       delay between bar-close and fetch (default 0.5)
+    CHART_TAIL_SEND_TIMEOUT_S per-socket send timeout (default 5)
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+HEARTBEAT_S = 15.0
+TAIL_CAP = 50
+
+# Persister bar_size → chart timeframe.
+BAR_SIZE_TO_TF: Dict[str, str] = {
+    "1 min": "1min",
+    "5 mins": "5min",
+    "15 mins": "15min",
+    "1 hour": "1hour",
+    "1 day": "1day",
+}
+
+Key = Tuple[str, str, str]  # (symbol, timeframe, session)
+# fetch(symbol, timeframe, session, since, fresh) → /chart-tail payload
+FetchFn = Callable[[str, str, str, int, bool], Awaitable[Optional[Dict[str, Any]]]]
+SendFn = Callable[[Dict[str, Any]], Awaitable[None]]
+
+
+def is_enabled() -> bool:
+    val = os.environ.get("CHART_TAIL_HUB", "true").strip().lower()
+    return val not in ("0", "false", "no", "off")
+
+
+def _env_num(name: str, default: float, cast=float):
+    try:
+        return cast(os.environ.get(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def reslice_tail(tail: Dict[str, Any], since: int, cap: int = TAIL_CAP) -> Dict[str, Any]:
+    """Narrow a `/chart-tail` payload fetched for an older cursor down to
+    `since`. Same rules as `get_chart_tail`: bars with time > since (last
+    `cap`), indicators on those bar times, markers with time > since."""
+    since = int(since)
+    bars = [b for b in (tail.get("bars") or []) if int(b.get("time", 0)) > since]
+    if cap and len(bars) > cap:
+        bars = bars[-cap:]
+    times = {int(b.get("time", 0)) for b in bars}
+    out = dict(tail)
+    out["since"] = since
+    out["bar_count"] = len(bars)
+    out["bars"] = bars
+    out["indicators"] = {
+        k: [pt for pt in (series or []) if int(pt.get("time", 0)) in times]
+        for k, series in (tail.get("indicators") or {}).items()
+    }
+    out["markers"] = [m for m in (tail.get("markers") or []) if int(m.get("time", 0)) > since]
+    return out
+
+
+class _Subscriber:
+    __slots__ = ("send", "since", "last_frame")
+
+    def __init__(self, send: SendFn, since: int):
+        self.send = send
+        self.since = int(since)
+        self.last_frame = time.monotonic()
+
+
+class _Publisher:
+    __slots__ = ("key", "subs", "wake", "fresh", "last_event", "task")
+
+    def __init__(self, key: Key):
+        self.key = key
+        self.subs: Dict[int, _Subscriber] = {}
+        self.wake = asyncio.Event()
+        self.fresh = False
+        self.last_event = 0.0
+        self.task: Optional[asyncio.Task] = None
+
+
+class ChartTailHub:
+    """Ref-counted tail publishers keyed by (symbol, timeframe, session).
+    All state lives on the event loop; only `on_bars_closed` is called from
+    another thread and it hops onto the loop via `call_soon_threadsafe`."""
+
+    def __init__(self, fetch: Optional[FetchFn] = None,
+                 tick_s: Optional[Callable[[], float]] = None):
+        self._fetch = fetch
+        self._tick_s = tick_s or (lambda: 2.0)
+        self._publishers: Dict[Key, _Publisher] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._next_id = 0
+        self._fetches = 0
+        self._frames = 0
+        self._pings = 0
+        self._events = 0
+        self._wakes = 0
+        self._send_failures = 0
+
+    def configure(self, fetch: FetchFn, tick_s: Optional[Callable[[], float]] = None) -> None:
+        self._fetch = fetch
+        if tick_s is not None:
+            self._tick_s = tick_s
+
+    # ---------- subscriptions (event loop) --------------------------------
+    def subscribe(self, symbol: str, timeframe: str, session: str,
+                  since: int, send: SendFn) -> Tuple[Key, int]:
+        """Attach a socket. Returns a token for `unsubscribe`."""
+        if self._fetch is None:
+            raise RuntimeError("ChartTailHub has no fetcher configured")
+        self._loop = asyncio.get_running_loop()
+        key = (symbol.upper(), timeframe.lower(), session.lower())
+        pub = self._publishers.get(key)
+        if pub is None:
+            pub = self._publishers[key] = _Publisher(key)
+            pub.task = self._loop.create_task(self._run(pub))
+        self._next_id += 1
+        pub.subs[self._next_id] = _Subscriber(send, since)
+        pub.wake.set()  # catch-up frame for the new socket
+        return key, self._next_id
+
+    def unsubscribe(self, token: Tuple[Key, int]) -> None:
+        key, sub_id = token
+        pub = self._publishers.get(key)
+        if pub is None:
+            return
+        pub.subs.pop(sub_id, None)
+        if not pub.subs:
+            self._publishers.pop(key, None)
+            if pub.task is not None:
+                pub.task.cancel()
+
+    # ---------- bar-close events (persister worker thread) ----------------
+    def on_bars_closed(self, bars: List[Dict]) -> int:
+        """TickToBarPersister listener: wake publishers whose (symbol, tf)
+        just closed a bar. Cheap and non-blocking on the push thread."""
+        loop = self._loop
+        if loop is None or not self._publishers or loop.is_closed():
+            return 0
+        closed = set()
+        for b in bars or ():
+            tf = BAR_SIZE_TO_TF.get(b.get("bar_size"))
+            sym = b.get("symbol")
+            if tf and sym:
+                closed.add((str(sym).upper(), tf))
+        if not closed:
+            return 0
+        try:
+            loop.call_soon_threadsafe(self._wake_closed, closed)
+        except RuntimeError:  # loop shut down between the check and the call
+            return 0
+        return len(closed)
+
+    def _wake_closed(self, closed: Iterable[Tuple[str, str]]) -> None:
+        closed = set(closed)
+        now = time.monotonic()
+        for (sym, tf, _session), pub in self._publishers.items():
+            if (sym, tf) in closed:
+                self._events += 1
+                pub.fresh = True
+                pub.last_event = now
+                pub.wake.set()
+
+    # ---------- publisher loop --------------------------------------------
+    def _wait_s(self, pub: _Publisher) -> float:
+        grace = _env_num("CHART_TAIL_EVENT_GRACE_S", 180.0)
+        if pub.last_event and time.monotonic() - pub.last_event < grace:
+            wait = _env_num("CHART_TAIL_POLL_S", 30.0)
+        else:
+            try:
+                wait = float(self._tick_s())
+            except Exception:
+                wait = 5.0
+        return max(0.05, wait)
+
+    async def _run(self, pub: _Publisher) -> None:
+        sym, tf, session = pub.key
+        next_poll = 0.0
+        try:
+            while pub.subs:
+                deadline = min([next_poll] + [s.last_frame + HEARTBEAT_S for s in pub.subs.values()])
+                timeout = max(0.0, deadline - time.monotonic())
+                if not pub.wake.is_set() and timeout > 0:
+                    try:
+                        await asyncio.wait_for(pub.wake.wait(), timeout)
+                    except asyncio.TimeoutError:
+                        pass
+                woke = pub.wake.is_set()
+                if woke:
+                    self._wakes += 1
+                fresh, pub.fresh = pub.fresh, False
+                pub.wake.clear()
+                if fresh:
+                    settle = _env_num("CHART_TAIL_SETTLE_S", 0.5)
+                    if settle > 0:
+                        await asyncio.sleep(settle)
+                    pub.wake.clear()  # bars that closed during the settle are covered
+                if woke or time.monotonic() >= next_poll:
+                    await self._publish(pub, fresh)
+                    next_poll = time.monotonic() + self._wait_s(pub)
+                await self._heartbeat(pub)
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:  # pragma: no cover - defensive
+            logger.warning(f"[CHART-TAIL-HUB] publisher {sym}/{tf}/{session} died: {e}")
+        finally:
+            if self._publishers.get(pub.key) is pub:
+                self._publishers.pop(pub.key, None)
+
+    async def _publish(self, pub: _Publisher, fresh: bool) -> None:
+        if not pub.subs:
+            return
+        sym, tf, session = pub.key
+        since = min(s.since for s in pub.subs.values())
+        self._fetches += 1
+        try:
+            tail = await self._fetch(sym, tf, session, since, fresh)
+        except Exception as e:
+            # Transient compute error — retry on the next tick.
+            logger.debug(f"[CHART-TAIL-HUB] tail fetch failed sym={sym} tf={tf}: {e}")
+            return
+        if not tail or not tail.get("success") or int(tail.get("bar_count") or 0) <= 0:
+            return
+        server_t = datetime.now(timezone.utc).isoformat()
+        sends = []
+        targets = []
+        for sub in list(pub.subs.values()):
+            frame = tail if sub.since == since else reslice_tail(tail, sub.since)
+            if int(frame.get("bar_count") or 0) <= 0:
+                continue
+            frame = dict(frame)
+            frame["from_ws"] = True
+            frame["server_t"] = server_t
+            targets.append((sub, int(frame.get("latest_time") or sub.since)))
+            sends.append(self._send(sub, frame))
+        if not sends:
+            return
+        results = await asyncio.gather(*sends)
+        now = time.monotonic()
+        for (sub, latest), ok in zip(targets, results):
+            if ok:
+                sub.since = latest
+                sub.last_frame = now
+                self._frames += 1
+
+    async def _heartbeat(self, pub: _Publisher) -> None:
+        now = time.monotonic()
+        due = [s for s in pub.subs.values() if now - s.last_frame >= HEARTBEAT_S]
+        if not due:
+            return
+        ping = {"type": "ping", "t": datetime.now(timezone.utc).isoformat(), "symbol": pub.key[0]}
+        results = await asyncio.gather(*(self._send(s, ping) for s in due))
+        for sub, ok in zip(due, results):
+            if ok:
+                sub.last_frame = now
+                self._pings += 1
+
+    async def _send(self, sub: _Subscriber, frame: Dict[str, Any]) -> bool:
+        # One slow / dead socket must not stall the broadcast. The socket's
+        # own handler notices the disconnect and unsubscribes.
+        try:
+            await asyncio.wait_for(sub.send(frame), _env_num("CHART_TAIL_SEND_TIMEOUT_S", 5.0))
+            return True
+        except Exception:
+            self._send_failures += 1
+            return False
+
+    # ---------- introspection ---------------------------------------------
+    def stats(self) -> Dict[str, Any]:
+        subs = sum(len(p.subs) for p in self._publishers.values())
+        return {
+            "enabled": is_enabled(),
+            "publishers": len(self._publishers),
+            "subscribers": subs,
+            "fetches": self._fetches,
+            "frames_sent": self._frames,
+            "pings_sent": self._pings,
+            "bar_close_events": self._events,
+            "wakes": self._wakes,
+            "send_failures": self._send_failures,
+            "keys": sorted("/".join(k) for k in self._publishers),
+        }
+
+
+_hub: Optional[ChartTailHub] = None
+_hub_lock = threading.Lock()
+
+
+def get_chart_tail_hub() -> ChartTailHub:
+    global _hub
+    if _hub is None:
+        with _hub_lock:
+            if _hub is None:
+                _hub = ChartTailHub()
+    return _hub
@@ -12,6 +12,8 @@ import logging
 from datetime import datetime, timezone
 from typing import Dict, List, Any
 
+from services import bar_catalog
+
 logger = logging.getLogger(__name__)
 
 # ─── IB Max Lookback Config ──────────────────────────────────────────────────
@@ -87,27 +89,38 @@ def build_data_inventory(db) -> Dict[str, Any]:
     inv_col = db["data_inventory"]
 
     # ── Step 1: Aggregate ib_historical_data ──
-    logger.info("[INVENTORY] Scanning ib_historical_data...")
-    ib_pipeline = [
-        {"$group": {
-            "_id": {"symbol": "$symbol", "bar_size": "$bar_size"},
-            "bars": {"$sum": 1},
-            "earliest": {"$min": "$date"},
-            "latest": {"$max": "$date"},
-        }}
-    ]
+    # The bar catalog holds exactly this $group, maintained by the writers;
+    # only scan the bars when it hasn't been seeded yet.
     ib_data = {}
-    for doc in ib_col.aggregate(ib_pipeline, allowDiskUse=True):
-        sym = doc["_id"].get("symbol")
-        bs = doc["_id"].get("bar_size")
-        if not sym or not bs:
-            continue
-        key = (sym, bs)
-        ib_data[key] = {
-            "bars": doc["bars"],
-            "earliest": doc["earliest"],
-            "latest": doc["latest"],
-        }
+    if bar_catalog.is_ready(db):
+        logger.info("[INVENTORY] Reading ib_historical_data coverage from bar_catalog...")
+        for doc in bar_catalog.entries(db):
+            ib_data[(doc["symbol"], doc["bar_size"])] = {
+                "bars": doc.get("bars", 0),
+                "earliest": doc.get("earliest"),
+                "latest": doc.get("latest"),
+            }
+    else:
+        logger.info("[INVENTORY] Scanning ib_historical_data...")
+        ib_pipeline = [
+            {"$group": {
+                "_id": {"symbol": "$symbol", "bar_size": "$bar_size"},
+                "bars": {"$sum": 1},
+                "earliest": {"$min": "$date"},
+                "latest": {"$max": "$date"},
+            }}
+        ]
+        for doc in ib_col.aggregate(ib_pipeline, allowDiskUse=True):
+            sym = doc["_id"].get("symbol")
+            bs = doc["_id"].get("bar_size")
+            if not sym or not bs:
+                continue
+            key = (sym, bs)
+            ib_data[key] = {
+                "bars": doc["bars"],
+                "earliest": doc["earliest"],
+                "latest": doc["latest"],
+            }
     logger.info(f"[INVENTORY] ib_historical_data: {len(ib_data)} (symbol, bar_size) combos")
 
     # ── Step 2: Aggregate historical_bars ──
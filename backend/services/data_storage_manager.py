@@ -406,6 +406,11 @@ class DataStorageManager:
                 else:
                     if count > 0:
                         result = collection.delete_many(query)
+                        if collection_name == "ib_historical_data" and result.deleted_count:
+                            # A retention sweep spans every (symbol, bar_size);
+                            # readers scan until the next catalog rebuild.
+                            from services import bar_catalog
+                            bar_catalog.record_deletes(self._db, None)
                         results["collections"][collection_name] = {
                             "deleted": result.deleted_count,
                             "retention_days": retention_days
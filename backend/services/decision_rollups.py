@@ -0,0 +1,387 @@
+"""
+Decision-Trail Rollups
+======================
+Per-UTC-day vote + funnel counters for the Diagnostics Module Scorecard,
+Funnel Monitor and markdown report.
+
+Why?
+    `build_module_scorecard` (vote breakdown) and `build_pipeline_funnel`
+    used to walk / count every `shadow_decisions` row in the window on
+    each dashboard hit and report export. The scanner logs a shadow for
+    every alert, so a 7–30 day window is tens of thousands of rows per
+    request — seconds of Mongo + Python for numbers that stop changing
+    once the day is over.
+
+How
+    * One doc per UTC day in `decision_trail_daily`:
+      `{day, votes: {<module>: {...}}, funnel: {...}, compacted}`.
+    * Write time: `ShadowTracker.log_decision` calls `record_decision()`
+      (`$inc` of the row's counters, upsert) and `mark_executed` calls
+      `record_executed()` — no scan, one tiny update.
+    * Compaction: `compact_day()` recomputes a CLOSED day from the raw rows
+      (the source of truth), stamps `compacted: true` and logs drift vs the
+      live counters. `compact_closed_days()` runs nightly from the trading
+      scheduler; a reader that meets an un-compacted past day compacts it
+      on the spot (one bounded scan, once), so pre-rollup history needs
+      no migration.
+    * Read time: `split_window()` turns the rolling `cutoff` window into
+      compacted whole days + at most two raw edges (the partial first day
+      and today's tail). Day boundaries are ISO string prefixes, so the
+      result is identical to the raw-window computation. A window with no
+      whole day in it (days=1) is one raw range with the pre-rollup query
+      shape.
+
+Knobs (env)
+    DECISION_ROLLUPS   "false" → every request scans the raw window (legacy)
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import threading
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+ROLLUP_COLLECTION = "decision_trail_daily"
+SOURCE_COLLECTION = "shadow_decisions"
+
+AI_PASS_VALUES = ["proceed", "PROCEED", "Proceed"]
+RISK_VETO_VALUES = ["REJECT", "reject", "Reject", "BLOCK", "block", "Block"]
+
+VOTE_FIELDS: Dict[str, Tuple[str, ...]] = {
+    "debate_agents": ("long_votes", "short_votes", "hold_votes",
+                      "total_votes", "agreed_with_final"),
+    "risk_manager": ("proceed_votes", "reject_votes", "reduce_votes",
+                     "total_votes", "agreed_with_final"),
+    "institutional": ("positive_votes", "negative_votes", "neutral_votes",
+                      "total_votes"),
+    "timeseries": ("up_votes", "down_votes", "neutral_votes",
+                   "total_votes", "agreed_with_final"),
+}
+FUNNEL_FIELDS = ("emitted", "ai_passed", "risk_passed", "fired_via_shadow")
+
+_COUNTER_PROJECTION = {
+    "_id": 0, "trigger_time": 1, "combined_recommendation": 1, "was_executed": 1,
+    "debate_result": 1, "risk_assessment": 1, "institutional_context": 1,
+    "timeseries_forecast": 1,
+}
+
+_stats_lock = threading.Lock()
+_stats: Dict[str, int] = {
+    "rollup_days_read": 0,
+    "raw_ranges_scanned": 0,
+    "compactions": 0,
+    "compaction_drift": 0,
+    "writes": 0,
+    "write_failures": 0,
+}
+
+
+def is_enabled() -> bool:
+    val = os.environ.get("DECISION_ROLLUPS", "true").strip().lower()
+    return val not in ("0", "false", "no", "off")
+
+
+def _bump(key: str, n: int = 1) -> None:
+    with _stats_lock:
+        _stats[key] = _stats.get(key, 0) + n
+
+
+def stats() -> Dict[str, Any]:
+    with _stats_lock:
+        return {"enabled": is_enabled(), **_stats}
+
+
+# ── Counters ──────────────────────────────────────────────────────────────
+def empty_counters() -> Dict[str, Any]:
+    return {
+        "votes": {m: {f: 0 for f in fields} for m, fields in VOTE_FIELDS.items()},
+        "funnel": {f: 0 for f in FUNNEL_FIELDS},
+    }
+
+
+def decision_counters(d: Dict[str, Any]) -> Dict[str, int]:
+    """Counter increments one `shadow_decisions` row contributes, as dotted
+    `votes.<module>.<field>` / `funnel.<stage>` keys (Mongo `$inc` ready).
+
+    Mirrors the funnel's count predicates and the v19.31.4 vote tally
+    exactly; the raw and rollup paths both go through here."""
+    out: Dict[str, int] = {"funnel.emitted": 1}
+
+    def bump(key: str) -> None:
+        out[key] = out.get(key, 0) + 1
+
+    rec = d.get("combined_recommendation")
+    risk = d.get("risk_assessment") or {}
+    if not isinstance(risk, dict):
+        risk = {}
+    if rec in AI_PASS_VALUES:
+        bump("funnel.ai_passed")
+        if risk.get("recommendation") not in RISK_VETO_VALUES:
+            bump("funnel.risk_passed")
+    if d.get("was_executed") is True:
+        bump("funnel.fired_via_shadow")
+
+    final_positive = str(rec or "").lower() in ("proceed", "reduce_size")
+
+    # Debate agents
+    debate = d.get("debate_result") or {}
+    winner = str(debate.get("winner") or "").lower() if isinstance(debate, dict) else ""
+    if winner:
+        bump("votes.debate_agents.total_votes")
+        if winner == "bull":
+            bump("votes.debate_agents.long_votes")
+            if final_positive:
+                bump("votes.debate_agents.agreed_with_final")
+        elif winner == "bear":
+            bump("votes.debate_agents.short_votes")
+            if not final_positive:
+                bump("votes.debate_agents.agreed_with_final")
+        else:  # tie / hold — neither agrees nor disagrees
+            bump("votes.debate_agents.hold_votes")
+
+    # Risk manager
+    risk_rec = str(risk.get("recommendation") or "").lower()
+    if risk_rec:
+        bump("votes.risk_manager.total_votes")
+        if risk_rec in ("proceed", "approve", "ok"):
+            bump("votes.risk_manager.proceed_votes")
+            if final_positive:
+                bump("votes.risk_manager.agreed_with_final")
+        elif risk_rec in ("reject", "block", "no"):
+            bump("votes.risk_manager.reject_votes")
+            if not final_positive:
+                bump("votes.risk_manager.agreed_with_final")
+        elif risk_rec in ("reduce", "reduce_size", "caution"):
+            bump("votes.risk_manager.reduce_votes")
+            if final_positive:
+                bump("votes.risk_manager.agreed_with_final")
+
+    # Institutional flow — informational, no agree counter
+    inst = d.get("institutional_context") or {}
+    flow = str(inst.get("flow_signal") or "").lower() if isinstance(inst, dict) else ""
+    if flow:
+        bump("votes.institutional.total_votes")
+        if flow in ("bullish", "buying", "accumulating", "positive"):
+            bump("votes.institutional.positive_votes")
+        elif flow in ("bearish", "selling", "distributing", "negative"):
+            bump("votes.institutional.negative_votes")
+        else:
+            bump("votes.institutional.neutral_votes")
+
+    # Timeseries forecast
+    ts = d.get("timeseries_forecast") or {}
+    direction = str(ts.get("direction") or "").lower() if isinstance(ts, dict) else ""
+    if direction:
+        bump("votes.timeseries.total_votes")
+        if direction in ("up", "bullish", "long"):
+            bump("votes.timeseries.up_votes")
+            if final_positive:
+                bump("votes.timeseries.agreed_with_final")
+        elif direction in ("down", "bearish", "short"):
+            bump("votes.timeseries.down_votes")
+            if not final_positive:
+                bump("votes.timeseries.agreed_with_final")
+        else:
+            bump("votes.timeseries.neutral_votes")
+    return out
+
+
+def add_flat(into: Dict[str, Any], flat: Dict[str, int]) -> Dict[str, Any]:
+    for key, n in flat.items():
+        node = into
+        *path, leaf = key.split(".")
+        for part in path:
+            node = node.setdefault(part, {})
+        node[leaf] = node.get(leaf, 0) + n
+    return into
+
+
+def add_counters(into: Dict[str, Any], doc: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Merge a rollup doc's `votes` / `funnel` blocks into `into`."""
+    if not doc:
+        return into
+    for mod, fields in (doc.get("votes") or {}).items():
+        dst = into["votes"].setdefault(mod, {})
+        for f, n in (fields or {}).items():
+            dst[f] = dst.get(f, 0) + int(n or 0)
+    for f, n in (doc.get("funnel") or {}).items():
+        into["funnel"][f] = into["funnel"].get(f, 0) + int(n or 0)
+    return into
+
+
+# ── Window splitting ──────────────────────────────────────────────────────
+def trigger_range(lo: str, hi: Optional[str]) -> Dict[str, str]:
+    rng = {"$gte": lo}
+    if hi:
+        rng["$lt"] = hi
+    return rng
+
+
+def _parse_iso(ts: str) -> datetime:
+    dt = datetime.fromisoformat(ts.replace("Z", "+00:00"))
+    return dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)
+
+
+def split_window(
+    cutoff_iso: str, now: Optional[datetime] = None,
+) -> Tuple[List[Tuple[str, Optional[str]]], List[str]]:
+    """(raw_ranges, rollup_days) covering `trigger_time >= cutoff_iso`.
+
+    Whole UTC days strictly after the cutoff's day and before today come
+    from rollups; the partial first day and today's tail stay raw."""
+    if not is_enabled():
+        return [(cutoff_iso, None)], []
+    try:
+        first_full = _parse_iso(cutoff_iso).astimezone(timezone.utc).date() + timedelta(days=1)
+    except (TypeError, ValueError):
+        return [(cutoff_iso, None)], []
+    today = (now or datetime.now(timezone.utc)).astimezone(timezone.utc).date()
+    if first_full >= today:
+        return [(cutoff_iso, None)], []
+    days = []
+    d = first_full
+    while d < today:
+        days.append(d.isoformat())
+        d += timedelta(days=1)
+    return [(cutoff_iso, first_full.isoformat()), (today.isoformat(), None)], days
+
+
+# ── Raw scans / compaction ────────────────────────────────────────────────
+def scan_counters(db, lo: str, hi: Optional[str], into: Optional[Dict[str, Any]] = None
+                  ) -> Dict[str, Any]:
+    """Counters for raw rows with `lo <= trigger_time < hi`."""
+    into = into if into is not None else empty_counters()
+    _bump("raw_ranges_scanned")
+    for d in db[SOURCE_COLLECTION].find({"trigger_time": trigger_range(lo, hi)},
+                                        _COUNTER_PROJECTION):
+        add_flat(into, decision_counters(d))
+    return into
+
+
+def _next_day(day: str) -> str:
+    return (date.fromisoformat(day) + timedelta(days=1)).isoformat()
+
+
+def compact_day(db, day: str) -> Dict[str, Any]:
+    """Recompute `day` from raw rows and store it as the authoritative
+    (compacted) rollup. Returns the counters."""
+    counters = scan_counters(db, day, _next_day(day))
+    coll = db[ROLLUP_COLLECTION]
+    live = coll.find_one({"day": day}, {"_id": 0, "votes": 1, "funnel": 1, "compacted": 1})
+    if live and not live.get("compacted"):
+        if add_counters(empty_counters(), live) != counters:
+            _bump("compaction_drift")
+            logger.info("[decision_rollups] %s live counters drifted from raw; re-sealed", day)
+    coll.replace_one(
+        {"day": day},
+        {"day": day, **counters, "compacted": True,
+         "compacted_at": datetime.now(timezone.utc).isoformat()},
+        upsert=True,
+    )
+    _bump("compactions")
+    return counters
+
+
+def compact_closed_days(db, now: Optional[datetime] = None) -> List[str]:
+    """Seal every past day whose counters are still live (nightly job)."""
+    today = (now or datetime.now(timezone.utc)).astimezone(timezone.utc).date().isoformat()
+    days = sorted(
+        d["day"] for d in db[ROLLUP_COLLECTION].find(
+            {"compacted": {"$ne": True}, "day": {"$lt": today}}, {"_id": 0, "day": 1},
+        ) if d.get("day")
+    )
+    for day in days:
+        compact_day(db, day)
+    return days
+
+
+def rollup_counters(db, days: Iterable[str], into: Optional[Dict[str, Any]] = None
+                    ) -> Dict[str, Any]:
+    """Sum the compacted rollups for `days`, compacting any that aren't."""
+    into = into if into is not None else empty_counters()
+    days = list(days)
+    if not days:
+        return into
+    found = set()
+    for doc in db[ROLLUP_COLLECTION].find(
+        {"day": {"$in": days}, "compacted": True}, {"_id": 0},
+    ):
+        found.add(doc.get("day"))
+        add_counters(into, doc)
+    for day in days:
+        if day not in found:
+            add_counters(into, compact_day(db, day))
+    _bump("rollup_days_read", len(days))
+    return into
+
+
+def window_counters(db, cutoff_iso: str) -> Dict[str, Any]:
+    """Vote + funnel counters for `trigger_time >= cutoff_iso`. Falls back
+    to one raw window scan if the rollup read fails."""
+    ranges, days = split_window(cutoff_iso)
+    if days:
+        try:
+            out = rollup_counters(db, days)
+            for lo, hi in ranges:
+                scan_counters(db, lo, hi, out)
+            return out
+        except Exception as e:
+            logger.warning("[decision_rollups] rollup read failed, scanning raw window: %s", e)
+    return scan_counters(db, cutoff_iso, None)
+
+
+# ── Write-time hooks ──────────────────────────────────────────────────────
+def _day_of(trigger_time: Any) -> Optional[str]:
+    if isinstance(trigger_time, str) and len(trigger_time) >= 10:
+        return trigger_time[:10]
+    return None
+
+
+def record_decision(db, doc: Dict[str, Any]) -> None:
+    """Fold one freshly inserted shadow decision into its day's counters."""
+    if db is None or not is_enabled():
+        return
+    day = _day_of(doc.get("trigger_time"))
+    if not day:
+        return
+    try:
+        db[ROLLUP_COLLECTION].update_one(
+            {"day": day},
+            {"$inc": decision_counters(doc), "$setOnInsert": {"compacted": False}},
+            upsert=True,
+        )
+        _bump("writes")
+    except Exception as e:
+        _bump("write_failures")
+        logger.debug("[decision_rollups] record_decision failed: %s", e)
+
+
+def record_executed(db, trigger_time: Any) -> None:
+    """A decision flipped to was_executed=True (mark_executed)."""
+    if db is None or not is_enabled():
+        return
+    day = _day_of(trigger_time)
+    if not day:
+        return
+    try:
+        db[ROLLUP_COLLECTION].update_one(
+            {"day": day},
+            {"$inc": {"funnel.fired_via_shadow": 1}, "$setOnInsert": {"compacted": False}},
+            upsert=True,
+        )
+        _bump("writes")
+    except Exception as e:
+        _bump("write_failures")
+        logger.debug("[decision_rollups] record_executed failed: %s", e)
+
+
+def ensure_indexes(db) -> None:
+    try:
+        db[ROLLUP_COLLECTION].create_index("day", unique=True)
+        db[ROLLUP_COLLECTION].create_index([("compacted", 1), ("day", 1)])
+    except Exception as e:
+        logger.debug("[decision_rollups] index creation failed: %s", e)
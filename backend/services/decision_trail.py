@@ -22,6 +22,8 @@ import logging
 from datetime import datetime, timedelta, timezone
 from typing import Any, Dict, List, Optional
 
+from services import decision_rollups
+
 logger = logging.getLogger(__name__)
 
 
@@ -464,7 +466,7 @@ def list_recent_decisions(
 
 # ── Module scorecard aggregation ─────────────────────────────────────────
 def _aggregate_vote_breakdown(db, cutoff_iso: str) -> Dict[str, Dict[str, Any]]:
-    """v19.31.4 — per-module vote tally from raw shadow_decisions.
+    """v19.31.4 — per-module vote tally over shadow_decisions.
 
     Aggregates the four module sub-dicts (debate_result, risk_assessment,
     institutional_context, timeseries_forecast) into a per-module
@@ -496,91 +498,12 @@ def _aggregate_vote_breakdown(db, cutoff_iso: str) -> Dict[str, Dict[str, Any]]:
     given decision (no sub-dict populated), it doesn't count toward
     that module's totals.
     """
-    out: Dict[str, Dict[str, Any]] = {
-        "debate_agents":   {"long_votes": 0, "short_votes": 0, "hold_votes": 0,
-                            "total_votes": 0, "agreed_with_final": 0},
-        "risk_manager":    {"proceed_votes": 0, "reject_votes": 0,
-                            "reduce_votes": 0, "total_votes": 0,
-                            "agreed_with_final": 0},
-        "institutional":   {"positive_votes": 0, "negative_votes": 0,
-                            "neutral_votes": 0, "total_votes": 0},
-        "timeseries":      {"up_votes": 0, "down_votes": 0, "neutral_votes": 0,
-                            "total_votes": 0, "agreed_with_final": 0},
-    }
+    out: Dict[str, Dict[str, Any]] = decision_rollups.empty_counters()["votes"]
     try:
-        cursor = db["shadow_decisions"].find(
-            {"trigger_time": {"$gte": cutoff_iso}},
-            {"_id": 0, "combined_recommendation": 1, "debate_result": 1,
-             "risk_assessment": 1, "institutional_context": 1,
-             "timeseries_forecast": 1},
-        )
-        for d in cursor:
-            final_rec = (d.get("combined_recommendation") or "").lower()
-            final_positive = final_rec in ("proceed", "reduce_size")
-
-            # Debate agents
-            debate = d.get("debate_result") or {}
-            winner = (debate.get("winner") or "").lower()
-            if winner:
-                out["debate_agents"]["total_votes"] += 1
-                if winner == "bull":
-                    out["debate_agents"]["long_votes"] += 1
-                    if final_positive:
-                        out["debate_agents"]["agreed_with_final"] += 1
-                elif winner == "bear":
-                    out["debate_agents"]["short_votes"] += 1
-                    if not final_positive:
-                        out["debate_agents"]["agreed_with_final"] += 1
-                else:  # tie / hold
-                    out["debate_agents"]["hold_votes"] += 1
-                    # hold doesn't agree-or-disagree with proceed/pass
-                    # — counts as neutral
-
-            # Risk manager
-            risk = d.get("risk_assessment") or {}
-            risk_rec = (risk.get("recommendation") or "").lower()
-            if risk_rec:
-                out["risk_manager"]["total_votes"] += 1
-                if risk_rec in ("proceed", "approve", "ok"):
-                    out["risk_manager"]["proceed_votes"] += 1
-                    if final_positive:
-                        out["risk_manager"]["agreed_with_final"] += 1
-                elif risk_rec in ("reject", "block", "no"):
-                    out["risk_manager"]["reject_votes"] += 1
-                    if not final_positive:
-                        out["risk_manager"]["agreed_with_final"] += 1
-                elif risk_rec in ("reduce", "reduce_size", "caution"):
-                    out["risk_manager"]["reduce_votes"] += 1
-                    if final_positive:
-                        out["risk_manager"]["agreed_with_final"] += 1
-
-            # Institutional flow — purely informational, no agree counter
-            inst = d.get("institutional_context") or {}
-            flow = (inst.get("flow_signal") or "").lower()
-            if flow:
-                out["institutional"]["total_votes"] += 1
-                if flow in ("bullish", "buying", "accumulating", "positive"):
-                    out["institutional"]["positive_votes"] += 1
-                elif flow in ("bearish", "selling", "distributing", "negative"):
-                    out["institutional"]["negative_votes"] += 1
-                else:
-                    out["institutional"]["neutral_votes"] += 1
-
-            # Timeseries forecast
-            ts = d.get("timeseries_forecast") or {}
-            direction = (ts.get("direction") or "").lower()
-            if direction:
-                out["timeseries"]["total_votes"] += 1
-                if direction in ("up", "bullish", "long"):
-                    out["timeseries"]["up_votes"] += 1
-                    if final_positive:
-                        out["timeseries"]["agreed_with_final"] += 1
-                elif direction in ("down", "bearish", "short"):
-                    out["timeseries"]["down_votes"] += 1
-                    if not final_positive:
-                        out["timeseries"]["agreed_with_final"] += 1
-                else:
-                    out["timeseries"]["neutral_votes"] += 1
+        # Whole days come from the compacted per-day rollups; only the
+        # partial first day + today's tail are read raw. The per-row tally
+        # lives in `decision_rollups.decision_counters`.
+        out = decision_rollups.window_counters(db, cutoff_iso)["votes"]
 
         # Compute disagreement_rate per module (where it makes sense).
         for mod_key in ("debate_agents", "risk_manager", "timeseries"):
@@ -721,25 +644,41 @@ def build_pipeline_funnel(db, days: int = 1) -> Dict[str, Any]:
         cutoff = datetime.now(timezone.utc) - timedelta(days=days)
         cutoff_iso = cutoff.isoformat()
 
+        # Shadow-derived stages: compacted per-day rollups for whole days
+        # in the window + count_documents over the raw edges (the partial
+        # first day and today's tail). days=1 is a single raw range.
+        ranges, days_rolled = decision_rollups.split_window(cutoff_iso)
+        rolled: Dict[str, int] = {}
+        if days_rolled:
+            try:
+                rolled = decision_rollups.rollup_counters(db, days_rolled)["funnel"]
+            except Exception as roll_err:
+                logger.warning(f"funnel rollup read failed, counting raw window: {roll_err}")
+                ranges, rolled = [(cutoff_iso, None)], {}
+
+        def _shadow_count(stage: str, extra: Dict[str, Any]) -> int:
+            return rolled.get(stage, 0) + sum(
+                db["shadow_decisions"].count_documents({
+                    "trigger_time": decision_rollups.trigger_range(lo, hi), **extra,
+                })
+                for lo, hi in ranges
+            )
+
         # Stage 1 — scanner emit (every shadow decision = 1 alert
         # the scanner emitted, regardless of whether bot took it).
-        emitted = db["shadow_decisions"].count_documents({
-            "trigger_time": {"$gte": cutoff_iso},
-        })
+        emitted = _shadow_count("emitted", {})
         # Stage 2 — AI passed = the AI council combined to "proceed".
         # `combined_recommendation` is always lowercase per shadow_tracker
         # but defend against legacy uppercase rows just in case.
-        ai_pass_match = {"$in": ["proceed", "PROCEED", "Proceed"]}
-        ai_passed = db["shadow_decisions"].count_documents({
-            "trigger_time": {"$gte": cutoff_iso},
+        ai_pass_match = {"$in": decision_rollups.AI_PASS_VALUES}
+        ai_passed = _shadow_count("ai_passed", {
             "combined_recommendation": ai_pass_match,
         })
         # Stage 3 — risk-council didn't veto.
-        risk_passed = db["shadow_decisions"].count_documents({
-            "trigger_time": {"$gte": cutoff_iso},
+        risk_passed = _shadow_count("risk_passed", {
             "combined_recommendation": ai_pass_match,
             "risk_assessment.recommendation": {
-                "$nin": ["REJECT", "reject", "Reject", "BLOCK", "block", "Block"],
+                "$nin": decision_rollups.RISK_VETO_VALUES,
             },
         })
         # Stage 4 — fired. Two ways to count this:
@@ -751,10 +690,7 @@ def build_pipeline_funnel(db, days: int = 1) -> Dict[str, Any]:
         # bypassed the shadow logger (auto-execute on a high-priority
         # alert that skipped consultation). Surface BOTH so the
         # operator can spot drift.
-        fired_via_shadow = db["shadow_decisions"].count_documents({
-            "trigger_time": {"$gte": cutoff_iso},
-            "was_executed": True,
-        })
+        fired_via_shadow = _shadow_count("fired_via_shadow", {"was_executed": True})
         fired_via_trades = db["bot_trades"].count_documents({
             "$or": [
                 {"executed_at": {"$gte": cutoff_iso}},
@@ -873,6 +873,20 @@ def compute_live_trigger_probability(base: float, distance_pct: float, rvol: flo
     return max(0.15, min(0.90, p))
 
 
+# Symbols per `$in` in the ib_historical_data ADV fallback aggregation.
+_ADV_IN_CHUNK = 500
+
+
+def _liquidity_table():
+    """The session liquidity table when built and enabled, else None
+    (callers fall back to their per-symbol Mongo paths)."""
+    try:
+        from services.liquidity_table import get_liquidity_table
+        table = get_liquidity_table()
+        return table if table.ready else None
+    except Exception:
+        return None
+
 
 class EnhancedBackgroundScanner:
     """
@@ -3716,9 +3730,20 @@ class EnhancedBackgroundScanner:
         2026-04-28e: switched from `avg_volume` (shares) → `avg_dollar_volume`
         to align with the newer `wave_scanner` and avoid the price-based
         asymmetry baked into share-only ADV gates.
+
+        Served from the session liquidity table when it is built; only
+        symbols the table doesn't know hit the collection.
         """
+        table = _liquidity_table()
+        if table is not None:
+            found, symbols = table.dollar_adv_many(symbols)
+            if not symbols:
+                return found
+        else:
+            found = {}
+
         def _sync_lookup():
-            adv_data = {}
+            adv_data = dict(found)
             try:
                 from database import get_database
                 db = get_database()
@@ -3754,11 +3779,63 @@ class EnhancedBackgroundScanner:
         comparable with the cache's `avg_dollar_volume` field.
 
         2026-04-28e: returns dollar volume now, not share volume.
+        Symbols the session liquidity table aggregated are answered from it.
         """
+        found: Dict[str, int] = {}
+        table = _liquidity_table()
+        if table is not None:
+            remaining = []
+            for symbol in symbols:
+                row = table.get(symbol)
+                if row is None or row["bars_dollar_volume"] is None:
+                    remaining.append(symbol)
+                elif row["bars_dollar_volume"] > 0:
+                    found[symbol] = int(row["bars_dollar_volume"])
+            symbols = remaining
+            if not symbols:
+                return found
+
+        from database import get_database
+        from services.async_mongo import aggregate_list, get_async_repo
+        repo = get_async_repo()
+        db = get_database()
+        if repo is not None and repo.serves(db):
+            # One $in aggregation per chunk of symbols (bars grouped by
+            # symbol, newest first) on the Motor pool — a full-universe scan
+            # holds one pooled connection at a time instead of one per symbol.
+            cutoff = (datetime.now(timezone.utc) - timedelta(days=30)).strftime("%Y-%m-%d")
+            adv_data = dict(found)
+            for i in range(0, len(symbols), _ADV_IN_CHUNK):
+                chunk = symbols[i:i + _ADV_IN_CHUNK]
+                try:
+                    groups = await aggregate_list(db, "ib_historical_data", [
+                        {"$match": {"symbol": {"$in": chunk}, "bar_size": "1 day",
+                                    "date": {"$gte": cutoff}}},
+                        {"$sort": {"date": -1}},
+                        {"$group": {"_id": "$symbol",
+                                    "bars": {"$push": {"volume": "$volume", "close": "$close"}}}},
+                    ])
+                except Exception as e:
+                    logger.debug(f"Error aggregating ib_historical_data ADV: {e}")
+                    continue
+                for g in groups:
+                    bars = (g.get("bars") or [])[:20]
+                    if len(bars) < 5:
+                        continue
+                    paired = [
+                        (float(b.get("volume", 0)), float(b.get("close", 0)))
+                        for b in bars
+                        if (b.get("volume") or 0) > 0 and (b.get("close") or 0) > 0
+                    ]
+                    if paired:
+                        avg_vol   = sum(v for v, _ in paired) / len(paired)
+                        avg_close = sum(c for _, c in paired) / len(paired)
+                        adv_data[g["_id"]] = int(avg_vol * avg_close)
+            return adv_data
+
         def _sync_lookup():
-            adv_data = {}
+            adv_data = dict(found)
             try:
-                from database import get_database
                 db = get_database()
                 if db is None:
                     return adv_data
@@ -3886,6 +3963,11 @@ class EnhancedBackgroundScanner:
         Reads `symbol_adv_cache.avg_volume` first (pre-computed by the IB
         collector), falls back to a 20-bar compute from ib_historical_data.
         Returns 0 when unprovable (caller treats that as fail-closed)."""
+        table = _liquidity_table()
+        row = table.get(symbol) if table is not None else None
+        if row is not None and row["avg_volume"]:
+            return int(row["avg_volume"])
+
         def _sync_lookup():
             try:
                 from database import get_database
@@ -3898,7 +3980,7 @@ class EnhancedBackgroundScanner:
             except Exception:
                 return 0
 
-        shares = await asyncio.to_thread(_sync_lookup)
+        shares = 0 if row is not None else await asyncio.to_thread(_sync_lookup)
         if shares <= 0:
             try:
                 shares = await self._fetch_single_adv(symbol)
@@ -3918,6 +4000,9 @@ class EnhancedBackgroundScanner:
         if cached and cached[0] == day:
             return cached[1]
 
+        table = _liquidity_table()
+        row = table.get(symbol) if table is not None else None
+
         def _sync_lookup():
             try:
                 from database import get_database
@@ -3931,7 +4016,10 @@ class EnhancedBackgroundScanner:
             except Exception:
                 return None
 
-        adrp = await asyncio.to_thread(_sync_lookup)
+        if row is not None:
+            adrp = row["adrp_20d"]
+        else:
+            adrp = await asyncio.to_thread(_sync_lookup)
         if adrp is None:
             adrp = await self._compute_adrp_from_bars(symbol)
         adrp = float(adrp or 0.0)
@@ -3941,6 +4029,11 @@ class EnhancedBackgroundScanner:
     async def _compute_adrp_from_bars(self, symbol: str, days: int = 20) -> float:
         """On-the-fly ADRP from the last `days` daily bars in
         ib_historical_data: mean((high-low)/close)*100. 0.0 on miss."""
+        table = _liquidity_table()
+        row = table.get(symbol) if table is not None and days == 20 else None
+        if row is not None and row["bars_adrp"] is not None:
+            return float(row["bars_adrp"])
+
         def _sync():
             try:
                 from database import get_database
@@ -3969,6 +4062,10 @@ class EnhancedBackgroundScanner:
         Fetch ADV (Average Daily Volume) for a single symbol from MongoDB.
         Uses ib_historical_data (same source as training) instead of Alpaca.
         """
+        table = _liquidity_table()
+        row = table.get(symbol) if table is not None else None
+        if row is not None and row["bars_avg_volume"] is not None:
+            return int(row["bars_avg_volume"])
         try:
             if self.db is not None:
                 pipeline = [
@@ -9597,6 +9694,15 @@ class EnhancedBackgroundScanner:
     
     async def _save_alert_to_db(self, alert: LiveAlert):
         if self.alerts_collection is not None:
+            # Pooled Motor upsert when `self.db` is the process db; tests /
+            # injected handles keep the sync collection (worker thread).
+            from services.async_mongo import get_async_repo
+            repo = get_async_repo()
+            if repo is not None and repo.serves(self.db):
+                await repo["live_alerts"].update_one(
+                    {"id": alert.id}, {"$set": alert.to_dict()}, upsert=True,
+                )
+                return
             await asyncio.to_thread(
                 self.alerts_collection.update_one,
                 {"id": alert.id},
@@ -9864,7 +9970,9 @@ class EnhancedBackgroundScanner:
             if not ts_service:
                 return
             
-            # Get AI prediction for this symbol using get_forecast method
+            # Get AI prediction for this symbol using get_forecast method.
+            # Symbols scan concurrently, so get_forecast coalesces this with
+            # other alerts' requests into one batched model call.
             prediction = await ts_service.get_forecast(alert.symbol)
             
             if prediction and prediction.get("usable"):
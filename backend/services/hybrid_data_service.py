@@ -788,6 +788,9 @@ class HybridDataService:
             query["timeframe"] = self._normalize_timeframe(timeframe)
         
         result = self._bars_collection.delete_many(query)
+        if result.deleted_count:
+            from services import bar_catalog
+            bar_catalog.record_deletes(self._db, [(query["symbol"], None)] if symbol else None)
         
         return {
             "success": True,
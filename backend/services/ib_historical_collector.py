@@ -31,6 +31,8 @@ from enum import Enum
 import uuid
 from pymongo import DESCENDING
 
+from services import bar_catalog
+
 logger = logging.getLogger(__name__)
 
 
@@ -205,6 +207,7 @@ class IBHistoricalCollector:
             self._data_col.create_index([("symbol", 1), ("bar_size", 1), ("date", 1)], unique=True)
             self._data_col.create_index([("symbol", 1), ("bar_size", 1)])
             self._data_col.create_index([("collected_at", DESCENDING)])
+            bar_catalog.ensure_indexes(db)
             self._jobs_col.create_index([("start_time", DESCENDING)])
             self._jobs_col.create_index([("id", 1)], unique=True)
             
@@ -1967,12 +1970,13 @@ class IBHistoricalCollector:
             if not bars:
                 continue
             
+            catalog_rows = []
             for bar in bars:
                 try:
                     # v323b — never persist today's in-progress daily bar
                     if self._is_inprogress_daily_bar(bar_size, bar.get("date") or bar.get("time")):
                         continue
-                    self._data_col.update_one(
+                    res = self._data_col.update_one(
                         {
                             "symbol": symbol,
                             "bar_size": bar_size,
@@ -1990,14 +1994,25 @@ class IBHistoricalCollector:
                         },
                         upsert=True
                     )
+                    catalog_rows.append((symbol, bar_size, bar.get("date") or bar.get("time"), res.upserted_id))
                     job.total_bars_collected += 1
                 except Exception as e:
                     if "duplicate" not in str(e).lower():
                         logger.warning(f"Error storing bar for {symbol}: {e}")
+            self._record_catalog(catalog_rows)
             
             # Mark this data as processed by clearing it from queue
             # (The queue will auto-cleanup old completed requests)
             
+    def _record_catalog(self, rows: list) -> None:
+        """Fold a loop of per-bar upserts into the bar catalog. `rows` are
+        (symbol, bar_size, date, upserted_id)."""
+        if rows:
+            bar_catalog.record_writes(
+                self._db, [r[:3] for r in rows],
+                [i for i, r in enumerate(rows) if r[3] is not None],
+            )
+
     @staticmethod
     def _is_inprogress_daily_bar(bar_size: str, bar_date) -> bool:
         """v323b — True when this DAILY bar is TODAY'S still-in-progress ET
@@ -2069,12 +2084,13 @@ class IBHistoricalCollector:
                     
                     # Store in database
                     if self._data_col is not None:
+                        catalog_rows = []
                         for bar in bars:
                             try:
                                 # v323b — never persist today's in-progress daily bar
                                 if self._is_inprogress_daily_bar(bar_size, bar.get("date") or bar.get("time")):
                                     continue
-                                self._data_col.update_one(
+                                res = self._data_col.update_one(
                                     {
                                         "symbol": symbol,
                                         "bar_size": bar_size,
@@ -2092,10 +2108,12 @@ class IBHistoricalCollector:
                                     },
                                     upsert=True
                                 )
+                                catalog_rows.append((symbol, bar_size, bar.get("date") or bar.get("time"), res.upserted_id))
                                 bars_collected += 1
                             except Exception as e:
                                 if "duplicate" not in str(e).lower():
                                     logger.warning(f"Error storing bar for {symbol}: {e}")
+                        self._record_catalog(catalog_rows)
                                     
                     return bars_collected
                 elif result.get("status") == "failed":
@@ -2257,12 +2275,13 @@ class IBHistoricalCollector:
             if not bars:
                 continue
             
+            catalog_rows = []
             for bar in bars:
                 try:
                     # v323b — never persist today's in-progress daily bar
                     if self._is_inprogress_daily_bar(bar_size, bar.get("date") or bar.get("time")):
                         continue
-                    self._data_col.update_one(
+                    res = self._data_col.update_one(
                         {
                             "symbol": symbol,
                             "bar_size": bar_size,
@@ -2280,10 +2299,12 @@ class IBHistoricalCollector:
                         },
                         upsert=True
                     )
+                    catalog_rows.append((symbol, bar_size, bar.get("date") or bar.get("time"), res.upserted_id))
                     stored_count += 1
                 except Exception as e:
                     if "duplicate" not in str(e).lower():
                         logger.warning(f"Error storing bar for {symbol}: {e}")
+            self._record_catalog(catalog_rows)
             
             # Mark this data as stored to avoid re-processing
             if request_id:
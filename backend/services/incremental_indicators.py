@@ -0,0 +1,425 @@
+"""
+Incremental (O(1)-per-bar) Indicator State
+==========================================
+Per-symbol running indicator state for live technical snapshots, so a
+snapshot after one new 5-min bar costs O(1) instead of re-walking the
+whole session window.
+
+Why?
+    Each snapshot recomputed VWAP / EMA9 / EMA20 / RSI14 / HOD-LOD from
+    scratch over up to 78 bars although only the trailing bar changed
+    since the last cycle, and the daily ATR / EMA50 / SMA200 / Bollinger
+    inputs were recomputed every cycle even though the daily window only
+    changes a few times a day.
+
+What is tracked (intraday, current-session window of <= 78 bars):
+    * VWAP         — running Σ(typical·vol) / Σvol, evicted bar subtracted.
+    * EMA 9 / 20   — the snapshot's EMA is SMA-seeded over the FIRST
+                     `period` bars of the window, so a sliding window moves
+                     the seed. `_WindowEMA` keeps (seed_sum, S) where
+                     ema = (1-k)^(n-p)·seed + S; append is S ← (1-k)S + kx,
+                     eviction is seed_sum += x_p − x_0 and
+                     S ← S − k(1-k)^(n-p)·x_p. Exact, O(1).
+    * RSI 14       — the snapshot's RSI is a SIMPLE average of the last 14
+                     changes (not Wilder smoothing); kept as running gain /
+                     loss sums over a 14-change ring.
+    * HOD / LOD    — monotonic deques (amortized O(1) sliding max / min).
+    The window mirrors `_filter_current_session(last 78 bars)`: a bar from
+    a new ET session resets the state.
+
+Daily inputs (ATR14, EMA50, SMA200, BB20, 20-day avg volume, daily RSI)
+are cached per symbol keyed by the daily window's tail fingerprint and
+recomputed only when that changes.
+
+Feeding:
+    `TickToBarPersister` bar-close events advance states that already
+    exist (registered as a listener in server.py). A snapshot whose bars
+    don't match its state (new symbol, restart, overwritten tail bar)
+    reseeds it from those bars, so the state always describes exactly the
+    bars the snapshot would have used. Live quotes are NOT folded in: the
+    snapshot's indicators are closed-bar based and the live price already
+    reaches it through the quote.
+
+Verification:
+    `INCREMENTAL_INDICATORS_VERIFY=true` (env) cross-checks every read
+    against the full recompute (services/technical_batch.py). Mismatches
+    beyond 1e-6 relative are counted in `stats()`, logged, the state is
+    reseeded and the recomputed values are served.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import threading
+from collections import deque
+from datetime import datetime, timezone
+from typing import Deque, Dict, List, Optional, Tuple
+
+from services.bar_store import _ts_epoch
+
+logger = logging.getLogger(__name__)
+
+WINDOW_BARS = 78
+RSI_PERIOD = 14
+INTRADAY_KEYS = ("vwap", "ema_9", "ema_20", "rsi_14", "intraday_high", "intraday_low")
+
+
+def _is_enabled() -> bool:
+    val = os.environ.get("INCREMENTAL_INDICATORS_ENABLED", "true").strip().lower()
+    return val not in ("0", "false", "no", "off")
+
+
+def _verify_enabled() -> bool:
+    val = os.environ.get("INCREMENTAL_INDICATORS_VERIFY", "false").strip().lower()
+    return val in ("1", "true", "yes", "on")
+
+
+def _session_date(ts) -> str:
+    """ET trading date of a bar timestamp — same rule as
+    RealTimeTechnicalService._filter_current_session."""
+    s = str(ts or "").strip().replace("/", "-")
+    if not s:
+        return ""
+    try:
+        if "T" in s:
+            from zoneinfo import ZoneInfo
+            dt = datetime.fromisoformat(s.replace("Z", "+00:00"))
+            if dt.tzinfo is None:
+                dt = dt.replace(tzinfo=timezone.utc)
+            return dt.astimezone(ZoneInfo("America/New_York")).strftime("%Y-%m-%d")
+        if len(s) >= 8 and s[:8].isdigit():
+            return f"{s[:4]}-{s[4:6]}-{s[6:8]}"
+        return s[:10]
+    except Exception:
+        return ""
+
+
+class _WindowEMA:
+    """SMA-seeded EMA over a sliding window, matching
+    RealTimeTechnicalService._calculate_ema on the window contents."""
+
+    __slots__ = ("period", "k", "seed_sum", "s")
+
+    def __init__(self, period: int) -> None:
+        self.period = period
+        self.k = 2 / (period + 1)
+        self.seed_sum = 0.0
+        self.s = 0.0
+
+    def on_append(self, closes: Deque[float]) -> None:
+        n = len(closes)
+        if n == self.period:
+            self.seed_sum = sum(list(closes)[:self.period])
+            self.s = 0.0
+        elif n > self.period:
+            self.s = (1 - self.k) * self.s + self.k * closes[-1]
+
+    def on_evict(self, closes: Deque[float]) -> None:
+        """Called BEFORE closes.popleft() with the window at size n+1."""
+        n1 = len(closes)
+        if n1 <= self.period:
+            return
+        x0, xp = closes[0], closes[self.period]
+        # S loses x_p (it joins the seed); seed loses x_0, gains x_p.
+        self.s -= self.k * (1 - self.k) ** (n1 - 1 - self.period) * xp
+        self.seed_sum += xp - x0
+
+    def value(self, closes: Deque[float]) -> float:
+        n = len(closes)
+        if n == 0:
+            return 0
+        if n < self.period:
+            return closes[-1]
+        seed = self.seed_sum / self.period
+        return (1 - self.k) ** (n - self.period) * seed + self.s
+
+
+class IntradayIndicatorState:
+    """Running session-window indicators for one symbol (5-min bars)."""
+
+    def __init__(self, capacity: int = WINDOW_BARS) -> None:
+        self.capacity = capacity
+        self.session = ""
+        self.closes: Deque[float] = deque()
+        self.highs: Deque[float] = deque()
+        self.lows: Deque[float] = deque()
+        self.tpv: Deque[float] = deque()
+        self.vols: Deque[float] = deque()
+        self.timestamps: Deque = deque()
+        self.vwap_num = 0.0
+        self.vwap_den = 0.0
+        self.ema9 = _WindowEMA(9)
+        self.ema20 = _WindowEMA(20)
+        self.changes: Deque[float] = deque()
+        self.gain_sum = 0.0
+        self.loss_sum = 0.0
+        # Monotonic deques of (seq, value) for sliding HOD / LOD.
+        self._seq = 0
+        self._max: Deque[Tuple[int, float]] = deque()
+        self._min: Deque[Tuple[int, float]] = deque()
+        self._head_seq = 0  # seq of closes[0]
+
+    @property
+    def size(self) -> int:
+        return len(self.closes)
+
+    def last_epoch(self) -> float:
+        return _ts_epoch(self.timestamps[-1]) if self.timestamps else 0.0
+
+    def _reset(self, session: str) -> None:
+        self.__init__(self.capacity)
+        self.session = session
+
+    def update_bar(self, bar: Dict) -> None:
+        ts = bar.get("timestamp", bar.get("date"))
+        session = _session_date(ts)
+        if session != self.session or not self.closes:
+            self._reset(session)
+        high = float(bar.get("high") or 0)
+        low = float(bar.get("low") or 0)
+        close = float(bar.get("close") or 0)
+        vol = float(bar.get("volume") or 0)
+
+        if self.closes:
+            change = close - self.closes[-1]
+            self.changes.append(change)
+            if change > 0:
+                self.gain_sum += change
+            else:
+                self.loss_sum += -change
+            if len(self.changes) > RSI_PERIOD:
+                old = self.changes.popleft()
+                if old > 0:
+                    self.gain_sum -= old
+                else:
+                    self.loss_sum -= -old
+
+        self.closes.append(close)
+        self.highs.append(high)
+        self.lows.append(low)
+        self.timestamps.append(ts)
+        tpv = ((high + low + close) / 3) * vol
+        self.tpv.append(tpv)
+        self.vols.append(vol)
+        self.vwap_num += tpv
+        self.vwap_den += vol
+        self.ema9.on_append(self.closes)
+        self.ema20.on_append(self.closes)
+
+        seq = self._seq
+        self._seq += 1
+        while self._max and self._max[-1][1] <= high:
+            self._max.pop()
+        self._max.append((seq, high))
+        while self._min and self._min[-1][1] >= low:
+            self._min.pop()
+        self._min.append((seq, low))
+
+        if len(self.closes) > self.capacity:
+            self._evict()
+
+    def _evict(self) -> None:
+        self.ema9.on_evict(self.closes)
+        self.ema20.on_evict(self.closes)
+        self.closes.popleft()
+        self.highs.popleft()
+        self.lows.popleft()
+        self.timestamps.popleft()
+        self.vwap_num -= self.tpv.popleft()
+        self.vwap_den -= self.vols.popleft()
+        self._head_seq += 1
+        while self._max and self._max[0][0] < self._head_seq:
+            self._max.popleft()
+        while self._min and self._min[0][0] < self._head_seq:
+            self._min.popleft()
+
+    def values(self) -> Dict[str, float]:
+        n = len(self.closes)
+        if n == 0:
+            return {}
+        if n >= RSI_PERIOD + 1:
+            avg_gain = self.gain_sum / RSI_PERIOD
+            avg_loss = self.loss_sum / RSI_PERIOD
+            rsi = 100 if avg_loss <= 0 else 100 - (100 / (1 + avg_gain / avg_loss))
+        else:
+            rsi = 50
+        return {
+            "vwap": self.vwap_num / self.vwap_den if self.vwap_den > 0 else self.closes[-1],
+            "ema_9": self.ema9.value(self.closes),
+            "ema_20": self.ema20.value(self.closes),
+            "rsi_14": rsi,
+            "intraday_high": self._max[0][1],
+            "intraday_low": self._min[0][1],
+        }
+
+    def matches(self, bars: List[Dict]) -> bool:
+        """True when this state describes exactly `bars` (same count, same
+        trailing bar)."""
+        if not bars or len(bars) != len(self.closes):
+            return False
+        tail = bars[-1]
+        return (
+            _ts_epoch(tail.get("timestamp", tail.get("date"))) == self.last_epoch()
+            and float(tail.get("close") or 0) == self.closes[-1]
+        )
+
+
+class IncrementalIndicatorRegistry:
+    """Process-wide map of symbol → IntradayIndicatorState plus the daily
+    indicator cache. Thread-safe (bar closes arrive on the push thread)."""
+
+    def __init__(self) -> None:
+        self._states: Dict[str, IntradayIndicatorState] = {}
+        self._daily: Dict[str, Tuple[tuple, Dict[str, float]]] = {}
+        self._lock = threading.Lock()
+        self._stats = {
+            "incremental_reads": 0,
+            "reseeds": 0,
+            "bars_applied": 0,
+            "daily_hits": 0,
+            "daily_recomputes": 0,
+            "verified": 0,
+            "mismatches": 0,
+            "max_rel_diff": 0.0,
+        }
+
+    # ---------- feeding -------------------------------------------------
+    def on_bars_closed(self, bars: List[Dict]) -> int:
+        """TickToBarPersister listener — advance existing 5-min states."""
+        applied = 0
+        with self._lock:
+            for bar in bars:
+                if bar.get("bar_size") != "5 mins":
+                    continue
+                state = self._states.get((bar.get("symbol") or "").upper())
+                if state is None:
+                    continue
+                ep = _ts_epoch(bar.get("date"))
+                if state.size and ep <= state.last_epoch():
+                    # Re-emitted / out-of-order bar: let the next read reseed.
+                    self._states.pop(bar["symbol"].upper(), None)
+                    continue
+                state.update_bar(bar)
+                applied += 1
+            self._stats["bars_applied"] += applied
+        return applied
+
+    def seed(self, symbol: str, bars: List[Dict]) -> IntradayIndicatorState:
+        state = IntradayIndicatorState()
+        for bar in bars:
+            state.update_bar(bar)
+        with self._lock:
+            self._states[symbol.upper()] = state
+            self._stats["reseeds"] += 1
+        return state
+
+    def reset(self) -> None:
+        with self._lock:
+            self._states.clear()
+            self._daily.clear()
+
+    # ---------- reads ---------------------------------------------------
+    def intraday_values(self, symbol: str, bars: Optional[List[Dict]]) -> Dict[str, float]:
+        """Indicators for the session-filtered intraday `bars` — O(1) when
+        the state is already in sync, else reseeded from `bars`."""
+        if not bars:
+            return {}
+        sym = symbol.upper()
+        with self._lock:
+            state = self._states.get(sym)
+            in_sync = state is not None and state.matches(bars)
+            if in_sync:
+                self._stats["incremental_reads"] += 1
+                vals = state.values()
+        if not in_sync:
+            vals = self.seed(sym, bars).values()
+        if _verify_enabled():
+            vals = self._verify(sym, bars, vals)
+        return vals
+
+    def daily_values(self, symbol: str, daily_bars: Optional[List[Dict]]) -> Dict[str, float]:
+        """Daily-window indicators, recomputed only when the window changes."""
+        if not daily_bars:
+            return {}
+        tail = daily_bars[-1]
+        key = (
+            len(daily_bars),
+            str(daily_bars[0].get("timestamp")),
+            str(tail.get("timestamp")),
+            tail.get("open"), tail.get("high"), tail.get("low"),
+            tail.get("close"), tail.get("volume"),
+        )
+        sym = symbol.upper()
+        with self._lock:
+            cached = self._daily.get(sym)
+            if cached is not None and cached[0] == key:
+                self._stats["daily_hits"] += 1
+                return cached[1]
+        from services.technical_batch import compute_batch_indicators
+        row = compute_batch_indicators([[]], [daily_bars])[0]
+        vals = {k: row[k] for k in (
+            "atr", "ema_50", "sma_200", "bb_middle", "bb_std", "avg_volume", "rsi_14_daily",
+        )}
+        with self._lock:
+            self._daily[sym] = (key, vals)
+            self._stats["daily_recomputes"] += 1
+        return vals
+
+    def precomputed(self, symbol: str, intraday_bars: Optional[List[Dict]],
+                    daily_bars: Optional[List[Dict]]) -> Optional[Dict[str, float]]:
+        """`precomputed=` argument for RealTimeTechnicalService._calculate_snapshot,
+        or None when disabled."""
+        if not _is_enabled():
+            return None
+        out = self.daily_values(symbol, daily_bars)
+        out = dict(out)
+        out.update(self.intraday_values(symbol, intraday_bars))
+        return out
+
+    def _verify(self, symbol: str, bars: List[Dict], vals: Dict[str, float]) -> Dict[str, float]:
+        from services.technical_batch import compute_batch_indicators
+        full = compute_batch_indicators([bars], [[]])[0]
+        worst = 0.0
+        for key in INTRADAY_KEYS:
+            a, b = vals.get(key, 0.0), full[key]
+            rel = abs(a - b) / max(abs(b), 1e-9)
+            worst = max(worst, rel)
+        with self._lock:
+            self._stats["verified"] += 1
+            self._stats["max_rel_diff"] = max(self._stats["max_rel_diff"], worst)
+            if worst > 1e-6:
+                self._stats["mismatches"] += 1
+        if worst > 1e-6:
+            logger.warning(
+                f"incremental_indicators: {symbol} drifted from full recompute "
+                f"(max rel diff {worst:.2e}) — reseeding"
+            )
+            self.seed(symbol, bars)
+            return {k: full[k] for k in INTRADAY_KEYS}
+        return vals
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "enabled": _is_enabled(),
+                "verify": _verify_enabled(),
+                "symbols": len(self._states),
+                "daily_cached": len(self._daily),
+                **self._stats,
+            }
+
+
+# ---------------- Module-level singleton ----------------
+
+_registry: Optional[IncrementalIndicatorRegistry] = None
+_singleton_lock = threading.Lock()
+
+
+def get_incremental_indicators() -> IncrementalIndicatorRegistry:
+    """Get or create the process-wide incremental indicator registry."""
+    global _registry
+    with _singleton_lock:
+        if _registry is None:
+            _registry = IncrementalIndicatorRegistry()
+    return _registry
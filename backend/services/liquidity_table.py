@@ -0,0 +1,478 @@
+"""
+Session Liquidity Table
+=======================
+Precomputed per-symbol liquidity for the whole symbol universe: share ADV,
+dollar ADV, ADR% and a 20-session time-of-day volume profile for RVOL.
+Rebuilt once per ET session, then served from memory.
+
+Why?
+    The scanner's ADV prefilter cascaded per symbol
+    (`_get_adv_from_cache` → `_get_adv_from_ib_historical` → `_fetch_single_adv`)
+    and the universal liquidity gate went back to Mongo for share ADV
+    (`_get_share_adv_for_gate`) and ADR% (`_compute_adrp_from_bars`) on
+    every alert. These inputs only change once a day, so a cycle was
+    spending hundreds of queries to re-read numbers it already had.
+
+How it is built (`build()`, sync — run via asyncio.to_thread):
+    * One `symbol_adv_cache` read for every cached symbol → the canonical
+      collector values (`avg_dollar_volume`, `avg_volume`, `adrp_20d`),
+      the same fields the scanner helpers read first.
+    * One chunked `$sort → $group/$push → $slice` aggregation over
+      `ib_historical_data` (daily + 5-min bars, last ~40 days) for the
+      qualified universe, grouped by (symbol, bar_size). Daily bars give
+      the bar-derived fallbacks the helpers compute on a cache miss;
+      5-min bars give the time-of-day volume curve.
+    * Columns are NumPy arrays ordered by symbol, with a dict index for
+      O(1) row lookup. A rebuild swaps in a new `_Columns` object in one
+      assignment, so readers never see a half-built table.
+
+Semantics:
+    * A symbol present in the table is authoritative for its
+      `symbol_adv_cache` fields as of the build — callers need not
+      re-query the cache. Bar-derived fields are NaN when the symbol was
+      not aggregated (outside the universe / no bars) and the caller
+      falls back to its Mongo path.
+    * `volume_fraction()` is the expected share of the full RTH day's
+      volume traded by a given minute of the session, averaged over the
+      last 20 complete sessions. It replaces the linear minutes/390
+      de-bias of snapshot RVOL when a profile exists: volume is
+      U-shaped, so linear time understates RVOL after the open and
+      overstates it into the close.
+    * `LIQUIDITY_TABLE_ENABLED=false` (env) makes every lookup a miss.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import math
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+RTH_OPEN_MIN = 9 * 60 + 30          # 09:30 ET, minutes since midnight
+RTH_MINUTES = 390
+SLOT_MINUTES = 5
+RTH_SLOTS = RTH_MINUTES // SLOT_MINUTES  # 78 five-minute slots
+PROFILE_SESSIONS = 20
+MIN_PROFILE_SESSIONS = 5
+MIN_SESSION_SLOTS = 60              # skip half days / partial sessions
+DAILY_BARS = 20
+LOOKBACK_DAYS = 40                  # calendar days ≈ 20+ sessions of 5-min bars
+MAX_INTRADAY_PUSH = (PROFILE_SESSIONS + 2) * RTH_SLOTS * 2  # RTH + extended hours
+
+NUMERIC_COLUMNS = (
+    "avg_volume",          # symbol_adv_cache.avg_volume (shares/day)
+    "avg_dollar_volume",   # symbol_adv_cache.avg_dollar_volume (backfilled)
+    "adrp_20d",            # symbol_adv_cache.adrp_20d (%)
+    "bars_avg_volume",     # mean of the last 20 daily volumes (> 0)
+    "bars_dollar_volume",  # avg volume × avg close over the last 30 days
+    "bars_adrp",           # mean((high-low)/close)·100 over the last 20 daily bars
+    "latest_close",
+)
+
+
+def _is_enabled() -> bool:
+    val = os.environ.get("LIQUIDITY_TABLE_ENABLED", "true").strip().lower()
+    return val not in ("0", "false", "no", "off")
+
+
+def _num(v) -> float:
+    return float(v) if isinstance(v, (int, float)) and not isinstance(v, bool) else 0.0
+
+
+# ---------------- timestamp → ET session minute ----------------
+
+_ET = None
+_utc_offset_cache: Dict[str, timedelta] = {}
+
+
+def _et_zone():
+    global _ET
+    if _ET is None:
+        from zoneinfo import ZoneInfo
+        _ET = ZoneInfo("America/New_York")
+    return _ET
+
+
+def _et_session_minute(ts) -> Optional[Tuple[str, int]]:
+    """(ET session date 'YYYY-MM-DD', minutes since ET midnight) for a bar
+    timestamp. IB "YYYYMMDD HH:MM:SS" strings are already ET; ISO strings
+    and datetimes are UTC (naive → UTC). None when unparseable."""
+    try:
+        if isinstance(ts, str):
+            s = ts.strip()
+            if len(s) >= 17 and s[:8].isdigit() and s[8] == " ":
+                return (f"{s[:4]}-{s[4:6]}-{s[6:8]}",
+                        int(s[9:11]) * 60 + int(s[12:14]))
+            dt = datetime.fromisoformat(s.replace("Z", "+00:00"))
+        elif isinstance(ts, datetime):
+            dt = ts
+        else:
+            return None
+        if dt.tzinfo is None:
+            dt = dt.replace(tzinfo=timezone.utc)
+        dt = dt.astimezone(timezone.utc)
+        # US DST switches at 02:00 ET, before the session, so one offset
+        # per UTC date is exact for every RTH bar.
+        key = dt.strftime("%Y-%m-%d")
+        off = _utc_offset_cache.get(key)
+        if off is None:
+            off = dt.astimezone(_et_zone()).utcoffset()
+            _utc_offset_cache[key] = off
+        et = dt + off
+        return et.strftime("%Y-%m-%d"), et.hour * 60 + et.minute
+    except Exception:
+        return None
+
+
+def _current_session() -> str:
+    return datetime.now(_et_zone()).strftime("%Y-%m-%d")
+
+
+# ---------------- per-symbol metrics ----------------
+
+def volume_profile(intraday_bars: Iterable[Dict],
+                   exclude_session: Optional[str] = None) -> Tuple[Optional[np.ndarray], int]:
+    """Average cumulative RTH volume fraction at the END of each 5-min slot
+    over the last PROFILE_SESSIONS complete sessions. Returns (curve, n)
+    with curve=None when fewer than MIN_PROFILE_SESSIONS qualify."""
+    by_session: Dict[str, np.ndarray] = {}
+    for b in intraday_bars:
+        pos = _et_session_minute(b.get("date") or b.get("timestamp"))
+        if pos is None:
+            continue
+        session, minute = pos
+        if session == exclude_session:
+            continue
+        slot = (minute - RTH_OPEN_MIN) // SLOT_MINUTES
+        if not 0 <= slot < RTH_SLOTS:
+            continue
+        vols = by_session.get(session)
+        if vols is None:
+            vols = by_session[session] = np.full(RTH_SLOTS, np.nan)
+        vols[slot] = _num(b.get("volume"))
+    complete = []
+    for session in sorted(by_session, reverse=True):
+        vols = by_session[session]
+        if np.count_nonzero(~np.isnan(vols)) < MIN_SESSION_SLOTS:
+            continue
+        filled = np.nan_to_num(vols, nan=0.0)
+        total = filled.sum()
+        if total > 0:
+            complete.append(np.cumsum(filled) / total)
+        if len(complete) == PROFILE_SESSIONS:
+            break
+    if len(complete) < MIN_PROFILE_SESSIONS:
+        return None, len(complete)
+    return np.mean(complete, axis=0), len(complete)
+
+
+def daily_metrics(daily_bars: List[Dict], now: Optional[datetime] = None) -> Dict[str, float]:
+    """Bar-derived fallbacks matching the scanner's per-symbol helpers:
+    `_fetch_single_adv` (bars_avg_volume), `_get_adv_from_ib_historical`
+    (bars_dollar_volume) and `_compute_adrp_from_bars` (bars_adrp).
+    `daily_bars` newest first."""
+    now = now or datetime.now(timezone.utc)
+    recent = daily_bars[:DAILY_BARS]
+    out = {k: math.nan for k in ("bars_avg_volume", "bars_dollar_volume",
+                                 "bars_adrp", "latest_close")}
+    if not recent:
+        return out
+    vols = [_num(b.get("volume")) for b in recent if _num(b.get("volume")) > 0]
+    out["bars_avg_volume"] = float(int(sum(vols) / len(vols))) if vols else 0.0
+
+    cutoff = (now - timedelta(days=30)).strftime("%Y-%m-%d")
+    in_window = [b for b in recent if str(b.get("date") or "") >= cutoff]
+    paired = [(_num(b.get("volume")), _num(b.get("close"))) for b in in_window]
+    paired = [(v, c) for v, c in paired if v > 0 and c > 0]
+    if len(in_window) >= 5 and paired:
+        avg_v = sum(v for v, _ in paired) / len(paired)
+        avg_c = sum(c for _, c in paired) / len(paired)
+        out["bars_dollar_volume"] = float(int(avg_v * avg_c))
+    else:
+        out["bars_dollar_volume"] = 0.0
+
+    rngs = []
+    for b in recent:
+        h, lo, c = b.get("high"), b.get("low"), b.get("close")
+        if all(isinstance(x, (int, float)) for x in (h, lo, c)) and c > 0:
+            rngs.append((h - lo) / c)
+    out["bars_adrp"] = (100.0 * sum(rngs) / len(rngs)) if rngs else 0.0
+    out["latest_close"] = _num(recent[0].get("close"))
+    return out
+
+
+# ---------------- the table ----------------
+
+class _Columns:
+    """Immutable snapshot of the table (swapped atomically on rebuild)."""
+
+    __slots__ = ("symbols", "index", "values", "profile", "profile_sessions")
+
+    def __init__(self, symbols: List[str], values: Dict[str, np.ndarray],
+                 profile: np.ndarray, profile_sessions: np.ndarray) -> None:
+        self.symbols = np.array(symbols, dtype=object)
+        self.index = {s: i for i, s in enumerate(symbols)}
+        self.values = values
+        self.profile = profile
+        self.profile_sessions = profile_sessions
+
+    @classmethod
+    def empty(cls) -> "_Columns":
+        return cls([], {k: np.zeros(0) for k in NUMERIC_COLUMNS},
+                   np.zeros((0, RTH_SLOTS), dtype=np.float32), np.zeros(0, dtype=np.int16))
+
+
+class LiquidityTable:
+    """In-memory liquidity table. Reads are lock-free against the current
+    `_Columns` snapshot; `build()` replaces it in one assignment."""
+
+    def __init__(self) -> None:
+        self._cols = _Columns.empty()
+        self._lock = threading.Lock()
+        self._session: Optional[str] = None
+        self._hits = 0
+        self._misses = 0
+        self._last_build: Dict = {}
+
+    # ---------- reads ---------------------------------------------------
+    @property
+    def ready(self) -> bool:
+        return _is_enabled() and len(self._cols.index) > 0
+
+    @property
+    def session(self) -> Optional[str]:
+        return self._session
+
+    def _row(self, symbol: str) -> Optional[int]:
+        if not _is_enabled():
+            return None
+        i = self._cols.index.get((symbol or "").upper())
+        if i is None:
+            self._misses += 1
+        else:
+            self._hits += 1
+        return i
+
+    def get(self, symbol: str) -> Optional[Dict[str, Optional[float]]]:
+        """All numeric fields for `symbol` (NaN → None), or None on a miss."""
+        cols = self._cols
+        i = self._row(symbol)
+        if i is None:
+            return None
+        out: Dict[str, Optional[float]] = {}
+        for k in NUMERIC_COLUMNS:
+            v = float(cols.values[k][i])
+            out[k] = None if math.isnan(v) else v
+        out["profile_sessions"] = int(cols.profile_sessions[i])
+        return out
+
+    def dollar_adv_many(self, symbols: Iterable[str]) -> Tuple[Dict[str, int], List[str]]:
+        """(cache dollar ADV for known symbols with ADV > 0, symbols the
+        table does not know). Mirrors `_get_adv_from_cache`."""
+        cols = self._cols
+        col = cols.values["avg_dollar_volume"]
+        found: Dict[str, int] = {}
+        unknown: List[str] = []
+        for s in symbols:
+            i = self._row(s)
+            if i is None:
+                unknown.append(s)
+            elif col[i] > 0:
+                found[s] = int(col[i])
+        return found, unknown
+
+    def volume_fraction(self, symbol: str, minutes_since_open: float) -> Optional[float]:
+        """Expected fraction of the full RTH day's volume traded by
+        `minutes_since_open`, interpolated within the 5-min slot. None
+        when the symbol has no profile."""
+        cols = self._cols
+        i = self._row(symbol)
+        if i is None or cols.profile_sessions[i] == 0:
+            return None
+        m = min(max(float(minutes_since_open), 0.0), float(RTH_MINUTES))
+        slot = min(int(m // SLOT_MINUTES), RTH_SLOTS - 1)
+        curve = cols.profile[i]
+        lo = float(curve[slot - 1]) if slot > 0 else 0.0
+        hi = float(curve[slot])
+        frac = lo + (hi - lo) * ((m - slot * SLOT_MINUTES) / SLOT_MINUTES)
+        return max(min(frac, 1.0), 1.0 / RTH_MINUTES)
+
+    def stats(self) -> Dict:
+        cols = self._cols
+        lookups = self._hits + self._misses
+        return {
+            "enabled": _is_enabled(),
+            "symbols": len(cols.index),
+            "with_profile": int(np.count_nonzero(cols.profile_sessions)),
+            "session": self._session,
+            "hits": self._hits,
+            "misses": self._misses,
+            "hit_rate_pct": round(100.0 * self._hits / lookups, 2) if lookups else 0.0,
+            "last_build": dict(self._last_build),
+        }
+
+    # ---------- build ---------------------------------------------------
+    def build(self, db, symbols: Optional[List[str]] = None,
+              chunk_size: Optional[int] = None) -> Dict:
+        """Rebuild from Mongo (sync — run via asyncio.to_thread).
+
+        `symbols` is the set to aggregate bars for (default: the qualified
+        universe); every `symbol_adv_cache` row is loaded regardless."""
+        started = time.monotonic()
+        if db is None:
+            return {"symbols": 0, "queries": 0}
+        if chunk_size is None:
+            chunk_size = int(os.environ.get("LIQUIDITY_TABLE_CHUNK", "50"))
+        session = _current_session()
+        now = datetime.now(timezone.utc)
+        queries = 0
+
+        rows: Dict[str, Dict[str, float]] = {}
+        try:
+            cursor = db["symbol_adv_cache"].find(
+                {}, {"_id": 0, "symbol": 1, "avg_dollar_volume": 1,
+                     "avg_volume": 1, "latest_close": 1, "adrp_20d": 1})
+            queries += 1
+            for doc in cursor:
+                sym = (doc.get("symbol") or "").upper()
+                if not sym:
+                    continue
+                share_vol = _num(doc.get("avg_volume"))
+                close = _num(doc.get("latest_close"))
+                dvol = _num(doc.get("avg_dollar_volume"))
+                if not dvol and share_vol and close:
+                    dvol = float(int(share_vol * close))
+                adrp = _num(doc.get("adrp_20d"))
+                rows[sym] = {
+                    "avg_volume": float(int(share_vol)),
+                    "avg_dollar_volume": float(int(dvol)),
+                    "adrp_20d": adrp if adrp > 0 else math.nan,
+                    "latest_close": close or math.nan,
+                }
+        except Exception as exc:
+            logger.warning(f"liquidity_table: symbol_adv_cache read failed: {exc}")
+
+        if symbols is None:
+            symbols = _universe(db)
+        targets = sorted({s.upper() for s in symbols if s})
+        profiles: Dict[str, Tuple[np.ndarray, int]] = {}
+        cutoff = (now - timedelta(days=LOOKBACK_DAYS)).strftime("%Y-%m-%d")
+        for i in range(0, len(targets), max(1, chunk_size)):
+            chunk = targets[i:i + chunk_size]
+            pipeline = [
+                {"$match": {"symbol": {"$in": chunk},
+                            "bar_size": {"$in": ["1 day", "5 mins"]},
+                            "date": {"$gte": cutoff}}},
+                {"$sort": {"date": -1}},
+                {"$group": {
+                    "_id": {"symbol": "$symbol", "bar_size": "$bar_size"},
+                    "bars": {"$push": {
+                        "date": "$date", "high": "$high", "low": "$low",
+                        "close": "$close", "volume": "$volume",
+                    }},
+                }},
+                {"$project": {"bars": {"$slice": ["$bars", MAX_INTRADAY_PUSH]}}},
+            ]
+            try:
+                grouped = list(db["ib_historical_data"].aggregate(pipeline, allowDiskUse=True))
+                queries += 1
+            except Exception as exc:
+                logger.warning(f"liquidity_table: bar aggregation chunk failed: {exc}")
+                continue
+            for g in grouped:
+                key = g.get("_id") or {}
+                sym = (key.get("symbol") or "").upper()
+                bars = g.get("bars") or []
+                if not sym or not bars:
+                    continue
+                row = rows.setdefault(sym, {
+                    "avg_volume": 0.0, "avg_dollar_volume": 0.0,
+                    "adrp_20d": math.nan, "latest_close": math.nan,
+                })
+                if key.get("bar_size") == "1 day":
+                    metrics = daily_metrics(bars[:DAILY_BARS], now=now)
+                    if math.isnan(row["latest_close"]) or not row["latest_close"]:
+                        row["latest_close"] = metrics.pop("latest_close")
+                    else:
+                        metrics.pop("latest_close")
+                    row.update(metrics)
+                else:
+                    curve, n = volume_profile(bars, exclude_session=session)
+                    if curve is not None:
+                        profiles[sym] = (curve, n)
+
+        ordered = sorted(rows)
+        values = {k: np.full(len(ordered), math.nan) for k in NUMERIC_COLUMNS}
+        profile = np.zeros((len(ordered), RTH_SLOTS), dtype=np.float32)
+        sessions = np.zeros(len(ordered), dtype=np.int16)
+        for i, sym in enumerate(ordered):
+            for k, v in rows[sym].items():
+                values[k][i] = v
+            if sym in profiles:
+                profile[i], sessions[i] = profiles[sym]
+
+        summary = {
+            "session": session,
+            "symbols": len(ordered),
+            "aggregated": len(targets),
+            "with_profile": len(profiles),
+            "queries": queries,
+            "elapsed_ms": round((time.monotonic() - started) * 1000, 1),
+            "at": now.isoformat(),
+        }
+        with self._lock:
+            if ordered:
+                self._cols = _Columns(ordered, values, profile, sessions)
+                self._session = session
+            self._last_build = summary
+        return summary
+
+
+# ---------------- Module-level singleton ----------------
+
+_table: Optional[LiquidityTable] = None
+_singleton_lock = threading.Lock()
+
+
+def get_liquidity_table() -> LiquidityTable:
+    """Get or create the process-wide liquidity table."""
+    global _table
+    with _singleton_lock:
+        if _table is None:
+            _table = LiquidityTable()
+    return _table
+
+
+def _universe(db) -> List[str]:
+    """Symbols whose bars are aggregated: the whole qualified universe."""
+    try:
+        from services.symbol_universe import get_universe
+        return sorted(get_universe(db, tier="all"))
+    except Exception as exc:
+        logger.debug(f"liquidity_table: universe lookup failed: {exc}")
+        return []
+
+
+async def liquidity_table_refresh_loop(db, interval_s: Optional[float] = None) -> None:
+    """Build at startup, then rebuild whenever the ET session rolls
+    (server.py background task). Checks every LIQUIDITY_TABLE_CHECK_SEC."""
+    table = get_liquidity_table()
+    if interval_s is None:
+        interval_s = float(os.environ.get("LIQUIDITY_TABLE_CHECK_SEC", "600"))
+    while True:
+        try:
+            if _is_enabled() and table.session != _current_session():
+                summary = await asyncio.to_thread(table.build, db)
+                logger.info(f"liquidity_table: rebuilt {summary}")
+        except Exception as exc:
+            logger.warning(f"liquidity_table: rebuild failed: {exc}")
+        await asyncio.sleep(interval_s)
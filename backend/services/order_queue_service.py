@@ -2,9 +2,12 @@
 Order Queue Service - MongoDB backed order queue for remote execution
 Replaces the in-memory order queue for persistence and reliability
 """
+import asyncio
 import os
+import time
 import uuid
 import logging
+import threading
 from datetime import datetime, timezone
 from typing import Optional, Dict, List, Any
 from enum import Enum
@@ -73,6 +76,11 @@ class QueuedOrder(BaseModel):
     oca_group: Optional[str] = None
 
 
+def _resolve_waiter(fut) -> None:
+    if not fut.done():
+        fut.set_result(True)
+
+
 class OrderQueueService:
     """MongoDB-backed order queue for remote trade execution"""
     
@@ -80,6 +88,16 @@ class OrderQueueService:
         self._db = None
         self._collection = None
         self._initialized = False
+        # Dispatch version for long-polling pushers: bumped on every new
+        # pending row so `wait_for_orders` wakes immediately instead of
+        # the pusher re-querying Mongo on a timer. Seeded from the wall
+        # clock so a backend restart never hands out a version lower
+        # than one a connected pusher already holds.
+        self._dispatch_version = int(time.time() * 1000)
+        self._dispatch_cond = threading.Condition()
+        # Long-poll waiters parked on an event loop (wait_for_orders_async)
+        # — woken via call_soon_threadsafe, so no thread is held per poll.
+        self._async_waiters: set = set()
         
     def initialize(self, db=None):
         """Initialize with MongoDB connection"""
@@ -320,6 +338,13 @@ class OrderQueueService:
         self._collection.insert_one(order_doc)
         # Remove _id that MongoDB added to the dict so callers don't leak ObjectId
         order_doc.pop("_id", None)
+        # Wake long-polling pushers. The row is already persisted, so a
+        # failed wake only costs latency (the poll times out and re-reads)
+        # — it must never fail the enqueue.
+        try:
+            self._notify_dispatch()
+        except Exception as e:
+            logger.debug(f"Order dispatch wake failed: {e}")
 
         if is_bracket:
             parent = order_doc.get("parent") or {}
@@ -338,17 +363,110 @@ class OrderQueueService:
     
     def get_pending_orders(self) -> List[Dict]:
         """Get all pending orders waiting for execution.
-        
-        Also auto-expires CLAIMED orders older than 5 minutes — these are
-        orders that were claimed but never completed (e.g., pusher restarted
-        mid-execution). Without this cleanup they loop forever.
+
+        Read-only: the stale CLAIMED / IB_PENDING expiry sweeps used to
+        run here on every pusher poll (two `update_many` writes per poll);
+        they now live in `sweep_stale_orders()`, run by the order-queue
+        reconciler loop in server.py.
+        """
+        if not self._initialized:
+            self.initialize()
+
+        orders = list(self._collection.find(
+            {"status": {"$in": [OrderStatus.PENDING.value, OrderStatus.CLAIMED.value]}},
+            {"_id": 0}
+        ).sort("queued_at", 1))
+
+        return orders
+
+    # ---------- event-driven dispatch (long-poll) -------------------------
+    @property
+    def dispatch_version(self) -> int:
+        return self._dispatch_version
+
+    def _notify_dispatch(self) -> None:
+        """Wake every pusher blocked in `wait_for_orders`."""
+        with self._dispatch_cond:
+            self._dispatch_version += 1
+            self._dispatch_cond.notify_all()
+            waiters = list(self._async_waiters)
+        for loop, fut in waiters:
+            try:
+                loop.call_soon_threadsafe(_resolve_waiter, fut)
+            except RuntimeError:  # loop closed
+                pass
+
+    def wait_for_orders(self, since_version: int, timeout: float) -> int:
+        """Block until an order is queued after `since_version` or
+        `timeout` seconds pass. Returns the current dispatch version.
+
+        Backs the long-poll `GET /api/ib/orders/pending?wait=N&version=V`:
+        the pusher echoes the version from its previous response, so an
+        order queued between two polls is never missed and an idle queue
+        costs no Mongo reads until something actually arrives.
+        """
+        deadline = time.monotonic() + max(0.0, float(timeout))
+        with self._dispatch_cond:
+            while self._dispatch_version <= since_version:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._dispatch_cond.wait(remaining)
+            return self._dispatch_version
+
+    async def wait_for_orders_async(self, since_version: int, timeout: float) -> int:
+        """`wait_for_orders` for the event loop: parks a future instead of
+        a default-executor thread, so long-polling pushers can't starve
+        the pool."""
+        loop = asyncio.get_running_loop()
+        fut = loop.create_future()
+        entry = (loop, fut)
+        with self._dispatch_cond:
+            if self._dispatch_version > since_version:
+                return self._dispatch_version
+            self._async_waiters.add(entry)
+        try:
+            await asyncio.wait({fut}, timeout=max(0.0, float(timeout)))
+        finally:
+            with self._dispatch_cond:
+                self._async_waiters.discard(entry)
+            if not fut.done():
+                fut.cancel()
+        return self._dispatch_version
+
+    async def get_pending_orders_async(self) -> List[Dict]:
+        """`get_pending_orders` on the pooled Motor repo when it mirrors
+        this queue's db, else in a worker thread."""
+        if not self._initialized:
+            await asyncio.to_thread(self.initialize)
+        from services.async_mongo import get_async_repo
+        repo = get_async_repo()
+        if repo is None or not repo.serves(self._db):
+            return await asyncio.to_thread(self.get_pending_orders)
+        return await repo["order_queue"].find_list(
+            {"status": {"$in": [OrderStatus.PENDING.value, OrderStatus.CLAIMED.value]}},
+            {"_id": 0}, sort=[("queued_at", 1)],
+        )
+
+    def sweep_stale_orders(self) -> Dict[str, int]:
+        """Expire orders stuck mid-flight. Run periodically in the
+        background (see server.py `_order_dead_letter_loop`).
+
+        * CLAIMED for > 5 min → EXPIRED. Orders that were claimed but never
+          completed (e.g., pusher restarted mid-execution). Without this
+          cleanup they loop forever.
+        * IB_PENDING for > 10 min → REJECTED (v19.34.109).
+
+        Returns `{"claimed_expired": n, "ib_pending_rejected": n}`.
         """
         if not self._initialized:
             self.initialize()
 
+        from datetime import timedelta
+        out = {"claimed_expired": 0, "ib_pending_rejected": 0}
+
         # Auto-expire stale CLAIMED orders (claimed > 5 min ago, never completed)
         try:
-            from datetime import timedelta
             stale_cutoff = (datetime.now(timezone.utc) - timedelta(minutes=5)).isoformat()
             expired = self._collection.update_many(
                 {
@@ -361,8 +479,9 @@ class OrderQueueService:
                     "error": "Auto-expired: claimed but never completed within 5 minutes",
                 }},
             )
-            if expired.modified_count > 0:
-                logger.warning(f"Auto-expired {expired.modified_count} stale CLAIMED orders")
+            out["claimed_expired"] = int(getattr(expired, "modified_count", 0) or 0)
+            if out["claimed_expired"] > 0:
+                logger.warning(f"Auto-expired {out['claimed_expired']} stale CLAIMED orders")
         except Exception as e:
             logger.debug(f"Stale order cleanup error: {e}")
 
@@ -372,7 +491,6 @@ class OrderQueueService:
         # Mark as rejected so the reconciler can move on, and tag the
         # error so the operator can investigate.
         try:
-            from datetime import timedelta
             ib_pending_cutoff = (
                 datetime.now(timezone.utc) - timedelta(minutes=10)
             ).isoformat()
@@ -387,21 +505,17 @@ class OrderQueueService:
                     "error": "Auto-expired: IB never resolved terminal state within 10 minutes",
                 }},
             )
-            if ib_expired.modified_count > 0:
+            out["ib_pending_rejected"] = int(getattr(ib_expired, "modified_count", 0) or 0)
+            if out["ib_pending_rejected"] > 0:
                 logger.warning(
-                    f"Auto-expired {ib_expired.modified_count} stuck IB_PENDING orders "
+                    f"Auto-expired {out['ib_pending_rejected']} stuck IB_PENDING orders "
                     f"(IB never sent a terminal state in 10 min)"
                 )
         except Exception as e:
             logger.debug(f"IB_PENDING cleanup error: {e}")
 
-        orders = list(self._collection.find(
-            {"status": {"$in": [OrderStatus.PENDING.value, OrderStatus.CLAIMED.value]}},
-            {"_id": 0}
-        ).sort("queued_at", 1))
-        
-        return orders
-    
+        return out
+
     def claim_order(self, order_id: str) -> Optional[Dict]:
         """
         Claim an order for execution (prevents double execution).
@@ -471,7 +585,7 @@ class OrderQueueService:
         if error is not None:
             update["error"] = error
         # v19.34.109 — Stamp the time we transitioned into IB_PENDING so
-        # the auto-expiry watchdog in get_pending_orders() can find
+        # the auto-expiry watchdog in sweep_stale_orders() can find
         # stuck rows ≥10 min old and force-close them.
         if status == OrderStatus.IB_PENDING.value:
             update["ib_pending_at"] = datetime.now(timezone.utc).isoformat()
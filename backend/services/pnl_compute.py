@@ -45,6 +45,8 @@ USAGE:
 from __future__ import annotations
 
 import logging
+import os
+import re
 from datetime import datetime, timezone
 from typing import Any, Dict, Optional
 
@@ -294,14 +296,24 @@ def _record_alert_outcome_bestEffort(
         "mfe_r_floor": round(_mfe_r_floor, 3),
         "mae_r_floor": round(_mae_r_floor, 3),
     }
+    prev_row = None
+    upserted = False
     try:
+        from pymongo import ReturnDocument
         # Upsert keyed on trade_id so retry-on-failure paths don't
-        # create duplicate outcome rows.
-        coll.update_one(
+        # create duplicate outcome rows. The prior version of the row
+        # (scale-out partials / reconciler re-upserts) comes back from the
+        # same atomic write, so two concurrent partial closes each see a
+        # distinct pre-image and the strategy_stats fold swaps exactly that
+        # contribution out.
+        prev_row = coll.find_one_and_update(
             {"trade_id": doc["trade_id"]},
             {"$set": doc},
+            projection=_STATS_ROW_PROJECTION,
             upsert=True,
+            return_document=ReturnDocument.BEFORE,
         )
+        upserted = True
     except Exception as e:
         logger.debug("[pnl_compute] alert_outcomes upsert failed: %s", e)
 
@@ -316,14 +328,22 @@ def _record_alert_outcome_bestEffort(
     # v19.34.240 — but ONLY for GENUINE strategy closes. Artifact closes
     # (phantom sweep / instant external unwind / operator flatten / corrupt pnl)
     # are excluded so they can't pollute the EV scoreboard.
-    if _genuine:
+    # Folded incrementally (O(1) per close) from the row delta; the genuine
+    # filter lives in `_stats_contribution`, so a re-upsert that flips a row
+    # to artifact still retracts its earlier contribution.
+    if upserted:
         try:
-            _upsert_strategy_stats_bestEffort(
-                trade, outcome, r_multiple, pnl.get("net_pnl", 0.0),
-            )
+            if doc["trade_id"]:
+                _fold_strategy_stats_bestEffort(
+                    prev_row if isinstance(prev_row, dict) else None, doc,
+                )
+            elif _genuine:
+                _upsert_strategy_stats_bestEffort(
+                    trade, outcome, r_multiple, pnl.get("net_pnl", 0.0),
+                )
         except Exception as _ss_err:
             logger.debug("[v19.34.216 strategy_stats] live hook skipped: %s", _ss_err)
-    else:
+    if not _genuine:
         logger.debug(
             "[v19.34.240 hygiene] strategy_stats SKIPPED for %s close (%s)",
             getattr(trade, "symbol", "?"), _hyg_tag,
@@ -443,6 +463,196 @@ def _classify_outcome(outcome, r, pnl):
     return None
 
 
+# ── incremental strategy_stats aggregate ───────────────────────────────────
+# `strategy_stats_agg` keeps, per base setup, the running sums the strategy
+# card needs (counts, Σpnl, ΣR, ΣR², win/loss R sums) plus a last-100 R ring,
+# so a close folds in with `$inc` instead of rescanning alert_outcomes. The
+# full recompute below shares the same accumulator/doc math and re-seeds the
+# aggregate, and the nightly `rebuild_strategy_stats` verifies every setup.
+_STATS_AGG_COLLECTION = "strategy_stats_agg"
+_R_RING_SIZE = 100
+_FOLD_CAS_ATTEMPTS = 5
+_STATS_ROW_PROJECTION = {
+    "_id": 1, "trade_id": 1, "setup_type": 1, "outcome": 1, "r_multiple": 1,
+    "net_pnl": 1, "pnl": 1, "closed_at": 1, "genuine": 1, "close_reason": 1,
+    "r_risk_unreliable": 1,
+}
+_STATS_SUM_FIELDS = ("trig", "won", "lost", "total_pnl", "n_r", "sum_r", "sum_r2",
+                     "n_win_r", "sum_win_r", "n_loss_r", "sum_loss_r")
+
+
+def _stats_contribution(row: Optional[dict], genuine_only: bool = True) -> Optional[dict]:
+    """What one alert_outcomes row adds to its setup's stats, or None when the
+    row is excluded (artifact / corrupt R / unclassifiable)."""
+    if not row:
+        return None
+    base = _base_setup(row.get("setup_type"))
+    if not base:
+        return None
+    if genuine_only and (
+        row.get("genuine", True) is False
+        or row.get("r_risk_unreliable") is True
+        or _is_reconciliation_artifact(row.get("setup_type"), row.get("close_reason"))
+    ):
+        return None
+    r = row.get("r_multiple")
+    r = float(r) if isinstance(r, (int, float)) else None
+    pnl_v = row.get("net_pnl")
+    if pnl_v is None:
+        pnl_v = row.get("pnl")
+    pnl_v = float(pnl_v) if isinstance(pnl_v, (int, float)) else 0.0
+    cls = _classify_outcome(row.get("outcome"), r, pnl_v)
+    if cls is None:
+        return None
+    key = str(row.get("trade_id") or row.get("_id") or "")
+    return {"base": base, "cls": cls, "r": r, "pnl": pnl_v, "key": key,
+            "sort": f"{row.get('closed_at', '')}\x00{key}"}
+
+
+def _stats_increments(c: dict, sign: int, into: Dict[str, float]) -> Dict[str, float]:
+    def add(field, v):
+        into[field] = into.get(field, 0) + sign * v
+    add("trig", 1)
+    add("won", 1 if c["cls"] == "win" else 0)
+    add("lost", 1 if c["cls"] == "loss" else 0)
+    add("total_pnl", c["pnl"])
+    r = c["r"]
+    if r is not None:
+        add("n_r", 1)
+        add("sum_r", r)
+        add("sum_r2", r * r)
+        if r > 0:
+            add("n_win_r", 1)
+            add("sum_win_r", r)
+        else:
+            add("n_loss_r", 1)
+            add("sum_loss_r", r)
+    return into
+
+
+def _accumulate_stats(rows, genuine_only: bool = True) -> dict:
+    """Full-history aggregate from chronologically sorted rows."""
+    agg: Dict[str, Any] = {f: 0 for f in _STATS_SUM_FIELDS}
+    ring = []
+    for d in rows:
+        c = _stats_contribution(d, genuine_only)
+        if c is None:
+            continue
+        _stats_increments(c, 1, agg)
+        if c["r"] is not None:
+            ring.append({"k": c["key"], "s": c["sort"], "r": c["r"]})
+    agg["ring"] = ring[-_R_RING_SIZE:]
+    return agg
+
+
+def _strategy_stats_doc(base: str, agg: dict, genuine_only: bool, recomputed_by: str) -> dict:
+    """strategy_stats document from an aggregate (full or incremental)."""
+    trig = int(agg.get("trig") or 0)
+    won = int(agg.get("won") or 0)
+    lost = int(agg.get("lost") or 0)
+    n_all = int(agg.get("n_r") or 0)
+    n_win, n_loss = int(agg.get("n_win_r") or 0), int(agg.get("n_loss_r") or 0)
+    sum_r = float(agg.get("sum_r") or 0.0)
+    sum_win, sum_loss = float(agg.get("sum_win_r") or 0.0), float(agg.get("sum_loss_r") or 0.0)
+
+    win_rate = (won / trig) if trig else 0.0
+    # v19.34.305 — EV must be the realized expectancy of the SAME sample the
+    # win_rate is measured over. The legacy code mixed full-sample win_rate
+    # with last-100 avg_win/avg_loss, so EV diverged from the realized mean
+    # (e.g. -0.13R "Expected Value" vs +0.01R "avg_r" on the same card). Use
+    # the FULL window sample for both, which makes EV == mean(R) and
+    # eliminates the contradiction. avg_win_r/avg_loss_r are also computed on
+    # the full sample for display consistency.
+    avg_win_r = (sum_win / n_win) if n_win else 0.0
+    avg_loss_r = abs(sum_loss / n_loss) if n_loss else 1.0
+    avg_rr = (sum_r / n_all) if n_all else 0.0
+    ev = avg_rr if n_all >= 5 else 0.0  # realized expectancy == mean(R)
+    profit_factor = (sum_win / abs(sum_loss)) if n_loss and sum_loss != 0 else 0.0
+    var_r = (float(agg.get("sum_r2") or 0.0) / n_all - avg_rr * avg_rr) if n_all else 0.0
+    return {
+        "setup_type": base,
+        "total_alerts": trig,
+        "alerts_triggered": trig,
+        "alerts_won": won,
+        "alerts_lost": lost,
+        "total_pnl": round(float(agg.get("total_pnl") or 0.0), 2),
+        "win_rate": round(win_rate, 4),
+        "profit_factor": round(profit_factor, 3),
+        "avg_rr_achieved": round(avg_rr, 3),
+        # v19.34.305 — expose the realized mean + sample size under the field
+        # names the TQS card-detail / drill-down read, so the displayed EV,
+        # avg_r and n all come from this one artifact-free recompute.
+        "avg_r": round(avg_rr, 4),
+        "r_stdev": round(max(var_r, 0.0) ** 0.5, 4),
+        "sample_size": trig,
+        "total_trades": trig,
+        "r_outcomes": [round(e["r"], 4) for e in (agg.get("ring") or [])],  # last-100, storage only
+        "avg_win_r": round(avg_win_r, 4),
+        "avg_loss_r": round(avg_loss_r, 4),
+        "expected_value_r": round(ev, 4),
+        "genuine_only": genuine_only,
+        "last_updated": datetime.now(timezone.utc).isoformat(),
+        "recomputed_by": recomputed_by,
+    }
+
+
+def _seed_stats_agg(db, base: str, agg: dict, seen: Optional[dict]) -> Optional[int]:
+    """Overwrite the aggregate for `base` with `agg`, derived from rows scanned
+    after `seen` (the aggregate as read before the scan; None if there was
+    none) — but only if no fold has moved it since. Returns the new `seq`,
+    or None when a close folded in between (its row may postdate the scan,
+    so the seed would drop it). `seq` only ever grows, so an in-flight fold
+    against the old aggregate fails its compare-and-set and retries against
+    the seeded one."""
+    from pymongo import ReturnDocument
+    fields = {**{f: agg.get(f, 0) for f in _STATS_SUM_FIELDS},
+              "ring": agg.get("ring") or [],
+              "rebuilt_at": datetime.now(timezone.utc).isoformat()}
+    coll = db[_STATS_AGG_COLLECTION]
+    if seen is None:
+        prev = coll.find_one_and_update(
+            {"setup_type": base}, {"$setOnInsert": {**fields, "seq": 1}},
+            upsert=True, return_document=ReturnDocument.BEFORE)
+        return 1 if prev is None else None
+    seeded = coll.find_one_and_update(
+        {"setup_type": base, "seq": seen.get("seq")},
+        {"$set": fields, "$inc": {"seq": 1}},
+        return_document=ReturnDocument.AFTER,
+    )
+    return None if seeded is None else int(seeded.get("seq") or 0)
+
+
+def _setup_rows(db, base: str) -> list:
+    """alert_outcomes rows of one setup family, in canonical fold order."""
+    # Anchored prefix match (index-friendly): base is always a prefix of
+    # its setup_type; the exact family check stays in Python.
+    rows = [
+        d for d in db["alert_outcomes"].find({"setup_type": {"$regex": "^" + re.escape(base)}},
+                                             _STATS_ROW_PROJECTION)
+        if _base_setup(d.get("setup_type")) == base
+    ]
+    rows.sort(key=lambda d: (str(d.get("closed_at", "")), str(d.get("_id", ""))))
+    return rows
+
+
+def _write_strategy_stats(db, base: str, doc: dict, seq: Optional[int], folded: bool = False) -> None:
+    """Write the derived strategy_stats doc tagged with the aggregate `seq` it
+    came from. Fold writes only land over an older `seq`, so two concurrent
+    closes can't leave the card showing the earlier aggregate."""
+    if seq is None:
+        db["strategy_stats"].update_one({"setup_type": base}, {"$set": doc}, upsert=True)
+        return
+    doc = {**doc, "agg_seq": seq}
+    if not folded:
+        db["strategy_stats"].update_one({"setup_type": base}, {"$set": doc}, upsert=True)
+        return
+    res = db["strategy_stats"].update_one(
+        {"setup_type": base, "agg_seq": {"$not": {"$gte": seq}}}, {"$set": doc})
+    if not getattr(res, "matched_count", 0):
+        db["strategy_stats"].update_one(
+            {"setup_type": base}, {"$setOnInsert": doc}, upsert=True)
+
+
 def recompute_strategy_stats_for_setup(base: str, genuine_only: bool = True) -> Optional[dict]:
     """v19.34.249 (F3) — CANONICAL strategy_stats recompute for ONE setup family
     from `alert_outcomes` (which is upserted 1-row-per-trade, keyed on trade_id).
@@ -454,105 +664,186 @@ def recompute_strategy_stats_for_setup(base: str, genuine_only: bool = True) ->
     was 11%/-0.43R). Recomputing from alert_outcomes makes win_rate AND EV share
     the SAME whole-trade sample and makes the live feed converge with the nightly
     backfill_strategy_stats.py. Math/keying mirror that script exactly.
-    `genuine_only` excludes hygiene-tagged artifacts."""
+    `genuine_only` excludes hygiene-tagged artifacts.
+
+    Close paths no longer call this (they fold the row delta into
+    `strategy_stats_agg`); it remains the ground truth for reconciler runs and
+    re-seeds the incremental aggregate for `base` when genuine_only."""
     if _get_outcomes_collection() is None or _AO_DB is None or not base:
         return None
     try:
-        ao = _AO_DB["alert_outcomes"]
-        rows = [
-            d for d in ao.find(
-                {}, {"_id": 1, "setup_type": 1, "outcome": 1, "r_multiple": 1,
-                     "net_pnl": 1, "pnl": 1, "closed_at": 1, "genuine": 1,
-                     "close_reason": 1, "r_risk_unreliable": 1})
-            if _base_setup(d.get("setup_type")) == base
-        ]
-        if genuine_only:
-            # Exclude both flagged artifacts AND legacy rows (no `genuine` field)
-            # that decode to reconciliation/phantom artifacts by setup/reason.
-            # v19.34.307 — also drop rows with a corrupt risk basis (stop ≈ entry
-            # → absurd R), which would otherwise skew avg_r / EV.
-            rows = [
-                d for d in rows
-                if d.get("genuine", True) is not False
-                and d.get("r_risk_unreliable") is not True
-                and not _is_reconciliation_artifact(
-                    d.get("setup_type"), d.get("close_reason"))
-            ]
-        rows.sort(key=lambda d: (str(d.get("closed_at", "")), str(d.get("_id", ""))))
-
-        trig = won = lost = 0
-        r_all = []
-        total_pnl = 0.0
-        for d in rows:
-            r = d.get("r_multiple")
-            r = float(r) if isinstance(r, (int, float)) else None
-            pnl_v = d.get("net_pnl")
-            if pnl_v is None:
-                pnl_v = d.get("pnl")
-            pnl_v = float(pnl_v) if isinstance(pnl_v, (int, float)) else 0.0
-            cls = _classify_outcome(d.get("outcome"), r, pnl_v)
-            if cls is None:
-                continue
-            trig += 1
-            won += 1 if cls == "win" else 0
-            lost += 1 if cls == "loss" else 0
-            total_pnl += pnl_v
-            if r is not None:
-                r_all.append(r)
-
-        r_out = r_all[-100:]  # last-100 retained for storage only
-        win_rate = (won / trig) if trig else 0.0
-        # v19.34.305 — EV must be the realized expectancy of the SAME sample the
-        # win_rate is measured over. The legacy code mixed full-sample win_rate
-        # with last-100 avg_win/avg_loss, so EV diverged from the realized mean
-        # (e.g. -0.13R "Expected Value" vs +0.01R "avg_r" on the same card). Use
-        # the FULL window sample (r_all) for both, which makes EV == mean(R) and
-        # eliminates the contradiction. avg_win_r/avg_loss_r are also computed on
-        # the full sample for display consistency.
-        n_all = len(r_all)
-        wins_r = [x for x in r_all if x > 0]
-        losses_r = [x for x in r_all if x <= 0]
-        avg_win_r = (sum(wins_r) / len(wins_r)) if wins_r else 0.0
-        avg_loss_r = abs(sum(losses_r) / len(losses_r)) if losses_r else 1.0
-        avg_rr = (sum(r_all) / n_all) if n_all else 0.0
-        ev = avg_rr if n_all >= 5 else 0.0  # realized expectancy == mean(R)
-        profit_factor = (
-            (sum(wins_r) / abs(sum(losses_r)))
-            if losses_r and sum(losses_r) != 0 else 0.0
-        )
-        doc = {
-            "setup_type": base,
-            "total_alerts": trig,
-            "alerts_triggered": trig,
-            "alerts_won": won,
-            "alerts_lost": lost,
-            "total_pnl": round(total_pnl, 2),
-            "win_rate": round(win_rate, 4),
-            "profit_factor": round(profit_factor, 3),
-            "avg_rr_achieved": round(avg_rr, 3),
-            # v19.34.305 — expose the realized mean + sample size under the field
-            # names the TQS card-detail / drill-down read, so the displayed EV,
-            # avg_r and n all come from this one artifact-free recompute.
-            "avg_r": round(avg_rr, 4),
-            "sample_size": trig,
-            "total_trades": trig,
-            "r_outcomes": [round(x, 4) for x in r_out],
-            "avg_win_r": round(avg_win_r, 4),
-            "avg_loss_r": round(avg_loss_r, 4),
-            "expected_value_r": round(ev, 4),
-            "genuine_only": genuine_only,
-            "last_updated": datetime.now(timezone.utc).isoformat(),
-            "recomputed_by": "pnl_compute_v19_34_249",
-        }
-        _AO_DB["strategy_stats"].update_one(
-            {"setup_type": base}, {"$set": doc}, upsert=True,
-        )
+        for _attempt in range(_FOLD_CAS_ATTEMPTS):
+            seen = (_AO_DB[_STATS_AGG_COLLECTION].find_one({"setup_type": base})
+                    if genuine_only else None)
+            agg = _accumulate_stats(_setup_rows(_AO_DB, base), genuine_only)
+            doc = _strategy_stats_doc(base, agg, genuine_only, "pnl_compute_v19_34_249")
+            if not genuine_only:
+                _write_strategy_stats(_AO_DB, base, doc, None)
+                return doc
+            seq = _seed_stats_agg(_AO_DB, base, agg, seen)
+            if seq is not None:
+                _write_strategy_stats(_AO_DB, base, doc, seq)
+                return doc
+        # Closes keep folding in; the aggregate (and the card) stay theirs.
         return doc
     except Exception as e:
         logger.debug("[v19.34.249 strategy_stats] recompute failed for %s: %s", base, e)
         return None
 
 
+def _stats_ring_refill(base: str, ring: list, n_r: int) -> list:
+    """A trade leaving the last-100 ring (artifact flip / re-label) leaves a
+    gap; return the next-older qualifying rows that backfill it so the ring
+    stays identical to a full recompute."""
+    need = min(_R_RING_SIZE, n_r) - len(ring)
+    if need <= 0:
+        return []
+    have = {e.get("k") for e in ring}
+    oldest = ring[0]["s"] if ring else None
+    q: Dict[str, Any] = {"setup_type": {"$regex": "^" + re.escape(base)}}
+    if oldest is not None:
+        q["closed_at"] = {"$lte": oldest.split("\x00", 1)[0]}
+    fill = []
+    for d in _AO_DB["alert_outcomes"].find(q, _STATS_ROW_PROJECTION).sort("closed_at", -1):
+        c = _stats_contribution(d)
+        if (c is None or c["base"] != base or c["r"] is None or c["key"] in have
+                or (oldest is not None and c["sort"] >= oldest)):
+            continue
+        fill.append({"k": c["key"], "s": c["sort"], "r": c["r"]})
+        if len(fill) >= need:
+            break
+    return fill
+
+
+def _fold_strategy_stats_bestEffort(prev_row: Optional[dict], new_row: dict) -> Optional[dict]:
+    """O(1) strategy_stats update for one alert_outcomes upsert: retract the
+    row's previous contribution, add the new one, swap its ring entry, then
+    re-derive the strategy_stats doc from the aggregate.
+
+    `prev_row` must be the pre-image returned by the upsert itself. The
+    aggregate changes in ONE compare-and-set write (sums `$inc`, ring `$set`,
+    filtered on the `seq` read), retried on conflict, so concurrent folds
+    for the same setup can neither double-apply nor drop a delta. A setup
+    with no aggregate yet (first close after deploy), or one that keeps
+    conflicting, is rebuilt by one full recompute instead."""
+    if _AO_DB is None:
+        return None
+    old_c = _stats_contribution(prev_row)
+    new_c = _stats_contribution(new_row)
+    if old_c == new_c:
+        return None  # idempotent re-upsert / excluded both times
+    from pymongo import ReturnDocument
+    agg_coll = _AO_DB[_STATS_AGG_COLLECTION]
+    out = None
+    for base in {c["base"] for c in (old_c, new_c) if c is not None}:
+        inc: Dict[str, float] = {}
+        if old_c is not None and old_c["base"] == base:
+            _stats_increments(old_c, -1, inc)
+        adds = new_c is not None and new_c["base"] == base
+        if adds:
+            _stats_increments(new_c, 1, inc)
+        key = (new_c or old_c)["key"]
+        agg = None
+        for _attempt in range(_FOLD_CAS_ATTEMPTS):
+            cur = agg_coll.find_one({"setup_type": base})
+            if cur is None:
+                break
+            # The ring entry mirrors the trade's row as it is NOW (read after
+            # the aggregate), not this fold's `new_row`: a later partial may
+            # already have been folded, and the last successful write must
+            # leave the latest R in the ring.
+            live = _stats_contribution(_AO_DB["alert_outcomes"].find_one(
+                {"trade_id": new_row.get("trade_id")}, _STATS_ROW_PROJECTION))
+            ring = [e for e in (cur.get("ring") or []) if e.get("k") != key]
+            if live is not None and live["base"] == base and live["r"] is not None:
+                ring.append({"k": key, "s": live["sort"], "r": live["r"]})
+            ring.sort(key=lambda e: e["s"])
+            ring = ring[-_R_RING_SIZE:]
+            n_r = int((cur.get("n_r") or 0) + inc.get("n_r", 0))
+            fill = _stats_ring_refill(base, ring, n_r)
+            if fill:
+                ring = sorted(fill + ring, key=lambda e: e["s"])[-_R_RING_SIZE:]
+            agg = agg_coll.find_one_and_update(
+                {"setup_type": base, "seq": cur.get("seq")},
+                {"$inc": {**inc, "seq": 1},
+                 "$set": {"ring": ring, "updated_at": datetime.now(timezone.utc).isoformat()}},
+                return_document=ReturnDocument.AFTER,
+            )
+            if agg is not None:
+                break
+        if agg is None:
+            out = recompute_strategy_stats_for_setup(base, genuine_only=True)
+            continue
+        doc = _strategy_stats_doc(base, agg, True, "pnl_compute_incremental")
+        _write_strategy_stats(_AO_DB, base, doc, int(agg.get("seq") or 0), folded=True)
+        if adds:
+            out = doc
+            logger.info(
+                "[strategy_stats] %s folded → EV=%.3fR win=%.0f%% (#trades=%d)",
+                base, doc["expected_value_r"], doc["win_rate"] * 100, doc["alerts_triggered"],
+            )
+    return out
+
+
+def rebuild_strategy_stats(db=None, *, tolerance: float = 1e-3) -> dict:
+    """Nightly full rebuild + verification of the incremental aggregate.
+
+    One pass over alert_outcomes (grouped by base setup in memory) recomputes
+    every family with the canonical math, compares it to the doc the
+    incremental aggregate currently yields, logs any drift, then re-seeds
+    both `strategy_stats` and `strategy_stats_agg` from the full result."""
+    global _AO_DB
+    if db is None:
+        _get_outcomes_collection()
+        db = _AO_DB
+    elif _AO_DB is None:
+        _AO_DB = db
+    rep: Dict[str, Any] = {"setups": 0, "drifted": [], "seeded": [], "skipped": []}
+    if db is None:
+        return rep
+    # Snapshot the aggregates BEFORE the scan: a seed only lands over the
+    # `seq` it was derived against (see _seed_stats_agg).
+    current = {a["setup_type"]: a for a in db[_STATS_AGG_COLLECTION].find({})}
+    groups: Dict[str, list] = {}
+    for d in db["alert_outcomes"].find({}, _STATS_ROW_PROJECTION):
+        bs = _base_setup(d.get("setup_type"))
+        if bs:
+            groups.setdefault(bs, []).append(d)
+    checked = ("alerts_triggered", "alerts_won", "alerts_lost", "total_pnl", "win_rate",
+               "profit_factor", "avg_r", "avg_win_r", "avg_loss_r", "expected_value_r")
+    for base, rows in groups.items():
+        rows.sort(key=lambda d: (str(d.get("closed_at", "")), str(d.get("_id", ""))))
+        live = current.get(base)
+        for _attempt in range(_FOLD_CAS_ATTEMPTS):
+            agg = _accumulate_stats(rows, True)
+            seq = _seed_stats_agg(db, base, agg, live)
+            if seq is not None:
+                break
+            # A close folded into `base` since the snapshot: re-read it and
+            # rescan just this family.
+            live = db[_STATS_AGG_COLLECTION].find_one({"setup_type": base})
+            rows = _setup_rows(db, base)
+        else:
+            rep["skipped"].append(base)
+            logger.warning("[strategy_stats rebuild] %s kept folding; left to the incremental path", base)
+            continue
+        full = _strategy_stats_doc(base, agg, True, "pnl_compute_nightly_rebuild")
+        if live is None:
+            rep["seeded"].append(base)
+        else:
+            inc = _strategy_stats_doc(base, live, True, "")
+            diff = {k: (inc[k], full[k]) for k in checked
+                    if abs(float(inc[k]) - float(full[k])) > tolerance}
+            if sorted(inc["r_outcomes"]) != sorted(full["r_outcomes"]):
+                diff["r_outcomes"] = (len(inc["r_outcomes"]), len(full["r_outcomes"]))
+            if diff:
+                rep["drifted"].append({"setup_type": base, "diff": diff})
+                logger.warning("[strategy_stats rebuild] %s incremental drift: %s", base, diff)
+        _write_strategy_stats(db, base, full, seq)
+        rep["setups"] += 1
+    return rep
+
+
 def _upsert_strategy_stats_bestEffort(
     trade: Any, outcome: str, r_multiple: Optional[float], net_pnl: float,
 ) -> None:
@@ -560,7 +851,10 @@ def _upsert_strategy_stats_bestEffort(
     `alert_outcomes` for the trade's setup family (the alert_outcomes row for THIS
     trade is already upserted by the caller before this runs), so scale-out
     partials can no longer inflate the counters. The `outcome`/`r_multiple`/
-    `net_pnl` args are retained for signature compatibility with the v216 caller."""
+    `net_pnl` args are retained for signature compatibility with the v216 caller.
+
+    Only used for rows without a trade_id now — keyed rows take the O(1)
+    `_fold_strategy_stats_bestEffort` path."""
     bs = _base_setup(getattr(trade, "setup_type", None))
     if not bs:
         return
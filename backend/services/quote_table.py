@@ -0,0 +1,285 @@
+"""
+Columnar L1 Quote Table + Binary Push Format
+============================================
+A preallocated NumPy table of the latest L1 quote per symbol (symbol →
+row index; bid / ask / last / close / high / low / open / volume / ts /
+pushed_at columns), plus the compact msgpack wire format the IB pusher
+can opt into via `POST /api/ib/push-data-bin`.
+
+Why?
+    `/api/ib/push-data` receives 100+ quote dicts every ~2s as JSON. Each
+    push is parsed into a pydantic model, every quote dict is mutated
+    (`pushed_at`), copied for the bar persister and fanned out to the
+    tick bus. At the open that per-push CPU is what keeps pushes in
+    flight long enough to trip the 503 backpressure gate.
+
+Wire format (`Content-Type: application/msgpack`):
+    A msgpack map with the same top-level keys as `IBPushDataRequest`
+    (timestamp, source, account, positions, level2, fundamentals, news,
+    news_providers, orders), except `quotes`, which is a single `bytes`
+    blob: a little-endian struct array of `QUOTE_WIRE_DTYPE` records,
+    one per symbol. Missing values are NaN. `schema` must equal
+    `WIRE_SCHEMA`. The server reads the blob with `np.frombuffer` (no
+    per-field parsing) and scatters it into the table column by column.
+    `encode_push()` builds a payload from the pusher's usual dict buffer.
+
+Readers:
+    `view()` returns column arrays for the resident rows (zero-copy
+    slices of the live table; treat as read-only) and `get()` a single
+    quote dict. `_pushed_ib_data["quotes"]` is still maintained in the
+    legacy dict shape for existing consumers; the binary path builds
+    those dicts from the table in one pass instead of parsing JSON.
+"""
+
+from __future__ import annotations
+
+import math
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+
+WIRE_SCHEMA = 1
+SYMBOL_BYTES = 16
+
+PRICE_FIELDS = ("bid", "ask", "last", "close", "high", "low", "open", "volume")
+
+# Record layout of the binary `quotes` blob. `ts` is the tick's epoch
+# seconds as stamped by the pusher (NaN when unknown).
+QUOTE_WIRE_DTYPE = np.dtype(
+    [("symbol", f"S{SYMBOL_BYTES}")]
+    + [(f, "<f8") for f in PRICE_FIELDS]
+    + [("ts", "<f8")]
+)
+
+COLUMNS = PRICE_FIELDS + ("ts", "pushed_at")
+DEFAULT_CAPACITY = 1024
+
+
+class QuoteDecodeError(ValueError):
+    """Raised when a binary push payload does not match the wire schema."""
+
+
+def _epoch(ts: Any) -> float:
+    if isinstance(ts, (int, float)) and not isinstance(ts, bool):
+        return float(ts)
+    if isinstance(ts, str) and ts:
+        try:
+            dt = datetime.fromisoformat(ts.replace("Z", "+00:00"))
+            return dt.timestamp()
+        except ValueError:
+            return math.nan
+    return math.nan
+
+
+def _iso(epoch: float) -> Optional[str]:
+    if math.isnan(epoch):
+        return None
+    return datetime.fromtimestamp(epoch, tz=timezone.utc).isoformat()
+
+
+# ---------------- wire format ----------------
+
+def encode_quotes(quotes: Dict[str, Dict[str, Any]]) -> bytes:
+    """Pack `{symbol: quote_dict}` into the binary `quotes` blob."""
+    rec = np.zeros(len(quotes), dtype=QUOTE_WIRE_DTYPE)
+    for i, (sym, q) in enumerate(quotes.items()):
+        rec["symbol"][i] = sym.upper().encode("ascii", "ignore")[:SYMBOL_BYTES]
+        q = q if isinstance(q, dict) else {}
+        for f in PRICE_FIELDS:
+            v = q.get(f)
+            rec[f][i] = float(v) if isinstance(v, (int, float)) and not isinstance(v, bool) else math.nan
+        rec["ts"][i] = _epoch(q.get("timestamp"))
+    return rec.tobytes()
+
+
+def encode_push(payload: Dict[str, Any]) -> bytes:
+    """msgpack body for `/api/ib/push-data-bin` from a JSON-style payload."""
+    import msgpack
+    body = {k: v for k, v in payload.items() if k != "quotes"}
+    body["schema"] = WIRE_SCHEMA
+    body["quotes"] = encode_quotes(payload.get("quotes") or {})
+    return msgpack.packb(body, use_bin_type=True)
+
+
+def decode_push(body: bytes) -> Dict[str, Any]:
+    """Inverse of `encode_push`. `quotes` comes back as a read-only
+    structured array viewing the request body (no copy)."""
+    import msgpack
+    try:
+        payload = msgpack.unpackb(body, raw=False)
+    except Exception as exc:
+        raise QuoteDecodeError(f"invalid msgpack body: {exc}") from exc
+    if not isinstance(payload, dict):
+        raise QuoteDecodeError("payload must be a map")
+    if payload.get("schema") != WIRE_SCHEMA:
+        raise QuoteDecodeError(f"unsupported schema {payload.get('schema')!r}")
+    blob = payload.get("quotes") or b""
+    if not isinstance(blob, (bytes, bytearray)) or len(blob) % QUOTE_WIRE_DTYPE.itemsize:
+        raise QuoteDecodeError("quotes blob does not match QUOTE_WIRE_DTYPE")
+    payload["quotes"] = np.frombuffer(blob, dtype=QUOTE_WIRE_DTYPE)
+    return payload
+
+
+# ---------------- the table ----------------
+
+class QuoteTable:
+    """Latest L1 quote per symbol in preallocated float64 columns.
+    Rows are assigned on first sight and never move; capacity doubles
+    when full (which invalidates previously returned views)."""
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY) -> None:
+        self._capacity = max(1, int(capacity))
+        self._cols: Dict[str, np.ndarray] = {
+            c: np.full(self._capacity, np.nan) for c in COLUMNS
+        }
+        self._index: Dict[str, int] = {}
+        self._symbols: List[str] = []
+        self._lock = threading.Lock()
+        self._ingests = 0
+        self._records = 0
+        self._last_ingest_us = 0.0
+
+    # ---------- writes --------------------------------------------------
+    def _rows_for(self, symbols: Iterable[str]) -> np.ndarray:
+        rows = []
+        for sym in symbols:
+            i = self._index.get(sym)
+            if i is None:
+                i = len(self._symbols)
+                if i >= self._capacity:
+                    self._grow()
+                self._index[sym] = i
+                self._symbols.append(sym)
+            rows.append(i)
+        return np.asarray(rows, dtype=np.intp)
+
+    def _grow(self) -> None:
+        new_cap = self._capacity * 2
+        for c, arr in self._cols.items():
+            grown = np.full(new_cap, np.nan)
+            grown[:self._capacity] = arr
+            self._cols[c] = grown
+        self._capacity = new_cap
+
+    def ingest_records(self, records: np.ndarray,
+                       pushed_at: Optional[float] = None) -> List[str]:
+        """Scatter a `QUOTE_WIRE_DTYPE` array into the table. Returns the
+        symbols written, in record order."""
+        started = time.perf_counter()
+        pushed_at = time.time() if pushed_at is None else pushed_at
+        symbols = [s.decode("ascii", "ignore").strip("\x00").upper()
+                   for s in records["symbol"].tolist()]
+        keep = [i for i, s in enumerate(symbols) if s]
+        if len(keep) != len(symbols):
+            records = records[keep]
+            symbols = [symbols[i] for i in keep]
+        with self._lock:
+            rows = self._rows_for(symbols)
+            for f in PRICE_FIELDS + ("ts",):
+                self._cols[f][rows] = records[f]
+            self._cols["pushed_at"][rows] = pushed_at
+            self._note(len(rows), started)
+        return symbols
+
+    def ingest_dicts(self, quotes: Dict[str, Dict[str, Any]],
+                     pushed_at: Optional[float] = None) -> List[str]:
+        """JSON-path equivalent of `ingest_records` for `{symbol: dict}`."""
+        started = time.perf_counter()
+        pushed_at = time.time() if pushed_at is None else pushed_at
+        symbols = [s.upper() for s, q in quotes.items() if s and isinstance(q, dict)]
+        dicts = [q for s, q in quotes.items() if s and isinstance(q, dict)]
+        if not symbols:
+            return []
+        cols = {
+            f: np.array([q.get(f) if isinstance(q.get(f), (int, float)) and not isinstance(q.get(f), bool)
+                         else math.nan for q in dicts], dtype=np.float64)
+            for f in PRICE_FIELDS
+        }
+        cols["ts"] = np.array([_epoch(q.get("timestamp")) for q in dicts])
+        with self._lock:
+            rows = self._rows_for(symbols)
+            for f, vals in cols.items():
+                self._cols[f][rows] = vals
+            self._cols["pushed_at"][rows] = pushed_at
+            self._note(len(rows), started)
+        return symbols
+
+    def _note(self, n: int, started: float) -> None:
+        self._ingests += 1
+        self._records += n
+        self._last_ingest_us = round((time.perf_counter() - started) * 1e6, 1)
+
+    # ---------- reads ---------------------------------------------------
+    def view(self, symbols: Optional[Iterable[str]] = None) -> Dict[str, np.ndarray]:
+        """Columns for every resident symbol (zero-copy slices, read-only
+        by convention) or, with `symbols`, gathered rows (NaN for unknown
+        symbols). Includes a `symbol` object array."""
+        with self._lock:
+            if symbols is None:
+                n = len(self._symbols)
+                out = {c: arr[:n] for c, arr in self._cols.items()}
+                out["symbol"] = np.array(self._symbols, dtype=object)
+                return out
+            syms = [s.upper() for s in symbols]
+            rows = np.array([self._index.get(s, -1) for s in syms], dtype=np.intp)
+            known = rows >= 0
+            out = {}
+            for c, arr in self._cols.items():
+                col = np.full(len(rows), np.nan)
+                col[known] = arr[rows[known]]
+                out[c] = col
+            out["symbol"] = np.array(syms, dtype=object)
+            return out
+
+    def get(self, symbol: str) -> Optional[Dict[str, Any]]:
+        """Latest quote for `symbol` in the legacy dict shape, or None."""
+        with self._lock:
+            i = self._index.get((symbol or "").upper())
+            if i is None:
+                return None
+            return self._row_dict(i)
+
+    def to_dicts(self, symbols: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """Legacy `{symbol: quote_dict}` (None for NaN) for `symbols`."""
+        with self._lock:
+            return {s: self._row_dict(self._index[s]) for s in symbols if s in self._index}
+
+    def _row_dict(self, i: int) -> Dict[str, Any]:
+        q: Dict[str, Any] = {"symbol": self._symbols[i]}
+        for f in PRICE_FIELDS:
+            v = float(self._cols[f][i])
+            q[f] = None if math.isnan(v) else v
+        q["timestamp"] = _iso(float(self._cols["ts"][i]))
+        q["pushed_at"] = _iso(float(self._cols["pushed_at"][i]))
+        return q
+
+    def __len__(self) -> int:
+        return len(self._symbols)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "symbols": len(self._symbols),
+                "capacity": self._capacity,
+                "ingests": self._ingests,
+                "records": self._records,
+                "last_ingest_us": self._last_ingest_us,
+            }
+
+
+# ---------------- Module-level singleton ----------------
+
+_table: Optional[QuoteTable] = None
+_singleton_lock = threading.Lock()
+
+
+def get_quote_table() -> QuoteTable:
+    """Get or create the process-wide quote table."""
+    global _table
+    with _singleton_lock:
+        if _table is None:
+            _table = QuoteTable()
+    return _table
@@ -19,6 +19,8 @@ import asyncio
 
 logger = logging.getLogger(__name__)
 
+_DAILY_BAR_PROJECTION = {"_id": 0, "date": 1, "open": 1, "high": 1, "low": 1, "close": 1, "volume": 1}
+
 
 @dataclass
 class TechnicalSnapshot:
@@ -137,10 +139,25 @@ class RealTimeTechnicalService:
         self._cache_ttl = 120  # 2 minute cache for technical data
         self._spy_change_pct: float = 0.0  # Cached SPY daily % change
         self._spy_cache_time: Optional[datetime] = None
+        self._bar_store = None  # services.bar_store.BarStore (None = Mongo only)
+        self._indicator_state = None  # services.incremental_indicators registry
+        self._liquidity_table = None  # services.liquidity_table (TOD volume profile)
     
     def set_db(self, db):
         """Set MongoDB connection for historical data access"""
         self._db = db
+
+    def set_bar_store(self, store):
+        """Attach the in-process bar store (read-through cache over Mongo)"""
+        self._bar_store = store
+
+    def set_indicator_state(self, registry):
+        """Attach the incremental (O(1)-per-bar) indicator state registry"""
+        self._indicator_state = registry
+
+    def set_liquidity_table(self, table):
+        """Attach the session liquidity table (per-symbol RVOL volume profile)"""
+        self._liquidity_table = table
     
     def _get_intraday_bars_from_db(self, symbol: str, bar_size: str = "5 mins", limit: int = 78) -> Optional[List[Dict]]:
         """Get recent intraday bars from ib_historical_data (same source as training).
@@ -149,23 +166,66 @@ class RealTimeTechnicalService:
         if self._db is None:
             return None
         try:
-            pipeline = [
-                {"$match": {"symbol": symbol.upper(), "bar_size": bar_size}},
-                {"$sort": {"date": -1}},
-                {"$limit": limit},
-                {"$project": {"_id": 0, "date": 1, "open": 1, "high": 1, "low": 1, "close": 1, "volume": 1, "collected_at": 1}},
-            ]
-            bars = list(self._db["ib_historical_data"].aggregate(pipeline, allowDiskUse=True))
-            if bars and len(bars) >= 5:
-                bars.reverse()  # Chronological order (oldest first)
-                # Rename 'date' to 'timestamp' for compatibility with indicator calculations
-                for bar in bars:
-                    bar['timestamp'] = bar.pop('date', None)
-                return bars
+            bars = list(self._db["ib_historical_data"].aggregate(
+                self._intraday_pipeline(symbol, bar_size, limit), allowDiskUse=True))
+            return self._chronological(bars, 5)
+        except Exception as e:
+            logger.debug(f"Error fetching intraday bars for {symbol}: {e}")
+        return None
+
+    @staticmethod
+    def _intraday_pipeline(symbol: str, bar_size: str, limit: int) -> List[Dict]:
+        return [
+            {"$match": {"symbol": symbol.upper(), "bar_size": bar_size}},
+            {"$sort": {"date": -1}},
+            {"$limit": limit},
+            {"$project": {"_id": 0, "date": 1, "open": 1, "high": 1, "low": 1, "close": 1, "volume": 1, "collected_at": 1}},
+        ]
+
+    @staticmethod
+    def _chronological(bars: Optional[List[Dict]], min_bars: int) -> Optional[List[Dict]]:
+        """Newest-first Mongo rows → oldest-first bars keyed by 'timestamp'
+        (the indicator calculations' field), or None below `min_bars`."""
+        if bars and len(bars) >= min_bars:
+            bars.reverse()
+            for bar in bars:
+                bar['timestamp'] = bar.pop('date', None)
+            return bars
+        return None
+
+    async def _intraday_bars_from_db(self, symbol: str, bar_size: str, limit: int) -> Optional[List[Dict]]:
+        """`_get_intraday_bars_from_db` on the pooled Motor repo when it
+        mirrors `self._db`, else in a worker thread."""
+        from services.async_mongo import get_async_repo
+        repo = get_async_repo()
+        if repo is None or not repo.serves(self._db):
+            return await asyncio.to_thread(self._get_intraday_bars_from_db, symbol, bar_size, limit)
+        try:
+            bars = await repo["ib_historical_data"].aggregate(
+                self._intraday_pipeline(symbol, bar_size, limit), allowDiskUse=True,
+            ).to_list(None)
+            return self._chronological(bars, 5)
         except Exception as e:
             logger.debug(f"Error fetching intraday bars for {symbol}: {e}")
         return None
 
+    async def _daily_bars_from_db(self, symbol: str, limit: int) -> Optional[List[Dict]]:
+        """`_get_daily_bars_from_db` on the pooled Motor repo when it
+        mirrors `self._db`, else in a worker thread."""
+        from services.async_mongo import get_async_repo
+        repo = get_async_repo()
+        if repo is None or not repo.serves(self._db):
+            return await asyncio.to_thread(self._get_daily_bars_from_db, symbol, limit)
+        try:
+            bars = await repo["ib_historical_data"].find_list(
+                {"symbol": symbol.upper(), "bar_size": "1 day"}, _DAILY_BAR_PROJECTION,
+                sort=[("date", -1)], limit=limit,
+            )
+            return self._chronological(bars, 10)
+        except Exception as e:
+            logger.debug(f"Error fetching daily bars for {symbol}: {e}")
+        return None
+
     async def _get_live_intraday_bars(
         self, symbol: str, bar_size: str = "5 mins"
     ) -> Optional[List[Dict]]:
@@ -318,6 +378,38 @@ class RealTimeTechnicalService:
         except Exception:
             return True  # Error parsing = treat as stale
     
+    async def _get_intraday_bars(self, symbol: str, bar_size: str = "5 mins", limit: int = 78) -> Optional[List[Dict]]:
+        """Store-first read of the trailing intraday window.
+
+        Serves from the in-process bar store (services/bar_store.py) with
+        zero Mongo I/O; on a miss falls back to `_get_intraday_bars_from_db`
+        and seeds the store so the next cycle is a hit. Same contract as the
+        Mongo path: chronological bars, None when fewer than 5."""
+        store = self._bar_store
+        cap = store.capacity_for(bar_size) if store is not None else None
+        if cap is not None and cap >= limit:
+            bars = store.get_bars(symbol, bar_size, limit)
+            if bars is not None:
+                return bars if len(bars) >= 5 else None
+        bars = await self._intraday_bars_from_db(symbol, bar_size, limit)
+        if bars and cap is not None and cap >= limit:
+            store.load(symbol, bar_size, bars)
+        return bars
+
+    async def _get_daily_bars(self, symbol: str, limit: int = 50) -> Optional[List[Dict]]:
+        """Store-first read of the trailing daily window. Same contract as
+        `_get_daily_bars_from_db`: chronological bars, None when fewer than 10."""
+        store = self._bar_store
+        cap = store.capacity_for("1 day") if store is not None else None
+        if cap is not None and cap >= limit:
+            bars = store.get_bars(symbol, "1 day", limit)
+            if bars is not None:
+                return bars if len(bars) >= 10 else None
+        bars = await self._daily_bars_from_db(symbol, limit)
+        if bars and cap is not None and cap >= limit:
+            store.load(symbol, "1 day", bars)
+        return bars
+
     def _get_daily_bars_from_db(self, symbol: str, limit: int = 50) -> Optional[List[Dict]]:
         """Get daily bars from ib_historical_data (fast, no API call).
         NOTE: This is a sync function called from async context.
@@ -326,17 +418,9 @@ class RealTimeTechnicalService:
             return None
         try:
             bars = list(self._db["ib_historical_data"].find(
-                {"symbol": symbol.upper(), "bar_size": "1 day"},
-                {"_id": 0, "date": 1, "open": 1, "high": 1, "low": 1, "close": 1, "volume": 1}
+                {"symbol": symbol.upper(), "bar_size": "1 day"}, _DAILY_BAR_PROJECTION,
             ).sort("date", -1).limit(limit))
-            
-            if bars and len(bars) >= 10:
-                # Reverse to chronological order (oldest first)
-                bars.reverse()
-                # Rename 'date' to 'timestamp' for compatibility
-                for bar in bars:
-                    bar['timestamp'] = bar.pop('date', None)
-                return bars
+            return self._chronological(bars, 10)
         except Exception as e:
             logger.debug(f"Error fetching daily bars for {symbol}: {e}")
         return None
@@ -387,13 +471,16 @@ class RealTimeTechnicalService:
         except Exception:
             return None
 
-    def _rth_time_fraction(self, today_bar: Optional[Dict] = None) -> float:
+    def _rth_time_fraction(self, today_bar: Optional[Dict] = None,
+                           symbol: Optional[str] = None) -> float:
         """v19.34.290 F1 — fraction of the RTH session elapsed (0..1], used to
         de-bias intraday RVOL. Returns 1.0 (NO de-bias) before the open, after the
         close, on error, OR when the 'today' daily bar is not actually today's ET
         session — so a COMPLETE prior-day volume is never scaled up into a false
         high RVOL (guards the F7 stale-today-bar case). Mirrors
-        ib_data_provider.calculate_rvol."""
+        ib_data_provider.calculate_rvol. With a liquidity table attached and a
+        `symbol`, the fraction is the symbol's 20-session time-of-day volume
+        curve instead of linear minutes/390."""
         try:
             from zoneinfo import ZoneInfo
             now_et = datetime.now(ZoneInfo("America/New_York"))
@@ -408,6 +495,10 @@ class RealTimeTechnicalService:
             if now_et < market_open or now_et >= market_close:
                 return 1.0
             minutes_since_open = (now_et - market_open).total_seconds() / 60.0
+            if self._liquidity_table is not None and symbol:
+                frac = self._liquidity_table.volume_fraction(symbol, minutes_since_open)
+                if frac is not None:
+                    return frac
             return max(min(minutes_since_open / 390.0, 1.0), 1.0 / 390.0)
         except Exception:
             return 1.0
@@ -526,129 +617,174 @@ class RealTimeTechnicalService:
         # 120s TTL stale; other callers (e.g. bar-poll over 1000s of symbols)
         # keep the default TTL to avoid a re-fetch storm.
         effective_ttl = max_age_sec if max_age_sec is not None else self._cache_ttl
-        if not force_refresh and symbol in self._cache:
-            cached = self._cache[symbol]
-            cache_age = (datetime.now(timezone.utc) - datetime.fromisoformat(cached.timestamp.replace('Z', '+00:00'))).total_seconds()
-            if cache_age < effective_ttl:
+        if not force_refresh:
+            cached = self._get_cached_snapshot(symbol, effective_ttl)
+            if cached is not None:
                 return cached
         
         try:
-            # Get intraday bars (5-min) from MongoDB — same source as training
-            intraday_bars = await asyncio.to_thread(self._get_intraday_bars_from_db, symbol, "5 mins", 78)
-
-            # Live-bar overlay (Feb-2026): when the IB pusher RPC is up, we
-            # prefer the freshest 5-min bars from `live_bar_cache` /
-            # pusher RPC. Pusher bars OVERWRITE matching Mongo timestamps
-            # and any newer bars are appended on top. This keeps the indicator
-            # warm-up (200-period EMA, 14-RSI etc.) intact while making sure
-            # the trailing edge of the series is real-time, not stale.
-            #
-            # 2026-04-30 v19.1 — caller can opt out via `mongo_only=True`
-            # (used by bar_poll_service to avoid pusher RPC bombardment).
-            if mongo_only:
-                intraday_source = "mongo_only_caller_request"
-            else:
-                live_bars = await self._get_live_intraday_bars(symbol, "5 mins")
-                intraday_bars, intraday_source = self._merge_live_into_history(
-                    intraday_bars, live_bars
-                )
-
-            # Staleness check: skip symbol if intraday data is too old
-            # BUT: if IB Pusher has a live quote, bars are fine for indicator calc
-            ib_quote = self._get_ib_quote(symbol)
-            ib_pusher_live = ib_quote and ib_quote.get("price", 0) > 0
-
-            if not ib_pusher_live and not allow_stale_price and self._check_staleness(intraday_bars):
-                logger.debug(f"Stale or missing intraday data for {symbol}, no live IB quote — skipping")
-                intraday_bars = None  # Will use fallback estimates
-                intraday_source = "mongo_only"
-            
-            # Get daily bars for ATR, average volume, daily levels from MongoDB
-            daily_bars = await asyncio.to_thread(self._get_daily_bars_from_db, symbol, 50)
-            
-            # Get current quote - IB Pusher ONLY (no stale MongoDB fallback)
-            if ib_pusher_live:
-                quote = ib_quote
-            elif allow_stale_price:
-                # v397/v398 — TQS SCORING path only. With no live pusher quote we
-                # would otherwise return None and default the whole 25% Technical
-                # pillar (rsi 50 / rvol 1.0 / levels 50 / neutral trend) for ~45%
-                # of alerts (diag v397). For QUALITY SCORING (not a live trade
-                # trigger) the latest stored bar is good enough — compute from
-                # Mongo bars instead. The scanner/auto-exec paths do NOT pass this
-                # flag and keep their fail-closed (return None) behaviour.
-                stale_price = 0.0
-                if intraday_bars:
-                    stale_price = intraday_bars[-1].get("close", 0) or 0.0
-                if stale_price <= 0 and daily_bars:
-                    stale_price = daily_bars[-1].get("close", 0) or 0.0
-                if stale_price <= 0:
-                    return None
-                quote = {"price": stale_price, "stale": True}
-            else:
-                # No live IB data = no scan. Scanner requires real-time prices.
-                return None
-            
-            if not quote or not daily_bars:
-                # v19.34.288 F3 (hybrid-C): a missing daily history for a
-                # universe symbol is a DATA-PIPELINE GAP — never paper over it
-                # with fabricated levels. Fail closed (skip this cycle, no
-                # alert) AND flag the gap so smart-backfill prioritizes healing
-                # it. Only flag the genuine daily-gap case (live price present).
-                if quote and not daily_bars:
-                    self._flag_daily_data_gap(symbol)
-                logger.warning(f"Insufficient data for {symbol}")
-                return None
-            
-            current_price = quote.get("price", 0)
-            if current_price <= 0:
+            inputs = await self._load_snapshot_inputs(
+                symbol, mongo_only=mongo_only, allow_stale_price=allow_stale_price,
+            )
+            if inputs is None:
                 return None
-            
-            # Calculate all indicators
+
+            # Calculate all indicators. With the incremental state attached,
+            # the bar-loop indicators are read from running per-symbol state
+            # (O(1) after a bar close) instead of recomputed over the window.
             spy_change = await self._get_spy_change()
-            # v19.34.292 F5 — session-anchor: drop prior-session bars so VWAP /
-            # short EMAs / HOD-LOD reflect ONLY the current session (the 78-bar
-            # by-recency window could otherwise blend yesterday into 'today').
-            intraday_bars = self._filter_current_session(intraday_bars)
+            precomputed = None
+            if self._indicator_state is not None:
+                precomputed = self._indicator_state.precomputed(
+                    symbol, inputs["intraday_bars"], inputs["daily_bars"],
+                )
             snapshot = self._calculate_snapshot(
                 symbol=symbol,
-                current_price=current_price,
-                intraday_bars=intraday_bars,
-                daily_bars=daily_bars,
-                quote=quote,
-                spy_change_pct=spy_change
+                current_price=inputs["current_price"],
+                intraday_bars=inputs["intraday_bars"],
+                daily_bars=inputs["daily_bars"],
+                quote=inputs["quote"],
+                spy_change_pct=spy_change,
+                precomputed=precomputed,
             )
-            # Stamp which data path produced the intraday bars so callers
-            # (e.g. the LiveAlertCard UI) can prove freshness at a glance.
-            snapshot.data_source = intraday_source
-
-            # v19.34.289 F2 — minute-level intraday freshness gate. A live quote
-            # only proves PRICE is fresh; the mongo intraday bars feeding
-            # VWAP/RSI/EMA can be stale if the collectors stalled. During RTH, if
-            # the trailing bar was COLLECTED longer than
-            # SCANNER_INTRADAY_MAX_BAR_AGE_MIN ago, flag the snapshot stale so the
-            # auto-exec gate blocks it (info-only). collected_at is UTC (tz-safe);
-            # a fresh live-overlay bar has no collected_at → treated as fresh.
-            try:
-                import os as _os
-                from services.live_bar_cache import classify_market_state
-                age_min = self._intraday_collected_age_min(intraday_bars)
-                snapshot.intraday_bar_age_min = age_min
-                _max_age = float(_os.environ.get("SCANNER_INTRADAY_MAX_BAR_AGE_MIN", "15"))
-                if (age_min is not None and age_min > _max_age
-                        and classify_market_state() == "rth"):
-                    snapshot.intraday_stale = True
-            except Exception:
-                pass
-
-            # Cache the result
-            self._cache[symbol] = snapshot
-
-            return snapshot
+            return self._finalize_snapshot(snapshot, inputs)
             
         except Exception as e:
             logger.error(f"Error calculating technicals for {symbol}: {e}")
             return None
+
+    def _get_cached_snapshot(self, symbol: str, ttl: float) -> Optional[TechnicalSnapshot]:
+        """Return the cached snapshot for `symbol` if younger than `ttl` seconds."""
+        cached = self._cache.get(symbol)
+        if cached is None:
+            return None
+        cache_age = (datetime.now(timezone.utc) - datetime.fromisoformat(cached.timestamp.replace('Z', '+00:00'))).total_seconds()
+        return cached if cache_age < ttl else None
+
+    async def _load_snapshot_inputs(
+        self, symbol: str, *, mongo_only: bool = False,
+        allow_stale_price: bool = False,
+    ) -> Optional[Dict[str, Any]]:
+        """Gather everything `_calculate_snapshot` needs for one symbol:
+        session-filtered intraday bars, daily bars, the quote and its price.
+        Returns None when the symbol must be skipped this cycle (no live
+        price, missing daily history). Shared by the single-symbol and batch
+        snapshot paths so both apply identical data gates."""
+        # Get intraday bars (5-min) — in-process bar store first, then
+        # MongoDB (same source as training) on a miss.
+        intraday_bars = await self._get_intraday_bars(symbol, "5 mins", 78)
+
+        # Live-bar overlay (Feb-2026): when the IB pusher RPC is up, we
+        # prefer the freshest 5-min bars from `live_bar_cache` /
+        # pusher RPC. Pusher bars OVERWRITE matching Mongo timestamps
+        # and any newer bars are appended on top. This keeps the indicator
+        # warm-up (200-period EMA, 14-RSI etc.) intact while making sure
+        # the trailing edge of the series is real-time, not stale.
+        #
+        # 2026-04-30 v19.1 — caller can opt out via `mongo_only=True`
+        # (used by bar_poll_service to avoid pusher RPC bombardment).
+        if mongo_only:
+            intraday_source = "mongo_only_caller_request"
+        else:
+            live_bars = await self._get_live_intraday_bars(symbol, "5 mins")
+            intraday_bars, intraday_source = self._merge_live_into_history(
+                intraday_bars, live_bars
+            )
+
+        # Staleness check: skip symbol if intraday data is too old
+        # BUT: if IB Pusher has a live quote, bars are fine for indicator calc
+        ib_quote = self._get_ib_quote(symbol)
+        ib_pusher_live = ib_quote and ib_quote.get("price", 0) > 0
+
+        if not ib_pusher_live and not allow_stale_price and self._check_staleness(intraday_bars):
+            logger.debug(f"Stale or missing intraday data for {symbol}, no live IB quote — skipping")
+            intraday_bars = None  # Will use fallback estimates
+            intraday_source = "mongo_only"
+        
+        # Get daily bars for ATR, average volume, daily levels (bar store
+        # first, MongoDB on a miss)
+        daily_bars = await self._get_daily_bars(symbol, 50)
+        
+        # Get current quote - IB Pusher ONLY (no stale MongoDB fallback)
+        if ib_pusher_live:
+            quote = ib_quote
+        elif allow_stale_price:
+            # v397/v398 — TQS SCORING path only. With no live pusher quote we
+            # would otherwise return None and default the whole 25% Technical
+            # pillar (rsi 50 / rvol 1.0 / levels 50 / neutral trend) for ~45%
+            # of alerts (diag v397). For QUALITY SCORING (not a live trade
+            # trigger) the latest stored bar is good enough — compute from
+            # Mongo bars instead. The scanner/auto-exec paths do NOT pass this
+            # flag and keep their fail-closed (return None) behaviour.
+            stale_price = 0.0
+            if intraday_bars:
+                stale_price = intraday_bars[-1].get("close", 0) or 0.0
+            if stale_price <= 0 and daily_bars:
+                stale_price = daily_bars[-1].get("close", 0) or 0.0
+            if stale_price <= 0:
+                return None
+            quote = {"price": stale_price, "stale": True}
+        else:
+            # No live IB data = no scan. Scanner requires real-time prices.
+            return None
+        
+        if not quote or not daily_bars:
+            # v19.34.288 F3 (hybrid-C): a missing daily history for a
+            # universe symbol is a DATA-PIPELINE GAP — never paper over it
+            # with fabricated levels. Fail closed (skip this cycle, no
+            # alert) AND flag the gap so smart-backfill prioritizes healing
+            # it. Only flag the genuine daily-gap case (live price present).
+            if quote and not daily_bars:
+                self._flag_daily_data_gap(symbol)
+            logger.warning(f"Insufficient data for {symbol}")
+            return None
+        
+        current_price = quote.get("price", 0)
+        if current_price <= 0:
+            return None
+        
+        # v19.34.292 F5 — session-anchor: drop prior-session bars so VWAP /
+        # short EMAs / HOD-LOD reflect ONLY the current session (the 78-bar
+        # by-recency window could otherwise blend yesterday into 'today').
+        intraday_bars = self._filter_current_session(intraday_bars)
+        return {
+            "intraday_bars": intraday_bars,
+            "daily_bars": daily_bars,
+            "quote": quote,
+            "current_price": current_price,
+            "intraday_source": intraday_source,
+        }
+
+    def _finalize_snapshot(self, snapshot: TechnicalSnapshot, inputs: Dict[str, Any]) -> TechnicalSnapshot:
+        """Stamp data-source / freshness onto a computed snapshot and cache it."""
+        intraday_bars = inputs["intraday_bars"]
+        # Stamp which data path produced the intraday bars so callers
+        # (e.g. the LiveAlertCard UI) can prove freshness at a glance.
+        snapshot.data_source = inputs["intraday_source"]
+
+        # v19.34.289 F2 — minute-level intraday freshness gate. A live quote
+        # only proves PRICE is fresh; the mongo intraday bars feeding
+        # VWAP/RSI/EMA can be stale if the collectors stalled. During RTH, if
+        # the trailing bar was COLLECTED longer than
+        # SCANNER_INTRADAY_MAX_BAR_AGE_MIN ago, flag the snapshot stale so the
+        # auto-exec gate blocks it (info-only). collected_at is UTC (tz-safe);
+        # a fresh live-overlay bar has no collected_at → treated as fresh.
+        try:
+            import os as _os
+            from services.live_bar_cache import classify_market_state
+            age_min = self._intraday_collected_age_min(intraday_bars)
+            snapshot.intraday_bar_age_min = age_min
+            _max_age = float(_os.environ.get("SCANNER_INTRADAY_MAX_BAR_AGE_MIN", "15"))
+            if (age_min is not None and age_min > _max_age
+                    and classify_market_state() == "rth"):
+                snapshot.intraday_stale = True
+        except Exception:
+            pass
+
+        # Cache the result
+        self._cache[snapshot.symbol] = snapshot
+
+        return snapshot
     
     def _calculate_snapshot(
         self,
@@ -657,9 +793,16 @@ class RealTimeTechnicalService:
         intraday_bars: List[Dict],
         daily_bars: List[Dict],
         quote: Dict,
-        spy_change_pct: float = 0.0
+        spy_change_pct: float = 0.0,
+        precomputed: Optional[Dict[str, float]] = None,
     ) -> TechnicalSnapshot:
-        """Calculate all technical indicators from bar data"""
+        """Calculate all technical indicators from bar data.
+
+        `precomputed` carries indicator values already produced by the
+        vectorized batch engine (services/technical_batch.py) — any key
+        present there replaces the matching per-bar loop below; everything
+        else (levels, trend, squeeze, OR) is derived identically."""
+        pre = precomputed or {}
         
         # === DAILY DATA ANALYSIS ===
         if daily_bars:
@@ -674,8 +817,11 @@ class RealTimeTechnicalService:
             daily_volume = today["volume"]
             
             # Calculate average volume (20-day)
-            volumes = [bar["volume"] for bar in daily_bars[-21:-1]] if len(daily_bars) > 21 else [bar["volume"] for bar in daily_bars[:-1]]
-            avg_volume = sum(volumes) / len(volumes) if volumes else daily_volume
+            if "avg_volume" in pre:
+                avg_volume = pre["avg_volume"]
+            else:
+                volumes = [bar["volume"] for bar in daily_bars[-21:-1]] if len(daily_bars) > 21 else [bar["volume"] for bar in daily_bars[:-1]]
+                avg_volume = sum(volumes) / len(volumes) if volumes else daily_volume
             
             # RVOL — v19.34.290 F1: time-of-day-adjusted. `daily_volume` is the
             # PARTIAL cumulative volume so far today; dividing it by a FULL-day
@@ -687,14 +833,14 @@ class RealTimeTechnicalService:
             # ib_data_provider.calculate_rvol.
             import os as _os
             if _os.environ.get("SCANNER_TOD_RVOL", "true").lower() in ("1", "true", "yes"):
-                _tf = self._rth_time_fraction(today)
+                _tf = self._rth_time_fraction(today, symbol)
             else:
                 _tf = 1.0
             _expected_vol = avg_volume * _tf
             rvol = daily_volume / _expected_vol if _expected_vol > 0 else 1.0
             
             # Calculate ATR (14-period)
-            atr = self._calculate_atr(daily_bars, 14)
+            atr = pre["atr"] if "atr" in pre else self._calculate_atr(daily_bars, 14)
             atr_percent = (atr / current_price) * 100 if current_price > 0 else 0
             
             # Gap calculation
@@ -703,8 +849,8 @@ class RealTimeTechnicalService:
             holding_gap = current_price > prev_close if gap_pct > 0 else current_price < prev_close if gap_pct < 0 else True
             
             # Calculate SMAs/EMAs from daily data
-            ema_50 = self._calculate_ema([bar["close"] for bar in daily_bars], 50)
-            sma_200 = self._calculate_sma([bar["close"] for bar in daily_bars], 200)
+            ema_50 = pre["ema_50"] if "ema_50" in pre else self._calculate_ema([bar["close"] for bar in daily_bars], 50)
+            sma_200 = pre["sma_200"] if "sma_200" in pre else self._calculate_sma([bar["close"] for bar in daily_bars], 200)
             
             # Support/Resistance from daily data
             resistance, support = self._calculate_sr_levels(daily_bars[-20:])
@@ -731,19 +877,19 @@ class RealTimeTechnicalService:
         # === INTRADAY DATA ANALYSIS ===
         if intraday_bars and len(intraday_bars) >= 5:
             # Calculate intraday VWAP
-            vwap = self._calculate_vwap(intraday_bars)
+            vwap = pre["vwap"] if "vwap" in pre else self._calculate_vwap(intraday_bars)
             
             # Calculate short-term EMAs from intraday data
             closes = [bar["close"] for bar in intraday_bars]
-            ema_9 = self._calculate_ema(closes, 9)
-            ema_20 = self._calculate_ema(closes, 20)
+            ema_9 = pre["ema_9"] if "ema_9" in pre else self._calculate_ema(closes, 9)
+            ema_20 = pre["ema_20"] if "ema_20" in pre else self._calculate_ema(closes, 20)
             
             # Calculate RSI from intraday closes
-            rsi_14 = self._calculate_rsi(closes, 14)
+            rsi_14 = pre["rsi_14"] if "rsi_14" in pre else self._calculate_rsi(closes, 14)
             
             # Update high/low of day if intraday data is more recent
-            intraday_high = max(bar["high"] for bar in intraday_bars)
-            intraday_low = min(bar["low"] for bar in intraday_bars)
+            intraday_high = pre["intraday_high"] if "intraday_high" in pre else max(bar["high"] for bar in intraday_bars)
+            intraday_low = pre["intraday_low"] if "intraday_low" in pre else min(bar["low"] for bar in intraday_bars)
             high_of_day = max(high_of_day, intraday_high)
             low_of_day = min(low_of_day, intraday_low)
             
@@ -756,15 +902,15 @@ class RealTimeTechnicalService:
             # fabrication. RSI needs >=15 closes; if we have fewer, fall back to
             # a REAL daily RSI rather than the old hardcoded 50.
             closes = [bar["close"] for bar in intraday_bars]
-            vwap = self._calculate_vwap(intraday_bars)
-            ema_9 = self._calculate_ema(closes, 9)
-            ema_20 = self._calculate_ema(closes, 20)
+            vwap = pre["vwap"] if "vwap" in pre else self._calculate_vwap(intraday_bars)
+            ema_9 = pre["ema_9"] if "ema_9" in pre else self._calculate_ema(closes, 9)
+            ema_20 = pre["ema_20"] if "ema_20" in pre else self._calculate_ema(closes, 20)
             if len(closes) >= 15:
-                rsi_14 = self._calculate_rsi(closes, 14)
+                rsi_14 = pre["rsi_14"] if "rsi_14" in pre else self._calculate_rsi(closes, 14)
             else:
-                rsi_14 = self._calculate_rsi([bar["close"] for bar in daily_bars], 14)
-            intraday_high = max(bar["high"] for bar in intraday_bars)
-            intraday_low = min(bar["low"] for bar in intraday_bars)
+                rsi_14 = pre["rsi_14_daily"] if "rsi_14_daily" in pre else self._calculate_rsi([bar["close"] for bar in daily_bars], 14)
+            intraday_high = pre["intraday_high"] if "intraday_high" in pre else max(bar["high"] for bar in intraday_bars)
+            intraday_low = pre["intraday_low"] if "intraday_low" in pre else min(bar["low"] for bar in intraday_bars)
             high_of_day = max(high_of_day, intraday_high)
             low_of_day = min(low_of_day, intraday_low)
             data_quality = "warming"
@@ -780,7 +926,7 @@ class RealTimeTechnicalService:
             vwap = open_price if open_price > 0 else prev_close
             ema_9 = prev_close
             ema_20 = prev_close
-            rsi_14 = self._calculate_rsi([bar["close"] for bar in daily_bars], 14)
+            rsi_14 = pre["rsi_14_daily"] if "rsi_14_daily" in pre else self._calculate_rsi([bar["close"] for bar in daily_bars], 14)
             data_quality = "proxy"
             bars_used = 0
         
@@ -850,8 +996,8 @@ class RealTimeTechnicalService:
         
         # === BOLLINGER BANDS (20-period, 2 std dev) from daily closes ===
         daily_closes = [bar["close"] for bar in daily_bars] if daily_bars else [current_price]
-        bb_middle = self._calculate_sma(daily_closes, 20)
-        bb_std = self._calculate_std(daily_closes, 20)
+        bb_middle = pre["bb_middle"] if "bb_middle" in pre else self._calculate_sma(daily_closes, 20)
+        bb_std = pre["bb_std"] if "bb_std" in pre else self._calculate_std(daily_closes, 20)
         bb_upper = bb_middle + (2 * bb_std)
         bb_lower = bb_middle - (2 * bb_std)
         bb_width = ((bb_upper - bb_lower) / bb_middle * 100) if bb_middle > 0 else 0
@@ -1069,19 +1215,80 @@ class RealTimeTechnicalService:
     ) -> Dict[str, TechnicalSnapshot]:
         """Get technical snapshots for multiple symbols.
 
+        Indicators for every uncached symbol are computed together by the
+        vectorized batch engine (services/technical_batch.py) instead of one
+        symbol at a time. `TECHNICALS_BATCH_ENGINE=false` (env) restores the
+        sequential per-symbol path.
+
         Args:
             mongo_only: forwarded to ``get_technical_snapshot`` — see
                 that docstring for rationale (avoids pusher RPC bombardment
                 from the v18 bar poll service).
         """
-        results = {}
+        import os as _os
+        if _os.environ.get("TECHNICALS_BATCH_ENGINE", "true").lower() not in ("1", "true", "yes"):
+            results = {}
+            for symbol in symbols:
+                snapshot = await self.get_technical_snapshot(
+                    symbol, mongo_only=mongo_only,
+                )
+                if snapshot:
+                    results[symbol] = snapshot
+            return results
+
+        from utils.ticker_validator import is_valid_ticker
+        from services.technical_batch import compute_batch_indicators
 
+        # Phase 1 — per-symbol cache check + data gates (bar reads are
+        # bar-store hits on the scan path). Phase 2 — every indicator for
+        # all surviving symbols in one vectorized pass. Phase 3 — cheap
+        # per-symbol assembly (levels / trend / squeeze) + cache stamp.
+        results: Dict[str, TechnicalSnapshot] = {}
+        pending: List[Tuple[str, str, Dict[str, Any]]] = []
         for symbol in symbols:
-            snapshot = await self.get_technical_snapshot(
-                symbol, mongo_only=mongo_only,
+            sym = symbol.upper()
+            if not is_valid_ticker(sym):
+                continue
+            cached = self._get_cached_snapshot(sym, self._cache_ttl)
+            if cached is not None:
+                results[symbol] = cached
+                continue
+            try:
+                inputs = await self._load_snapshot_inputs(sym, mongo_only=mongo_only)
+            except Exception as e:
+                logger.error(f"Error calculating technicals for {sym}: {e}")
+                continue
+            if inputs is not None:
+                pending.append((symbol, sym, inputs))
+
+        if not pending:
+            return results
+
+        spy_change = await self._get_spy_change()
+        try:
+            indicators = compute_batch_indicators(
+                [p[2]["intraday_bars"] for p in pending],
+                [p[2]["daily_bars"] for p in pending],
             )
-            if snapshot:
-                results[symbol] = snapshot
+        except Exception as e:
+            # Fall back to the per-bar loops rather than dropping the batch.
+            logger.warning(f"Batch indicator pass failed, using scalar path: {e}")
+            indicators = [None] * len(pending)
+
+        for (key, sym, inputs), pre in zip(pending, indicators):
+            try:
+                snapshot = self._calculate_snapshot(
+                    symbol=sym,
+                    current_price=inputs["current_price"],
+                    intraday_bars=inputs["intraday_bars"],
+                    daily_bars=inputs["daily_bars"],
+                    quote=inputs["quote"],
+                    spy_change_pct=spy_change,
+                    precomputed=pre,
+                )
+                results[key] = self._finalize_snapshot(snapshot, inputs)
+            except Exception as e:
+                logger.error(f"Error calculating technicals for {sym}: {e}")
 
         return results
     
@@ -1225,4 +1432,19 @@ def get_technical_service() -> RealTimeTechnicalService:
             logger.info("RealTimeTechnicalService initialized with ib_historical_data")
         except Exception as e:
             logger.warning(f"Could not inject database into technical service: {e}")
+        try:
+            from services.bar_store import get_bar_store
+            _technical_service.set_bar_store(get_bar_store())
+        except Exception as e:
+            logger.warning(f"Could not attach bar store to technical service: {e}")
+        try:
+            from services.incremental_indicators import get_incremental_indicators
+            _technical_service.set_indicator_state(get_incremental_indicators())
+        except Exception as e:
+            logger.warning(f"Could not attach incremental indicators to technical service: {e}")
+        try:
+            from services.liquidity_table import get_liquidity_table
+            _technical_service.set_liquidity_table(get_liquidity_table())
+        except Exception as e:
+            logger.warning(f"Could not attach liquidity table to technical service: {e}")
     return _technical_service
@@ -0,0 +1,216 @@
+"""
+Shared-Memory Bar Blocks
+========================
+Ships many bar series to `ProcessPoolExecutor` workers as one
+`multiprocessing.shared_memory` segment instead of pickled dict lists.
+
+Why?
+    Handing `List[Dict]` bars to a pool pickles every dict on the way in
+    and unpickles it in the worker — for a market-wide run that is
+    millions of small objects serialized per shard, often costing more
+    than the simulation itself.
+
+Layout
+    One segment per block: a float64 matrix `(len(columns), total_rows)`
+    followed by a fixed-width unicode timestamp array. Series are laid
+    end to end; `meta["offsets"][key] = (start, stop)` locates each. Only
+    `meta` (a small dict) crosses the process boundary.
+
+    `SharedArray` is the same idea for one plain ndarray — e.g. an output
+    matrix the parent preallocates and workers fill in place.
+
+Lifecycle
+    The creating process owns the segment: build it with
+    `SharedBarBlock.create(...)`, submit `block.meta`, and `close()` it
+    (which also unlinks) once every worker using it has returned.
+    Workers `attach(meta)`, read views, and `close()` their handle.
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+from multiprocessing import resource_tracker, shared_memory
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+def _shares_creator_tracker() -> bool:
+    """True when this process already talks to a resource tracker — on
+    POSIX every `multiprocessing` child (fork, spawn and forkserver alike)
+    inherits the parent's tracker fd, so its registrations are the
+    creator's."""
+    tracker = getattr(resource_tracker, "_resource_tracker", None)
+    return getattr(tracker, "_fd", None) is not None
+
+
+def _attach_segment(meta: Dict[str, Any]) -> shared_memory.SharedMemory:
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=meta["name"], track=False)
+    if meta.get("pid") == os.getpid() or _shares_creator_tracker():
+        # Same tracker as the creator: the attach re-registers the name
+        # (a no-op) and unregistering would drop the creator's entry.
+        return shared_memory.SharedMemory(name=meta["name"])
+    # An unrelated process starts its own tracker on attach, which would
+    # unlink the segment (and warn) when this process exits; the creator
+    # owns cleanup.
+    shm = shared_memory.SharedMemory(name=meta["name"])
+    try:
+        resource_tracker.unregister(shm._name, "shared_memory")
+    except Exception:
+        pass
+    return shm
+
+
+def _release(shm: Optional[shared_memory.SharedMemory], owner: bool) -> None:
+    if shm is None:
+        return
+    try:
+        shm.close()
+    except BufferError:
+        pass  # a caller still holds a view; the mapping goes with it
+    if owner:
+        try:
+            shm.unlink()
+        except FileNotFoundError:
+            pass
+
+
+def _ts_width(timestamps) -> int:
+    if isinstance(timestamps, np.ndarray) and timestamps.dtype.kind == "U":
+        return timestamps.dtype.itemsize // 4
+    return max(len(t) for t in timestamps)
+
+
+def shm_free_bytes() -> Optional[int]:
+    """Free bytes on the tmpfs backing POSIX shared memory (None if unknown).
+    Containers often mount a small /dev/shm; writing past it is a SIGBUS."""
+    try:
+        st = os.statvfs("/dev/shm")
+    except OSError:
+        return None
+    return st.f_bavail * st.f_frsize
+
+
+class SharedBarBlock:
+    """Columnar bar series in one shared-memory segment."""
+
+    def __init__(self, shm: shared_memory.SharedMemory, meta: Dict, owner: bool) -> None:
+        self._shm: Optional[shared_memory.SharedMemory] = shm
+        self.meta = meta
+        self._owner = owner
+        n_cols, total = len(meta["columns"]), meta["total"]
+        self._matrix = np.ndarray((n_cols, total), dtype=np.float64, buffer=shm.buf)
+        self._timestamps = np.ndarray(
+            (total,), dtype=f"<U{meta['ts_width']}", buffer=shm.buf, offset=self._matrix.nbytes)
+        self._col_index = {c: i for i, c in enumerate(meta["columns"])}
+
+    # ---------- construction -------------------------------------------
+    @classmethod
+    def create(cls, series: Iterable[Tuple[str, Sequence[str], Dict[str, np.ndarray]]],
+               columns: Sequence[str]) -> "SharedBarBlock":
+        """Pack `(key, timestamps, {column: float array})` triples."""
+        series = list(series)
+        offsets: Dict[str, Tuple[int, int]] = {}
+        total = 0
+        ts_width = 1
+        for key, timestamps, _cols in series:
+            offsets[key] = (total, total + len(timestamps))
+            total += len(timestamps)
+            if len(timestamps):
+                ts_width = max(ts_width, _ts_width(timestamps))
+        meta = {"name": None, "columns": list(columns), "total": total,
+                "ts_width": ts_width, "offsets": offsets}
+        size = cls.nbytes(len(columns), total, ts_width)
+        shm = shared_memory.SharedMemory(create=True, size=max(size, 1))
+        meta["name"] = shm.name
+        meta["pid"] = os.getpid()
+        block = cls(shm, meta, owner=True)
+        for key, timestamps, cols in series:
+            start, stop = offsets[key]
+            for c in columns:
+                block._matrix[block._col_index[c], start:stop] = cols[c]
+            block._timestamps[start:stop] = timestamps
+        return block
+
+    @staticmethod
+    def nbytes(n_columns: int, total: int, ts_width: int) -> int:
+        return 8 * n_columns * total + 4 * ts_width * total
+
+    @classmethod
+    def attach(cls, meta: Dict) -> "SharedBarBlock":
+        """Open an existing block in a worker process."""
+        return cls(_attach_segment(meta), meta, owner=False)
+
+    # ---------- reads ---------------------------------------------------
+    def keys(self) -> List[str]:
+        return list(self.meta["offsets"])
+
+    def columns(self, key: str, start: int = 0, stop: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """Zero-copy column views for series `key` (optionally sliced)."""
+        s0, s1 = self.meta["offsets"][key]
+        stop = s1 - s0 if stop is None else stop
+        return {c: self._matrix[i, s0 + start:s0 + stop] for c, i in self._col_index.items()}
+
+    def series(self, key: str) -> Tuple[np.ndarray, np.ndarray, int, int]:
+        """`(matrix, timestamps, start, stop)`: the whole block's column-major
+        matrix and timestamp array (zero-copy) plus series `key`'s bounds."""
+        s0, s1 = self.meta["offsets"][key]
+        return self._matrix, self._timestamps, s0, s1
+
+    def timestamps(self, key: str, start: int = 0, stop: Optional[int] = None) -> List[str]:
+        s0, s1 = self.meta["offsets"][key]
+        stop = s1 - s0 if stop is None else stop
+        return self._timestamps[s0 + start:s0 + stop].tolist()
+
+    # ---------- lifecycle -----------------------------------------------
+    def close(self) -> None:
+        """Release this handle; the creating process also unlinks."""
+        shm, self._shm = self._shm, None
+        if shm is None:
+            return
+        self._matrix = self._timestamps = None
+        _release(shm, self._owner)
+
+    def __enter__(self) -> "SharedBarBlock":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class SharedArray:
+    """One ndarray in its own shared-memory segment."""
+
+    def __init__(self, shm: shared_memory.SharedMemory, meta: Dict, owner: bool) -> None:
+        self._shm: Optional[shared_memory.SharedMemory] = shm
+        self.meta = meta
+        self._owner = owner
+        self.array: Optional[np.ndarray] = np.ndarray(
+            tuple(meta["shape"]), dtype=np.dtype(meta["dtype"]), buffer=shm.buf)
+
+    @classmethod
+    def create(cls, shape: Sequence[int], dtype=np.float32) -> "SharedArray":
+        """Uninitialised (zero-filled by the OS) array of `shape`."""
+        dtype = np.dtype(dtype)
+        size = int(np.prod(shape)) * dtype.itemsize
+        shm = shared_memory.SharedMemory(create=True, size=max(size, 1))
+        meta = {"name": shm.name, "pid": os.getpid(), "shape": list(shape), "dtype": dtype.str}
+        return cls(shm, meta, owner=True)
+
+    @classmethod
+    def attach(cls, meta: Dict) -> "SharedArray":
+        return cls(_attach_segment(meta), meta, owner=False)
+
+    def close(self) -> None:
+        """Release this handle; the creating process also unlinks."""
+        shm, self._shm = self._shm, None
+        self.array = None
+        _release(shm, self._owner)
+
+    def __enter__(self) -> "SharedArray":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
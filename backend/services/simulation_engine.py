@@ -598,10 +598,12 @@ class HistoricalSimulationEngine:
                 # Cache the data to unified collection
                 if bars and self._db is not None:
                     from datetime import timezone as tz
+                    from services import bar_catalog
+                    catalog_keys, inserted = [], []
                     for bar in bars:
                         timestamp = bar.get("timestamp", "")
                         date_str = timestamp[:10] if isinstance(timestamp, str) else timestamp.strftime("%Y-%m-%d")
-                        self._db["ib_historical_data"].update_one(
+                        res = self._db["ib_historical_data"].update_one(
                             {"symbol": symbol, "bar_size": "1 day", "date": date_str},
                             {"$set": {
                                 "symbol": symbol,
@@ -617,6 +619,10 @@ class HistoricalSimulationEngine:
                             }},
                             upsert=True
                         )
+                        if res.upserted_id is not None:
+                            inserted.append(len(catalog_keys))
+                        catalog_keys.append((symbol, "1 day", date_str))
+                    bar_catalog.record_writes(self._db, catalog_keys, inserted)
                 
                 return bars
                 
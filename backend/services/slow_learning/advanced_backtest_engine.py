@@ -17,7 +17,6 @@ Optimizations:
 
 import logging
 import asyncio
-import random
 import statistics
 from typing import Optional, Dict, Any, List, Tuple
 from datetime import datetime, timezone, timedelta
@@ -26,6 +25,8 @@ from enum import Enum
 import uuid
 import math
 
+import numpy as np
+
 logger = logging.getLogger(__name__)
 
 
@@ -132,6 +133,219 @@ def _fill_pending_entry(pending, bar_open, timestamp, symbol, strategy, exec_cfg
     )
 
 
+def _close_trade(trade, exit_price, exit_reason, timestamp, exec_cfg):
+    """Stamp exit fields, P&L (net of v320b round-trip commission) and
+    R-multiple onto `trade` in place."""
+    trade.exit_price = exit_price
+    trade.exit_date = timestamp[:10]
+    trade.exit_time = timestamp[11:19] if len(timestamp) > 10 else ""
+    trade.exit_reason = exit_reason
+
+    if trade.direction == "short":
+        trade.pnl = (trade.entry_price - exit_price) * trade.shares
+        trade.pnl_percent = (trade.entry_price / exit_price - 1) * 100 if exit_price > 0 else 0
+    else:
+        trade.pnl = (exit_price - trade.entry_price) * trade.shares
+        trade.pnl_percent = (exit_price / trade.entry_price - 1) * 100 if trade.entry_price > 0 else 0
+
+    # v320b: round-trip commission (entry + exit)
+    _comm = _commission(trade.shares, exec_cfg) * 2.0
+    if _comm > 0:
+        trade.commission = _comm
+        trade.pnl -= _comm
+
+    risk = abs(trade.entry_price - trade.stop_price)
+    if risk > 0:
+        trade.r_multiple = trade.pnl / (risk * trade.shares)
+    return trade
+
+
+def _tag_market_wide_trades(trades, bar_size, use_mtf, htf_trend):
+    """Market-wide trade dicts tagged with timeframe info."""
+    trade_dicts = [t.to_dict() if hasattr(t, 'to_dict') else t for t in trades]
+    for td in trade_dicts:
+        td["bar_size"] = bar_size
+        td["multi_timeframe"] = use_mtf
+        if use_mtf and htf_trend:
+            td["htf_trend"] = htf_trend
+    return trade_dicts
+
+
+def _vector_kernel_enabled() -> bool:
+    """BT_VECTOR_KERNEL=0 -> legacy per-bar `_simulate_strategy` loop."""
+    return str(os.environ.get("BT_VECTOR_KERNEL", "1")).strip().lower() not in ("0", "false", "off", "no")
+
+
+def _streak_distribution(streaks) -> Dict[str, float]:
+    """min / max / avg / median of per-simulation max streak lengths."""
+    return {
+        "min": int(np.min(streaks)),
+        "max": int(np.max(streaks)),
+        "avg": float(np.mean(streaks)),
+        "median": float(np.median(streaks)),
+    }
+
+
+def _simulate_vectorized(engine, symbol, bars, strategy, starting_capital, htf_trend=None, arrays=None):
+    """Array-kernel twin of the `_simulate_strategy` bar loop.
+
+    Entry signals come from a whole-series mask (or, when the engine's
+    `_check_entry_signal` is overridden/patched, from calling it on flat
+    bars exactly as the loop would). Fill / stop / target prices depend
+    only on the signal bar, so exits are resolved for every candidate
+    entry at once; the sequential pass just hops signal → exit → next
+    signal, sizing from running capital. MFE/MAE and the equity curve
+    are filled in from the taken segments afterwards. Results match the
+    loop bar-for-bar, v320b costs included.
+
+    `arrays` (a `backtest_kernel.BarArrays`) may be passed instead of
+    `bars` — pool workers build it straight from shared memory."""
+    from bisect import bisect_left
+
+    from services.slow_learning import backtest_kernel as bk
+
+    trades: List[BacktestTrade] = []
+    a = arrays if arrays is not None else bk.bar_arrays(bars)
+    n = a.n
+    if n == 0:
+        return trades, []
+    exec_cfg = _bt_cost_cfg()
+    bps = exec_cfg["slippage_bps"]
+    next_bar = exec_cfg["next_bar_fills"]
+    ts = a.timestamps
+    close = a.close.tolist()
+    is_short = strategy.setup_type.lower().startswith("short_")
+    direction = "short" if is_short else "long"
+    stop_mult = (1 + strategy.stop_pct / 100) if is_short else (1 - strategy.stop_pct / 100)
+    target_mult = (1 - strategy.target_pct / 100) if is_short else (1 + strategy.target_pct / 100)
+
+    def plan(ks):
+        """(exit bar, reason code) per candidate signal bar in `ks`."""
+        if next_bar:
+            entry = a.open[ks + 1]
+            if bps > 0:
+                slipped = entry * ((1 - bps / 10000.0) if is_short else (1 + bps / 10000.0))
+                entry = np.where(entry > 0, slipped, entry)
+        else:
+            entry = a.close[ks]
+        return bk.resolve_exits(a, ks + 1, entry * stop_mult, entry * target_mult,
+                                is_short, strategy.max_bars_to_hold)
+
+    check = getattr(engine, "_check_entry_signal", None)
+    if getattr(check, "__func__", None) is AdvancedBacktestEngine._check_entry_signal:
+        mask, known = bk.entry_signal_mask(a, strategy.setup_type)
+        if not known:
+            engine._warn_unknown_setup(strategy)
+        mask[n - 1] = False  # no bar left to fill / exit on
+        sig = np.flatnonzero(mask)
+        exit_all, reason_all = plan(sig)
+        sig_l, exit_l, reason_l = sig.tolist(), exit_all.tolist(), reason_all.tolist()
+
+        def next_signal(start):
+            p = bisect_left(sig_l, start)
+            if p == len(sig_l):
+                return None
+            return sig_l[p], exit_l[p], reason_l[p]
+    else:
+        def next_signal(start):
+            for k in range(start, n - 1):
+                if check(bars[k], strategy, bars[:k + 1]):
+                    ex, rc = plan(np.array([k], dtype=np.intp))
+                    return k, int(ex[0]), int(rc[0])
+            return None
+
+    capital = starting_capital
+    cap_at = np.full(n, -1, dtype=np.intp)  # index into cap_vals where capital changes
+    cap_at[0] = 0
+    cap_vals = [starting_capital]
+    taken_start, taken_end, taken_cap = [], [], []
+
+    i = 0
+    entries_allowed = htf_trend != "bearish"  # No longs in downtrends
+    while entries_allowed:
+        hop = next_signal(i)
+        if hop is None:
+            break
+        k, j, rc = hop
+        position_value = capital * (strategy.position_size_pct / 100)
+        if next_bar:
+            # v320b: fill at NEXT bar's open
+            trade = _fill_pending_entry(
+                {"direction": direction, "position_value": position_value},
+                float(a.open[k + 1]), ts[k + 1], symbol, strategy, exec_cfg,
+            )
+            if trade is None:
+                i = k + 1
+                continue
+        else:
+            price = close[k]
+            shares = int(position_value / price)
+            if shares <= 0:
+                i = k + 1
+                continue
+            trade = BacktestTrade(
+                id=f"t_{uuid.uuid4().hex[:8]}",
+                symbol=symbol,
+                strategy_name=strategy.name,
+                setup_type=strategy.setup_type,
+                direction=direction,
+                entry_date=ts[k][:10],
+                entry_time=ts[k][11:19] if len(ts[k]) > 10 else "",
+                entry_price=price,
+                shares=shares,
+                stop_price=price * stop_mult,
+                target_price=price * target_mult,
+                bars_held=0,
+            )
+        start = k + 1
+        trade.bars_held = j - start + 1
+
+        reason = bk.EXIT_REASONS[rc]
+        gap_open = float(a.open[j]) if exec_cfg["enabled"] else 0.0
+        if rc == bk.STOP:
+            exit_price = _slip(_stop_fill(trade.stop_price, gap_open, is_short), is_buy=is_short, bps=bps)
+        elif rc == bk.TARGET:
+            exit_price = _target_fill(trade.target_price, gap_open, is_short)
+        else:
+            exit_price = _slip(close[j], is_buy=is_short, bps=bps)
+        taken_start.append(start)
+        taken_end.append(j)
+        taken_cap.append(capital)
+        _close_trade(trade, exit_price, reason, ts[j], exec_cfg)
+        trades.append(trade)
+        capital += trade.pnl
+        if j + 1 < n:
+            cap_at[j + 1] = len(cap_vals)
+            cap_vals.append(capital)
+        i = j + 1
+
+    # Equity: running capital when flat, capital + unrealized while in a trade.
+    np.maximum.accumulate(cap_at, out=cap_at)
+    equity = np.asarray(cap_vals, dtype=np.float64)[cap_at]
+    if trades:
+        entry = np.array([t.entry_price for t in trades])
+        shares = np.array([t.shares for t in trades], dtype=np.float64)
+        hi, lo = bk.segment_extremes(a.close, taken_start, taken_end)
+        if is_short:
+            best, worst = (entry - lo) * shares, (entry - hi) * shares
+        else:
+            best, worst = (hi - entry) * shares, (lo - entry) * shares
+        for t, b, w in zip(trades, best.tolist(), worst.tolist()):
+            t.max_favorable_excursion = max(0.0, b)
+            t.max_adverse_excursion = min(0.0, w)
+        lengths = np.asarray(taken_end) - np.asarray(taken_start) + 1
+        owner = np.repeat(np.arange(len(trades)), lengths)
+        pos = np.concatenate([np.arange(s, e + 1) for s, e in zip(taken_start, taken_end)])
+        px = a.close[pos]
+        unrealized = (entry[owner] - px) * shares[owner] if is_short else (px - entry[owner]) * shares[owner]
+        equity[pos] = np.asarray(taken_cap, dtype=np.float64)[owner] + unrealized
+    equity_curve = [
+        {"timestamp": t, "equity": e, "price": p}
+        for t, e, p in zip(ts, equity.tolist(), close)
+    ]
+    return trades, equity_curve
+
+
 # ============================================================================
 # Data Classes
 # ============================================================================
@@ -225,6 +439,7 @@ class MonteCarloConfig:
     # gives a real P&L distribution. Drawdowns still vary from order too.
     bootstrap: bool = True
     bootstrap_sample_size: Optional[int] = None  # None => same as len(trades)
+    seed: Optional[int] = None  # fixed RNG seed for reproducible runs
 
     def to_dict(self) -> Dict:
         return asdict(self)
@@ -714,7 +929,8 @@ class AdvancedBacktestEngine:
         wf_config: WalkForwardConfig = None,
         total_days: int = 365,
         end_date: str = None,
-        job_id: str = None
+        job_id: str = None,
+        workers: Optional[int] = None
     ) -> WalkForwardResult:
         """
         Run walk-forward optimization to test strategy robustness.
@@ -732,6 +948,8 @@ class AdvancedBacktestEngine:
             total_days: Total days of data to use
             end_date: End date (defaults to today)
             job_id: Optional job ID for progress tracking
+            workers: Worker processes for parallel fold simulation (default
+                BT_PARALLEL_WORKERS; <= 1 runs serially). See backtest_pool.
             
         Returns:
             WalkForwardResult with robustness analysis
@@ -777,41 +995,53 @@ class AdvancedBacktestEngine:
         all_in_sample_trades = []
         all_out_sample_trades = []
         
+        # Fold boundaries (in bar indices); each fold rolls forward step_days
+        folds = []
         current_start = 0
-        
         for period_num in range(num_periods):
-            # Update progress
-            if job_id:
-                self._update_job_progress(
-                    job_id,
-                    (period_num / num_periods) * 100,
-                    f"Walk-forward period {period_num + 1}/{num_periods}..."
-                )
-            
-            # Calculate period boundaries (in bar indices)
             in_sample_end = current_start + wf_config.in_sample_days
             out_sample_end = in_sample_end + wf_config.out_of_sample_days
-            
             if out_sample_end > len(all_bars):
                 break
-                
+            folds.append((period_num, current_start, in_sample_end, out_sample_end))
+            current_start += wf_config.step_days
+
+        fold_trades = {}
+        from services.slow_learning import backtest_pool
+        n_workers = backtest_pool.pool_workers(workers)
+        if (n_workers > 1 and len(folds) > 1 and self._entry_checks_vectorizable()
+                and _vector_kernel_enabled()):
+            fold_trades = await self._walk_forward_parallel(
+                symbol, all_bars, folds, strategy, n_workers, job_id)
+
+        for period_num, current_start, in_sample_end, out_sample_end in folds:
             # Split bars
             in_sample_bars = all_bars[current_start:in_sample_end]
             out_sample_bars = all_bars[in_sample_end:out_sample_end]
-            
-            # Run strategy on in-sample
-            in_trades, _ = await self._simulate_strategy(
-                symbol, in_sample_bars, strategy, 100000
-            )
-            
-            # Run strategy on out-of-sample
-            out_trades, _ = await self._simulate_strategy(
-                symbol, out_sample_bars, strategy, 100000
-            )
+
+            if period_num in fold_trades:
+                in_trades, out_trades = fold_trades[period_num]
+            else:
+                # Update progress
+                if job_id:
+                    self._update_job_progress(
+                        job_id,
+                        (period_num / num_periods) * 100,
+                        f"Walk-forward period {period_num + 1}/{num_periods}..."
+                    )
+
+                # Run strategy on in-sample
+                in_trades, _ = await self._simulate_strategy(
+                    symbol, in_sample_bars, strategy, 100000
+                )
+
+                # Run strategy on out-of-sample
+                out_trades, _ = await self._simulate_strategy(
+                    symbol, out_sample_bars, strategy, 100000
+                )
             
             # Skip periods with too few trades
             if len(in_trades) < wf_config.min_trades_per_period:
-                current_start += wf_config.step_days
                 continue
             
             all_in_sample_trades.extend(in_trades)
@@ -835,9 +1065,6 @@ class AdvancedBacktestEngine:
                 "out_sample_pnl": sum(t.pnl for t in out_trades)
             }
             periods.append(period_data)
-            
-            # Move to next period
-            current_start += wf_config.step_days
         
         result.periods = periods
         
@@ -876,6 +1103,62 @@ class AdvancedBacktestEngine:
         
         return result
 
+    async def _walk_forward_parallel(
+        self,
+        symbol: str,
+        all_bars: List[Dict],
+        folds: List[Tuple[int, int, int, int]],
+        strategy: StrategyConfig,
+        n_workers: int,
+        job_id: str = None
+    ) -> Dict[int, Tuple[List[BacktestTrade], List[BacktestTrade]]]:
+        """Simulate walk-forward folds on a process pool.
+
+        The series is shipped once as a shared-memory block; folds are
+        split into contiguous shards and each finished shard reports into
+        `_update_job_progress`. Returns {period_num: (in_trades,
+        out_trades)}; folds whose shard failed are absent, and the caller
+        simulates those in-process."""
+        from concurrent.futures import ProcessPoolExecutor
+        from services.slow_learning import backtest_pool
+
+        n_shards = min(len(folds), n_workers * 2)
+        per = -(-len(folds) // n_shards)
+        shards = [folds[i:i + per] for i in range(0, len(folds), per)]
+        env = backtest_pool.cost_env()
+        loop = asyncio.get_running_loop()
+        fold_trades: Dict[int, Tuple[List[BacktestTrade], List[BacktestTrade]]] = {}
+        done = 0
+
+        async def _run(shard):
+            nonlocal done
+            try:
+                rows = await loop.run_in_executor(
+                    pool, backtest_pool.walk_forward_shard, block.meta, symbol, shard, strategy, env)
+            except Exception as e:
+                logger.warning(f"Walk-forward shard failed ({e}), simulating in-process")
+                return
+            for period_num, in_rows, out_rows in rows:
+                fold_trades[period_num] = (
+                    [BacktestTrade(**d) for d in in_rows],
+                    [BacktestTrade(**d) for d in out_rows],
+                )
+            done += len(shard)
+            if job_id:
+                self._update_job_progress(
+                    job_id, (done / len(folds)) * 100,
+                    f"Walk-forward folds {done}/{len(folds)} ({n_workers} workers)"
+                )
+
+        block = backtest_pool.pack_series([(symbol, all_bars)])
+        pool = ProcessPoolExecutor(max_workers=n_workers)
+        try:
+            await asyncio.gather(*(_run(shard) for shard in shards))
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
+            block.close()
+        return fold_trades
+
     # ========================================================================
     # Monte Carlo Simulation
     # ========================================================================
@@ -939,108 +1222,45 @@ class AdvancedBacktestEngine:
             max_dd = max(max_dd, dd)
         result.original_max_drawdown = max_dd
         
-        # Run simulations
-        pnl_results = []
-        drawdown_results = []
-        win_streak_results = []
-        lose_streak_results = []
-        
-        for sim_num in range(mc_config.num_simulations):
-            # Update progress periodically
-            if job_id and sim_num % 1000 == 0:
+        from services.slow_learning import monte_carlo_kernel as mc_kernel
+
+        # Run simulations — one resample matrix per chunk of simulations
+        # (see monte_carlo_kernel for the loop semantics it reproduces).
+        def _progress(done: int) -> None:
+            if job_id:
                 self._update_job_progress(
                     job_id,
-                    (sim_num / mc_config.num_simulations) * 100,
-                    f"Running simulation {sim_num + 1}/{mc_config.num_simulations}..."
+                    (done / mc_config.num_simulations) * 100,
+                    f"Ran {done}/{mc_config.num_simulations} simulations..."
                 )
 
-            # Build the trade sequence for this simulation
-            if mc_config.bootstrap:
-                # Bootstrap: sample with replacement — produces a REAL distribution
-                # of P&L outcomes (simulates "a different run of N trades from the
-                # same underlying edge"). Without this, total P&L is deterministic
-                # and every percentile collapses to the same value.
-                sample_size = mc_config.bootstrap_sample_size or len(trades)
-                sim_trades = [random.choice(trades) for _ in range(sample_size)]
-                # Make fresh copies so randomize_trade_size mutations don't leak
-                # back into the original trade list.
-                sim_trades = [BacktestTrade(**{**t.__dict__}) for t in sim_trades]
-            else:
-                # Legacy shuffle-only behavior (note: pnl_distribution will be
-                # degenerate unless randomize_trade_size is enabled).
-                sim_trades = trades.copy()
-                if mc_config.randomize_trade_order:
-                    random.shuffle(sim_trades)
-
-            # Optionally randomize trade sizes
-            if mc_config.randomize_trade_size:
-                variation = mc_config.size_variation_pct / 100
-                for t in sim_trades:
-                    factor = 1 + random.uniform(-variation, variation)
-                    t.pnl *= factor
-            
-            # Calculate simulation metrics
-            equity = starting_capital
-            peak = equity
-            max_dd = 0
-            current_streak = 0
-            max_win_streak = 0
-            max_lose_streak = 0
-            
-            for trade in sim_trades:
-                equity += trade.pnl
-                peak = max(peak, equity)
-                dd = (peak - equity) / peak * 100
-                max_dd = max(max_dd, dd)
-                
-                # Track streaks
-                if trade.pnl > 0:
-                    if current_streak > 0:
-                        current_streak += 1
-                    else:
-                        max_lose_streak = max(max_lose_streak, abs(current_streak))
-                        current_streak = 1
-                    max_win_streak = max(max_win_streak, current_streak)
-                else:
-                    if current_streak < 0:
-                        current_streak -= 1
-                    else:
-                        max_win_streak = max(max_win_streak, current_streak)
-                        current_streak = -1
-                    max_lose_streak = max(max_lose_streak, abs(current_streak))
-            
-            final_pnl = equity - starting_capital
-            pnl_results.append(final_pnl)
-            drawdown_results.append(max_dd)
-            win_streak_results.append(max_win_streak)
-            lose_streak_results.append(max_lose_streak)
-        
-        # Calculate distributions
-        pnl_results.sort()
-        drawdown_results.sort()
-        
+        sims = mc_kernel.simulate(
+            np.array([t.pnl for t in trades], dtype=np.float64),
+            mc_config.num_simulations,
+            starting_capital,
+            bootstrap=mc_config.bootstrap,
+            sample_size=mc_config.bootstrap_sample_size,
+            randomize_trade_order=mc_config.randomize_trade_order,
+            randomize_trade_size=mc_config.randomize_trade_size,
+            size_variation_pct=mc_config.size_variation_pct,
+            seed=mc_config.seed,
+            progress=_progress,
+        )
+        pnl_results = np.sort(sims["final_pnl"])
+        drawdown_results = np.sort(sims["max_drawdown"])
+
         result.pnl_distribution = self._calculate_percentiles(
             pnl_results, mc_config.confidence_levels
         )
         result.drawdown_distribution = self._calculate_percentiles(
             drawdown_results, mc_config.confidence_levels
         )
-        result.win_streak_distribution = {
-            "min": min(win_streak_results),
-            "max": max(win_streak_results),
-            "avg": statistics.mean(win_streak_results),
-            "median": statistics.median(win_streak_results)
-        }
-        result.lose_streak_distribution = {
-            "min": min(lose_streak_results),
-            "max": max(lose_streak_results),
-            "avg": statistics.mean(lose_streak_results),
-            "median": statistics.median(lose_streak_results)
-        }
-        
+        result.win_streak_distribution = _streak_distribution(sims["max_win_streak"])
+        result.lose_streak_distribution = _streak_distribution(sims["max_lose_streak"])
+
         # Risk metrics
-        result.probability_of_profit = len([p for p in pnl_results if p > 0]) / len(pnl_results) * 100
-        result.probability_of_ruin = len([d for d in drawdown_results if d > 50]) / len(drawdown_results) * 100
+        result.probability_of_profit = float(np.mean(pnl_results > 0)) * 100
+        result.probability_of_ruin = float(np.mean(drawdown_results > 50)) * 100
         result.expected_max_drawdown = result.drawdown_distribution.get("50", 0)
         result.worst_case_drawdown = result.drawdown_distribution.get("95", 0)
         
@@ -1066,15 +1286,16 @@ class AdvancedBacktestEngine:
         
         return result
     
-    def _calculate_percentiles(self, values: List[float], levels: List[float]) -> Dict:
-        """Calculate percentiles for a list of values"""
+    def _calculate_percentiles(self, values, levels: List[float]) -> Dict:
+        """Calculate percentiles for a sorted list / array of values"""
         result = {}
+        values = np.asarray(values, dtype=np.float64)
         n = len(values)
         for level in levels:
             idx = int(level * n)
             idx = max(0, min(idx, n - 1))
             percentile_key = str(int(level * 100))
-            result[percentile_key] = round(values[idx], 2)
+            result[percentile_key] = round(float(values[idx]), 2)
         return result
 
     # ========================================================================
@@ -1761,7 +1982,8 @@ class AdvancedBacktestEngine:
         starting_capital: float = 100000.0,
         max_symbols: int = 1500,
         use_multi_timeframe: bool = False,
-        job_id: str = None
+        job_id: str = None,
+        workers: Optional[int] = None
     ) -> Dict[str, Any]:
         """
         Run a strategy against the entire US market to find all historical trades.
@@ -1784,6 +2006,8 @@ class AdvancedBacktestEngine:
             max_symbols: Maximum symbols to scan (default 1500 for comprehensive coverage)
             use_multi_timeframe: Enable multi-timeframe analysis (higher TF trend confirmation)
             job_id: Optional job ID for progress tracking
+            workers: Worker processes for parallel simulation (default
+                BT_PARALLEL_WORKERS; <= 1 runs serially). See backtest_pool.
             
         Returns:
             Dict with all trades found, grouped by symbol, with summary stats
@@ -1840,85 +2064,151 @@ class AdvancedBacktestEngine:
         
         logger.info(f"Market-wide backtest: bar_size={normalized_bar_size}, multi_timeframe={use_mtf}")
         
-        # Process symbols in batches
-        batch_size = 25
-        for i in range(0, len(symbols), batch_size):
-            batch = symbols[i:i + batch_size]
-            
-            for symbol in batch:
+        # Per-symbol outcome, by position in `symbols`: ("trades", dicts) /
+        # ("none", None) / ("error", msg); None = skipped by the pre-filters.
+        # Merged in symbol order below so serial and parallel runs agree.
+        outcomes: List[Optional[Tuple[str, Any]]] = [None] * len(symbols)
+
+        from services.slow_learning import backtest_pool
+        n_workers = backtest_pool.pool_workers(workers)
+        parallel = n_workers > 1 and self._entry_checks_vectorizable() and _vector_kernel_enabled()
+        pool = None
+        shard_tasks = []
+        settled = 0  # symbols skipped or simulated (parallel progress)
+        if parallel:
+            from concurrent.futures import ProcessPoolExecutor
+            pool = ProcessPoolExecutor(max_workers=n_workers)
+            loop = asyncio.get_running_loop()
+            env = backtest_pool.cost_env()
+            logger.info(f"Market-wide backtest: parallel mode, {n_workers} workers")
+
+        async def _collect_shard(block, jobs, positions):
+            nonlocal settled
+            args = (jobs, strategy, starting_capital, normalized_bar_size, use_mtf)
+            try:
                 try:
-                    # Fetch primary timeframe data
-                    bars = await self._get_cached_bars(
-                        symbol=symbol,
-                        timeframe=primary_timeframe,
-                        start_date=filters.start_date,
-                        end_date=filters.end_date
-                    )
-                    
-                    if not bars or len(bars) < 10:
-                        continue
-                    
-                    # Apply price/volume filters
-                    last_price = bars[-1].get("close", 0)
-                    avg_volume = sum(b.get("volume", 0) for b in bars[-20:]) / min(20, len(bars))
-                    
-                    if last_price < min_price or last_price > max_price:
-                        continue
-                    if avg_volume < min_volume:
-                        continue
-                    
-                    # Multi-timeframe: Get higher timeframe trend
-                    htf_trend = None
-                    if use_mtf:
-                        htf_bars = await self._get_cached_bars(
+                    shard = await loop.run_in_executor(
+                        pool, backtest_pool.market_wide_shard, block.meta, *args, env)
+                except Exception as e:
+                    logger.warning(f"Backtest pool shard failed ({e}), simulating in-process")
+                    shard = backtest_pool.simulate_market_wide(block, *args)
+            finally:
+                block.close()
+            for pos, (_sym, status, payload) in zip(positions, shard):
+                outcomes[pos] = (status, payload)
+            settled += len(jobs)
+            if job_id:
+                self._update_job_progress(
+                    job_id, (settled / total_symbols) * 100,
+                    f"Simulated {settled}/{total_symbols} symbols ({n_workers} workers)"
+                )
+
+        # Process symbols in batches
+        batch_size = backtest_pool.shard_size() if parallel else 25
+        try:
+            for i in range(0, len(symbols), batch_size):
+                batch = symbols[i:i + batch_size]
+                ready = []  # (position, symbol, bars, htf_trend) for the pool
+
+                for pos, symbol in enumerate(batch, start=i):
+                    try:
+                        # Fetch primary timeframe data
+                        bars = await self._get_cached_bars(
                             symbol=symbol,
-                            timeframe=higher_timeframe,
+                            timeframe=primary_timeframe,
                             start_date=filters.start_date,
                             end_date=filters.end_date
                         )
-                        if htf_bars and len(htf_bars) >= 20:
-                            htf_trend = self._determine_trend(htf_bars)
-                    
-                    # Run strategy simulation on this symbol
-                    trades, equity_curve = await self._simulate_strategy(
-                        bars=bars,
-                        strategy=strategy,
-                        starting_capital=starting_capital,
-                        symbol=symbol,
-                        htf_trend=htf_trend if use_mtf else None
-                    )
-                    
-                    if trades:
-                        # Convert trades to dicts
-                        trade_dicts = [t.to_dict() if hasattr(t, 'to_dict') else t for t in trades]
-                        
-                        # Tag with timeframe info
-                        for td in trade_dicts:
-                            td["bar_size"] = normalized_bar_size
-                            td["multi_timeframe"] = use_mtf
-                            if use_mtf and htf_trend:
-                                td["htf_trend"] = htf_trend
-                        
-                        all_trades.extend(trade_dicts)
-                        trades_by_symbol[symbol] = trade_dicts
-                        symbols_with_trades.append(symbol)
-                    else:
-                        symbols_no_trades.append(symbol)
-                        
-                except Exception as e:
-                    errors.append(f"{symbol}: {str(e)}")
-                    logger.debug(f"Error processing {symbol}: {e}")
-                
-                processed += 1
-            
-            # Update job progress
-            if job_id and job_id in self._running_jobs:
-                job = self._running_jobs[job_id]
-                job.progress = int((processed / total_symbols) * 100)
-            
-            # Small delay between batches
-            await asyncio.sleep(0.5)
-        
+
+                        if not bars or len(bars) < 10:
+                            settled += 1
+                            continue
+
+                        # Apply price/volume filters
+                        last_price = bars[-1].get("close", 0)
+                        avg_volume = sum(b.get("volume", 0) for b in bars[-20:]) / min(20, len(bars))
+
+                        if last_price < min_price or last_price > max_price:
+                            settled += 1
+                            continue
+                        if avg_volume < min_volume:
+                            settled += 1
+                            continue
+
+                        # Multi-timeframe: Get higher timeframe trend
+                        htf_trend = None
+                        if use_mtf:
+                            htf_bars = await self._get_cached_bars(
+                                symbol=symbol,
+                                timeframe=higher_timeframe,
+                                start_date=filters.start_date,
+                                end_date=filters.end_date
+                            )
+                            if htf_bars and len(htf_bars) >= 20:
+                                htf_trend = self._determine_trend(htf_bars)
+
+                        if parallel:
+                            ready.append((pos, symbol, bars, htf_trend))
+                        else:
+                            # Run strategy simulation on this symbol
+                            trades, equity_curve = await self._simulate_strategy(
+                                bars=bars,
+                                strategy=strategy,
+                                starting_capital=starting_capital,
+                                symbol=symbol,
+                                htf_trend=htf_trend if use_mtf else None
+                            )
+                            if trades:
+                                outcomes[pos] = ("trades", _tag_market_wide_trades(
+                                    trades, normalized_bar_size, use_mtf, htf_trend))
+                            else:
+                                outcomes[pos] = ("none", None)
+
+                    except Exception as e:
+                        outcomes[pos] = ("error", str(e))
+                        settled += 1
+                        logger.debug(f"Error processing {symbol}: {e}")
+
+                    processed += 1
+
+                if parallel:
+                    # Ship this batch to the pool; its completion reports progress.
+                    if ready:
+                        block = backtest_pool.pack_series([(sym, bars) for _p, sym, bars, _h in ready])
+                        shard_tasks.append(asyncio.ensure_future(_collect_shard(
+                            block,
+                            [(sym, htf) for _p, sym, _b, htf in ready],
+                            [p for p, _s, _b, _h in ready],
+                        )))
+                    continue
+
+                # Update job progress
+                if job_id and job_id in self._running_jobs:
+                    job = self._running_jobs[job_id]
+                    job.progress = int((processed / total_symbols) * 100)
+
+                # Small delay between batches
+                await asyncio.sleep(0.5)
+
+            if shard_tasks:
+                await asyncio.gather(*shard_tasks)
+        finally:
+            if pool is not None:
+                pool.shutdown(wait=False, cancel_futures=True)
+
+        for symbol, outcome in zip(symbols, outcomes):
+            if outcome is None:
+                continue
+            status, payload = outcome
+            if status == "trades":
+                all_trades.extend(payload)
+                trades_by_symbol[symbol] = payload
+                symbols_with_trades.append(symbol)
+            elif status == "none":
+                symbols_no_trades.append(symbol)
+            else:
+                errors.append(f"{symbol}: {payload}")
+
         # Calculate summary statistics
         total_trades = len(all_trades)
         winning_trades = [t for t in all_trades if t.get("pnl", 0) > 0]
@@ -2194,6 +2484,12 @@ class AdvancedBacktestEngine:
     # Data Caching and Management
     # ========================================================================
     
+    def _entry_checks_vectorizable(self) -> bool:
+        """True unless `_check_entry_signal` is overridden/patched — pool
+        workers simulate with a fresh engine and the stock entry masks."""
+        check = getattr(self, "_check_entry_signal", None)
+        return getattr(check, "__func__", None) is AdvancedBacktestEngine._check_entry_signal
+
     def _normalize_bar_size(self, bar_size: str) -> str:
         """
         Normalize bar_size format to match IB collected data format.
@@ -2456,7 +2752,13 @@ class AdvancedBacktestEngine:
             strategy: Strategy configuration
             starting_capital: Starting capital
             htf_trend: Higher timeframe trend ('bullish', 'bearish', 'neutral') for MTF analysis
+
+        Runs on the array kernel (`_simulate_vectorized`) unless
+        BT_VECTOR_KERNEL=0, which selects the per-bar loop below.
         """
+        if _vector_kernel_enabled():
+            return _simulate_vectorized(self, symbol, bars, strategy, starting_capital, htf_trend)
+
         trades: List[BacktestTrade] = []
         equity_curve: List[Dict] = []
         exec_cfg = _bt_cost_cfg()
@@ -2547,29 +2849,7 @@ class AdvancedBacktestEngine:
                     exit_reason = "end_of_data"
                 
                 if exit_price:
-                    # Close trade
-                    current_trade.exit_price = exit_price
-                    current_trade.exit_date = timestamp[:10]
-                    current_trade.exit_time = timestamp[11:19] if len(timestamp) > 10 else ""
-                    current_trade.exit_reason = exit_reason
-                    
-                    if is_short_trade:
-                        current_trade.pnl = (current_trade.entry_price - exit_price) * current_trade.shares
-                        current_trade.pnl_percent = (current_trade.entry_price / exit_price - 1) * 100 if exit_price > 0 else 0
-                    else:
-                        current_trade.pnl = (exit_price - current_trade.entry_price) * current_trade.shares
-                        current_trade.pnl_percent = (exit_price / current_trade.entry_price - 1) * 100 if current_trade.entry_price > 0 else 0
-
-                    # v320b: round-trip commission (entry + exit)
-                    _comm = _commission(current_trade.shares, exec_cfg) * 2.0
-                    if _comm > 0:
-                        current_trade.commission = _comm
-                        current_trade.pnl -= _comm
-                    
-                    risk = abs(current_trade.entry_price - current_trade.stop_price)
-                    if risk > 0:
-                        current_trade.r_multiple = current_trade.pnl / (risk * current_trade.shares)
-                    
+                    _close_trade(current_trade, exit_price, exit_reason, timestamp, exec_cfg)
                     trades.append(current_trade)
                     capital += current_trade.pnl
                     in_position = False
@@ -2679,17 +2959,23 @@ class AdvancedBacktestEngine:
             # Unknown setup — log once (not every bar) and fall back.
             # Note: silent fallback to momentum was masking real bugs (e.g. SHORT_TREND
             # aliasing to SHORT_MOMENTUM). We now warn loudly.
-            if not getattr(self, "_warned_unknown_setups", None):
-                self._warned_unknown_setups = set()
-            warn_key = clean_type
-            if warn_key not in self._warned_unknown_setups:
-                logger.warning(
-                    f"[BACKTEST] Unknown setup type '{strategy.setup_type}' "
-                    f"(clean='{clean_type}') — no dedicated entry check, falling back to momentum. "
-                    f"This may produce misleading results. Add an explicit branch."
-                )
-                self._warned_unknown_setups.add(warn_key)
+            self._warn_unknown_setup(strategy)
             return self._check_momentum_entry(bar, recent_bars, short=is_short)
+
+    def _warn_unknown_setup(self, strategy: StrategyConfig):
+        """Log an unknown setup type once per engine."""
+        setup_type = strategy.setup_type.lower()
+        clean_type = setup_type.replace("short_", "") if setup_type.startswith("short_") else setup_type
+        if not getattr(self, "_warned_unknown_setups", None):
+            self._warned_unknown_setups = set()
+        warn_key = clean_type
+        if warn_key not in self._warned_unknown_setups:
+            logger.warning(
+                f"[BACKTEST] Unknown setup type '{strategy.setup_type}' "
+                f"(clean='{clean_type}') — no dedicated entry check, falling back to momentum. "
+                f"This may produce misleading results. Add an explicit branch."
+            )
+            self._warned_unknown_setups.add(warn_key)
     
     def _check_orb_entry(self, bar: Dict, recent_bars: List[Dict], short: bool = False) -> bool:
         """Opening Range Breakout entry"""
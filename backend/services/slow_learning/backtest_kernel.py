@@ -0,0 +1,339 @@
+"""
+Vectorized Backtest Kernel
+==========================
+Array form of the per-bar work inside `AdvancedBacktestEngine.
+_simulate_strategy`: OHLCV columns, whole-series entry-signal masks for
+every `_check_*_entry` family, and stop / target / time exit resolution
+over a slice instead of a bar loop.
+
+Why?
+    The legacy loop reads each field through `bar.get("close",
+    bar.get("c", 0))` on every bar, calls `_check_entry_signal` with a
+    fresh `bars[:i+1]` slice on every flat bar (O(n²) copying), and
+    appends one equity dict per bar as it goes. Multi-strategy and
+    market-wide runs over thousands of symbols spent minutes there.
+
+How
+    * `bar_arrays()` pulls the columns once per simulation.
+    * `entry_signal_mask()` evaluates a setup family for every bar at
+      once (rolling sums / extrema over sliding windows).
+    * `resolve_exits()` finds, for every candidate entry at once, the
+      first stop- or target-touching bar of its holding window. Fill,
+      stop and target prices depend only on the signal bar, never on
+      earlier trades, so this needs no sequential state.
+    * `segment_extremes()` gives per-trade MFE / MAE inputs.
+    The engine keeps the sequential part — hopping signal → exit → next
+    signal, position sizing from running capital, v320b fills / slippage
+    / commission — per TRADE rather than per bar, so the cost model is
+    unchanged.
+
+Parity
+    Each mask reproduces its scalar `_check_*_entry` helper exactly,
+    including warm-up lengths and zero-guards. Rolling sums add in the
+    same left-to-right order as Python's `sum()` so MA thresholds compare
+    bit-for-bit. tests/test_backtest_kernel.py runs both paths over
+    random series for every setup family.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+MIN_VOLUME = 100_000
+MIN_PRICE = 5.0
+MAX_PRICE = 500.0
+
+# clean setup type → mask family (mirrors `_check_entry_signal` dispatch)
+SETUP_FAMILIES: Dict[str, str] = {
+    "orb": "orb",
+    "vwap": "vwap",
+    "vwap_bounce": "vwap",
+    "gap_and_go": "gap",
+    "gap_fade": "gap",
+    "breakout": "breakout",
+    "breakdown": "breakout",
+    "scalp": "scalp",
+    "range": "range",
+    "mean_reversion": "mean_reversion",
+    "reversal": "reversal",
+    "trend_continuation": "trend",
+    "trend": "trend",
+    "momentum": "momentum",
+}
+
+
+@dataclass
+class BarArrays:
+    """Column view of a bar list.
+
+    `high` / `low` / `open` fall back to the close when a bar lacks them
+    (what the simulation loop reads); `sig_*` fall back to 0 (what the
+    `_check_*_entry` helpers read)."""
+    timestamps: List[str]
+    close: np.ndarray
+    open: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+    sig_open: np.ndarray
+    sig_high: np.ndarray
+    sig_low: np.ndarray
+    volume: np.ndarray
+    vwap: np.ndarray
+
+    @property
+    def n(self) -> int:
+        return len(self.timestamps)
+
+
+def _field(bars: List[Dict], key: str, alt: str, default: float) -> np.ndarray:
+    return np.fromiter(
+        (b.get(key, b.get(alt, default)) for b in bars), dtype=np.float64, count=len(bars)
+    )
+
+
+RAW_COLUMNS = ("close", "open", "high", "low", "volume", "vwap")
+
+
+def raw_columns(bars: List[Dict]) -> Dict[str, np.ndarray]:
+    """float64 columns for `bars` (NaN where a bar lacks open/high/low).
+    This is what `shared_bars` ships to pool workers."""
+    nan = np.nan
+    return {
+        "close": _field(bars, "close", "c", 0.0),
+        "open": _field(bars, "open", "o", nan),
+        "high": _field(bars, "high", "h", nan),
+        "low": _field(bars, "low", "l", nan),
+        "volume": _field(bars, "volume", "v", 0.0),
+        "vwap": np.fromiter((b.get("vwap", 0) or 0.0 for b in bars), dtype=np.float64, count=len(bars)),
+    }
+
+
+def arrays_from_columns(timestamps: List[str], cols: Dict[str, np.ndarray]) -> BarArrays:
+    """`BarArrays` from `raw_columns()` output (or slices of it)."""
+    close, open_raw, high_raw, low_raw = cols["close"], cols["open"], cols["high"], cols["low"]
+    return BarArrays(
+        timestamps=list(timestamps),
+        close=close,
+        open=np.where(np.isnan(open_raw), close, open_raw),
+        high=np.where(np.isnan(high_raw), close, high_raw),
+        low=np.where(np.isnan(low_raw), close, low_raw),
+        sig_open=np.nan_to_num(open_raw, nan=0.0),
+        sig_high=np.nan_to_num(high_raw, nan=0.0),
+        sig_low=np.nan_to_num(low_raw, nan=0.0),
+        volume=cols["volume"],
+        vwap=cols["vwap"],
+    )
+
+
+def bar_arrays(bars: List[Dict]) -> BarArrays:
+    """Extract OHLCV (+ optional vwap) columns from `bars` in one pass each."""
+    return arrays_from_columns([b.get("timestamp", "") for b in bars], raw_columns(bars))
+
+
+# ---------------- rolling helpers (index i = window ending at bar i) ----------------
+
+def _lag(x: np.ndarray, k: int) -> np.ndarray:
+    out = np.full(len(x), np.nan)
+    if k < len(x):
+        out[k:] = x[:len(x) - k]
+    return out
+
+
+def _trailing_sum(x: np.ndarray, w: int) -> np.ndarray:
+    """x[i-w+1] + ... + x[i], summed left to right like Python's sum()."""
+    n = len(x)
+    out = np.full(n, np.nan)
+    if n >= w:
+        s = x[:n - w + 1].copy()
+        for k in range(1, w):
+            s += x[k:n - w + 1 + k]
+        out[w - 1:] = s
+    return out
+
+
+def _trailing_max(x: np.ndarray, w: int) -> np.ndarray:
+    out = np.full(len(x), np.nan)
+    if len(x) >= w:
+        out[w - 1:] = sliding_window_view(x, w).max(axis=1)
+    return out
+
+
+def _trailing_min(x: np.ndarray, w: int) -> np.ndarray:
+    out = np.full(len(x), np.nan)
+    if len(x) >= w:
+        out[w - 1:] = sliding_window_view(x, w).min(axis=1)
+    return out
+
+
+# ---------------- entry-signal masks ----------------
+
+def _orb(a: BarArrays, short: bool) -> np.ndarray:
+    if short:
+        return a.sig_low < _lag(_trailing_min(a.sig_low, 2), 1) * 0.998
+    return a.sig_high > _lag(_trailing_max(a.sig_high, 2), 1) * 1.002
+
+
+def _vwap(a: BarArrays, short: bool) -> np.ndarray:
+    vwap = np.where(a.vwap != 0, a.vwap, _trailing_sum(a.close, 10) / 10)
+    dist = (a.close - vwap) / vwap
+    ok = vwap != 0
+    if short:
+        return ok & (-0.002 < dist) & (dist < 0.008) & (a.close < vwap)
+    return ok & (-0.008 < dist) & (dist < 0.002) & (a.close > vwap)
+
+
+def _gap(a: BarArrays, short: bool) -> np.ndarray:
+    prev_close = _lag(a.close, 1)
+    gap_pct = (a.sig_open - prev_close) / prev_close * 100
+    ok = prev_close != 0
+    return ok & (gap_pct <= -1.5) if short else ok & (gap_pct >= 1.5)
+
+
+def _breakout(a: BarArrays, short: bool) -> np.ndarray:
+    if short:
+        return a.sig_low < _lag(_trailing_min(a.sig_low, 19), 1)
+    return a.sig_high > _lag(_trailing_max(a.sig_high, 19), 1)
+
+
+def _scalp(a: BarArrays, short: bool) -> np.ndarray:
+    rng = a.sig_high - a.sig_low
+    avg_range = _lag(_trailing_sum(rng, 4), 1) / 4
+    avg_vol = _lag(_trailing_sum(a.volume, 4), 1) / 4
+    prev_close = _lag(a.close, 1)
+    ok = (avg_range != 0) & (avg_vol != 0) & (prev_close != 0)
+    ok &= (rng > avg_range * 1.3) & (a.volume > avg_vol * 1.2)
+    return ok & (a.close < prev_close) if short else ok & (a.close > prev_close)
+
+
+def _range(a: BarArrays, short: bool) -> np.ndarray:
+    hi = _trailing_max(a.sig_high, 20)
+    lo = _trailing_min(a.sig_low, 20)
+    size = hi - lo
+    pos = (a.close - lo) / size
+    ok = size != 0
+    return ok & (pos > 0.85) if short else ok & (pos < 0.15)
+
+
+def _mean_reversion(a: BarArrays, short: bool) -> np.ndarray:
+    ma20 = _trailing_sum(a.close, 20) / 20
+    dev = (a.close - ma20) / ma20
+    ok = ma20 != 0
+    return ok & (dev > 0.04) if short else ok & (dev < -0.04)
+
+
+def _reversal(a: BarArrays, short: bool) -> np.ndarray:
+    c8, c15 = _lag(a.close, 7), _lag(a.close, 14)
+    ma10 = _trailing_sum(a.close, 10) / 10
+    if short:
+        return (c8 > c15) & (a.sig_high < _lag(_trailing_max(a.sig_high, 7), 1)) & (a.close < ma10)
+    return (c8 < c15) & (a.sig_low > _lag(_trailing_min(a.sig_low, 7), 1)) & (a.close > ma10)
+
+
+def _trend(a: BarArrays, short: bool) -> np.ndarray:
+    ma10 = _trailing_sum(a.close, 10) / 10
+    ma20 = _trailing_sum(a.close, 20) / 20
+    ok = (ma10 != 0) & (ma20 != 0) & (np.abs(a.close - ma10) / ma10 < 0.01)
+    if short:
+        return ok & (ma10 < ma20) & (a.close < ma10)
+    return ok & (ma10 > ma20) & (a.close > ma10)
+
+
+def _momentum(a: BarArrays, short: bool) -> np.ndarray:
+    c0 = _lag(a.close, 3)
+    mom = (a.close - c0) / c0 * 100
+    ok = c0 != 0
+    return ok & (mom <= -2.0) if short else ok & (mom >= 2.0)
+
+
+# family → (mask fn, minimum len(recent_bars) the scalar helper requires)
+_FAMILIES = {
+    "orb": (_orb, 3),
+    "vwap": (_vwap, 10),
+    "gap": (_gap, 2),
+    "breakout": (_breakout, 20),
+    "scalp": (_scalp, 5),
+    "range": (_range, 20),
+    "mean_reversion": (_mean_reversion, 20),
+    "reversal": (_reversal, 15),
+    "trend": (_trend, 20),
+    "momentum": (_momentum, 5),
+}
+
+
+def entry_signal_mask(a: BarArrays, setup_type: str) -> Tuple[np.ndarray, bool]:
+    """Boolean mask of bars where `_check_entry_signal` would fire for
+    `setup_type`, plus whether the setup type is known (unknown types
+    fall back to momentum, as in the scalar dispatch)."""
+    setup = setup_type.lower()
+    short = setup.startswith("short_")
+    clean = setup.replace("short_", "") if short else setup
+    family = SETUP_FAMILIES.get(clean)
+    fn, warmup = _FAMILIES[family or "momentum"]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mask = fn(a, short)
+    mask &= np.arange(a.n) >= warmup - 1
+    mask &= (a.volume >= MIN_VOLUME) & (a.close >= MIN_PRICE) & (a.close <= MAX_PRICE)
+    return mask, family is not None
+
+
+# ---------------- exits ----------------
+
+STOP, TARGET, TIME, END_OF_DATA = 0, 1, 2, 3
+EXIT_REASONS = ("stop", "target", "time", "end_of_data")
+
+
+def resolve_exits(a: BarArrays, starts: np.ndarray, stop_prices: np.ndarray,
+                  target_prices: np.ndarray, is_short: bool, max_bars_to_hold: int,
+                  chunk: int = 64) -> Tuple[np.ndarray, np.ndarray]:
+    """Exit bar and reason code for positions whose exit checks begin at
+    `starts` (one row per candidate entry).
+
+    Stop wins over target on the same bar; a position still open after
+    `max_bars_to_hold` bars exits on TIME, and one still open at the
+    last bar on END_OF_DATA. Holding windows are scanned `chunk` bars at
+    a time as an (m, chunk) matrix so long holds don't allocate m × hold."""
+    n = a.n
+    starts = np.asarray(starts, dtype=np.intp)
+    time_j = starts + max(int(max_bars_to_hold), 1) - 1
+    end = np.minimum(time_j, n - 1)
+    exit_idx = end.copy()
+    reason = np.where(end == time_j, TIME, END_OF_DATA)
+    rows = np.arange(len(starts))
+    offset = 0
+    while len(rows):
+        idx = starts[rows, None] + offset + np.arange(chunk)
+        valid = idx <= end[rows, None]
+        idx = np.minimum(idx, n - 1)
+        lo, hi = a.low[idx], a.high[idx]
+        if is_short:
+            stop_hit = (hi >= stop_prices[rows, None]) & valid
+            target_hit = (lo <= target_prices[rows, None]) & valid
+        else:
+            stop_hit = (lo <= stop_prices[rows, None]) & valid
+            target_hit = (hi >= target_prices[rows, None]) & valid
+        hit = stop_hit | target_hit
+        done = hit.any(axis=1)
+        first = np.argmax(hit, axis=1)
+        r = rows[done]
+        exit_idx[r] = starts[r] + offset + first[done]
+        reason[r] = np.where(stop_hit[done, first[done]], STOP, TARGET)
+        offset += chunk
+        rows = rows[~done & (starts[rows] + offset <= end[rows])]
+    return exit_idx, reason
+
+
+def segment_extremes(x: np.ndarray, starts: List[int], ends: List[int]) -> Tuple[np.ndarray, np.ndarray]:
+    """max / min of x[s:e+1] for disjoint, ascending segments."""
+    if not starts:
+        return np.empty(0), np.empty(0)
+    bounds = np.empty(2 * len(starts), dtype=np.intp)
+    bounds[0::2] = starts
+    bounds[1::2] = np.asarray(ends) + 1
+    if bounds[-1] >= len(x):
+        bounds = bounds[:-1]
+    return (np.maximum.reduceat(x, bounds)[0::2],
+            np.minimum.reduceat(x, bounds)[0::2])
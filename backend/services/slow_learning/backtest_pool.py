@@ -0,0 +1,156 @@
+"""
+Backtest Process Pool
+=====================
+Parallel execution mode for `run_market_wide_backtest` and
+`run_walk_forward`: symbols (or walk-forward folds) are sharded across a
+`ProcessPoolExecutor`, with bars shipped as `shared_bars.SharedBarBlock`
+segments instead of pickled dict lists.
+
+Why?
+    Both runs loop over symbols / folds inside one asyncio task, so a
+    market-wide scan uses one core while the rest of the box idles. The
+    simulation itself (`backtest_kernel`) is CPU-bound and independent per
+    symbol and per fold.
+
+How
+    The parent keeps everything stateful or I/O-bound: bar fetching,
+    price / volume / MTF pre-filters, progress, and the final merge. Each
+    shard is a list of symbols (or folds) plus the block's small `meta`
+    dict; the worker attaches the segment, rebuilds `BarArrays` from
+    zero-copy column views and runs the same `_simulate_vectorized` the
+    serial path uses. Results are merged back in the serial order, so the
+    combined result is identical to a serial run (trade ids aside — they
+    are random uuids either way).
+
+Knobs
+    BT_PARALLEL_WORKERS   worker processes (default 0 = serial). The
+                          `workers=` argument on the run methods overrides.
+    BT_POOL_SHARD_SIZE    symbols per market-wide shard (default 25).
+    BT_* cost knobs are forwarded to workers with every shard, so a pool
+    started earlier never simulates with stale execution-cost settings.
+"""
+
+from __future__ import annotations
+
+import os
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from services.shared_bars import SharedBarBlock
+from services.slow_learning import backtest_kernel as bk
+
+COST_ENV_KEYS = (
+    "BT_COSTS", "BT_SLIPPAGE_BPS", "BT_COMMISSION_PER_SHARE",
+    "BT_COMMISSION_MIN", "BT_NEXT_BAR_FILLS", "BT_VECTOR_KERNEL",
+)
+
+
+def pool_workers(requested: Optional[int] = None) -> int:
+    """Worker count for a run; <= 1 means run serially."""
+    if requested is not None:
+        return max(0, int(requested))
+    try:
+        return max(0, int(os.environ.get("BT_PARALLEL_WORKERS", "0")))
+    except ValueError:
+        return 0
+
+
+def shard_size() -> int:
+    try:
+        return max(1, int(os.environ.get("BT_POOL_SHARD_SIZE", "25")))
+    except ValueError:
+        return 25
+
+
+def cost_env() -> Dict[str, str]:
+    """The parent's execution-cost (and kernel) knobs, forwarded to each shard."""
+    return {k: os.environ[k] for k in COST_ENV_KEYS if k in os.environ}
+
+
+def _apply_cost_env(env: Dict[str, str]) -> None:
+    for k in COST_ENV_KEYS:
+        os.environ.pop(k, None)
+    os.environ.update(env)
+
+
+def pack_series(series: Sequence[Tuple[str, List[Dict]]]) -> SharedBarBlock:
+    """Pack `(key, bars)` pairs into one shared-memory block."""
+    return SharedBarBlock.create(
+        ((key, [b.get("timestamp", "") for b in bars], bk.raw_columns(bars)) for key, bars in series),
+        bk.RAW_COLUMNS,
+    )
+
+
+# ---------------- market-wide ----------------
+
+def simulate_market_wide(block: SharedBarBlock, jobs: Sequence[Tuple[str, Optional[str]]],
+                         strategy, starting_capital: float, bar_size: str,
+                         use_mtf: bool) -> List[Tuple[str, str, object]]:
+    """Simulate `(symbol, htf_trend)` jobs on series from `block`.
+
+    Returns `(symbol, "trades" | "none" | "error", payload)` per job, in
+    job order, where payload is the tagged trade dicts or an error string."""
+    from services.slow_learning.advanced_backtest_engine import (
+        AdvancedBacktestEngine, _simulate_vectorized, _tag_market_wide_trades,
+    )
+
+    engine = AdvancedBacktestEngine()
+    out = []
+    for symbol, htf_trend in jobs:
+        try:
+            arrays = bk.arrays_from_columns(block.timestamps(symbol), block.columns(symbol))
+            trades, _curve = _simulate_vectorized(
+                engine, symbol, None, strategy, starting_capital,
+                htf_trend=htf_trend if use_mtf else None, arrays=arrays,
+            )
+            if trades:
+                out.append((symbol, "trades",
+                            _tag_market_wide_trades(trades, bar_size, use_mtf, htf_trend)))
+            else:
+                out.append((symbol, "none", None))
+        except Exception as e:
+            out.append((symbol, "error", str(e)))
+    return out
+
+
+def market_wide_shard(meta: Dict, jobs, strategy, starting_capital, bar_size, use_mtf,
+                      env: Dict[str, str]):
+    """Pool entry point for `simulate_market_wide`."""
+    _apply_cost_env(env)
+    block = SharedBarBlock.attach(meta)
+    try:
+        return simulate_market_wide(block, jobs, strategy, starting_capital, bar_size, use_mtf)
+    finally:
+        block.close()
+
+
+# ---------------- walk-forward ----------------
+
+def simulate_walk_forward(block: SharedBarBlock, symbol: str,
+                          folds: Sequence[Tuple[int, int, int, int]],
+                          strategy) -> List[Tuple[int, List[Dict], List[Dict]]]:
+    """Simulate `(period_num, start, in_end, out_end)` folds of one series.
+    Returns `(period_num, in_trades, out_trades)` with trades as dicts."""
+    from services.slow_learning.advanced_backtest_engine import (
+        AdvancedBacktestEngine, _simulate_vectorized,
+    )
+
+    engine = AdvancedBacktestEngine()
+    out = []
+    for period_num, start, in_end, out_end in folds:
+        legs = []
+        for lo, hi in ((start, in_end), (in_end, out_end)):
+            arrays = bk.arrays_from_columns(block.timestamps(symbol, lo, hi), block.columns(symbol, lo, hi))
+            trades, _curve = _simulate_vectorized(engine, symbol, None, strategy, 100000, arrays=arrays)
+            legs.append([t.to_dict() for t in trades])
+        out.append((period_num, legs[0], legs[1]))
+    return out
+
+
+def walk_forward_shard(meta: Dict, symbol: str, folds, strategy, env: Dict[str, str]):
+    """Pool entry point for `simulate_walk_forward`."""
+    _apply_cost_env(env)
+    block = SharedBarBlock.attach(meta)
+    try:
+        return simulate_walk_forward(block, symbol, folds, strategy)
+    finally:
+        block.close()
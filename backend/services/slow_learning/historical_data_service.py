@@ -16,6 +16,8 @@ from typing import Optional, Dict, Any, List
 from datetime import datetime, timezone, timedelta
 from dataclasses import dataclass, asdict
 
+from services import bar_catalog
+
 logger = logging.getLogger(__name__)
 
 
@@ -222,6 +224,7 @@ class HistoricalDataService:
         is_daily = "day" in bar_size.lower()
             
         stored = 0
+        catalog_keys, inserted = [], []
         for bar in bars:
             try:
                 timestamp = bar.get("timestamp", "")
@@ -232,7 +235,7 @@ class HistoricalDataService:
                 if IBHistoricalCollector._is_inprogress_daily_bar(bar_size, date_str):
                     continue
 
-                self._historical_bars_col.update_one(
+                res = self._historical_bars_col.update_one(
                     {
                         "symbol": symbol,
                         "bar_size": bar_size,
@@ -252,9 +255,13 @@ class HistoricalDataService:
                     }},
                     upsert=True
                 )
+                if res.upserted_id is not None:
+                    inserted.append(len(catalog_keys))
+                catalog_keys.append((symbol, bar_size, date_str))
                 stored += 1
             except Exception as e:
                 logger.warning(f"Error storing bar: {e}")
+        bar_catalog.record_writes(self._db, catalog_keys, inserted)
                 
         return stored
         
@@ -451,18 +458,20 @@ class HistoricalDataService:
             bar_size_map = {"1Day": "1 day", "1day": "1 day", "5Min": "5 mins", "5min": "5 mins", 
                             "15Min": "15 mins", "1Hour": "1 hour"}
             bar_size = bar_size_map.get(timeframe)
-        if bar_size is None:
-            # v19.34.320d — was silently defaulting to "1 day", causing
-            # minute-bar pollution of the daily collection (386k mislabels
-            # confirmed in 2026 audit). Fail loudly instead.
-            raise ValueError(
-                f"_store_bars/_update_data_stats: unmapped timeframe={timeframe!r}; "
-                f"valid keys: {sorted(bar_size_map.keys())}. "
-                f"Refusing to silently default to '1 day' (v19.34.320d guard)."
-            )
+            if bar_size is None:
+                # v19.34.320d — was silently defaulting to "1 day", causing
+                # minute-bar pollution of the daily collection (386k mislabels
+                # confirmed in 2026 audit). Fail loudly instead.
+                raise ValueError(
+                    f"_store_bars/_update_data_stats: unmapped timeframe={timeframe!r}; "
+                    f"valid keys: {sorted(bar_size_map.keys())}. "
+                    f"Refusing to silently default to '1 day' (v19.34.320d guard)."
+                )
             query["bar_size"] = bar_size
             
         result = self._historical_bars_col.delete_many(query)
+        if result.deleted_count:
+            bar_catalog.record_deletes(self._db, [(query["symbol"], query.get("bar_size"))])
         
         # Also delete stats
         if self._historical_stats_col is not None:
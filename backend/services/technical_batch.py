@@ -0,0 +1,224 @@
+"""
+Vectorized Batch Indicator Engine
+=================================
+Computes the bar-loop indicators behind `RealTimeTechnicalService.
+_calculate_snapshot` for N symbols at once from 2-D OHLCV matrices.
+
+Why?
+    `_calculate_ema` / `_calculate_rsi` / `_calculate_atr` / `_calculate_vwap`
+    / `_calculate_std` are pure-Python loops over lists of dicts, run one
+    symbol at a time. A bar-poll pass over 2,500 symbols ran 2,500 of each.
+    Here every indicator is a handful of NumPy ops over an (N, T) matrix;
+    the only Python loop left is the EMA recursion over T columns (<= 78
+    intraday / 50 daily), vectorized across all N rows.
+
+Layout:
+    Series are RIGHT-aligned: row i holds its `length[i]` bars in the last
+    columns, NaN-padded on the left, so "the trailing k bars" is always the
+    last k columns regardless of how much history each symbol has.
+
+Parity:
+    Each function reproduces the scalar helper's edge cases exactly (short
+    series fallbacks, RSI 50 / 100 sentinels, VWAP zero-volume fallback).
+    Results differ from the scalar loops only by float summation order
+    (~1e-12), far below the 2-decimal rounding applied to snapshots.
+    tests/test_technical_batch.py locks this against the scalar helpers.
+
+Usage:
+    rows = compute_batch_indicators(intraday_series, daily_series)
+    snapshot = svc._calculate_snapshot(..., precomputed=rows[i])
+"""
+
+from __future__ import annotations
+
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+OHLCV_FIELDS = ("open", "high", "low", "close", "volume")
+
+
+def pack_ohlcv(series: Sequence[Optional[Sequence[Dict]]]) -> Dict[str, np.ndarray]:
+    """Pack N chronological bar lists into right-aligned (N, T) float64
+    matrices keyed by OHLCV field, plus an int `length` vector."""
+    n = len(series)
+    lengths = np.array([len(s) if s else 0 for s in series], dtype=np.int64)
+    t = int(lengths.max()) if n else 0
+    out = {f: np.full((n, t), np.nan, dtype=np.float64) for f in OHLCV_FIELDS}
+    for i, bars in enumerate(series):
+        if not bars:
+            continue
+        off = t - len(bars)
+        for f in OHLCV_FIELDS:
+            out[f][i, off:] = [float(b.get(f) or 0) for b in bars]
+    out["length"] = lengths
+    return out
+
+
+def _tail_mask(t: int, k: np.ndarray) -> np.ndarray:
+    """(N, T) bool mask selecting the last k[i] columns of each row."""
+    cols = np.arange(t)[None, :]
+    return cols >= (t - k)[:, None]
+
+
+def tail_sma(values: np.ndarray, lengths: np.ndarray, period: int) -> np.ndarray:
+    """`_calculate_sma`: mean of the last `period` (or all, if fewer); 0 when empty."""
+    n, t = values.shape
+    k = np.minimum(lengths, period)
+    mask = _tail_mask(t, k)
+    sums = np.where(mask, values, 0.0).sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        out = np.where(k > 0, sums / np.maximum(k, 1), 0.0)
+    return out
+
+
+def tail_std(values: np.ndarray, lengths: np.ndarray, period: int) -> np.ndarray:
+    """`_calculate_std`: population std of the last `period` (or all); 0 when < 2."""
+    n, t = values.shape
+    k = np.minimum(lengths, period)
+    mask = _tail_mask(t, k)
+    mean = tail_sma(values, lengths, period)
+    dev = np.where(mask, values - mean[:, None], 0.0)
+    var = (dev * dev).sum(axis=1) / np.maximum(k, 1)
+    return np.where(lengths >= 2, np.sqrt(var), 0.0)
+
+
+def ema(values: np.ndarray, lengths: np.ndarray, period: int) -> np.ndarray:
+    """`_calculate_ema`: SMA-seeded EMA over each row; last value when the
+    row is shorter than `period`; 0 when empty."""
+    n, t = values.shape
+    out = np.zeros(n, dtype=np.float64)
+    if t == 0:
+        return out
+    has = lengths > 0
+    out[has] = values[has, -1]
+    ok = lengths >= period
+    if not ok.any():
+        return out
+    start = t - lengths
+    seed_idx = np.clip(start[:, None] + np.arange(period)[None, :], 0, t - 1)
+    seed = np.take_along_axis(values, seed_idx, axis=1).sum(axis=1) / period
+    run = np.where(ok, seed, 0.0)
+    first = start + period  # first column folded into the recursion
+    mult = 2 / (period + 1)
+    for col in range(int(first[ok].min()), t):
+        m = ok & (col >= first)
+        if m.any():
+            run[m] = (values[m, col] * mult) + (run[m] * (1 - mult))
+    out[ok] = run[ok]
+    return out
+
+
+def rsi(values: np.ndarray, lengths: np.ndarray, period: int = 14) -> np.ndarray:
+    """`_calculate_rsi`: simple-average RSI over the last `period` changes;
+    50 when fewer than period+1 prices, 100 when there are no losses."""
+    n, t = values.shape
+    out = np.full(n, 50.0)
+    ok = lengths >= period + 1
+    if not ok.any():
+        return out
+    window = values[ok, t - period - 1:]
+    change = np.diff(window, axis=1)
+    avg_gain = np.where(change > 0, change, 0.0).sum(axis=1) / period
+    avg_loss = np.where(change > 0, 0.0, -change).sum(axis=1) / period
+    with np.errstate(invalid="ignore", divide="ignore"):
+        rs = avg_gain / avg_loss
+        val = np.where(avg_loss == 0, 100.0, 100 - (100 / (1 + rs)))
+    out[ok] = val
+    return out
+
+
+def atr(high: np.ndarray, low: np.ndarray, close: np.ndarray,
+        lengths: np.ndarray, period: int = 14) -> np.ndarray:
+    """`_calculate_atr`: mean true range of the last `period` bar pairs
+    (all pairs if fewer); 0 when fewer than 2 bars."""
+    n, t = close.shape
+    if t < 2:
+        return np.zeros(n, dtype=np.float64)
+    prev_close = close[:, :-1]
+    h, l = high[:, 1:], low[:, 1:]
+    tr = np.maximum(h - l, np.maximum(np.abs(h - prev_close), np.abs(l - prev_close)))
+    n_tr = np.maximum(lengths - 1, 0)
+    k = np.minimum(n_tr, period)
+    mask = _tail_mask(t - 1, k)
+    sums = np.where(mask, tr, 0.0).sum(axis=1)
+    return np.where(k > 0, sums / np.maximum(k, 1), 0.0)
+
+
+def vwap(high: np.ndarray, low: np.ndarray, close: np.ndarray,
+         volume: np.ndarray, lengths: np.ndarray) -> np.ndarray:
+    """`_calculate_vwap`: typical-price VWAP over each row; last close when
+    volume is zero; 0 when empty."""
+    n, t = close.shape
+    out = np.zeros(n, dtype=np.float64)
+    has = lengths > 0
+    if not has.any():
+        return out
+    typical = (high + low + close) / 3
+    valid = ~np.isnan(close)
+    total_vp = np.where(valid, typical * volume, 0.0).sum(axis=1)
+    total_vol = np.where(valid, volume, 0.0).sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        vw = np.where(total_vol > 0, total_vp / total_vol, close[:, -1])
+    out[has] = vw[has]
+    return out
+
+
+def prior_avg_volume(volume: np.ndarray, lengths: np.ndarray) -> np.ndarray:
+    """20-day average volume EXCLUDING today (`daily_bars[-21:-1]`, or all
+    prior bars when there are <= 21); today's volume when there are none."""
+    n, t = volume.shape
+    out = np.zeros(n, dtype=np.float64)
+    if t == 0:
+        return out
+    k = np.where(lengths > 21, 20, np.maximum(lengths - 1, 0))
+    prior = volume[:, :-1]
+    mask = _tail_mask(t - 1, k)
+    sums = np.where(mask, prior, 0.0).sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        out = np.where(k > 0, sums / np.maximum(k, 1), volume[:, -1])
+    return np.where(lengths > 0, out, 0.0)
+
+
+def batch_indicator_arrays(intraday: Dict[str, np.ndarray],
+                           daily: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """All snapshot indicators for N symbols, one (N,) array per key.
+
+    `intraday` / `daily` are `pack_ohlcv` outputs over the same N symbols
+    (intraday already session-filtered by the caller)."""
+    il, dl = intraday["length"], daily["length"]
+    ic, dc = intraday["close"], daily["close"]
+    n = len(il)
+    has_intraday = il > 0
+    with np.errstate(all="ignore"):
+        i_high = np.where(has_intraday, np.nanmax(intraday["high"], axis=1, initial=-np.inf), 0.0) \
+            if intraday["high"].shape[1] else np.zeros(n)
+        i_low = np.where(has_intraday, np.nanmin(intraday["low"], axis=1, initial=np.inf), 0.0) \
+            if intraday["low"].shape[1] else np.zeros(n)
+    return {
+        # intraday
+        "vwap": vwap(intraday["high"], intraday["low"], ic, intraday["volume"], il),
+        "ema_9": ema(ic, il, 9),
+        "ema_20": ema(ic, il, 20),
+        "rsi_14": rsi(ic, il, 14),
+        "intraday_high": i_high,
+        "intraday_low": i_low,
+        # daily
+        "rsi_14_daily": rsi(dc, dl, 14),
+        "ema_50": ema(dc, dl, 50),
+        "sma_200": tail_sma(dc, dl, 200),
+        "bb_middle": tail_sma(dc, dl, 20),
+        "bb_std": tail_std(dc, dl, 20),
+        "atr": atr(daily["high"], daily["low"], dc, dl, 14),
+        "avg_volume": prior_avg_volume(daily["volume"], dl),
+    }
+
+
+def compute_batch_indicators(intraday_series: Sequence[Optional[Sequence[Dict]]],
+                             daily_series: Sequence[Optional[Sequence[Dict]]]) -> List[Dict[str, float]]:
+    """Per-symbol indicator dicts (the `precomputed=` argument of
+    `_calculate_snapshot`) for N aligned intraday / daily bar lists."""
+    arrays = batch_indicator_arrays(pack_ohlcv(intraday_series), pack_ohlcv(daily_series))
+    keys = list(arrays)
+    cols = [arrays[k].tolist() for k in keys]
+    return [dict(zip(keys, vals)) for vals in zip(*cols)]
@@ -40,14 +40,26 @@ Design notes:
     * Defensive: skips quotes with last_price <= 0 (IB sentinel for
       "no print yet today"), skips ETFs/indices that don't trade
       (e.g. VIX), and never raises into the push-data hot path.
+    * Write-behind: finalized bars go onto a bounded, coalescing queue
+      (`_BarWriteQueue`) drained by a dedicated writer thread with
+      `bulk_write(ordered=False)`. At a minute boundary ~480 symbols ×
+      up to 4 bar sizes close at once; the push thread used to pay one
+      `update_one` round-trip per bar. Now it only enqueues. Overflow
+      drops the oldest pending bar (backfill repairs it, same as a
+      restart); `close()` drains on shutdown (also registered atexit).
+      TICK_BAR_WRITE_BEHIND=false restores synchronous (bulk) writes.
 """
 
 from __future__ import annotations
 
+import atexit
 import logging
+import os
 import threading
+import time
+from collections import OrderedDict, deque
 from datetime import datetime, timezone
-from typing import Dict, Optional, Tuple
+from typing import Callable, Dict, List, Optional, Tuple
 
 logger = logging.getLogger(__name__)
 
@@ -164,6 +176,221 @@ class _BarBuilder:
         }
 
 
+def _env_flag(name: str, default: str) -> bool:
+    val = os.environ.get(name, default).strip().lower()
+    return val not in ("0", "false", "no", "off")
+
+
+def _env_num(name: str, default: float) -> float:
+    try:
+        return float(os.environ.get(name, default))
+    except ValueError:
+        return float(default)
+
+
+class _BarWriteQueue:
+    """Bounded write-behind queue for finalized bars.
+
+    Bars are keyed by (symbol, bar_size, date) so a bar re-finalized before
+    it was written replaces the pending copy instead of being written
+    twice. A single daemon writer thread waits until `batch_size` bars are
+    pending or the oldest has lingered `flush_interval_s`, then hands up to
+    `batch_size` bars to `write_fn` (one unordered bulk_write). Failed
+    batches are re-queued and the writer waits out an exponential backoff
+    before the next attempt, whatever the queue depth; when the queue is at
+    `max_pending` the oldest bar is dropped and counted."""
+
+    def __init__(self, write_fn: Callable[[list], int], *, max_pending: int,
+                 batch_size: int, flush_interval_s: float) -> None:
+        self._write_fn = write_fn
+        self._max_pending = max(1, int(max_pending))
+        self._batch_size = max(1, int(batch_size))
+        self._flush_interval_s = max(0.0, float(flush_interval_s))
+        # key → (bar, enqueued_monotonic)
+        self._pending: "OrderedDict[Tuple[str, str, str], Tuple[Dict, float]]" = OrderedDict()
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+        self._writing = 0  # bars handed to write_fn and not yet settled
+        self._urgent = 0   # callers blocked in flush(); skip the linger
+        self._backoff_s = 0.0
+        self._next_attempt_at = 0.0  # monotonic; set after a failed flush
+        # Metrics (read by stats()).
+        self._enqueued = 0
+        self._coalesced = 0
+        self._dropped = 0
+        self._flushes = 0
+        self._flush_errors = 0
+        self._flush_ms: "deque[float]" = deque(maxlen=256)
+        self._lag_ms: "deque[float]" = deque(maxlen=256)
+        self._last_flush_at: Optional[float] = None
+        self._max_depth = 0
+
+    # ---------- producer ------------------------------------------------
+    def put(self, bars: list) -> None:
+        now = time.monotonic()
+        with self._cond:
+            for bar in bars:
+                key = (bar["symbol"], bar["bar_size"], bar["date"])
+                if key in self._pending:
+                    self._coalesced += 1
+                    self._pending[key] = (bar, self._pending[key][1])
+                    continue
+                if len(self._pending) >= self._max_pending:
+                    self._pending.popitem(last=False)
+                    self._dropped += 1
+                self._pending[key] = (bar, now)
+                self._enqueued += 1
+            self._max_depth = max(self._max_depth, len(self._pending))
+            self._ensure_thread()
+            self._cond.notify()
+
+    def _ensure_thread(self) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            self._stopping = False
+            self._thread = threading.Thread(
+                target=self._run, name="tick_to_bar_writer", daemon=True)
+            self._thread.start()
+
+    # ---------- writer --------------------------------------------------
+    def _take_batch(self) -> List[Tuple[Dict, float]]:
+        batch = []
+        while self._pending and len(batch) < self._batch_size:
+            _key, item = self._pending.popitem(last=False)
+            batch.append(item)
+        self._writing = len(batch)
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._pending and not self._stopping:
+                    self._cond.wait()
+                if not self._pending:
+                    return
+                # After a failure, back off before every retry — also when
+                # the queue is full, stopping, or a caller is in flush().
+                if time.monotonic() < self._next_attempt_at:
+                    self._cond.wait(self._next_attempt_at - time.monotonic())
+                    continue
+                if not self._stopping and not self._urgent:
+                    oldest = next(iter(self._pending.values()))[1]
+                    deadline = oldest + self._flush_interval_s
+                    while (len(self._pending) < self._batch_size and not self._stopping
+                           and not self._urgent and time.monotonic() < deadline):
+                        self._cond.wait(deadline - time.monotonic())
+                batch = self._take_batch()
+            self._flush(batch)
+
+    def _flush(self, batch: List[Tuple[Dict, float]]) -> None:
+        started = time.monotonic()
+        bars = [bar for bar, _t in batch]
+        try:
+            self._write_fn(bars)
+            ok = True
+        except Exception as exc:
+            ok = False
+            logger.warning(f"tick_to_bar: bulk flush of {len(bars)} bars failed: {exc}")
+        done = time.monotonic()
+        with self._cond:
+            self._writing = 0
+            self._flushes += 1
+            self._flush_ms.append((done - started) * 1000.0)
+            self._last_flush_at = time.time()
+            if ok:
+                self._backoff_s = 0.0
+                self._next_attempt_at = 0.0
+                self._lag_ms.append((done - min(t for _b, t in batch)) * 1000.0)
+            else:
+                self._flush_errors += 1
+                self._backoff_s = min(max(self._backoff_s * 2, 1.0), 30.0)
+                self._next_attempt_at = done + self._backoff_s
+                # Re-queue at the front unless a newer copy arrived meanwhile.
+                requeue: "OrderedDict[Tuple[str, str, str], Tuple[Dict, float]]" = OrderedDict()
+                for bar, t in batch:
+                    key = (bar["symbol"], bar["bar_size"], bar["date"])
+                    if key not in self._pending:
+                        requeue[key] = (bar, t)
+                requeue.update(self._pending)
+                while len(requeue) > self._max_pending:
+                    requeue.popitem(last=False)
+                    self._dropped += 1
+                self._pending = requeue
+            self._cond.notify_all()
+
+    # ---------- lifecycle -----------------------------------------------
+    def flush(self, timeout: float = 10.0) -> bool:
+        """Write everything pending now (bypassing the linger). Returns
+        True when the queue is empty on return."""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            if self._thread is None or not self._thread.is_alive():
+                batch = None
+            else:
+                batch = False
+                # An explicit flush gets one immediate attempt; further
+                # failures back off again from 1s.
+                self._backoff_s = 0.0
+                self._next_attempt_at = 0.0
+                self._urgent += 1
+                self._cond.notify_all()
+                try:
+                    while (self._pending or self._writing) and time.monotonic() < deadline:
+                        self._cond.wait(0.05)
+                finally:
+                    self._urgent -= 1
+                return not self._pending and not self._writing
+        # No writer thread (never started or died) → drain inline.
+        while batch is None or batch:
+            with self._cond:
+                batch = self._take_batch()
+            if not batch:
+                break
+            self._flush(batch)
+            if self._next_attempt_at or time.monotonic() > deadline:
+                break  # failed (re-queued for the writer) or out of time
+        return not self._pending
+
+    def close(self, timeout: float = 10.0) -> bool:
+        """Stop the writer after draining every pending bar."""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+            thread = self._thread
+        if thread is not None and thread.is_alive():
+            thread.join(timeout)
+        return self.flush(timeout=max(0.1, timeout))
+
+    def stats(self) -> Dict:
+        with self._cond:
+            flush_ms = sorted(self._flush_ms)
+            lag_ms = sorted(self._lag_ms)
+
+            def _pct(vals, q):
+                return round(vals[min(len(vals) - 1, int(q * len(vals)))], 2) if vals else None
+
+            return {
+                "pending": len(self._pending),
+                "max_pending": self._max_pending,
+                "max_depth_seen": self._max_depth,
+                "batch_size": self._batch_size,
+                "flush_interval_s": self._flush_interval_s,
+                "writer_alive": bool(self._thread and self._thread.is_alive()),
+                "enqueued_total": self._enqueued,
+                "coalesced_total": self._coalesced,
+                "dropped_total": self._dropped,
+                "flushes_total": self._flushes,
+                "flush_errors_total": self._flush_errors,
+                "retry_backoff_s": self._backoff_s,
+                "flush_ms_p50": _pct(flush_ms, 0.50),
+                "flush_ms_p95": _pct(flush_ms, 0.95),
+                "flush_ms_max": _pct(flush_ms, 1.0),
+                "enqueue_to_write_ms_p50": _pct(lag_ms, 0.50),
+                "enqueue_to_write_ms_p95": _pct(lag_ms, 0.95),
+                "last_flush_at": self._last_flush_at,
+            }
+
+
 class TickToBarPersister:
     """Builds 1m/5m/15m/1h bars from live tick quotes and upserts on close."""
 
@@ -183,11 +410,31 @@ class TickToBarPersister:
         self._last_persist_ts: Optional[float] = None
         # Ticks observed (for debugging — increments each on_quote call).
         self._ticks_observed_total: int = 0
+        # Bar-close listeners (e.g. services.bar_store). Called with the
+        # list of finalized bars, outside the builder lock.
+        self._bar_close_listeners: List[Callable[[list], object]] = []
+        # Write-behind queue (None = synchronous bulk writes on the caller).
+        self._stats_lock = threading.Lock()
+        self._write_queue: Optional[_BarWriteQueue] = None
+        if _env_flag("TICK_BAR_WRITE_BEHIND", "true"):
+            self._write_queue = _BarWriteQueue(
+                self._write_bars,
+                max_pending=int(_env_num("TICK_BAR_QUEUE_MAX", 20000)),
+                batch_size=int(_env_num("TICK_BAR_BULK_BATCH", 1000)),
+                flush_interval_s=_env_num("TICK_BAR_FLUSH_SEC", 0.25),
+            )
 
     # ---------- DB late-binding (server.py wires after Mongo connect) -----
     def set_db(self, db) -> None:
         self._db = db
 
+    def add_bar_close_listener(self, callback: Callable[[list], object]) -> None:
+        """Register `callback(bars)` to be invoked with every batch of
+        finalized bars. Runs on the push worker thread; must be cheap and
+        must not block. Exceptions are swallowed."""
+        if callback not in self._bar_close_listeners:
+            self._bar_close_listeners.append(callback)
+
     # ---------- public API used by routers/ib.py::receive_pushed_ib_data --
     def on_push(self, quotes: Dict[str, dict]) -> int:
         """
@@ -240,51 +487,110 @@ class TickToBarPersister:
 
         if finalized:
             self._upsert_bars(finalized)
+            self._notify_bar_close(finalized)
         return len(finalized)
 
+    def flush(self, timeout: float = 10.0) -> bool:
+        """Write every queued bar now. True when nothing is left pending."""
+        if self._write_queue is None:
+            return True
+        return self._write_queue.flush(timeout)
+
+    def close(self, timeout: float = 10.0) -> bool:
+        """Drain the write-behind queue and stop its writer thread
+        (server shutdown / atexit)."""
+        if self._write_queue is None:
+            return True
+        return self._write_queue.close(timeout)
+
     def stats(self) -> Dict:
         """Return introspection stats (read by /api/ib/tick-persister-stats)."""
         with self._lock:
-            return {
-                "active_builders": len(self._builders),
+            active = len(self._builders)
+            ticks = self._ticks_observed_total
+        with self._stats_lock:
+            out = {
+                "active_builders": active,
                 "bars_persisted_total": self._bars_persisted_total,
                 "bars_persisted_by_size": dict(self._bars_persisted_by_size),
-                "ticks_observed_total": self._ticks_observed_total,
+                "ticks_observed_total": ticks,
                 "last_persist_ts": self._last_persist_ts,
                 "bar_sizes": list(_BAR_WINDOWS_SEC.keys()),
             }
+        out["write_behind"] = self._write_queue.stats() if self._write_queue is not None else None
+        return out
 
     # ---------- internal helpers ----------------------------------------
+    def _notify_bar_close(self, bars: list) -> None:
+        for callback in tuple(self._bar_close_listeners):
+            try:
+                callback(bars)
+            except Exception as exc:
+                logger.debug(f"tick_to_bar: bar-close listener failed: {exc}")
+
     def _upsert_bars(self, bars: list) -> None:
-        if self._db is None:
+        """Hand finalized bars to the write-behind queue (or write them
+        now when write-behind is disabled). Never blocks on Mongo in
+        write-behind mode."""
+        if self._db is None or not bars:
+            return
+        if self._write_queue is not None:
+            self._write_queue.put(bars)
             return
         try:
-            col = self._db["ib_historical_data"]
+            self._write_bars(bars)
         except Exception as exc:
-            logger.debug(f"tick_to_bar: cannot reach ib_historical_data: {exc}")
-            return
-        now_ts = datetime.now(timezone.utc).timestamp()
-        for bar in bars:
-            try:
-                col.update_one(
-                    {
-                        "symbol": bar["symbol"],
-                        "bar_size": bar["bar_size"],
-                        "date": bar["date"],
-                    },
-                    {"$set": bar},
-                    upsert=True,
+            logger.warning(f"tick_to_bar: bulk upsert of {len(bars)} bars failed: {exc}")
+
+    def _write_bars(self, bars: list) -> int:
+        """One unordered bulk upsert for `bars`. Per-bar failures inside a
+        BulkWriteError are logged and skipped; anything else raises so the
+        queue can retry the batch."""
+        from pymongo import UpdateOne
+        from pymongo.errors import BulkWriteError
+        from services.bar_catalog import record_writes, upserted_indexes
+
+        db = self._db
+        if db is None:
+            return 0
+        col = db["ib_historical_data"]
+        ops = [
+            UpdateOne(
+                {"symbol": bar["symbol"], "bar_size": bar["bar_size"], "date": bar["date"]},
+                {"$set": bar},
+                upsert=True,
+            )
+            for bar in bars
+        ]
+        failed: set = set()
+        try:
+            inserted = upserted_indexes(col.bulk_write(ops, ordered=False))
+        except BulkWriteError as bwe:
+            inserted = upserted_indexes(bwe.details or {})
+            for err in (bwe.details or {}).get("writeErrors", []):
+                failed.add(err.get("index"))
+                bar = bars[err.get("index", 0)] if err.get("index") is not None else {}
+                logger.warning(
+                    f"tick_to_bar: upsert {bar.get('symbol')} {bar.get('bar_size')} "
+                    f"{bar.get('date')} failed: {err.get('errmsg')}"
                 )
+        written = [bar for i, bar in enumerate(bars) if i not in failed]
+        record_writes(
+            db,
+            [(bar["symbol"], bar["bar_size"], bar["date"]) if i not in failed else (None, None, None)
+             for i, bar in enumerate(bars)],
+            inserted,
+        )
+        now_ts = datetime.now(timezone.utc).timestamp()
+        with self._stats_lock:
+            for bar in written:
                 self._bars_persisted_total += 1
                 self._bars_persisted_by_size[bar["bar_size"]] = (
                     self._bars_persisted_by_size.get(bar["bar_size"], 0) + 1
                 )
+            if written:
                 self._last_persist_ts = now_ts
-            except Exception as exc:
-                logger.warning(
-                    f"tick_to_bar: upsert {bar.get('symbol')} "
-                    f"{bar.get('bar_size')} {bar.get('date')} failed: {exc}"
-                )
+        return len(written)
 
 
 # ---------------- Module-level singleton ----------------
@@ -307,3 +613,15 @@ def init_tick_to_bar_persister(db) -> TickToBarPersister:
     persister = get_tick_to_bar_persister()
     persister.set_db(db)
     return persister
+
+
+@atexit.register
+def _drain_on_exit() -> None:
+    """Last-chance drain of queued bars if the process exits without the
+    server shutdown hook running."""
+    persister = _persister
+    if persister is not None:
+        try:
+            persister.close(timeout=5.0)
+        except Exception:
+            pass
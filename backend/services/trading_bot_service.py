@@ -5722,8 +5722,13 @@ class TradingBotService:
             )
             return
 
-        client = motor.motor_asyncio.AsyncIOMotorClient(mongo_url)
-        db = client[os.environ.get("DB_NAME", "tradecommand")]
+        # Shared pooled repository (metrics under /api/system/async-mongo-stats)
+        # when it's bound to this loop; otherwise a private client as before.
+        from services.async_mongo import get_async_repo
+        db = get_async_repo()
+        if db is None:
+            client = motor.motor_asyncio.AsyncIOMotorClient(mongo_url)
+            db = client[os.environ.get("DB_NAME", "tradecommand")]
 
         print(
             "[v123 kill-switch] Continuous monitor started (15s cadence)",
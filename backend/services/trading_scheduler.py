@@ -369,6 +369,39 @@ class TradingScheduler:
                 replace_existing=True
             )
 
+            # 7c. Decision-trail rollup compaction - Daily 8:30 PM ET (after the
+            # UTC day boundary in EDT; the next night catches it in EST). Seals
+            # closed days' Diagnostics vote/funnel counters from raw
+            # shadow_decisions so dashboard windows never rescan them.
+            self._scheduler.add_job(
+                _wrap_async(self._run_decision_rollup_compaction),
+                CronTrigger(
+                    hour=20,
+                    minute=30,
+                    timezone='US/Eastern'
+                ),
+                id='decision_rollup_compaction',
+                name='Decision Trail Rollup Compaction',
+                replace_existing=True
+            )
+
+            # 7d. Bar catalog reconcile - Saturday 3:00 AM ET. Re-derives the
+            # per-(symbol, bar_size) coverage catalog from ib_historical_data
+            # (seeds it on first run) so drift from writers outside the
+            # catalog contract — deletes, repair scripts — never accumulates.
+            self._scheduler.add_job(
+                _wrap_async(self._run_bar_catalog_reconcile),
+                CronTrigger(
+                    day_of_week='sat',
+                    hour=3,
+                    minute=0,
+                    timezone='US/Eastern'
+                ),
+                id='bar_catalog_reconcile',
+                name='Bar Catalog Reconcile',
+                replace_existing=True
+            )
+
             # 8. Weekly Auto-Revalidation - Sunday 10:00 PM ET
             # Honest promote/reject check on every trained model, run
             # overnight when markets are closed. Results land in
@@ -473,6 +506,17 @@ class TradingScheduler:
                 )
         except Exception as e:
             logger.error("[scheduler] learning reconcile failed (continuing to rebuild): %s", e)
+        try:
+            # Full strategy_stats rebuild: verifies (and re-seeds) the
+            # incremental per-setup aggregate the close path folds into.
+            from services import pnl_compute
+            rep = await asyncio.to_thread(pnl_compute.rebuild_strategy_stats)
+            logger.info(
+                "[scheduler] strategy_stats rebuild: %d setups, %d drifted, %d seeded, %d skipped",
+                rep["setups"], len(rep["drifted"]), len(rep["seeded"]), len(rep["skipped"]),
+            )
+        except Exception as e:
+            logger.error("[scheduler] strategy_stats rebuild failed: %s", e)
         try:
             from services.learning_loop_service import get_learning_loop_service
             n = await get_learning_loop_service().rebuild_learning_stats_from_all_outcomes()
@@ -1106,6 +1150,72 @@ class TradingScheduler:
             self._log_task_result(result)
 
 
+    async def _run_decision_rollup_compaction(self):
+        """Seal every closed UTC day of the decision-trail rollups from raw
+        shadow_decisions (see services/decision_rollups.py)."""
+        start_time = datetime.now(timezone.utc)
+        result = ScheduledTaskResult(
+            task_type="decision_rollup_compaction",
+            success=False,
+            started_at=start_time.isoformat(),
+            completed_at="",
+            duration_seconds=0,
+            result_summary=""
+        )
+        try:
+            from services import decision_rollups
+            if self._db is None:
+                result.result_summary = "No database"
+            else:
+                sealed = await asyncio.to_thread(decision_rollups.compact_closed_days, self._db)
+                result.success = True
+                result.result_summary = f"Compacted {len(sealed)} day(s): {', '.join(sealed) or '-'}"
+            logger.info(f"Decision rollup compaction: {result.result_summary}")
+        except Exception as e:
+            result.error = str(e)
+            result.result_summary = f"Decision rollup compaction failed: {e}"
+            logger.error(f"Decision rollup compaction failed: {e}")
+        finally:
+            end_time = datetime.now(timezone.utc)
+            result.completed_at = end_time.isoformat()
+            result.duration_seconds = (end_time - start_time).total_seconds()
+            self._log_task_result(result)
+
+    async def _run_bar_catalog_reconcile(self):
+        """Rebuild the bar catalog from ib_historical_data (see
+        services/bar_catalog.py)."""
+        start_time = datetime.now(timezone.utc)
+        result = ScheduledTaskResult(
+            task_type="bar_catalog_reconcile",
+            success=False,
+            started_at=start_time.isoformat(),
+            completed_at="",
+            duration_seconds=0,
+            result_summary=""
+        )
+        try:
+            from services import bar_catalog
+            if self._db is None:
+                result.result_summary = "No database"
+            else:
+                report = await asyncio.to_thread(bar_catalog.rebuild, self._db)
+                result.success = True
+                result.result_summary = (
+                    f"{report['entries']} entries, {report['drifted']} drifted, "
+                    f"{report['removed']} removed"
+                )
+                result.metadata = report
+            logger.info(f"Bar catalog reconcile: {result.result_summary}")
+        except Exception as e:
+            result.error = str(e)
+            result.result_summary = f"Bar catalog reconcile failed: {e}"
+            logger.error(result.result_summary)
+        finally:
+            end_time = datetime.now(timezone.utc)
+            result.completed_at = end_time.isoformat()
+            result.duration_seconds = (end_time - start_time).total_seconds()
+            self._log_task_result(result)
+
     async def _run_entry_price_sync(self):
         """v19.34.148 — nightly snap of `entry_price` ← IB.avgCost.
 
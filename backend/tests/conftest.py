@@ -74,3 +74,15 @@ def sample_historical_bar():
         "volume": 5000000,
         "bar_size": "1 day"
     }
+
+
+@pytest.fixture
+def tracker_stderr(capfd):
+    """Call after a shared-memory round trip: stops (and so drains) the
+    multiprocessing resource tracker and returns everything written to
+    stderr, tracker tracebacks included."""
+    def drain():
+        from multiprocessing import resource_tracker
+        resource_tracker._resource_tracker._stop()
+        return capfd.readouterr().err
+    return drain
@@ -39,9 +39,10 @@ def _build_trade(**overrides) -> SimpleNamespace:
 
 
 def _captured_doc_from_upsert(mock_coll: MagicMock) -> dict:
-    """Pull the $set doc that the writer would have upserted."""
-    assert mock_coll.update_one.called, "writer never called update_one"
-    args, kwargs = mock_coll.update_one.call_args
+    """Pull the $set doc that the writer would have upserted (one atomic
+    find_one_and_update so the strategy_stats fold gets the pre-image)."""
+    assert mock_coll.find_one_and_update.called, "writer never upserted the row"
+    args, kwargs = mock_coll.find_one_and_update.call_args
     update = args[1] if len(args) > 1 else kwargs.get("update")
     return update["$set"]
 
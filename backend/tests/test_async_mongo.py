@@ -0,0 +1,180 @@
+"""
+Async Mongo repository: hot paths route through the pooled Motor facade
+only when it mirrors the caller's db handle and runs on its loop; every
+other caller keeps the sync collection in a worker thread. Metrics are
+per collection.
+"""
+import asyncio
+
+import mongomock
+import pytest
+
+from services import async_mongo as AM
+
+
+class _FakeMotorCursor:
+    def __init__(self, docs):
+        self._docs = list(docs)
+
+    def sort(self, spec):
+        key, direction = spec[0]
+        self._docs.sort(key=lambda d: d.get(key), reverse=direction == -1)
+        return self
+
+    def limit(self, n):
+        self._docs = self._docs[:n]
+        return self
+
+    async def to_list(self, length=None):
+        return list(self._docs)
+
+    def __aiter__(self):
+        async def gen():
+            for d in self._docs:
+                yield d
+        return gen()
+
+
+class _FakeMotorColl:
+    """Motor-shaped async adapter over a mongomock collection."""
+
+    def __init__(self, coll):
+        self._c = coll
+
+    def find(self, *a, **k):
+        return _FakeMotorCursor(self._c.find(*a, **k))
+
+    def aggregate(self, pipeline, **k):
+        return _FakeMotorCursor(self._c.aggregate(pipeline))
+
+    def __getattr__(self, op):
+        async def run(*a, **k):
+            return getattr(self._c, op)(*a, **k)
+        return run
+
+
+@pytest.fixture
+def wired():
+    sync_db = mongomock.MongoClient().db
+
+    class _Db:
+        def __getitem__(self, name):
+            return _FakeMotorColl(sync_db[name])
+
+    class _Client:
+        def __getitem__(self, name):
+            return _Db()
+
+        def close(self):
+            pass
+
+    def install(loop):
+        AM._repo = AM.AsyncMongoRepository(_Client(), "t", mirror_of=sync_db, loop=loop)
+        return AM._repo
+    yield sync_db, install
+    AM._repo = None
+
+
+def test_call_routes_through_repo_and_records_latency(wired):
+    sync_db, install = wired
+
+    async def main():
+        repo = install(asyncio.get_running_loop())
+        await AM.call(sync_db, "confidence_gate_log", "insert_one", {"decision_id": "d1", "x": 1})
+        await AM.call(sync_db, "confidence_gate_log", "update_one",
+                      {"decision_id": "d1"}, {"$set": {"x": 2}})
+        rows = await AM.find_list(sync_db, "confidence_gate_log", {}, {"_id": 0}, limit=5)
+        n = 0
+        async for _ in repo["confidence_gate_log"].find({}):
+            n += 1
+        return rows, n, repo.stats()
+
+    rows, n, st = asyncio.run(main())
+    assert rows == [{"decision_id": "d1", "x": 2}] and n == 1
+    cg = st["collections"]["confidence_gate_log"]
+    assert cg["ops"] == 4 and cg["errors"] == 0
+    assert cg["by_op"] == {"insert_one": 1, "update_one": 1, "find": 2}
+    assert cg["p95_ms"] is not None
+    assert set(AM.HOT_COLLECTIONS) <= set(st["collections"])
+    assert st["thread_fallbacks"] == 0
+
+
+def test_foreign_db_and_other_loops_fall_back_to_threads(wired):
+    sync_db, install = wired
+    other = mongomock.MongoClient().db
+    repo = install(None)  # bound to no running loop → never served
+
+    async def main():
+        await AM.call(sync_db, "live_alerts", "update_one", {"id": "a"}, {"$set": {"v": 1}}, upsert=True)
+        await AM.call(other, "live_alerts", "insert_one", {"id": "b"})
+        return AM.get_async_repo()
+
+    assert asyncio.run(main()) is None
+    assert sync_db.live_alerts.find_one({"id": "a"})["v"] == 1
+    assert other.live_alerts.find_one({"id": "b"}) is not None
+    st = repo.stats()
+    assert st["collections"]["live_alerts"]["ops"] == 0
+    assert st["thread_fallbacks"] == 2
+
+
+def test_errors_are_counted(wired):
+    sync_db, install = wired
+
+    async def main():
+        repo = install(asyncio.get_running_loop())
+        await repo["order_queue"].insert_one({"_id": 1})
+        with pytest.raises(Exception):
+            await repo["order_queue"].insert_one({"_id": 1})
+        return repo.stats()["collections"]["order_queue"]
+
+    oq = asyncio.run(main())
+    assert oq["ops"] == 2 and oq["errors"] == 1
+
+
+def test_order_long_poll_parks_no_thread():
+    from services.order_queue_service import OrderQueueService
+    svc = OrderQueueService()
+    svc.initialize(mongomock.MongoClient().db)
+
+    async def main():
+        v0 = svc.dispatch_version
+        waiter = asyncio.create_task(svc.wait_for_orders_async(v0, 5))
+        await asyncio.sleep(0.05)
+        assert len(svc._async_waiters) == 1 and not waiter.done()
+        await asyncio.to_thread(svc._notify_dispatch)
+        got = await asyncio.wait_for(waiter, 1.0)
+        assert got == v0 + 1 and not svc._async_waiters
+        assert await svc.wait_for_orders_async(v0 + 1, 0.05) == v0 + 1  # timeout
+        assert await svc.get_pending_orders_async() == []
+
+    asyncio.run(main())
+
+
+def test_scanner_adv_fallback_is_one_aggregation_per_chunk(wired, monkeypatch):
+    from datetime import datetime, timedelta, timezone
+
+    import database
+    from services import enhanced_scanner as ES
+
+    sync_db, install = wired
+    day = lambda k: (datetime.now(timezone.utc) - timedelta(days=k)).strftime("%Y-%m-%d")
+    symbols = [f"S{i}" for i in range(7)]
+    sync_db.ib_historical_data.insert_many([
+        {"symbol": s, "bar_size": "1 day", "date": day(k), "volume": 1_000.0 * (i + 1), "close": 10.0}
+        for i, s in enumerate(symbols) for k in range(1, 8 if s != "S6" else 4)
+    ])
+    monkeypatch.setattr(database, "get_database", lambda: sync_db)
+    monkeypatch.setattr(ES, "_liquidity_table", lambda: None)
+    monkeypatch.setattr(ES, "_ADV_IN_CHUNK", 3)
+    scanner = ES.EnhancedBackgroundScanner.__new__(ES.EnhancedBackgroundScanner)
+
+    async def main():
+        repo = install(asyncio.get_running_loop())
+        adv = await scanner._get_adv_from_ib_historical(symbols)
+        return adv, repo
+
+    adv, repo = asyncio.run(main())
+    assert adv == {s: 10_000 * (i + 1) for i, s in enumerate(symbols[:6])}  # S6 has < 5 bars
+    st = repo.stats()
+    assert st["collections"]["ib_historical_data"]["by_op"] == {"aggregate": 3}  # 7 symbols / 3
+    assert st["thread_fallbacks"] == 0
@@ -0,0 +1,108 @@
+"""
+Vectorized backtest kernel (services/slow_learning/backtest_kernel.py).
+
+`_simulate_strategy` runs on whole-series entry masks + per-trade exit
+scans; BT_VECTOR_KERNEL=0 keeps the per-bar loop. Both must produce the
+same trades and equity curve for every setup family, with and without
+the v320b cost model.
+"""
+import asyncio
+import random
+
+import numpy as np
+import pytest
+
+from services.slow_learning import backtest_kernel as bk
+from services.slow_learning.advanced_backtest_engine import (
+    AdvancedBacktestEngine,
+    StrategyConfig,
+)
+
+SETUPS = [
+    "orb", "vwap", "gap_and_go", "breakout", "scalp", "range",
+    "mean_reversion", "reversal", "trend_continuation", "momentum", "mystery",
+]
+
+
+def _bars(n=400, seed=7):
+    rnd = random.Random(seed)
+    price = 40.0
+    out = []
+    for i in range(n):
+        o = price * (1 + rnd.gauss(0, 0.012))
+        c = max(1.0, o * (1 + rnd.gauss(0, 0.02)))
+        out.append({
+            "timestamp": f"2026-{1 + i // 28 % 12:02d}-{1 + i % 28:02d}T15:30:00",
+            "open": o,
+            "high": max(o, c) * (1 + abs(rnd.gauss(0, 0.008))),
+            "low": min(o, c) * (1 - abs(rnd.gauss(0, 0.008))),
+            "close": c,
+            "volume": rnd.choice([50_000, 150_000, 400_000, 900_000]),
+            **({"vwap": c * 1.001} if i % 7 == 0 else {}),
+        })
+        price = c
+    return out
+
+
+def _run(engine, bars, strategy, htf=None):
+    return asyncio.run(engine._simulate_strategy("T", bars, strategy, 100_000.0, htf_trend=htf))
+
+
+def _strip(trades):
+    return [{k: v for k, v in t.to_dict().items() if k != "id"} for t in trades]
+
+
+@pytest.mark.parametrize("costs", ["1", "0"])
+@pytest.mark.parametrize("setup", SETUPS)
+@pytest.mark.parametrize("short", [False, True])
+def test_kernel_matches_bar_loop(monkeypatch, setup, short, costs):
+    monkeypatch.setenv("BT_COSTS", costs)
+    monkeypatch.setenv("BT_SLIPPAGE_BPS", "3")
+    engine = AdvancedBacktestEngine()
+    strategy = StrategyConfig(
+        name="s", setup_type=("short_" if short else "") + setup,
+        stop_pct=1.5, target_pct=3.0, position_size_pct=10.0, max_bars_to_hold=6,
+    )
+    bars = _bars(seed=len(setup) + short)
+    monkeypatch.setenv("BT_VECTOR_KERNEL", "1")
+    fast_trades, fast_curve = _run(engine, bars, strategy)
+    monkeypatch.setenv("BT_VECTOR_KERNEL", "0")
+    slow_trades, slow_curve = _run(engine, bars, strategy)
+
+    assert slow_trades, "fixture should produce trades for every family"
+    assert _strip(fast_trades) == _strip(slow_trades)
+    assert fast_curve == slow_curve
+
+
+def test_entry_masks_match_scalar_checks():
+    engine = AdvancedBacktestEngine()
+    bars = _bars(n=250, seed=3)
+    a = bk.bar_arrays(bars)
+    for setup in SETUPS:
+        for prefix in ("", "short_"):
+            strategy = StrategyConfig(name="s", setup_type=prefix + setup)
+            mask, known = bk.entry_signal_mask(a, strategy.setup_type)
+            expected = [engine._check_entry_signal(b, strategy, bars[:i + 1]) for i, b in enumerate(bars)]
+            assert mask.tolist() == expected, prefix + setup
+            assert known == (setup != "mystery")
+
+
+def test_bearish_htf_blocks_entries_and_curve_is_flat():
+    engine = AdvancedBacktestEngine()
+    strategy = StrategyConfig(name="s", setup_type="momentum")
+    trades, curve = _run(engine, _bars(60), strategy, htf="bearish")
+    assert trades == [] and {p["equity"] for p in curve} == {100_000.0}
+    assert _run(engine, [], strategy) == ([], [])
+
+
+def test_resolve_exits_prefers_stop_and_times_out():
+    flat = {"timestamp": "t", "open": 10, "high": 10.5, "low": 9.5, "close": 10}
+    bars = [flat] * 70 + [{"timestamp": "t", "open": 10, "high": 12, "low": 8, "close": 10}]
+    a = bk.bar_arrays(bars)
+    idx, reason = bk.resolve_exits(
+        a, np.array([0, 0, 0, 68]), np.array([9.0, 9.0, 5.0, 11.0]),
+        np.array([11.0, 11.0, 20.0, 9.0]), False, 80, chunk=16)
+    assert idx.tolist() == [70, 70, 70, 68]
+    assert [bk.EXIT_REASONS[r] for r in reason] == ["stop", "stop", "end_of_data", "stop"]
+    idx, reason = bk.resolve_exits(a, np.array([0]), np.array([9.0]), np.array([11.0]), False, 3)
+    assert (idx.tolist(), reason.tolist()) == ([2], [bk.TIME])
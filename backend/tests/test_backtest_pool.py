@@ -0,0 +1,164 @@
+"""
+Process-pool fan-out for market-wide and walk-forward backtests
+(services/slow_learning/backtest_pool.py, services/shared_bars.py).
+
+The parallel mode must return exactly what the serial run returns (trade
+ids aside — random uuids either way), ship bars through shared memory,
+and stream per-shard progress into `_update_job_progress`.
+"""
+import asyncio
+import random
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pytest
+
+from services.shared_bars import SharedBarBlock
+from services.slow_learning import backtest_pool
+from services.slow_learning.advanced_backtest_engine import (
+    AdvancedBacktestEngine,
+    BacktestFilters,
+    StrategyConfig,
+    WalkForwardConfig,
+)
+
+VOLATILE = {"timestamp", "created_at", "completed_at", "duration_seconds", "id"}
+
+
+def _bars(seed, n=300, price=40.0):
+    rnd = random.Random(seed)
+    out = []
+    for i in range(n):
+        o = price * (1 + rnd.gauss(0, 0.01))
+        c = max(1.0, o * (1 + rnd.gauss(0, 0.02)))
+        out.append({
+            "timestamp": f"2025-{1 + i // 28 % 12:02d}-{1 + i % 28:02d}T00:00:00+00:00",
+            "open": o, "high": max(o, c) * 1.006, "low": min(o, c) * 0.994, "close": c,
+            "volume": 600_000 + rnd.randint(0, 400_000),
+        })
+        price = c
+    return out
+
+
+SERIES = {f"S{i}": _bars(i) for i in range(9)}
+SERIES["SHORT"] = _bars(99, n=5)              # < 10 bars → skipped
+SERIES["PENNY"] = _bars(98, price=1.0)         # price filter → skipped
+
+
+class _Engine(AdvancedBacktestEngine):
+    def __init__(self):
+        super().__init__()
+        self.progress = []
+
+    async def _get_cached_bars(self, symbol, timeframe, start_date=None, end_date=None):
+        if symbol == "BOOM":
+            raise RuntimeError("feed down")
+        return SERIES.get(symbol, [])
+
+    def _update_job_progress(self, job_id, progress, message):
+        self.progress.append((progress, message))
+
+
+def _scrub(obj):
+    if isinstance(obj, dict):
+        return {k: _scrub(v) for k, v in obj.items() if k not in VOLATILE}
+    if isinstance(obj, list):
+        return [_scrub(v) for v in obj]
+    return obj
+
+
+def _square(meta):
+    block = SharedBarBlock.attach(meta)
+    try:
+        cols = block.columns("B", 1, 3)
+        return block.timestamps("B", 1, 3), (cols["close"] ** 2).tolist()
+    finally:
+        block.close()
+
+
+def test_shared_block_round_trips_across_processes(tracker_stderr):
+    cols = {"close": np.array([1.0, 2.0, 3.0]), "volume": np.array([5.0, 6.0, 7.0])}
+    with SharedBarBlock.create(
+        [("A", ["a0"], {k: v[:1] for k, v in cols.items()}),
+         ("B", ["b0", "b1-long-timestamp", "b2"], cols)],
+        ["close", "volume"],
+    ) as block:
+        assert block.columns("A")["volume"].tolist() == [5.0]
+        with ProcessPoolExecutor(max_workers=1) as pool:
+            ts, sq = pool.submit(_square, block.meta).result()
+    assert ts == ["b1-long-timestamp", "b2"] and sq == [4.0, 9.0]
+    # The worker shares the parent's resource tracker; dropping the
+    # registration there made every parent unlink a tracker KeyError.
+    assert "Traceback" not in tracker_stderr()
+
+
+@pytest.mark.parametrize("setup", ["breakout", "short_momentum"])
+def test_market_wide_parallel_matches_serial(monkeypatch, setup):
+    monkeypatch.setenv("BT_POOL_SHARD_SIZE", "3")
+    strategy = StrategyConfig(name="mw", setup_type=setup, max_bars_to_hold=8)
+    symbols = list(SERIES) + ["BOOM", "MISSING"]
+    filters = BacktestFilters(start_date="2025-01-01", end_date="2025-12-31")
+
+    serial = asyncio.run(_Engine().run_market_wide_backtest(
+        strategy, filters=filters, symbols=symbols, workers=0))
+    engine = _Engine()
+    parallel = asyncio.run(engine.run_market_wide_backtest(
+        strategy, filters=filters, symbols=symbols, workers=2, job_id="j1"))
+
+    assert serial["summary"]["total_trades"] > 0
+    assert _scrub(parallel) == _scrub(serial)
+    assert serial["errors_count"] == 1
+    # 3 shards of 3 symbols each reported in as they finished.
+    assert len(engine.progress) == 3
+    assert engine.progress[-1][1].startswith("Simulated 13/13")
+
+
+def test_walk_forward_parallel_matches_serial():
+    strategy = StrategyConfig(name="wf", setup_type="breakout", max_bars_to_hold=8)
+    cfg = WalkForwardConfig(in_sample_days=60, out_of_sample_days=20, step_days=20,
+                            min_trades_per_period=1)
+
+    async def run(engine, workers):
+        return await engine.run_walk_forward(
+            "S1", strategy, cfg, total_days=300, end_date="2025-12-31", job_id="wf", workers=workers)
+
+    serial = asyncio.run(run(_Engine(), 0))
+    engine = _Engine()
+    parallel = asyncio.run(run(engine, 3))
+
+    assert len(serial.periods) > 3
+    assert _scrub(parallel.to_dict()) == _scrub(serial.to_dict())
+    assert engine.progress[-1][1].startswith("Walk-forward folds")
+    assert engine.progress[-1][0] == pytest.approx(100.0)
+
+
+def test_cost_env_is_forwarded(monkeypatch):
+    monkeypatch.setenv("BT_COSTS", "0")
+    monkeypatch.delenv("BT_SLIPPAGE_BPS", raising=False)
+    assert backtest_pool.cost_env() == {"BT_COSTS": "0"}
+    assert backtest_pool.pool_workers(None) == 0
+    monkeypatch.setenv("BT_PARALLEL_WORKERS", "4")
+    assert backtest_pool.pool_workers(None) == 4 and backtest_pool.pool_workers(1) == 1
+    monkeypatch.setenv("BT_VECTOR_KERNEL", "0")
+    assert backtest_pool.cost_env() == {"BT_COSTS": "0", "BT_VECTOR_KERNEL": "0"}
+
+
+def test_vector_kernel_kill_switch_keeps_runs_serial(monkeypatch):
+    monkeypatch.setenv("BT_VECTOR_KERNEL", "0")
+
+    def boom(*a, **k):
+        raise AssertionError("pool used with BT_VECTOR_KERNEL=0")
+
+    async def aboom(*a, **k):
+        boom()
+
+    monkeypatch.setattr(_Engine, "_walk_forward_parallel", aboom)
+    monkeypatch.setattr(backtest_pool, "pack_series", boom)
+    strategy = StrategyConfig(name="wf", setup_type="breakout", max_bars_to_hold=8)
+    cfg = WalkForwardConfig(in_sample_days=60, out_of_sample_days=20, step_days=20,
+                            min_trades_per_period=1)
+    asyncio.run(_Engine().run_walk_forward(
+        "S1", strategy, cfg, total_days=300, end_date="2025-12-31", workers=3))
+    asyncio.run(_Engine().run_market_wide_backtest(
+        strategy, filters=BacktestFilters(start_date="2025-01-01", end_date="2025-12-31"),
+        symbols=list(SERIES)[:3], workers=2))
@@ -0,0 +1,153 @@
+"""
+Bar catalog: the writer-maintained per-(symbol, bar_size) coverage docs
+must equal what a full `$group` over ib_historical_data derives, and the
+coverage readers must answer identically from either.
+"""
+import asyncio
+import random
+from datetime import datetime, timedelta, timezone
+
+import mongomock
+import pytest
+
+from services import backfill_readiness_service as BR
+from services import bar_catalog as BC
+from services import tick_to_bar_persister as ttb
+
+
+def _bar(symbol, bar_size, ts):
+    return {"symbol": symbol, "bar_size": bar_size, "date": ts.isoformat(),
+            "open": 1.0, "high": 1.0, "low": 1.0, "close": 1.0, "volume": 10,
+            "collected_at": datetime.now(timezone.utc).isoformat()}
+
+
+def _comparable(db):
+    out = {}
+    for e in BC.entries(db, with_days=True):
+        out[(e["symbol"], e["bar_size"])] = (
+            e["bars"], e["earliest"], e["latest"],
+            {m: sorted(d) for m, d in (e.get("days") or {}).items()},
+        )
+    return out
+
+
+@pytest.fixture
+def db():
+    d = mongomock.MongoClient().db
+    BC.ensure_indexes(d)
+    return d
+
+
+def test_write_path_matches_rebuild(db):
+    rng = random.Random(7)
+    p = ttb.TickToBarPersister(db=db)
+    base = datetime(2026, 5, 4, 13, 30, tzinfo=timezone.utc)
+    written = []
+    for _ in range(12):
+        fresh = [
+            _bar(rng.choice(["SPY", "AAPL", "NVDA"]), rng.choice(["1 min", "5 mins"]),
+                 base + timedelta(days=rng.randint(0, 40), minutes=5 * rng.randint(0, 70)))
+            for _ in range(25)
+        ]
+        fresh = list({(b["symbol"], b["bar_size"], b["date"]): b for b in fresh
+                      if (b["symbol"], b["bar_size"], b["date"]) not in
+                      {(w["symbol"], w["bar_size"], w["date"]) for w in written}}.values())
+        # New bars lead each batch (mongomock numbers upserts in insert
+        # order rather than by op index); re-writes of existing bars follow
+        # and must not move the counts.
+        batch = fresh + rng.sample(written, min(len(written), 10))
+        assert p._write_bars(batch) == len(batch)
+        written += fresh
+
+    live = _comparable(db)
+    assert sum(v[0] for v in live.values()) == len(written)
+    report = BC.rebuild(db)
+    assert report["drifted"] == 0 and report["removed"] == 0
+    assert _comparable(db) == live
+    assert BC.is_ready(db)
+
+
+def test_rebuild_drops_entries_without_bars_and_fixes_drift(db):
+    BC.record_writes(db, [("ZZZ", "1 day", "2026-01-05")], inserted=[0])
+    db.ib_historical_data.insert_many([
+        _bar("SPY", "1 day", datetime(2026, 1, d, tzinfo=timezone.utc)) for d in (5, 6, 9)
+    ])
+    BC.record_writes(db, [("SPY", "1 day", datetime(2026, 1, 5, tzinfo=timezone.utc).isoformat())],
+                     inserted=[0])
+    report = BC.rebuild(db)
+    assert report["entries"] == 1 and report["removed"] == 1 and report["drifted"] == 1
+    (entry,) = BC.entries(db, with_days=True)
+    assert entry["bars"] == 3
+    # Jan 7 + 8 (Wed/Thu) are missing weekdays; the weekend isn't a gap.
+    assert BC.gap_days(entry) == ["2026-01-07", "2026-01-08"]
+    start, bitmap = BC.coverage_bitmap(entry)
+    assert start.isoformat() == "2026-01-05" and bitmap == 0b10011
+
+
+def test_readers_match_scans(db, monkeypatch):
+    rng = random.Random(11)
+    now = datetime.now(timezone.utc)
+    syms = [f"S{i}" for i in range(30)]
+    rows = []
+    for s in syms:
+        for tf in BR.CRITICAL_TIMEFRAMES:
+            age = rng.choice([0.2, 1, 2, 6, 20])
+            for k in range(rng.randint(0, 3) if tf != "5 mins" else rng.choice([10, 900])):
+                rows.append(_bar(s, tf, now - timedelta(days=age, minutes=5 * k)))
+    db.ib_historical_data.insert_many(rows)
+    monkeypatch.setattr(BR, "get_universe", lambda _db, _tier: set(syms))
+    monkeypatch.setattr(BR, "_market_state_now", lambda: "rth")
+
+    scans = (BR._check_overall_freshness(db), BR._check_density_adequate(db),
+             {tf: BC.latest_dates(db, tf) for tf in BR.CRITICAL_TIMEFRAMES})
+    BC.rebuild(db)
+    reads0 = BC.stats()["catalog_reads"]
+    cat = (BR._check_overall_freshness(db), BR._check_density_adequate(db),
+           {tf: BC.latest_dates(db, tf) for tf in BR.CRITICAL_TIMEFRAMES})
+    assert BC.stats()["catalog_reads"] > reads0
+    assert cat[0]["per_timeframe"] == scans[0]["per_timeframe"]
+    assert cat[1]["dense_symbols"] == scans[1]["dense_symbols"]
+    assert {r["symbol"] for r in cat[1]["low_density_sample"]} == \
+        {r["symbol"] for r in scans[1]["low_density_sample"]}
+    assert cat[2] == scans[2]
+
+
+def test_deletes_refresh_dirty_entries_and_unscoped_deletes_drop_seed(db):
+    db.ib_historical_data.insert_many(
+        [_bar("SPY", tf, datetime(2026, 1, d, 15, tzinfo=timezone.utc))
+         for tf in ("1 day", "5 mins") for d in (5, 6, 7, 8)]
+        + [_bar("QQQ", "1 day", datetime(2026, 1, 5, 15, tzinfo=timezone.utc))]
+    )
+    BC.rebuild(db)
+
+    db.ib_historical_data.delete_many({"symbol": "SPY", "bar_size": "1 day",
+                                       "date": {"$gte": "2026-01-07"}})
+    assert BC.record_deletes(db, [("SPY", "1 day")]) == 1
+    db.ib_historical_data.delete_many({"symbol": "QQQ"})
+    assert BC.record_deletes(db, [("QQQ", None)]) == 1
+    assert BC.bar_counts(db, "1 day") == {"SPY": 2}
+    assert BC.latest_by_symbol(db, "1 day")["SPY"].startswith("2026-01-06")
+    assert BC.bar_counts(db, "5 mins") == {"SPY": 4}
+    assert db.bar_catalog.count_documents({"dirty": {"$exists": True}}) == 0
+    assert BC.rebuild(db)["drifted"] == 0
+
+    assert BC.is_ready(db)
+    BC.record_deletes(db, None)
+    assert not BC.is_ready(db)
+    BC.rebuild(db)
+    assert BC.is_ready(db)
+
+
+def test_startup_seed_runs_once(db):
+    db.ib_historical_data.insert_one(_bar("SPY", "1 day", datetime(2026, 1, 5, tzinfo=timezone.utc)))
+    assert not BC.is_ready(db)
+    report = asyncio.run(BC.seed_if_unready(db, delay_s=0))
+    assert report["entries"] == 1 and BC.is_ready(db)
+    assert asyncio.run(BC.seed_if_unready(db, delay_s=0)) is None
+
+
+def test_day_key_shapes():
+    assert BC.day_key("20260610 09:30:00") == "2026-06-10"
+    assert BC.day_key("2026-06-10T09:30:00-04:00") == "2026-06-10"
+    assert BC.day_key("20260610") == "2026-06-10"
+    assert BC.day_key("garbage") is None
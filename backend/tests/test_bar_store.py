@@ -0,0 +1,146 @@
+"""
+In-process columnar bar store (services/bar_store.py).
+
+Locks the contract the technical snapshot relies on: chronological
+windows capped at capacity, live bar-close advancing only hydrated
+windows, bulk hydrate in one aggregation per chunk, and the
+read-through fallback in RealTimeTechnicalService.
+"""
+import asyncio
+from unittest.mock import patch
+
+import mongomock
+
+from services.bar_store import BarStore, _ts_epoch
+from services.realtime_technical_service import RealTimeTechnicalService
+
+
+def _bars(n, start_minute=0, bar_size="5 mins", symbol="SPY"):
+    out = []
+    for i in range(n):
+        m = start_minute + i * 5
+        out.append({
+            "symbol": symbol, "bar_size": bar_size,
+            "date": f"2026-02-10T{14 + m // 60:02d}:{m % 60:02d}:00+00:00",
+            "open": 100 + i, "high": 101 + i, "low": 99 + i, "close": 100.5 + i,
+            "volume": 1000 + i,
+        })
+    return out
+
+
+def test_load_keeps_newest_capacity_in_order():
+    store = BarStore({"5 mins": 5})
+    store.load("spy", "5 mins", list(reversed(_bars(8))))
+    bars = store.get_bars("SPY", "5 mins")
+    assert [b["open"] for b in bars] == [103, 104, 105, 106, 107]
+    assert bars[0]["timestamp"] < bars[-1]["timestamp"]
+    assert isinstance(bars[0]["volume"], int)
+
+
+def test_bar_close_advances_only_existing_windows():
+    store = BarStore({"5 mins": 3})
+    live = _bars(1, start_minute=60)[0]
+    assert store.on_bar_close(live) is False  # never seeded → ignored
+    assert store.get_bars("SPY", "5 mins") is None
+
+    store.load("SPY", "5 mins", _bars(3))
+    assert store.on_bar_close(live) is True
+    assert [b["open"] for b in store.get_bars("SPY", "5 mins")] == [101, 102, 100]
+
+
+def test_bar_close_same_timestamp_overwrites_and_older_is_ignored():
+    store = BarStore({"5 mins": 5})
+    store.load("SPY", "5 mins", _bars(3))
+    tail = dict(_bars(3)[-1], close=999.0)
+    assert store.on_bar_close(tail) is True
+    assert store.get_bars("SPY", "5 mins")[-1]["close"] == 999.0
+    assert len(store.get_bars("SPY", "5 mins")) == 3
+    assert store.on_bar_close(_bars(1)[0] | {"close": 1.0}) is False
+
+
+def test_ib_and_iso_timestamps_order_by_time_not_string():
+    # 09:35 ET == 14:35 UTC (EST). As strings the ISO form sorts first.
+    assert _ts_epoch("20260210 09:35:00") == _ts_epoch("2026-02-10T14:35:00+00:00")
+    store = BarStore({"5 mins": 5})
+    store.load("SPY", "5 mins", [
+        {"date": "20260210 09:30:00", "open": 1, "high": 1, "low": 1, "close": 1, "volume": 1},
+        {"date": "20260210 09:35:00", "open": 2, "high": 2, "low": 2, "close": 2, "volume": 1},
+    ])
+    store.on_bar_close({"symbol": "SPY", "bar_size": "5 mins",
+                        "date": "2026-02-10T14:40:00+00:00",
+                        "open": 3, "high": 3, "low": 3, "close": 3, "volume": 1})
+    assert [b["open"] for b in store.get_bars("SPY", "5 mins")] == [1, 2, 3]
+
+
+def test_get_arrays_are_views_of_trailing_bars():
+    store = BarStore({"5 mins": 10})
+    store.load("SPY", "5 mins", _bars(6))
+    arr = store.get_arrays("SPY", "5 mins", limit=4)
+    assert list(arr["open"]) == [102, 103, 104, 105]
+    assert arr["close"].base is not None  # slice, not a copy
+
+
+def test_disabled_and_expired_windows_miss(monkeypatch):
+    store = BarStore({"5 mins": 10})
+    store.load("SPY", "5 mins", _bars(6))
+    monkeypatch.setenv("BAR_STORE_ENABLED", "false")
+    assert store.get_bars("SPY", "5 mins") is None
+    monkeypatch.setenv("BAR_STORE_ENABLED", "true")
+    assert store.get_bars("SPY", "5 mins", max_age_sec=-1) is None
+    assert store.stats()["misses"] == 1  # disabled reads don't count
+
+
+def test_hydrate_one_query_per_chunk():
+    db = mongomock.MongoClient()["t"]
+    for sym in ("AAA", "BBB", "CCC"):
+        db["ib_historical_data"].insert_many(_bars(8, symbol=sym))
+    store = BarStore({"5 mins": 5})
+    summary = store.hydrate(db, ["AAA", "bbb", "CCC", "ZZZ"], "5 mins", chunk_size=2)
+    assert summary["queries"] == 2
+    assert summary["symbols_loaded"] == 3
+    bars = store.get_bars("BBB", "5 mins")
+    assert [b["open"] for b in bars] == [103, 104, 105, 106, 107]
+    assert store.get_bars("ZZZ", "5 mins") is None
+
+
+def test_technical_service_reads_store_without_mongo():
+    svc = RealTimeTechnicalService()
+    svc.set_db(mongomock.MongoClient()["t"])
+    store = BarStore()
+    svc.set_bar_store(store)
+    store.load("SPY", "5 mins", _bars(20))
+    with patch.object(svc, "_get_intraday_bars_from_db") as mongo:
+        bars = asyncio.run(svc._get_intraday_bars("SPY", "5 mins", 78))
+    mongo.assert_not_called()
+    assert len(bars) == 20
+
+
+def test_technical_service_miss_falls_back_and_seeds_store():
+    svc = RealTimeTechnicalService()
+    svc.set_db(mongomock.MongoClient()["t"])
+    store = BarStore()
+    svc.set_bar_store(store)
+    daily = [{"timestamp": f"2026-01-{d:02d}", "open": 1, "high": 2, "low": 0.5,
+              "close": 1.5, "volume": 10} for d in range(1, 16)]
+    with patch.object(svc, "_get_daily_bars_from_db", return_value=daily) as mongo:
+        first = asyncio.run(svc._get_daily_bars("AAPL", 50))
+        second = asyncio.run(svc._get_daily_bars("AAPL", 50))
+    assert mongo.call_count == 1
+    assert first == second
+
+
+def test_persister_notifies_bar_close_listeners():
+    from datetime import datetime, timezone
+    from services.tick_to_bar_persister import TickToBarPersister
+
+    p = TickToBarPersister(db=None)
+    seen = []
+    p.add_bar_close_listener(seen.extend)
+    t1 = datetime(2026, 4, 28, 14, 30, 5, tzinfo=timezone.utc)
+    with patch("services.tick_to_bar_persister.datetime") as dt_mock:
+        dt_mock.now.return_value = t1
+        dt_mock.fromtimestamp = datetime.fromtimestamp
+        p.on_push({"SPY": {"last": 500.0, "volume": 1_000}})
+        dt_mock.now.return_value = t1.replace(minute=31)
+        p.on_push({"SPY": {"last": 501.0, "volume": 1_100}})
+    assert [b["bar_size"] for b in seen] == ["1 min"]
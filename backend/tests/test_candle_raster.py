@@ -0,0 +1,120 @@
+"""
+NumPy candlestick rasterizer (services/ai_modules/candle_raster.py).
+
+Parity: the raster must line up with the mplfinance PNG the CNN path used
+to render — same panels, candle placement and up/down colours — compared
+on 8x8-pixel block maps after resizing the PNG to CNN_IMAGE_SIZE exactly
+as the torchvision transform does.
+"""
+import io
+
+import mongomock
+import numpy as np
+import pytest
+from PIL import Image
+
+from services.ai_modules import chart_image_generator as cig
+from services.ai_modules.candle_raster import (
+    CNN_IMAGE_SIZE, ohlcv_arrays, rasterize_bars, rasterize_windows,
+)
+
+
+def _bars(seed, n):
+    rng = np.random.default_rng(seed)
+    closes = 100 * np.cumprod(1 + rng.normal(0, 0.01, n))
+    out = []
+    for i, c in enumerate(closes):
+        o = c * (1 + rng.normal(0, 0.005))
+        out.append({
+            "date": f"2026-01-{1 + i // 48:02d}T{8 + i % 48 // 4:02d}:{(i % 4) * 15:02d}:00",
+            "open": o, "high": max(o, c) * (1 + abs(rng.normal(0, 0.004))),
+            "low": min(o, c) * (1 - abs(rng.normal(0, 0.004))), "close": c,
+            "volume": float(rng.integers(100_000, 1_000_000)),
+        })
+    return out
+
+
+def _block_maps(img):
+    img = img.astype(float)
+    r, g, b = img[..., 0], img[..., 1], img[..., 2]
+    ink = np.abs(img - 10).sum(-1) > 40
+    red = (r > g + 30) & (r > b + 30)
+    green = (g > r + 30) & (b > r) & (g >= b - 20)
+    blocks = CNN_IMAGE_SIZE // 8
+    return [m.astype(float).reshape(blocks, 8, blocks, 8).mean((1, 3)).ravel() for m in (ink, green, red)]
+
+
+@pytest.mark.parametrize("seed,n", [(1, 35), (2, 50), (3, 80)])
+def test_parity_with_mplfinance_png(seed, n):
+    bars = _bars(seed, n)
+    png = cig.generate_chart_image(cig.bars_to_dataframe(bars), CNN_IMAGE_SIZE)
+    ref = np.array(Image.open(io.BytesIO(png)).convert("RGB")
+                   .resize((CNN_IMAGE_SIZE, CNN_IMAGE_SIZE), Image.BILINEAR))
+    img = rasterize_bars(bars)
+    assert img.shape == ref.shape and img.dtype == np.uint8
+    ink, up, down = (np.corrcoef(a, b)[0, 1] for a, b in zip(_block_maps(ref), _block_maps(img)))
+    assert ink > 0.9 and up > 0.75 and down > 0.75, (ink, up, down)
+    assert np.abs(ref.astype(int) - img).mean() < 25
+
+
+def test_batch_equals_single_renders():
+    windows = [ohlcv_arrays(_bars(s, 50)) for s in range(5)]
+    batch = rasterize_windows(np.stack(windows))
+    for w, img in zip(windows, batch):
+        assert np.array_equal(rasterize_windows(w[None])[0], img)
+
+
+def test_filtering_matches_bars_to_dataframe():
+    bars = _bars(7, 30)
+    bars[3]["close"] = 0
+    bars[10]["date"] = bars[9]["date"]
+    df = cig.bars_to_dataframe(bars)
+    arr = ohlcv_arrays(bars)
+    np.testing.assert_allclose(arr, df[["Open", "High", "Low", "Close", "Volume"]].to_numpy().T)
+    assert ohlcv_arrays(bars[:4]) is None
+
+
+def test_training_images_rendered_in_batches(monkeypatch):
+    db = mongomock.MongoClient().db
+    docs = [dict(b, symbol="AAA", bar_size="1 day") for b in _bars(11, 160)]
+    docs[70]["open"] = 0  # one dirty bar → its windows take the filtered path
+    db["ib_historical_data"].insert_many(docs)
+    calls = []
+    orig = cig.generate_chart_image
+    monkeypatch.setattr(cig, "generate_chart_image", lambda *a, **k: calls.append(1) or orig(*a, **k))
+
+    samples = cig.generate_training_images_from_bars(db, "BREAKOUT", "1 day", window_size=40)
+    assert samples and not calls
+    assert all(s["image"].shape == (CNN_IMAGE_SIZE, CNN_IMAGE_SIZE, 3) for s in samples)
+
+    monkeypatch.setenv("CNN_CHART_RENDERER", "mplfinance")
+    png_samples = cig.generate_training_images_from_bars(db, "BREAKOUT", "1 day", window_size=40)
+    assert [s["window_start"] for s in png_samples] == [s["window_start"] for s in samples]
+    assert all("image_bytes" in s for s in png_samples)
+
+
+def test_live_tensor_uses_the_models_renderer(monkeypatch):
+    from services.ai_modules import candle_raster
+    db = mongomock.MongoClient().db
+    db["ib_historical_data"].insert_many([dict(b, symbol="AAA", bar_size="1 day") for b in _bars(5, 60)])
+    monkeypatch.setattr(cig, "image_bytes_to_tensor", lambda data: ("png", data))
+    monkeypatch.setattr(candle_raster, "images_to_tensor", lambda img: ("raster", img))
+
+    # No chart_renderer metadata → model predates the rasterizer → mplfinance.
+    (kind, _), meta = cig.generate_live_chart_tensor(db, "AAA", "1 day", 50)
+    assert kind == "png" and meta["renderer"] == cig.RENDERER_MPLFINANCE
+    (kind, img), meta = cig.generate_live_chart_tensor(db, "AAA", "1 day", 50, renderer="numpy")
+    assert kind == "raster" and img.shape == (CNN_IMAGE_SIZE, CNN_IMAGE_SIZE, 3)
+    assert cig.sample_renderer({"image": img}) == cig.RENDERER_NUMPY
+    assert cig.sample_renderer({"image_bytes": b""}) == cig.RENDERER_MPLFINANCE
+
+
+def test_images_to_tensor_matches_imagenet_transform():
+    torch = pytest.importorskip("torch")
+    from services.ai_modules.candle_raster import images_to_tensor
+    img = rasterize_bars(_bars(3, 50))
+    t = images_to_tensor(img)
+    assert t.shape == (3, CNN_IMAGE_SIZE, CNN_IMAGE_SIZE) and t.dtype == torch.float32
+    mean, std = np.array([0.485, 0.456, 0.406]), np.array([0.229, 0.224, 0.225])
+    np.testing.assert_allclose(t[:, 0, 0].numpy(), (10 / 255 - mean) / std, rtol=1e-5)
+    assert images_to_tensor(np.stack([img, img])).shape == (2, 3, CNN_IMAGE_SIZE, CNN_IMAGE_SIZE)
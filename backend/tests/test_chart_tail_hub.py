@@ -0,0 +1,148 @@
+"""
+Chart-tail fan-out hub: one tail fetch per (symbol, timeframe, session)
+tick shared by every `/ws/chart-tail` socket, woken by TickToBarPersister
+bar-close events and torn down when the last socket leaves.
+"""
+import asyncio
+import threading
+
+from services.chart_tail_hub import ChartTailHub, reslice_tail
+
+
+def _full(n=120, t0=1_000_000, step=300):
+    bars = [{"time": t0 + i * step, "open": 1, "high": 2, "low": 0, "close": 1, "volume": 10}
+            for i in range(n)]
+    return {
+        "bars": bars,
+        "indicators": {"ema_20": [{"time": b["time"], "value": i} for i, b in enumerate(bars)]},
+        "markers": [{"time": bars[-3]["time"], "text": "B"}],
+    }
+
+
+def _tail(full, symbol, tf, since, cap=50):
+    """Reference per-socket /chart-tail slice (mirrors get_chart_tail)."""
+    bars = [b for b in full["bars"] if b["time"] > since][-cap:]
+    times = {b["time"] for b in bars}
+    return {
+        "success": True, "symbol": symbol, "timeframe": tf, "since": since,
+        "latest_time": full["bars"][-1]["time"] if full["bars"] else since,
+        "bar_count": len(bars), "bars": bars,
+        "indicators": {k: [p for p in v if p["time"] in times] for k, v in full["indicators"].items()},
+        "markers": [m for m in full["markers"] if m["time"] > since],
+        "from_cache": True, "cache": "hit",
+    }
+
+
+class _Feed:
+    def __init__(self):
+        self.full = _full()
+        self.calls = []
+
+    async def fetch(self, symbol, tf, session, since, fresh):
+        self.calls.append((symbol, tf, session, since, fresh))
+        return _tail(self.full, symbol, tf, since)
+
+    def close_bar(self):
+        t = self.full["bars"][-1]["time"] + 300
+        self.full["bars"].append({"time": t, "open": 1, "high": 2, "low": 0, "close": 1, "volume": 5})
+        self.full["indicators"]["ema_20"].append({"time": t, "value": 0})
+
+
+def _sink():
+    frames = []
+
+    async def send(frame):
+        frames.append(frame)
+    return frames, send
+
+
+def test_reslice_matches_direct_tail():
+    full = _full()
+    shared = _tail(full, "SPY", "5min", 0)
+    for since in (0, full["bars"][60]["time"], full["bars"][-2]["time"], full["bars"][-1]["time"]):
+        got = reslice_tail(shared, since)
+        want = _tail(full, "SPY", "5min", since)
+        assert got == want
+
+
+def test_one_fetch_fans_out_to_all_sockets(monkeypatch):
+    monkeypatch.setenv("CHART_TAIL_SETTLE_S", "0")
+    feed = _Feed()
+    hub = ChartTailHub(feed.fetch, tick_s=lambda: 60.0)
+    cursors = [0, feed.full["bars"][100]["time"], feed.full["bars"][-1]["time"]]
+
+    async def main():
+        sinks = [_sink() for _ in cursors]
+        tokens = [hub.subscribe("spy", "5min", "rth_plus_premarket", c, send)
+                  for c, (_, send) in zip(cursors, sinks)]
+        await asyncio.sleep(0.05)
+        assert len(feed.calls) == 1 and feed.calls[0][3] == 0  # min cursor, one query
+        for c, (frames, _) in zip(cursors, sinks):
+            want = _tail(feed.full, "SPY", "5min", c)
+            if want["bar_count"]:
+                assert len(frames) == 1 and frames[0]["from_ws"] is True
+                assert {k: frames[0][k] for k in want} == want
+            else:
+                assert frames == []
+
+        # A 5-min bar closes on the persister thread → one more fetch,
+        # every socket gets exactly the new bar.
+        feed.close_bar()
+        th = threading.Thread(target=hub.on_bars_closed,
+                              args=([{"symbol": "SPY", "bar_size": "5 mins", "date": "x"},
+                                     {"symbol": "QQQ", "bar_size": "5 mins", "date": "x"}],))
+        th.start()
+        th.join()
+        await asyncio.sleep(0.05)
+        assert len(feed.calls) == 2 and feed.calls[1][4] is True  # fresh read after bar close
+        new_t = feed.full["bars"][-1]["time"]
+        for frames, _ in sinks:
+            assert [b["time"] for b in frames[-1]["bars"]] == [new_t]
+        assert hub.stats()["publishers"] == 1 and hub.stats()["subscribers"] == 3
+
+        for tok in tokens:
+            hub.unsubscribe(tok)
+        await asyncio.sleep(0)
+        assert hub.stats()["publishers"] == 0
+
+    asyncio.run(main())
+
+
+def test_other_timeframes_and_idle_publishers_not_woken(monkeypatch):
+    monkeypatch.setenv("CHART_TAIL_SETTLE_S", "0")
+    feed = _Feed()
+    hub = ChartTailHub(feed.fetch, tick_s=lambda: 60.0)
+
+    async def main():
+        _, send = _sink()
+        tok = hub.subscribe("SPY", "1min", "rth_plus_premarket", 0, send)
+        await asyncio.sleep(0.02)
+        n = len(feed.calls)
+        hub.on_bars_closed([{"symbol": "SPY", "bar_size": "5 mins"}])
+        await asyncio.sleep(0.02)
+        assert len(feed.calls) == n
+        hub.unsubscribe(tok)
+        await asyncio.sleep(0)
+        hub.on_bars_closed([{"symbol": "SPY", "bar_size": "1 min"}])
+        await asyncio.sleep(0.02)
+        assert len(feed.calls) == n
+
+    asyncio.run(main())
+
+
+def test_dead_socket_does_not_block_broadcast(monkeypatch):
+    monkeypatch.setenv("CHART_TAIL_SEND_TIMEOUT_S", "0.05")
+    feed = _Feed()
+    hub = ChartTailHub(feed.fetch, tick_s=lambda: 60.0)
+
+    async def stuck(frame):
+        await asyncio.sleep(10)
+
+    async def main():
+        frames, send = _sink()
+        hub.subscribe("SPY", "5min", "rth", 0, stuck)
+        hub.subscribe("SPY", "5min", "rth", 0, send)
+        await asyncio.sleep(0.2)
+        assert len(frames) == 1 and hub.stats()["send_failures"] == 1
+
+    asyncio.run(main())
@@ -0,0 +1,87 @@
+"""
+Columnar NVMe bar cache (services/ai_modules/columnar_bars.py).
+
+training_pipeline caches bars as memory-mapped OHLCV + date .npy files
+instead of pickled dict lists. Cached bars must read back identically
+(as dicts), expose zero-copy columns, survive pickling into pool workers
+as a path reference, keep the `_fh` hold-out tag in their identity and
+fall back to pickle for rows the columnar form can't represent.
+"""
+import pickle
+
+import numpy as np
+import pytest
+
+from services.ai_modules import columnar_bars as cb
+from services.ai_modules import training_pipeline as tp
+from services.ai_modules.timeseries_features import TimeSeriesFeatureEngineer
+
+
+def _bars(n=300):
+    rng = np.random.default_rng(4)
+    closes = 50 + np.cumsum(rng.normal(0, 0.5, n))
+    return [
+        {"date": f"2025-{1 + i // 28 % 12:02d}-{1 + i % 28:02d}", "open": float(c - 0.1),
+         "high": float(c + 0.4), "low": float(c - 0.5), "close": float(c), "volume": 1000 + i}
+        for i, c in enumerate(closes)
+    ]
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(tp, "BAR_CACHE_DIR", str(tmp_path / "bars"))
+    monkeypatch.setenv("TB_FROZEN_HOLDOUT_DAYS", "45")
+    return tmp_path
+
+
+def test_round_trip_as_dicts_and_columns(cache_dir):
+    bars = _bars()
+    tp._cache_bars_to_disk("AAPL", "1 day", bars)
+    loaded = tp._load_bars_from_disk("AAPL", "1 day")
+    assert isinstance(loaded, cb.ColumnarBars)
+    assert len(loaded) == len(bars)
+    assert list(loaded) == bars
+    assert loaded[-1] == bars[-1] and loaded[5] == bars[5]
+    assert list(loaded[10:20]) == bars[10:20]
+    closes = cb.bar_column(loaded, "close")
+    assert np.shares_memory(closes, loaded.column("close"))
+    assert np.array_equal(closes, [b["close"] for b in bars])
+    assert not (cache_dir / "bars" / "1_day" / "AAPL_fh45.pkl").exists()
+
+
+def test_pickle_ships_paths_not_bars(cache_dir):
+    tp._cache_bars_to_disk("MSFT", "1 day", _bars())
+    loaded = tp._load_bars_from_disk("MSFT", "1 day")[100:200]
+    blob = pickle.dumps(loaded)
+    assert len(blob) < 500
+    again = pickle.loads(blob)
+    assert list(again) == list(loaded)
+    # Unbacked instances pickle their data instead.
+    mem = cb.ColumnarBars(*cb.from_bars(_bars(20)))
+    assert list(pickle.loads(pickle.dumps(mem))) == _bars(20)
+
+
+def test_holdout_tag_keeps_cache_identity(cache_dir, monkeypatch):
+    tp._cache_bars_to_disk("NVDA", "1 day", _bars())
+    assert tp._load_bars_from_disk("NVDA", "1 day") is not None
+    monkeypatch.setenv("TB_FROZEN_HOLDOUT_DAYS", "30")
+    assert tp._load_bars_from_disk("NVDA", "1 day") is None
+
+
+def test_irregular_bars_fall_back_to_pickle(cache_dir):
+    bars = _bars(50)
+    bars[3]["close"] = None
+    tp._cache_bars_to_disk("ODD", "1 day", bars)
+    assert (cache_dir / "bars" / "1_day" / "ODD_fh45.pkl").exists()
+    assert tp._load_bars_from_disk("ODD", "1 day") == bars
+    extra = _bars(50)
+    extra[0]["vwap"] = 1.0
+    assert cb.from_bars(extra) is None
+
+
+def test_features_identical_on_columnar_bars(cache_dir):
+    bars = _bars()
+    tp._cache_bars_to_disk("AMD", "1 day", bars)
+    loaded = tp._load_bars_from_disk("AMD", "1 day")
+    fe = TimeSeriesFeatureEngineer(50)
+    assert np.array_equal(fe.extract_features_bulk(bars), fe.extract_features_bulk(loaded))
@@ -0,0 +1,115 @@
+"""
+Decision-trail rollups: the scorecard vote breakdown and the funnel's
+shadow stages read compacted per-day counters for whole days + the raw
+edges, and must equal the raw-window computation exactly.
+"""
+import random
+from datetime import datetime, timedelta, timezone
+
+import mongomock
+import pytest
+
+from services import decision_rollups as DR
+from services import decision_trail as DT
+
+
+def _decision(rng, ts):
+    return {
+        "id": f"sd_{rng.random()}",
+        "trigger_time": ts.isoformat(),
+        "combined_recommendation": rng.choice(["proceed", "pass", "reduce_size", "PROCEED", ""]),
+        "was_executed": rng.random() < 0.2,
+        "debate_result": rng.choice([{}, {"winner": "bull"}, {"winner": "bear"}, {"winner": "tie"}]),
+        "risk_assessment": rng.choice([{}, {"recommendation": "proceed"}, {"recommendation": "REJECT"},
+                                       {"recommendation": "reduce"}, {"recommendation": "block"}]),
+        "institutional_context": rng.choice([{}, {"flow_signal": "buying"}, {"flow_signal": "mixed"}]),
+        "timeseries_forecast": rng.choice([{}, {"direction": "up"}, {"direction": "short"}, {"direction": "flat"}]),
+    }
+
+
+@pytest.fixture
+def db():
+    d = mongomock.MongoClient().db
+    rng = random.Random(3)
+    now = datetime.now(timezone.utc)
+    d.shadow_decisions.insert_many([
+        _decision(rng, now - timedelta(minutes=rng.randint(1, 12 * 24 * 60))) for _ in range(600)
+    ])
+    return d
+
+
+def _raw(db, days, monkeypatch):
+    monkeypatch.setenv("DECISION_ROLLUPS", "false")
+    try:
+        return DT.build_module_scorecard(db, days)["vote_breakdown"], DT.build_pipeline_funnel(db, days)["stages"]
+    finally:
+        monkeypatch.setenv("DECISION_ROLLUPS", "true")
+
+
+@pytest.mark.parametrize("days", [1, 2, 7, 10])
+def test_rollup_reads_match_raw_window(db, days, monkeypatch):
+    want_votes, want_stages = _raw(db, days, monkeypatch)
+    got_votes = DT.build_module_scorecard(db, days)["vote_breakdown"]
+    got_stages = DT.build_pipeline_funnel(db, days)["stages"]
+    assert got_votes == want_votes
+    assert [s["count"] for s in got_stages] == [s["count"] for s in want_stages]
+    # Second read is served from the compacted days.
+    assert DT.build_module_scorecard(db, days)["vote_breakdown"] == want_votes
+
+
+def test_write_time_counters_match_compaction(db):
+    live = mongomock.MongoClient().db
+    for d in db.shadow_decisions.find({}, {"_id": 0}):
+        row = dict(d, was_executed=False)
+        live.shadow_decisions.insert_one(dict(row))
+        DR.record_decision(live, row)
+        if d["was_executed"]:
+            live.shadow_decisions.update_one({"id": d["id"]}, {"$set": {"was_executed": True}})
+            DR.record_executed(live, d["trigger_time"])
+    today = datetime.now(timezone.utc).date().isoformat()
+    before = {x["day"]: x for x in live[DR.ROLLUP_COLLECTION].find({}, {"_id": 0})}
+    drift0 = DR.stats()["compaction_drift"]
+    sealed = DR.compact_closed_days(live)
+    assert sealed == sorted(d for d in before if d < today)
+    assert DR.stats()["compaction_drift"] == drift0
+    for day in sealed:
+        doc = live[DR.ROLLUP_COLLECTION].find_one({"day": day})
+        assert doc["compacted"] is True
+        assert DR.add_counters(DR.empty_counters(), doc) == \
+            DR.add_counters(DR.empty_counters(), before[day])
+    assert live[DR.ROLLUP_COLLECTION].find_one({"day": today})["compacted"] is False
+
+
+def test_split_window_edges():
+    now = datetime(2026, 6, 10, 15, 0, tzinfo=timezone.utc)
+    ranges, days = DR.split_window((now - timedelta(days=1)).isoformat(), now)
+    assert days == [] and ranges == [((now - timedelta(days=1)).isoformat(), None)]
+    cutoff = (now - timedelta(days=3)).isoformat()
+    ranges, days = DR.split_window(cutoff, now)
+    assert days == ["2026-06-08", "2026-06-09"]
+    assert ranges == [(cutoff, "2026-06-08"), ("2026-06-10", None)]
+
+
+def test_mark_executed_counts_each_flip_once(db):
+    import asyncio
+
+    from services.ai_modules.shadow_tracker import ShadowTracker
+
+    tracker = ShadowTracker()
+    tracker._db, tracker._decisions_col = db, db.shadow_decisions
+    d = db.shadow_decisions.find_one({"was_executed": False}, {"_id": 0, "id": 1, "trigger_time": 1})
+    day = DR._day_of(d["trigger_time"])
+
+    def fired():
+        doc = db[DR.ROLLUP_COLLECTION].find_one({"day": day}) or {}
+        return (doc.get("funnel") or {}).get("fired_via_shadow", 0)
+
+    before = fired()
+
+    async def race():
+        return await asyncio.gather(*(tracker.mark_executed(d["id"], trade_id=f"bt_{i}") for i in range(3)))
+
+    results = asyncio.run(race())
+    assert all(r["success"] for r in results)
+    assert fired() == before + 1
+    assert db.shadow_decisions.find_one({"id": d["id"]})["was_executed"] is True
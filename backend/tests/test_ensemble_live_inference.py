@@ -14,8 +14,9 @@ import pytest
 
 from services.ai_modules.ensemble_live_inference import (
     SCANNER_TO_ENSEMBLE_KEY, bet_size_multiplier_from_p_win, predict_meta_label_p_win,
-    clear_model_cache, _cached_gbm_load, _MODEL_CACHE, MODEL_CACHE_TTL_S,
+    clear_model_cache, _cached_gbm_load,
 )
+from services.ai_modules.model_registry import get_model_registry
 
 
 def test_bet_size_forces_zero_below_50_pct():
@@ -210,7 +211,7 @@ def test_cache_returns_none_on_missing_model_and_does_not_cache():
         g = _cached_gbm_load(db, "never_trained_model", 5)
 
     assert g is None
-    assert "never_trained_model" not in _MODEL_CACHE, (
+    assert "never_trained_model" not in get_model_registry().stats()["models"], (
         "Cache must not store None — next retrain must have a clean slot to fill"
     )
 
@@ -225,12 +226,34 @@ def test_clear_model_cache_empties_all_entries():
         _cached_gbm_load(db, "m1", 5)
         _cached_gbm_load(db, "m2", 5)
 
-    assert len(_MODEL_CACHE) == 2
+    assert get_model_registry().stats()["entries"] == 2
     evicted = clear_model_cache()
     assert evicted == 2
-    assert len(_MODEL_CACHE) == 0
+    assert get_model_registry().stats()["entries"] == 0
 
 
-def test_cache_ttl_is_ten_minutes():
-    """Lock in the 10-minute TTL as a stable contract."""
-    assert MODEL_CACHE_TTL_S == 600
+def test_cache_reloads_only_on_version_change():
+    """No fixed TTL: a cached model is reused until its Mongo version stamp changes."""
+    import mongomock
+    clear_model_cache()
+    db = mongomock.MongoClient().db
+    db["timeseries_models"].insert_one({"name": "m_ver", "version": "v1", "updated_at": "t1"})
+    built = []
+
+    def _make(model_name=None, forecast_horizon=None):
+        m = MagicMock()
+        m._model = MagicMock()
+        built.append(m)
+        return m
+
+    reg = get_model_registry()
+    with patch("services.ai_modules.timeseries_gbm.TimeSeriesGBM", side_effect=_make), \
+            patch.object(reg, "poll_s", 0.0):
+        g1 = _cached_gbm_load(db, "m_ver", 5)
+        assert _cached_gbm_load(db, "m_ver", 5) is g1
+        db["timeseries_models"].update_one({"name": "m_ver"}, {"$set": {"version": "v2"}})
+        g2 = _cached_gbm_load(db, "m_ver", 5)
+
+    assert g2 is not g1 and len(built) == 2
+    assert reg.stats()["entries"] == 1  # superseded version dropped
+    clear_model_cache()
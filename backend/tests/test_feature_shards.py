@@ -0,0 +1,99 @@
+"""
+Out-of-core feature shards: the shards must read back exactly what was
+appended, external-memory training must match the in-memory DMatrix, and
+the CPCV / baseline subsamples taken from shards must equal what those
+helpers draw from the full matrix.
+"""
+import os
+
+import numpy as np
+import pytest
+import xgboost as xgb
+
+from services.ai_modules import feature_shards as FS
+from services.ai_modules.feature_baseline import compute_feature_baseline
+from services.ai_modules.timeseries_gbm import _cpcv_fallback_intervals, run_gbm_cpcv
+
+NAMES = [f"f{i}" for i in range(6)]
+
+
+@pytest.fixture
+def data():
+    rng = np.random.default_rng(3)
+    X = rng.normal(size=(6000, len(NAMES))).astype(np.float32)
+    y = ((X[:, 0] + X[:, 1] > 0).astype(np.int64) + (X[:, 2] > 1)).astype(np.float32)
+    return X, y
+
+
+@pytest.fixture
+def shards(data):
+    X, y = data
+    with FS.ShardWriter("test", shard_rows=1000) as w:
+        for lo in range(0, len(X), 1700):
+            w.append(X[lo:lo + 1700], y[lo:lo + 1700])
+        yield w.finish()
+
+
+def test_round_trip(data, shards):
+    X, y = data
+    assert shards.rows == len(X) and len(shards.files) == 7
+    np.testing.assert_array_equal(shards.labels(), y)
+    np.testing.assert_array_equal(shards.labels(2500, 4200), y[2500:4200])
+    rows = FS.sample_rows(len(X), 700, 42)
+    np.testing.assert_array_equal(shards.take(rows), X[rows])
+
+
+def test_append_rejects_mismatched_chunks(tmp_path):
+    w = FS.ShardWriter("bad", root=str(tmp_path))
+    w.append(np.zeros((3, 2), np.float32), np.zeros(3, np.float32))
+    with pytest.raises(ValueError):
+        w.append(np.zeros((3, 4), np.float32), np.zeros(3, np.float32))
+    with pytest.raises(ValueError):
+        w.append(np.zeros((3, 2), np.float32), np.zeros(2, np.float32))
+    w.close()
+
+
+def test_external_memory_training_matches_in_memory(data, shards):
+    X, y = data
+    params = {"objective": "multi:softprob", "num_class": 3, "tree_method": "hist",
+              "max_bin": 256, "device": "cpu", "seed": 0}
+    w = np.linspace(0.5, 1.5, 4500).astype(np.float32)
+    dtrain = shards.dmatrix(0, 4500, weight=w, feature_names=NAMES, max_bin=256)
+    dval = shards.dmatrix(4800, 6000, feature_names=NAMES, max_bin=256, ref=dtrain)
+    assert dtrain.num_row() == 4500 and dval.num_row() == 1200
+    booster = xgb.train(params, dtrain, 20, evals=[(dval, "val")], verbose_eval=False)
+    ooc = shards.predict(booster, 4800, 6000, NAMES)
+
+    ref = xgb.train(params, xgb.DMatrix(X[:4500], label=y[:4500], weight=w, feature_names=NAMES), 20)
+    mem = ref.predict(xgb.DMatrix(X[4800:], feature_names=NAMES))
+    assert ooc.shape == mem.shape == (1200, 3)
+    assert np.mean(ooc.argmax(1) == mem.argmax(1)) > 0.97
+
+
+def test_cpcv_and_baseline_samples_match_full_matrix(data, shards, monkeypatch):
+    X, y = data
+    monkeypatch.setenv("TB_GBM_CPCV_MAX_ROWS", "1500")
+    monkeypatch.setenv("TB_GBM_CPCV_BOOST_ROUNDS", "20")
+    params = {"objective": "multi:softprob", "num_class": 3, "tree_method": "hist",
+              "device": "cpu", "seed": 0}
+    full = run_gbm_cpcv(X, y.astype(np.int64), None, None, params, num_boost_round=20, forecast_horizon=5)
+    rows = FS.sample_rows(len(y), 1500, 42)
+    iv = _cpcv_fallback_intervals(len(y), 5)[rows]
+    sub = run_gbm_cpcv(shards.take(rows), y[rows].astype(np.int64), None, iv, params,
+                       num_boost_round=20, forecast_horizon=5)
+    assert sub == full
+
+    base_rows = FS.sample_rows(len(y), 2000, 7)
+    got = compute_feature_baseline(shards.take(base_rows), NAMES, max_rows=2000, n_total=len(y))
+    want = compute_feature_baseline(X, NAMES, max_rows=2000)
+    got.pop("captured_at"), want.pop("captured_at")
+    assert got == want
+
+
+def test_close_removes_directory(data):
+    w = FS.ShardWriter("gone")
+    w.append(*data)
+    root = w.finish().root
+    assert os.path.isdir(root)
+    w.close()
+    assert not os.path.exists(root)
@@ -0,0 +1,129 @@
+"""
+Single-round-trip bar fetch + deferred P-WIRE shadows for
+ConfidenceGate._get_live_prediction.
+
+All bar sizes the live prediction and its multi-TF shadows need come from
+one `$unionWith` aggregation (`fetch_recent_bars_multi`), and with
+`defer_shadows` the shadow computation is handed back as a pending job
+that evaluate() attaches to the logged decision afterwards.
+"""
+import asyncio
+
+import mongomock
+
+from services.ai_modules import confidence_gate as cg
+
+
+def _seed(col, symbol="AAPL", sizes=("1 min", "5 mins", "15 mins", "1 day"), n=260):
+    docs = []
+    for bs in sizes:
+        for i in range(n):
+            docs.append({"symbol": symbol, "bar_size": bs, "date": f"2026-06-01T{i // 60:02d}:{i % 60:02d}",
+                         "open": 10.0 + i, "high": 11.0 + i, "low": 9.0 + i, "close": 10.5 + i,
+                         "volume": 1000 + i, "vwap": 10.2, "source": "ib"})
+    col.insert_many(docs)
+
+
+class _UnionCollection:
+    """mongomock lacks $unionWith: run each branch separately, count round trips."""
+
+    def __init__(self, col):
+        self._col = col
+        self.name = col.name
+        self.aggregate_calls = 0
+        self.find_calls = 0
+
+    def aggregate(self, pipeline):
+        self.aggregate_calls += 1
+        head = [st for st in pipeline if "$unionWith" not in st]
+        rows = list(self._col.aggregate(head))
+        for st in pipeline:
+            if "$unionWith" in st:
+                rows += list(self._col.aggregate(st["$unionWith"]["pipeline"]))
+        return iter(rows)
+
+    def find(self, *a, **k):
+        self.find_calls += 1
+        return self._col.find(*a, **k)
+
+
+class _DB:
+    def __init__(self, col):
+        self.col = col
+
+    def __getitem__(self, name):
+        return self.col
+
+
+def _expected(col, bs, limit=200):
+    rows = list(col.find({"symbol": "AAPL", "bar_size": bs}, cg.RECENT_BAR_PROJECTION)
+                .sort("date", -1).limit(limit))
+    for r in rows:
+        r.pop("bar_size")
+    return rows[::-1]
+
+
+def test_one_round_trip_for_all_bar_sizes():
+    raw = mongomock.MongoClient().db.ib_historical_data
+    _seed(raw)
+    col = _UnionCollection(raw)
+    sizes = ["5 mins", "1 day", "1 min", "15 mins"]
+    got = cg.fetch_recent_bars_multi(_DB(col), "AAPL", sizes)
+    assert col.aggregate_calls == 1 and col.find_calls == 0
+    for bs in sizes:
+        assert got[bs] == _expected(raw, bs)
+        assert set(got[bs][0]) <= set(cg.RECENT_BAR_PROJECTION)  # no vwap/source/_id
+
+
+def test_falls_back_to_find_without_union_with():
+    raw = mongomock.MongoClient().db.ib_historical_data
+    _seed(raw, sizes=("5 mins", "1 day"))
+    got = cg.fetch_recent_bars_multi(_DB(raw), "AAPL", ["5 mins", "1 day", "1 min"])
+    assert got["5 mins"] == _expected(raw, "5 mins")
+    assert got["1 min"] == []
+
+
+class _FakeTS:
+    def __init__(self, db):
+        self._db = db
+
+    def predict_for_setup(self, symbol, bars, setup_type):
+        return {"direction": "up", "confidence": 0.7, "probability_up": 0.62,
+                "probability_down": 0.38, "model_used": "primary_5min",
+                "model_type": "setup_specific", "model_metrics": {}}
+
+    def predict_with_named_model(self, symbol, bars, name):
+        return {"direction": "up", "probability_up": 0.6, "probability_down": 0.4,
+                "confidence": 0.6, "model_used": name}
+
+    def classify_current_regime(self, *a, **k):
+        return "high_vol"
+
+
+def test_deferred_shadows_attach_after_decision(monkeypatch):
+    import services.ai_modules.timeseries_service as tss
+
+    raw = mongomock.MongoClient().db
+    _seed(raw["ib_historical_data"])
+    fake = _FakeTS(raw)
+    monkeypatch.setattr(tss, "get_timeseries_ai", lambda: fake)
+    monkeypatch.setattr(cg, "PWIRE_SHADOW_ENABLED", True)
+    gate = object.__new__(cg.ConfidenceGate)
+    gate._db = raw
+
+    async def main():
+        live = await gate._get_live_prediction("AAPL", "BREAKOUT", "long", defer_shadows=True)
+        assert live["has_prediction"] and "regime_shadows" not in live
+        job = live.pop("_shadow_job")
+        decision = {"decision_id": "d-1", "live_prediction": live}
+        raw["confidence_gate_log"].insert_one({"decision_id": "d-1", "live_prediction": dict(live)})
+        gate._attach_deferred_shadows(decision, job)
+        await asyncio.gather(*gate._background_tasks)
+        return decision
+
+    decision = asyncio.run(main())
+    shadows = decision["live_prediction"]["regime_shadows"]
+    assert {s["bar_size"] for s in shadows} == {"1 min", "5 mins", "15 mins"}
+    row = raw["confidence_gate_log"].find_one({"decision_id": "d-1"})
+    assert row["live_prediction"]["regime_shadow"]["bar_size"] == "5 mins"
+    assert len(row["live_prediction"]["regime_shadows"]) == 3
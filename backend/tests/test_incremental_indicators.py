@@ -0,0 +1,120 @@
+"""
+Incremental (O(1)-per-bar) indicator state (services/incremental_indicators.py).
+
+The state must reproduce the full recompute over exactly the bars the
+snapshot would use — the current ET session, capped at 78 bars — while
+bars stream in one at a time, across window eviction and session rolls.
+"""
+import random
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from services import technical_batch as tb
+from services.incremental_indicators import (
+    INTRADAY_KEYS,
+    IncrementalIndicatorRegistry,
+    IntradayIndicatorState,
+)
+from services.realtime_technical_service import RealTimeTechnicalService
+
+
+def _bars(n, start=datetime(2026, 2, 10, 9, 0, tzinfo=timezone.utc), seed=1):
+    rnd = random.Random(seed)
+    price = 100.0
+    out = []
+    for i in range(n):
+        c = max(1.0, price + rnd.uniform(-1, 1))
+        out.append({
+            "symbol": "SPY", "bar_size": "5 mins",
+            "date": (start + timedelta(minutes=5 * i)).isoformat(),
+            "open": price, "high": max(price, c) + rnd.uniform(0, 0.5),
+            "low": min(price, c) - rnd.uniform(0, 0.5), "close": c,
+            "volume": rnd.randint(100, 5000),
+        })
+        price = c
+    return out
+
+
+def _full(bars):
+    return tb.compute_batch_indicators([bars], [[]])[0]
+
+
+def _window(bars):
+    """What the snapshot sees: last 78, then current-session filter."""
+    return RealTimeTechnicalService()._filter_current_session(bars[-78:])
+
+
+@pytest.mark.parametrize("n", [1, 4, 9, 10, 15, 21, 78, 79, 120])
+def test_streaming_state_matches_full_recompute(n):
+    bars = _bars(n)  # 09:00 UTC + 5m·i stays within one ET session
+    state = IntradayIndicatorState()
+    for b in bars:
+        state.update_bar(b)
+    window = _window(bars)
+    assert state.size == len(window)
+    full = _full(window)
+    got = state.values()
+    for key in INTRADAY_KEYS:
+        assert got[key] == pytest.approx(full[key], rel=1e-9, abs=1e-9), key
+
+
+def test_new_session_resets_window():
+    day1 = _bars(30, start=datetime(2026, 2, 10, 15, 0, tzinfo=timezone.utc))
+    day2 = _bars(5, start=datetime(2026, 2, 11, 15, 0, tzinfo=timezone.utc), seed=2)
+    state = IntradayIndicatorState()
+    for b in day1 + day2:
+        state.update_bar(b)
+    assert state.size == 5
+    assert state.values()["ema_9"] == pytest.approx(_full(day2)["ema_9"])
+
+
+def test_registry_reads_incrementally_after_bar_close():
+    reg = IncrementalIndicatorRegistry()
+    bars = _bars(40)
+    snapshot_bars = [dict(b, timestamp=b["date"]) for b in bars[:39]]
+    reg.intraday_values("SPY", snapshot_bars)  # seeds
+    assert reg.stats()["reseeds"] == 1
+
+    assert reg.on_bars_closed([bars[39]]) == 1
+    after = [dict(b, timestamp=b["date"]) for b in bars]
+    vals = reg.intraday_values("SPY", after)
+    stats = reg.stats()
+    assert stats["reseeds"] == 1 and stats["incremental_reads"] == 1
+    assert vals["vwap"] == pytest.approx(_full(after)["vwap"])
+
+
+def test_registry_reseeds_when_out_of_sync():
+    reg = IncrementalIndicatorRegistry()
+    bars = [dict(b, timestamp=b["date"]) for b in _bars(20)]
+    reg.intraday_values("SPY", bars)
+    changed = bars[:-1] + [dict(bars[-1], close=bars[-1]["close"] + 1)]
+    vals = reg.intraday_values("SPY", changed)
+    assert reg.stats()["reseeds"] == 2
+    assert vals["ema_9"] == pytest.approx(_full(changed)["ema_9"])
+
+
+def test_verify_mode_catches_drift(monkeypatch):
+    monkeypatch.setenv("INCREMENTAL_INDICATORS_VERIFY", "true")
+    reg = IncrementalIndicatorRegistry()
+    bars = [dict(b, timestamp=b["date"]) for b in _bars(30)]
+    reg.intraday_values("SPY", bars)
+    reg._states["SPY"].vwap_num *= 1.01  # simulate accumulator drift
+    vals = reg.intraday_values("SPY", bars)
+    stats = reg.stats()
+    assert stats["verified"] == 2 and stats["mismatches"] == 1
+    assert vals["vwap"] == pytest.approx(_full(bars)["vwap"])
+
+
+def test_daily_values_cached_until_window_changes():
+    reg = IncrementalIndicatorRegistry()
+    daily = [dict(b, timestamp=b["date"]) for b in _bars(50)]
+    first = reg.daily_values("SPY", daily)
+    reg.daily_values("SPY", daily)
+    assert reg.stats()["daily_recomputes"] == 1
+    assert reg.stats()["daily_hits"] == 1
+    bumped = daily[:-1] + [dict(daily[-1], volume=daily[-1]["volume"] + 10)]
+    second = reg.daily_values("SPY", bumped)
+    assert reg.stats()["daily_recomputes"] == 2
+    assert second["avg_volume"] == first["avg_volume"]
+    assert second["atr"] == pytest.approx(RealTimeTechnicalService()._calculate_atr(daily, 14))
@@ -0,0 +1,158 @@
+"""
+Session liquidity table (services/liquidity_table.py).
+
+Locks the build shape (one cache read + one grouped aggregation per
+chunk), parity of the bar-derived fallbacks with the scanner's
+per-symbol helpers, the time-of-day volume curve, and that the scanner
+helpers answer from the table without touching Mongo.
+"""
+import asyncio
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from zoneinfo import ZoneInfo
+
+import mongomock
+import pytest
+
+import database
+from services import liquidity_table as lt
+from services.enhanced_scanner import EnhancedBackgroundScanner as Scanner
+from services.liquidity_table import LiquidityTable, volume_profile
+
+ET = ZoneInfo("America/New_York")
+
+
+def _daily(symbol, n=25, base=50.0):
+    today = datetime.now(timezone.utc).date()
+    out = []
+    for i in range(n):
+        c = base + (i % 5)
+        out.append({
+            "symbol": symbol, "bar_size": "1 day",
+            "date": (today - timedelta(days=n - 1 - i)).isoformat(),
+            "open": c, "high": c * 1.03, "low": c * 0.98, "close": c,
+            "volume": 1_000_000 + 10_000 * i,
+        })
+    return out
+
+
+def _sessions(symbol, n_sessions=6, shape=lambda slot: 1.0):
+    """Complete RTH sessions of 5-min bars on the last `n_sessions` weekdays."""
+    out = []
+    day = datetime.now(ET).date() - timedelta(days=1)
+    done = 0
+    while done < n_sessions:
+        if day.weekday() < 5:
+            open_et = datetime(day.year, day.month, day.day, 9, 30, tzinfo=ET)
+            for slot in range(lt.RTH_SLOTS):
+                ts = (open_et + timedelta(minutes=5 * slot)).astimezone(timezone.utc)
+                out.append({
+                    "symbol": symbol, "bar_size": "5 mins", "date": ts.isoformat(),
+                    "open": 10, "high": 10, "low": 10, "close": 10,
+                    "volume": shape(slot),
+                })
+            done += 1
+        day -= timedelta(days=1)
+    return out
+
+
+@pytest.fixture
+def db():
+    db = mongomock.MongoClient()["t"]
+    db["symbol_adv_cache"].insert_many([
+        {"symbol": "AAA", "avg_volume": 4_000_000, "avg_dollar_volume": 200_000_000,
+         "latest_close": 50.0, "adrp_20d": 3.1},
+        {"symbol": "BBB", "avg_volume": 900_000, "latest_close": 20.0},  # no dollar field
+        {"symbol": "THIN", "avg_volume": 0, "avg_dollar_volume": 0},
+    ])
+    for sym in ("AAA", "BBB", "CCC"):
+        db["ib_historical_data"].insert_many(_daily(sym))
+    db["ib_historical_data"].insert_many(_sessions("AAA"))
+    return db
+
+
+def test_build_one_cache_read_and_one_aggregation_per_chunk(db):
+    table = LiquidityTable()
+    summary = table.build(db, symbols=["AAA", "BBB", "CCC"], chunk_size=2)
+    assert summary["queries"] == 1 + 2
+    assert summary["symbols"] == 4 and summary["with_profile"] == 1
+    assert list(table._cols.symbols) == ["AAA", "BBB", "CCC", "THIN"]
+
+    aaa = table.get("aaa")
+    assert aaa["avg_dollar_volume"] == 200_000_000 and aaa["adrp_20d"] == 3.1
+    assert aaa["profile_sessions"] == 6
+    assert table.get("BBB")["avg_dollar_volume"] == 18_000_000  # backfilled
+    assert table.get("THIN")["bars_avg_volume"] is None          # not aggregated
+    assert table.get("CCC")["avg_volume"] == 0                   # bars only
+    assert table.get("ZZZ") is None
+
+
+def test_bar_fallbacks_match_scanner_helpers(db):
+    table = LiquidityTable()
+    table.build(db, symbols=["CCC"])
+    row = table.get("CCC")
+    fs = SimpleNamespace(db=db)
+    assert row["bars_avg_volume"] == asyncio.run(Scanner._fetch_single_adv(fs, "CCC"))
+    assert row["bars_adrp"] == pytest.approx(
+        asyncio.run(Scanner._compute_adrp_from_bars(fs, "CCC")))
+
+
+def test_volume_profile_follows_intraday_shape():
+    # U-shaped day: heavy open and close, quiet midday.
+    u = lambda slot: 5000 if slot < 6 or slot >= 72 else 1000
+    curve, n = volume_profile(_sessions("AAA", shape=u))
+    assert n == 6
+    assert curve[-1] == pytest.approx(1.0)
+    assert curve[5] == pytest.approx(30_000 / 126_000)
+    assert all(b >= a for a, b in zip(curve, curve[1:]))
+
+    table = LiquidityTable()
+    db = mongomock.MongoClient()["t"]
+    db["ib_historical_data"].insert_many(_sessions("AAA", shape=u))
+    table.build(db, symbols=["AAA"])
+    assert table.volume_fraction("AAA", 30) == pytest.approx(curve[5])
+    # Halfway through slot 0 → half of the first slot's share.
+    assert table.volume_fraction("AAA", 2.5) == pytest.approx(curve[0] / 2)
+    assert table.volume_fraction("AAA", 390) == pytest.approx(1.0)
+    # 30 min in, the U-shape says ~24% of the day has traded, not 30/390.
+    assert table.volume_fraction("AAA", 30) > 30 / 390
+
+
+def test_too_few_sessions_has_no_profile():
+    curve, n = volume_profile(_sessions("AAA", n_sessions=lt.MIN_PROFILE_SESSIONS - 1))
+    assert curve is None and n == lt.MIN_PROFILE_SESSIONS - 1
+
+
+def test_scanner_helpers_read_table_without_mongo(db, monkeypatch):
+    table = LiquidityTable()
+    table.build(db, symbols=["AAA", "BBB", "CCC"])
+    monkeypatch.setattr(lt, "_table", table)
+    empty = mongomock.MongoClient()["empty"]
+    monkeypatch.setattr(database, "_db", empty)  # any Mongo read would miss
+    fs = SimpleNamespace(db=empty, _adrp_cache={})
+    fs._fetch_single_adv = lambda s: Scanner._fetch_single_adv(fs, s)
+    fs._compute_adrp_from_bars = lambda s: Scanner._compute_adrp_from_bars(fs, s)
+
+    adv = asyncio.run(Scanner._get_adv_from_cache(fs, ["AAA", "BBB", "THIN"]))
+    assert adv == {"AAA": 200_000_000, "BBB": 18_000_000}
+    assert asyncio.run(Scanner._get_share_adv_for_gate(fs, "AAA")) == 4_000_000
+    # No cached share ADV → the table's 20-bar fallback, still no Mongo.
+    assert asyncio.run(Scanner._get_share_adv_for_gate(fs, "CCC")) == \
+        table.get("CCC")["bars_avg_volume"] > 0
+    assert asyncio.run(Scanner._get_adrp_for_gate(fs, "AAA")) == 3.1
+    assert asyncio.run(Scanner._get_adrp_for_gate(fs, "CCC")) == \
+        pytest.approx(table.get("CCC")["bars_adrp"])
+
+
+def test_unknown_symbols_fall_back_and_disabled_table_misses(db, monkeypatch):
+    table = LiquidityTable()
+    table.build(db, symbols=["AAA"])
+    monkeypatch.setattr(lt, "_table", table)
+    monkeypatch.setattr(database, "_db", db)
+    db["symbol_adv_cache"].insert_one({"symbol": "NEW", "avg_dollar_volume": 75_000_000})
+    fs = SimpleNamespace(db=db)
+    adv = asyncio.run(Scanner._get_adv_from_cache(fs, ["AAA", "NEW"]))
+    assert adv == {"AAA": 200_000_000, "NEW": 75_000_000}
+
+    monkeypatch.setenv("LIQUIDITY_TABLE_ENABLED", "false")
+    assert not table.ready and table.get("AAA") is None
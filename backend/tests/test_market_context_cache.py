@@ -0,0 +1,100 @@
+"""
+Market context feature cache (services/ai_modules/market_context_cache.py).
+
+predict_for_setup reads regime (SPY/QQQ/IWM) and per-symbol MTF features
+through a cache that recomputes only when a new daily bar lands. Cached
+values must equal a fresh computation, repeat calls must do no bar
+fetches, and a new daily bar must invalidate.
+"""
+from datetime import date, timedelta
+
+import mongomock
+import numpy as np
+import pytest
+
+from services.ai_modules import market_context_cache as mcc
+
+
+def _seed(db, symbol, n=80, start=date(2026, 1, 1), base=100.0):
+    rng = np.random.default_rng(abs(hash(symbol)) % 1000)
+    price = base
+    docs = []
+    for i in range(n):
+        price *= 1 + rng.normal(0, 0.01)
+        d = (start + timedelta(days=i)).isoformat()
+        docs.append({"symbol": symbol, "bar_size": "1 day", "date": d,
+                     "open": price * 0.99, "high": price * 1.01, "low": price * 0.98,
+                     "close": price, "volume": 1_000_000 + i})
+    db["ib_historical_data"].insert_many(docs)
+
+
+@pytest.fixture
+def db():
+    d = mongomock.MongoClient().db
+    for s in ("SPY", "QQQ", "IWM", "AAPL"):
+        _seed(d, s)
+    return d
+
+
+class _CountingDB:
+    """Counts full `find` fetches (probes use find_one)."""
+
+    def __init__(self, db):
+        self._db = db
+        self.finds = 0
+
+    def __getitem__(self, name):
+        outer = self
+        col = self._db[name]
+
+        class _Col:
+            def find(self, *a, **k):
+                outer.finds += 1
+                return col.find(*a, **k)
+
+            def find_one(self, *a, **k):
+                return col.find_one(*a, **k)
+
+        return _Col()
+
+
+def test_cached_values_match_fresh_compute(db):
+    cache = mcc.MarketContextCache(ttl_s=300)
+    assert cache.regime_features(db) == mcc.compute_regime_features(db)
+    assert cache.mtf_features(db, "AAPL") == mcc.compute_mtf_features(db, "AAPL")
+
+
+def test_repeat_calls_do_no_bar_io(db):
+    counting = _CountingDB(db)
+    cache = mcc.MarketContextCache(ttl_s=300)
+    cache.regime_features(counting)
+    cache.mtf_features(counting, "AAPL")
+    assert counting.finds == 4
+    for _ in range(20):
+        cache.regime_features(counting)
+        cache.mtf_features(counting, "AAPL")
+    assert counting.finds == 4
+    assert cache.stats()["hits"] == 40
+
+
+def test_revalidation_only_refetches_on_new_daily_bar(db):
+    counting = _CountingDB(db)
+    cache = mcc.MarketContextCache(ttl_s=0)  # probe on every call
+    first = cache.mtf_features(counting, "AAPL")
+    cache.mtf_features(counting, "AAPL")
+    assert counting.finds == 1 and cache.stats()["revalidated"] == 1
+    _seed(db, "AAPL", n=1, start=date(2026, 6, 1), base=150.0)
+    second = cache.mtf_features(counting, "AAPL")
+    assert counting.finds == 2
+    assert second != first
+
+
+def test_lru_bound_and_disable(db, monkeypatch):
+    cache = mcc.MarketContextCache(ttl_s=300, max_symbols=2)
+    for s in ("SPY", "QQQ", "IWM"):
+        cache.mtf_features(db, s)
+    assert cache.stats()["entries"] == 2
+    monkeypatch.setenv("MARKET_CONTEXT_CACHE", "0")
+    counting = _CountingDB(db)
+    cache.mtf_features(counting, "QQQ")
+    assert counting.finds == 1
@@ -0,0 +1,123 @@
+"""
+Process-wide model registry (services/ai_modules/model_registry.py).
+
+Models are keyed by (model_name, version stamp): a cached model is reused
+until its `timeseries_models` doc changes, the cache is bounded by an LRU
+byte budget, and detached views share the canonical Booster.
+"""
+import threading
+import time
+
+import mongomock
+
+from services.ai_modules.model_registry import MISSING_STAMP, ModelRegistry, model_stamp
+
+
+class _Booster:
+    def __init__(self, nbytes):
+        self._raw = b"x" * nbytes
+
+    def save_raw(self, raw_format="ubj"):
+        return self._raw
+
+
+class _Model:
+    def __init__(self, name, nbytes=100):
+        self.model_name = name
+        self.forecast_horizon = 5
+        self._model = _Booster(nbytes)
+        self._db = "db"
+
+
+def _db(*names):
+    db = mongomock.MongoClient().db
+    for n in names:
+        db["timeseries_models"].insert_one({"name": n, "version": "v1", "updated_at": "t1"})
+    return db
+
+
+def _loader(calls, nbytes=100):
+    def load(db, name, horizon):
+        calls.append(name)
+        return _Model(name, nbytes)
+    return load
+
+
+def test_stamp_tracks_version_and_quarantine():
+    db = _db("a")
+    s1 = model_stamp(db, "a")
+    db["timeseries_models"].update_one({"name": "a"}, {"$set": {"quarantined": True}})
+    assert model_stamp(db, "a") != s1
+    assert model_stamp(db, "nope") == MISSING_STAMP
+
+
+def test_hit_within_poll_and_reload_on_new_version():
+    db, calls = _db("a"), []
+    reg = ModelRegistry(poll_s=0.0, max_bytes=10_000)
+    load = _loader(calls)
+    m1 = reg.get(db, "a", loader=load)
+    assert reg.get(db, "a", loader=load) is m1  # stamp unchanged → no reload
+    db["timeseries_models"].update_one({"name": "a"}, {"$set": {"updated_at": "t2"}})
+    m2 = reg.get(db, "a", loader=load)
+    assert m2 is not m1 and calls == ["a", "a"]
+    st = reg.stats()
+    assert (st["entries"], st["version_changes"], st["hits"], st["misses"]) == (1, 1, 1, 2)
+
+
+def test_lru_byte_budget_evicts_least_recent():
+    db, calls = _db("a", "b", "c"), []
+    reg = ModelRegistry(poll_s=60.0, max_bytes=250)
+    load = _loader(calls)
+    reg.get(db, "a", loader=load)
+    reg.get(db, "b", loader=load)
+    reg.get(db, "a", loader=load)  # a is now most recent
+    reg.get(db, "c", loader=load)
+    st = reg.stats()
+    assert st["models"] == ["a", "c"] and st["evictions"] == 1 and st["bytes"] == 200
+    reg.get(db, "b", loader=load)
+    assert calls == ["a", "b", "c", "b"]
+
+
+def test_detached_view_shares_booster():
+    db = _db("a")
+    reg = ModelRegistry(poll_s=60.0)
+    canonical = reg.get(db, "a", loader=_loader([]))
+    view = reg.get(db, "a", detached=True, loader=_loader([]))
+    assert view is not canonical and view._db is None and canonical._db == "db"
+    assert view._model is canonical._model
+    assert reg.get(db, "a", detached=True) is view
+
+
+def test_missing_model_not_stored_but_remembered_for_poll():
+    db, calls = _db(), []
+    reg = ModelRegistry(poll_s=60.0)
+
+    def load(db, name, horizon):
+        calls.append(name)
+        return None
+
+    assert reg.get(db, "ghost", loader=load) is None
+    assert reg.get(db, "ghost", loader=load) is None
+    assert calls == ["ghost"] and reg.stats()["entries"] == 0
+    reg.invalidate("ghost")
+    reg.get(db, "ghost", loader=load)
+    assert calls == ["ghost", "ghost"]
+
+
+def test_concurrent_misses_load_once():
+    db, calls = _db("a"), []
+    reg = ModelRegistry(poll_s=60.0)
+
+    def slow(db, name, horizon):
+        calls.append(name)
+        time.sleep(0.05)
+        return _Model(name)
+
+    out = []
+    threads = [threading.Thread(target=lambda: out.append(reg.get(db, "a", loader=slow)))
+               for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert calls == ["a"] and len({id(m) for m in out}) == 1
@@ -0,0 +1,117 @@
+"""
+Vectorized Monte Carlo (services/slow_learning/monte_carlo_kernel.py).
+
+`run_monte_carlo` resamples trades as index matrices and derives equity,
+drawdown and streaks with array ops. Per simulation row those metrics
+must match the original per-trade loop.
+"""
+import asyncio
+import random
+
+import numpy as np
+import pytest
+
+from services.slow_learning import monte_carlo_kernel as mc
+from services.slow_learning.advanced_backtest_engine import (
+    AdvancedBacktestEngine,
+    BacktestTrade,
+    MonteCarloConfig,
+)
+
+
+def _loop_metrics(pnls, starting_capital):
+    """The pre-vectorization per-simulation loop, verbatim in spirit."""
+    equity = starting_capital
+    peak = equity
+    max_dd = 0
+    current_streak = max_win = max_lose = 0
+    for pnl in pnls:
+        equity += pnl
+        peak = max(peak, equity)
+        max_dd = max(max_dd, (peak - equity) / peak * 100)
+        if pnl > 0:
+            if current_streak > 0:
+                current_streak += 1
+            else:
+                max_lose = max(max_lose, abs(current_streak))
+                current_streak = 1
+            max_win = max(max_win, current_streak)
+        else:
+            if current_streak < 0:
+                current_streak -= 1
+            else:
+                max_win = max(max_win, current_streak)
+                current_streak = -1
+            max_lose = max(max_lose, abs(current_streak))
+    return equity - starting_capital, max_dd, max_win, max_lose
+
+
+def _pnls(n=60, seed=3):
+    rnd = random.Random(seed)
+    # Include exact zeros: they count as losses in the streak logic.
+    return [0.0 if rnd.random() < 0.1 else round(rnd.gauss(40, 900), 2) for _ in range(n)]
+
+
+def test_path_metrics_match_loop():
+    pnl = np.array(_pnls())
+    rng = np.random.default_rng(11)
+    picks = pnl[rng.integers(0, len(pnl), size=(300, 80))]
+    got = mc.path_metrics(picks, 25_000.0)
+    for i, row in enumerate(picks):
+        final, dd, win, lose = _loop_metrics(row.tolist(), 25_000.0)
+        assert got["final_pnl"][i] == pytest.approx(final, abs=1e-6)
+        assert got["max_drawdown"][i] == pytest.approx(dd, abs=1e-9)
+        assert got["max_win_streak"][i] == win
+        assert got["max_lose_streak"][i] == lose
+
+
+def test_max_run_length_edges():
+    flags = np.array([
+        [True, True, False, True, True, True],
+        [False] * 6,
+        [True] * 6,
+        [False, True, False, True, True, False],
+    ])
+    assert mc.max_run_length(flags).tolist() == [3, 0, 6, 2]
+    assert mc.max_run_length(~flags).tolist() == [1, 6, 0, 1]
+
+
+def test_chunking_is_transparent(monkeypatch):
+    pnl = np.array(_pnls())
+    whole = mc.simulate(pnl, 500, 100_000.0, seed=5)
+    monkeypatch.setenv("MC_CHUNK_CELLS", "1000")  # 16 rows per chunk
+    ticks = []
+    chunked = mc.simulate(pnl, 500, 100_000.0, seed=5, progress=ticks.append)
+    assert ticks[-1] == 500 and len(ticks) > 1
+    # Chunks draw from one generator in sequence, so only shapes and the
+    # distributions' overall behaviour are comparable — not row identity.
+    for k in whole:
+        assert chunked[k].shape == (500,)
+    assert np.all(chunked["max_drawdown"] >= 0)
+
+
+def test_shuffle_mode_keeps_total_pnl():
+    pnl = np.array(_pnls(30))
+    out = mc.simulate(pnl, 200, 50_000.0, bootstrap=False, seed=1)
+    assert np.allclose(out["final_pnl"], pnl.sum())
+    fixed = mc.simulate(pnl, 5, 50_000.0, bootstrap=False, randomize_trade_order=False)
+    assert np.allclose(fixed["max_drawdown"], _loop_metrics(pnl.tolist(), 50_000.0)[1])
+
+
+def test_run_monte_carlo_result_shape_and_path_count():
+    trades = [BacktestTrade(pnl=p) for p in _pnls(120)]
+    engine = AdvancedBacktestEngine()
+    cfg = MonteCarloConfig(num_simulations=20_000, seed=42)
+    res = asyncio.run(engine.run_monte_carlo(trades=trades, mc_config=cfg))
+    assert res.num_simulations == 20_000
+    ticks = []
+    out = mc.simulate(np.array(_pnls(120)), 20_000, 100_000.0, seed=42, progress=ticks.append)
+    assert ticks[-1] == 20_000 and out["final_pnl"].shape == (20_000,)
+    assert set(res.pnl_distribution) == {"5", "25", "50", "75", "95"}
+    assert res.pnl_distribution["5"] <= res.pnl_distribution["50"] <= res.pnl_distribution["95"]
+    assert res.expected_max_drawdown == res.drawdown_distribution["50"]
+    assert 0 <= res.probability_of_profit <= 100
+    assert set(res.win_streak_distribution) == {"min", "max", "avg", "median"}
+    assert isinstance(res.win_streak_distribution["max"], int)
+    again = asyncio.run(engine.run_monte_carlo(trades=trades, mc_config=cfg))
+    assert again.pnl_distribution == res.pnl_distribution
@@ -0,0 +1,91 @@
+"""
+Event-driven order dispatch: `queue_order` wakes pushers blocked in the
+`/api/ib/orders/pending?wait=N&version=V` long-poll, and the read path no
+longer writes to Mongo (stale sweeps run from the background reconciler).
+"""
+import asyncio
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+import mongomock
+import pytest
+
+from services.order_queue_service import OrderQueueService, OrderStatus
+
+
+@pytest.fixture
+def svc(monkeypatch):
+    import services.kill_switch_gate as ksg
+    monkeypatch.setattr(ksg, "evaluate_kill_switch_gate", lambda order: None)
+    s = OrderQueueService()
+    s.initialize(mongomock.MongoClient().db)
+    return s
+
+
+def _order(sym="AAPL"):
+    return {"symbol": sym, "action": "BUY", "quantity": 10, "order_type": "MKT"}
+
+
+def test_wait_returns_immediately_when_behind(svc):
+    v0 = svc.dispatch_version
+    svc.queue_order(_order())
+    t0 = time.monotonic()
+    assert svc.wait_for_orders(v0, timeout=5) == v0 + 1
+    assert time.monotonic() - t0 < 0.1
+
+
+def test_queue_order_wakes_waiting_pusher(svc):
+    v0 = svc.dispatch_version
+    woke = {}
+
+    def waiter():
+        t0 = time.monotonic()
+        woke["version"] = svc.wait_for_orders(v0, timeout=5)
+        woke["dt"] = time.monotonic() - t0
+
+    th = threading.Thread(target=waiter)
+    th.start()
+    time.sleep(0.1)
+    svc.queue_order(_order())
+    th.join(2)
+    assert woke["version"] == v0 + 1
+    assert woke["dt"] < 1.0
+
+
+def test_wait_times_out_without_orders(svc):
+    v0 = svc.dispatch_version
+    t0 = time.monotonic()
+    assert svc.wait_for_orders(v0, timeout=0.1) == v0
+    assert time.monotonic() - t0 >= 0.1
+
+
+def test_endpoint_long_poll(svc, monkeypatch):
+    import routers.ib as ib
+    monkeypatch.setattr(ib, "get_order_queue_service", lambda: svc)
+    monkeypatch.setattr(ib, "get_pending_orders", svc.get_pending_orders)
+
+    async def main():
+        first = await ib.get_pending_orders_endpoint()
+        assert first["count"] == 0
+        poll = asyncio.create_task(ib.get_pending_orders_endpoint(wait=5, version=first["version"]))
+        await asyncio.sleep(0.1)
+        assert not poll.done()
+        await asyncio.to_thread(svc.queue_order, _order("MSFT"))
+        got = await asyncio.wait_for(poll, 1.0)
+        assert got["count"] == 1 and got["orders"][0]["symbol"] == "MSFT"
+        assert got["version"] > first["version"]
+
+    asyncio.run(main())
+
+
+def test_sweep_expires_stale_rows(svc):
+    old = (datetime.now(timezone.utc) - timedelta(minutes=20)).isoformat()
+    svc._collection.insert_many([
+        {"order_id": "c1", "status": OrderStatus.CLAIMED.value, "claimed_at": old, "queued_at": old},
+        {"order_id": "i1", "status": OrderStatus.IB_PENDING.value, "ib_pending_at": old, "queued_at": old},
+    ])
+    assert svc.get_pending_orders()[0]["order_id"] == "c1"  # read path leaves it alone
+    assert svc.sweep_stale_orders() == {"claimed_expired": 1, "ib_pending_rejected": 1}
+    assert svc.get_order("c1")["status"] == OrderStatus.EXPIRED.value
+    assert svc.get_order("i1")["status"] == OrderStatus.REJECTED.value
@@ -0,0 +1,166 @@
+"""
+Batched setup-model inference + request coalescing.
+
+`predict_for_setup_batch` groups requests by resolved model key and makes
+one model call per group; `TimeSeriesGBM.predict_batch` does the same for
+the general model. Per-request results must equal one-at-a-time calls.
+`PredictionBatcher` gathers concurrent async callers into one batch.
+"""
+import asyncio
+
+import numpy as np
+import pytest
+import xgboost as xgb
+
+from services.ai_modules.prediction_batcher import PredictionBatcher
+from services.ai_modules.timeseries_gbm import TimeSeriesGBM
+from services.ai_modules.timeseries_service import TimeSeriesAIService
+
+
+def _bars(seed, n=120):
+    rng = np.random.default_rng(seed)
+    price = 50 + seed
+    out = []
+    for i in range(n):
+        price *= 1 + rng.normal(0, 0.01)
+        out.append({"date": f"2026-03-{1 + i % 28:02d}T10:{i % 60:02d}:00",
+                    "open": price * 0.998, "high": price * 1.004, "low": price * 0.995,
+                    "close": price, "volume": float(rng.integers(1e4, 1e6))})
+    return out
+
+
+def _booster(feature_names, num_class=3, seed=0):
+    rng = np.random.RandomState(seed)
+    X = rng.rand(200, len(feature_names)).astype(np.float32)
+    y = rng.randint(0, num_class, size=200)
+    params = ({"objective": "multi:softprob", "num_class": num_class} if num_class > 2
+              else {"objective": "binary:logistic"})
+    params["verbosity"] = 0
+    return xgb.train(params, xgb.DMatrix(X, label=y, feature_names=feature_names),
+                     num_boost_round=5)
+
+
+class _SetupModel:
+    UP_THRESHOLD = 0.52
+
+    def __init__(self, base, num_class):
+        self._feature_engineer = base._feature_engineer
+        self._feature_names = list(base._feature_names) + ["setup_breakout_strength"]
+        self._model = _booster(self._feature_names, num_class, seed=num_class)
+        self._version = "test"
+        self._metrics = None
+
+
+@pytest.fixture
+def service():
+    svc = object.__new__(TimeSeriesAIService)
+    svc._db = None
+    general = TimeSeriesGBM()
+    general._model = _booster(general._feature_names, seed=7)
+    svc._model = general
+    svc._setup_models = {
+        "BREAKOUT": _SetupModel(general, 3),
+        "SCALP": _SetupModel(general, 2),
+    }
+    return svc
+
+
+def _requests():
+    setups = ["breakout", "scalp", "unknown_setup", "breakout", "scalp", "gap_fade"]
+    return [{"symbol": f"S{i}", "bars": _bars(i), "setup_type": st} for i, st in enumerate(setups)]
+
+
+def _strip(d):
+    return {k: v for k, v in d.items() if k != "timestamp"} if d else d
+
+
+def test_batch_matches_one_by_one(service):
+    reqs = _requests() + [{"symbol": "TINY", "bars": _bars(99, n=5), "setup_type": "breakout"}]
+    single = [service.predict_for_setup(r["symbol"], r["bars"], r["setup_type"]) for r in reqs]
+    batched = service.predict_for_setup_batch(reqs)
+    assert [_strip(b) for b in batched] == [_strip(s) for s in single]
+    assert {b["model_type"] for b in batched if b} == {"setup_specific", "general"}
+    assert batched[-1] is None  # too few bars anywhere → no prediction
+
+
+def test_one_model_call_per_group(service, monkeypatch):
+    calls = []
+    orig = TimeSeriesAIService._predict_setup_rows
+
+    def counting(model, matrix):
+        calls.append(matrix.shape[0])
+        return orig(model, matrix)
+
+    monkeypatch.setattr(TimeSeriesAIService, "_predict_setup_rows", staticmethod(counting))
+    general_calls = []
+    orig_general = service._model._model.predict
+    monkeypatch.setattr(service._model._model, "predict",
+                        lambda dm, **k: general_calls.append(dm.num_row()) or orig_general(dm, **k))
+    service.predict_for_setup_batch(_requests())
+    assert sorted(calls) == [2, 2]
+    assert general_calls == [2]
+
+
+def test_gbm_predict_batch_matches_predict():
+    gbm = TimeSeriesGBM()
+    gbm._model = _booster(gbm._feature_names, seed=3)
+    items = [(_bars(i), f"S{i}") for i in range(5)] + [(_bars(9, n=3), "TINY")]
+    batched = gbm.predict_batch(items)
+    single = [gbm.predict(b, s) for b, s in items]
+    assert [_strip(p.to_dict()) if p else None for p in batched] == \
+           [_strip(p.to_dict()) if p else None for p in single]
+
+
+def test_batcher_coalesces_concurrent_submits():
+    seen = []
+
+    def batch_fn(items):
+        seen.append(list(items))
+        return [x * 10 for x in items]
+
+    async def main():
+        b = PredictionBatcher(batch_fn, name="t", window_ms=20, max_batch=100)
+        out = await asyncio.gather(*(b.submit(i) for i in range(12)))
+        return out, b.stats()
+
+    out, stats = asyncio.run(main())
+    assert out == [i * 10 for i in range(12)]
+    assert len(seen) == 1 and stats["largest_batch"] == 12
+
+
+def test_batcher_max_batch_and_errors(monkeypatch):
+    def batch_fn(items):
+        if -1 in items:
+            raise ValueError("boom")
+        return items
+
+    async def main():
+        b = PredictionBatcher(batch_fn, window_ms=1000, max_batch=4)
+        ok = await asyncio.wait_for(asyncio.gather(*(b.submit(i) for i in range(4))), 1.0)
+        bad = await asyncio.gather(b.submit(1), b.submit(-1), return_exceptions=True)
+        return ok, bad, b.stats()
+
+    ok, bad, stats = asyncio.run(main())
+    assert ok == [0, 1, 2, 3]  # flushed at max_batch, not after the 1s window
+    assert all(isinstance(e, ValueError) for e in bad)
+    monkeypatch.setenv("PREDICT_BATCH", "0")
+
+    async def direct():
+        b = PredictionBatcher(batch_fn)
+        return await b.submit(5), b.stats()["batches"]
+
+    assert asyncio.run(direct()) == (5, 0)
+
+
+def test_coalesced_service_path(service):
+    reqs = _requests()
+
+    async def main():
+        return await asyncio.gather(*(
+            service.predict_for_setup_coalesced(r["symbol"], r["bars"], r["setup_type"]) for r in reqs
+        ))
+
+    got = asyncio.run(main())
+    want = service.predict_for_setup_batch(reqs)
+    assert [_strip(g) for g in got] == [_strip(w) for w in want]
+    assert service.prediction_batch_stats()["setup"]["largest_batch"] == len(reqs)
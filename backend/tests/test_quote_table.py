@@ -0,0 +1,127 @@
+"""
+Columnar L1 quote table + binary push ingest (services/quote_table.py,
+POST /api/ib/push-data-bin).
+
+Pins the wire format (round-trip, and the pusher's stdlib `struct`
+layout), vectorized ingest / views, and that the binary endpoint feeds
+the same downstream state as the JSON endpoint.
+"""
+import asyncio
+import math
+import struct
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+from fastapi import HTTPException
+
+from services import quote_table as qt
+from services.quote_table import QUOTE_WIRE_DTYPE, QuoteTable, decode_push, encode_push
+
+QUOTES = {
+    "AAPL": {"symbol": "AAPL", "bid": 199.9, "ask": 200.1, "last": 200.0, "volume": 1_200_000,
+             "close": 198.0, "high": 201.0, "low": 197.5, "open": 198.5,
+             "timestamp": "2026-05-04T14:30:00+00:00"},
+    "TSLA": {"symbol": "TSLA", "bid": None, "ask": 280.2, "last": 280.1, "volume": None},
+}
+
+
+def test_wire_round_trip_and_pusher_struct_layout():
+    body = encode_push({"timestamp": "t", "quotes": QUOTES, "account": {"NetLiq": 1}})
+    payload = decode_push(body)
+    rec = payload["quotes"]
+    assert payload["account"] == {"NetLiq": 1}
+    assert rec["symbol"].tolist() == [b"AAPL", b"TSLA"]
+    assert rec["last"].tolist() == [200.0, 280.1]
+    assert math.isnan(rec["bid"][1])
+    assert rec["ts"][0] == pytest.approx(1777905000.0)
+    assert not rec.flags.writeable  # a view of the request body, not a copy
+    # documents/scripts/ib_data_pusher.py packs records with struct "<16s9d".
+    assert struct.calcsize("<16s9d") == QUOTE_WIRE_DTYPE.itemsize
+
+
+@pytest.mark.parametrize("bad", [b"\xc1", encode_push({"quotes": {}})[:-1]])
+def test_decode_rejects_malformed_payloads(bad):
+    with pytest.raises(qt.QuoteDecodeError):
+        decode_push(bad)
+
+
+def test_binary_and_dict_ingest_agree():
+    a, b = QuoteTable(), QuoteTable()
+    a.ingest_records(decode_push(encode_push({"quotes": QUOTES}))["quotes"], 100.0)
+    b.ingest_dicts(QUOTES, 100.0)
+    for sym in QUOTES:
+        assert a.get(sym) == b.get(sym)
+    assert a.get("TSLA")["bid"] is None and a.get("AAPL")["volume"] == 1_200_000
+
+
+def test_rows_are_stable_views_and_capacity_grows():
+    table = QuoteTable(capacity=2)
+    table.ingest_dicts({"AAA": {"last": 1.0}, "BBB": {"last": 2.0}})
+    view = table.view()
+    assert view["last"].base is not None  # slice of the live column
+    table.ingest_dicts({"CCC": {"last": 3.0}, "AAA": {"last": 1.5}})
+    assert table.stats()["capacity"] == 4
+    assert table.view()["last"].tolist() == [1.5, 2.0, 3.0]
+    picked = table.view(["ccc", "ZZZ"])
+    assert picked["last"][0] == 3.0 and np.isnan(picked["last"][1])
+
+
+class _Req:
+    def __init__(self, body):
+        self._body = body
+
+    async def body(self):
+        return self._body
+
+
+class _Resp:
+    def __init__(self):
+        self.status_code = 200
+        self.headers = {}
+
+
+class _Persister:
+    def __init__(self):
+        self.seen = []
+
+    def on_push(self, quotes):
+        self.seen.append(quotes)
+        return 0
+
+
+def test_binary_endpoint_feeds_same_state_as_json(monkeypatch):
+    from routers import ib as ib_module
+
+    table = QuoteTable()
+    monkeypatch.setattr(qt, "_table", table)
+    persister = _Persister()
+    ib_module._push_in_flight = 0
+    body = encode_push({"timestamp": "2026-05-04T14:30:00Z", "source": "ib_gateway",
+                        "quotes": QUOTES, "positions": [{"symbol": "AAPL", "position": 10}]})
+    with patch("services.tick_to_bar_persister.get_tick_to_bar_persister", return_value=persister), \
+            patch("database.get_database", return_value=None):
+        out = asyncio.run(ib_module.receive_pushed_ib_data_binary(_Req(body), _Resp()))
+
+    assert out["success"] and out["received"]["quotes"] == 2
+    assert out["received"]["positions"] == 1
+    pushed = ib_module.get_pushed_quotes()
+    assert pushed["AAPL"]["last"] == 200.0 and pushed["AAPL"]["pushed_at"]
+    assert persister.seen[0]["TSLA"]["last"] == 280.1
+    assert table.stats()["ingests"] == 1  # not re-ingested by the shared handler
+
+
+def test_binary_endpoint_backpressure_and_bad_body():
+    from routers import ib as ib_module
+
+    ib_module._push_in_flight = ib_module._PUSH_DATA_MAX_CONCURRENT
+    resp = _Resp()
+    try:
+        out = asyncio.run(ib_module.receive_pushed_ib_data_binary(_Req(b"unused"), resp))
+    finally:
+        ib_module._push_in_flight = 0
+    assert resp.status_code == 503 and out["error"] == "backpressure"
+
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(ib_module.receive_pushed_ib_data_binary(_Req(b"\x93\x01"), _Resp()))
+    assert exc.value.status_code == 400
@@ -216,3 +216,37 @@ def test_loader_early_exits_when_db_missing():
     # Should NOT raise
     svc._load_setup_models_from_db()
     assert svc._setup_models == {}
+
+
+def test_setup_models_follow_registry_version_changes():
+    """Registry-loaded setup models are stored by name and resolved on every
+    read, so a promoted version reaches predict_for_setup and the old
+    Booster isn't pinned outside the registry."""
+    from services.ai_modules import model_registry
+    from services.ai_modules.timeseries_service import _RegistryModelRef, _SetupModelTable
+
+    ts_docs = [_make_ts_model_doc("scalp_1min_predictor")]
+    svc = _make_service_with_fake_db(ts_docs)
+    svc._setup_models = _SetupModelTable()
+
+    def fake_gbm_factory(*args, **kwargs):
+        gbm = MagicMock()
+        gbm._model = object()
+        gbm._version = ts_docs[0]["version"]
+        return gbm
+
+    reg = model_registry.ModelRegistry(poll_s=0.0)
+    with patch.object(model_registry, "_registry", reg), patch(
+        "services.ai_modules.timeseries_service.TimeSeriesGBM",
+        side_effect=fake_gbm_factory,
+    ):
+        svc._load_setup_models_from_db()
+        assert isinstance(dict.__getitem__(svc._setup_models, ("SCALP", "1 min")), _RegistryModelRef)
+        first = svc._setup_models.get(("SCALP", "1 min"))
+        assert first._version == "v0.1.0" and svc._setup_models["SCALP"] is first
+
+        ts_docs[0]["version"] = "v0.2.0"  # promoted elsewhere
+        second = svc._setup_models.get(("SCALP", "1 min"))
+        assert second is not first and second._version == "v0.2.0"
+        assert [m for _k, m in svc._setup_models.items()] == [second, second]
+        assert reg.stats()["entries"] == 1
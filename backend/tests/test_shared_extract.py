@@ -0,0 +1,98 @@
+"""
+Shared-memory extraction transport: workers fed a `BarRef` must see the
+same bars, and results routed through the output arena must equal what the
+worker returns directly.
+"""
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pytest
+
+from services.ai_modules import shared_extract as SE
+from services.ai_modules.columnar_bars import BAR_FIELDS, bar_column
+
+
+def _bars(n, seed):
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 1, n))
+    return [
+        {"date": f"2026-01-01T{i:06d}", "open": float(c), "high": float(c + 1),
+         "low": float(c - 1), "close": float(c), "volume": float(1000 + i)}
+        for i, c in enumerate(close)
+    ]
+
+
+def _worker(args):
+    symbol, bars, fh = args
+    c = bar_column(bars, "close")
+    n = len(c) - 50 - fh
+    if n <= 0:
+        return None
+    X = np.stack([c[:n], c[fh:n + fh]], axis=1).astype(np.float32)
+    y = (c[fh:n + fh] > c[:n]).astype(np.float32)
+    return {("S", fh): (X, y)}
+
+
+def _plan(_sym, n):
+    return {("S", 5): (n - 50 - 5, 2)}
+
+
+@pytest.fixture
+def batch():
+    return {"AAA": _bars(300, 1), "BBB": _bars(120, 2)}
+
+
+def test_bars_round_trip(batch):
+    with SE.SharedBatch.create(batch) as shared:
+        for sym, bars in batch.items():
+            ref = shared.args((sym, bars))[1]
+            assert isinstance(ref, SE.BarRef)
+            view, block = SE.open_bars(ref)
+            try:
+                assert len(view) == len(bars)
+                assert view[-1]["date"] == bars[-1]["date"]
+                for f in BAR_FIELDS:
+                    np.testing.assert_allclose(bar_column(view, f), [b[f] for b in bars], rtol=1e-6)
+            finally:
+                view = None
+                block.close()
+
+
+@pytest.mark.parametrize("in_pool", [False, True])
+def test_results_match_direct(batch, in_pool, tracker_stderr):
+    tasks = [(sym, bars, 5) for sym, bars in batch.items()]
+    expected = {t[0]: _worker(t) for t in tasks}
+    with SE.SharedBatch.create(batch, plan=_plan) as shared:
+        if in_pool:
+            with ProcessPoolExecutor(max_workers=2) as pool:
+                raw = {t[0]: pool.submit(SE.run_task, _worker, shared.args(t), shared.out(t[0])).result()
+                       for t in tasks}
+        else:
+            raw = {t[0]: SE.run_task(_worker, shared.args(t), shared.out(t[0])) for t in tasks}
+        assert all(isinstance(r, SE.SharedResult) and not r.spill for r in raw.values())
+        got = {sym: shared.collect(sym, r) for sym, r in raw.items()}
+    for sym, res in expected.items():
+        X, y = got[sym][("S", 5)]
+        np.testing.assert_array_equal(X, res[("S", 5)][0])
+        np.testing.assert_array_equal(y, res[("S", 5)][1])
+    assert "Traceback" not in tracker_stderr()
+
+
+def test_results_that_overflow_their_slot_spill(batch):
+    with SE.SharedBatch.create(batch, plan=lambda s, n: {("S", 5): (10, 2)}) as shared:
+        t = ("AAA", batch["AAA"], 5)
+        res = SE.run_task(_worker, shared.args(t), shared.out("AAA"))
+        assert not res.counts and ("S", 5) in res.spill
+        np.testing.assert_array_equal(shared.collect("AAA", res)[("S", 5)][0], _worker(t)[("S", 5)][0])
+
+
+def test_disabled_or_unpackable_batches_pass_through(batch, monkeypatch):
+    odd = {"CCC": [{"date": "d", "open": 1, "high": 1, "low": 1, "close": 1, "volume": 1, "vwap": 1}]}
+    with SE.SharedBatch.create(odd, plan=_plan) as shared:
+        assert shared.block is None
+        assert shared.args(("CCC", odd["CCC"])) == ("CCC", odd["CCC"])
+    monkeypatch.setenv("TRAIN_SHM_TRANSPORT", "false")
+    with SE.SharedBatch.create(batch, plan=_plan) as shared:
+        t = ("AAA", batch["AAA"], 5)
+        assert shared.args(t) is t and shared.out("AAA") is None
+        assert shared.collect("AAA", SE.run_task(_worker, t)) is not None
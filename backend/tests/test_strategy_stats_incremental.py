@@ -0,0 +1,166 @@
+"""
+Incremental strategy_stats: every alert_outcomes upsert folds its row delta
+into `strategy_stats_agg` (O(1) per close) and the derived strategy_stats doc
+must match the canonical full recompute — including re-upserts (scale-out
+partials), rows flipping to artifact, and the last-100 R ring. The nightly
+`rebuild_strategy_stats` verifies + re-seeds the aggregate.
+"""
+import random
+from types import SimpleNamespace
+
+import mongomock
+import pytest
+from pymongo import ReturnDocument
+
+from services import pnl_compute as PC
+
+_CHECK = ("alerts_triggered", "alerts_won", "alerts_lost", "total_pnl", "win_rate",
+          "profit_factor", "avg_rr_achieved", "avg_r", "r_stdev", "avg_win_r",
+          "avg_loss_r", "expected_value_r", "r_outcomes")
+
+
+@pytest.fixture
+def db():
+    d = mongomock.MongoClient().db
+    PC._AO_DB = d
+    yield d
+    PC._AO_DB = None
+
+
+def _upsert(db, row):
+    """What _record_alert_outcome_bestEffort does around the alert_outcomes write."""
+    prev = db.alert_outcomes.find_one_and_update(
+        {"trade_id": row["trade_id"]}, {"$set": row}, projection=PC._STATS_ROW_PROJECTION,
+        upsert=True, return_document=ReturnDocument.BEFORE)
+    PC._fold_strategy_stats_bestEffort(prev, row)
+
+
+def _expected(db, base):
+    rows = [d for d in db.alert_outcomes.find({}, PC._STATS_ROW_PROJECTION)
+            if PC._base_setup(d.get("setup_type")) == base]
+    rows.sort(key=lambda d: (str(d.get("closed_at", "")), str(d.get("_id", ""))))
+    return PC._strategy_stats_doc(base, PC._accumulate_stats(rows), True, "")
+
+
+def _assert_matches(db, base):
+    got = db.strategy_stats.find_one({"setup_type": base})
+    want = _expected(db, base)
+    for k in _CHECK:
+        assert got[k] == pytest.approx(want[k], abs=1e-3), k
+
+
+def _row(i, setup="squeeze_long", r=1.0, day=None, **kw):
+    outcome = "won" if r > 0 else "lost"
+    return {"trade_id": f"T{i}", "setup_type": setup, "outcome": outcome, "r_multiple": r,
+            "net_pnl": 50.0 * r, "closed_at": f"2026-06-{(i if day is None else day) % 28 + 1:02d}T10:{i % 60:02d}:00",
+            "genuine": True, **kw}
+
+
+def test_fold_matches_full_recompute_through_partials_and_flips(db):
+    rng = random.Random(7)
+    ids = []
+    for i in range(160):  # > ring size
+        row = _row(i, setup=rng.choice(["squeeze_long", "squeeze_short", "vwap_fade_long"]),
+                   r=round(rng.uniform(-1.5, 3.0), 3), day=i // 6)
+        _upsert(db, row)
+        ids.append(row)
+        if i % 9 == 0:  # scale-out partial re-upserts the same trade with a new R
+            _upsert(db, {**row, "r_multiple": round(row["r_multiple"] + 0.5, 3), "outcome": "won"})
+        if i % 23 == 0:  # hygiene flips an earlier close to artifact
+            _upsert(db, {**ids[i // 2], "genuine": False})
+    # A trade re-labelled into a different family moves its contribution.
+    _upsert(db, {**ids[5], "setup_type": "vwap_fade_short"})
+    _upsert(db, {**ids[6], "setup_type": "vwap_fade_short"})
+    # Recent trades leaving a full ring are backfilled from older history.
+    for row in ids[-12:]:
+        _upsert(db, {**row, "genuine": False})
+
+    for base in ("squeeze", "vwap_fade"):
+        _assert_matches(db, base)
+    assert len(db.strategy_stats.find_one({"setup_type": "squeeze"})["r_outcomes"]) == 100
+
+
+def test_first_close_after_deploy_seeds_from_history(db):
+    db.alert_outcomes.insert_many([_row(i, r=-1.0) for i in range(6)])
+    assert db.strategy_stats_agg.count_documents({}) == 0
+    _upsert(db, _row(99, r=2.0))
+    agg = db.strategy_stats_agg.find_one({"setup_type": "squeeze"})
+    assert agg["trig"] == 7 and agg["won"] == 1
+    _assert_matches(db, "squeeze")
+    _upsert(db, _row(100, r=1.0))
+    assert db.strategy_stats.find_one({"setup_type": "squeeze"})["recomputed_by"] == "pnl_compute_incremental"
+    _assert_matches(db, "squeeze")
+
+
+def test_close_path_folds_without_scanning(db, monkeypatch):
+    db.alert_outcomes.insert_many([_row(i, r=-1.0) for i in range(5)])
+    PC.recompute_strategy_stats_for_setup("squeeze")  # seeds the aggregate
+    scans = []
+    monkeypatch.setattr(PC, "recompute_strategy_stats_for_setup",
+                        lambda *a, **k: scans.append(a))
+    trade = SimpleNamespace(id="T-live", symbol="AMD", setup_type="squeeze_long",
+                            direction=SimpleNamespace(value="long"), fill_price=100.0,
+                            stop_price=98.0, tp_price=106.0, shares=100, entered_by="bot",
+                            executed_at="2026-06-03T14:00:00+00:00",
+                            closed_at="2026-06-03T15:00:00+00:00")
+    monkeypatch.setattr(PC, "_get_outcomes_collection", lambda: db.alert_outcomes)
+    PC._record_alert_outcome_bestEffort(
+        trade, "target", {"realized_pnl": 400.0, "net_pnl": 398.0, "shares": 100},
+        104.0, "test")
+    assert scans == []
+    ss = db.strategy_stats.find_one({"setup_type": "squeeze"})
+    assert ss["alerts_triggered"] == 6 and ss["alerts_won"] == 1
+    _assert_matches(db, "squeeze")
+
+
+def test_concurrent_folds_neither_double_count_nor_drop(db, monkeypatch):
+    for i in range(6):
+        _upsert(db, _row(i))
+    orig = PC._stats_ring_refill
+    raced = []
+
+    def racing(base, ring, n_r):
+        # Another close lands between this fold's aggregate read and its write.
+        if not raced:
+            raced.append(1)
+            _upsert(db, _row(100, r=-1.0))
+            _upsert(db, _row(3, r=-0.5))
+        return orig(base, ring, n_r)
+
+    monkeypatch.setattr(PC, "_stats_ring_refill", racing)
+    _upsert(db, _row(3, r=2.0))  # partial re-close of T3, racing the two above
+    agg = db.strategy_stats_agg.find_one({"setup_type": "squeeze"})
+    assert agg["trig"] == 7 and len({e["k"] for e in agg["ring"]}) == len(agg["ring"]) == 7
+    _assert_matches(db, "squeeze")
+    assert db.strategy_stats.find_one({"setup_type": "squeeze"})["agg_seq"] == agg["seq"]
+
+
+def test_nightly_rebuild_reports_drift_and_reseeds(db):
+    for i in range(12):
+        _upsert(db, _row(i, r=1.0 if i % 3 else -1.0))
+    assert PC.rebuild_strategy_stats(db)["drifted"] == []
+    db.strategy_stats_agg.update_one({"setup_type": "squeeze"}, {"$inc": {"won": 3, "sum_r": 4.0}})
+    rep = PC.rebuild_strategy_stats(db)
+    assert [d["setup_type"] for d in rep["drifted"]] == ["squeeze"]
+    assert PC.rebuild_strategy_stats(db)["drifted"] == []
+    _assert_matches(db, "squeeze")
+
+
+def test_rebuild_keeps_a_close_folded_after_its_scan(db, monkeypatch):
+    for i in range(6):
+        _upsert(db, _row(i))
+    orig = PC._accumulate_stats
+    raced = []
+
+    def racing(rows, genuine_only=True):
+        # A close lands (row + O(1) fold) after the nightly scan read its rows.
+        if not raced:
+            raced.append(1)
+            _upsert(db, _row(50, r=-1.0))
+        return orig(rows, genuine_only)
+
+    monkeypatch.setattr(PC, "_accumulate_stats", racing)
+    rep = PC.rebuild_strategy_stats(db)
+    assert rep["setups"] == 1 and rep["skipped"] == []
+    assert db.strategy_stats_agg.find_one({"setup_type": "squeeze"})["trig"] == 7
+    _assert_matches(db, "squeeze")
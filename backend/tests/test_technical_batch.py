@@ -0,0 +1,129 @@
+"""
+Vectorized batch indicator engine (services/technical_batch.py).
+
+Parity against the scalar `RealTimeTechnicalService._calculate_*` helpers
+across ragged series lengths, including every short-series fallback, plus
+an end-to-end check that `get_batch_snapshots` produces the same snapshots
+as the per-symbol path.
+"""
+import asyncio
+import dataclasses
+import random
+
+import pytest
+
+from services import technical_batch as tb
+from services.realtime_technical_service import RealTimeTechnicalService
+
+LENGTHS = [0, 1, 2, 4, 5, 9, 14, 15, 16, 20, 21, 22, 49, 50, 78]
+
+
+def _series(n, seed, flat=False, zero_volume=False):
+    rnd = random.Random(seed)
+    price = 50 + seed
+    bars = []
+    for i in range(n):
+        drift = 0 if flat else rnd.uniform(-1.5, 1.5)
+        o = price
+        c = max(1.0, price + drift)
+        bars.append({
+            "timestamp": f"2026-02-10T14:{i % 60:02d}:00+00:00",
+            "open": o, "high": max(o, c) + (0 if flat else rnd.uniform(0, 1)),
+            "low": min(o, c) - (0 if flat else rnd.uniform(0, 1)), "close": c,
+            "volume": 0 if zero_volume else rnd.randint(1_000, 90_000),
+        })
+        price = c
+    return bars
+
+
+@pytest.fixture
+def svc():
+    return RealTimeTechnicalService()
+
+
+@pytest.fixture
+def ragged():
+    out = [_series(n, seed=i) for i, n in enumerate(LENGTHS)]
+    out.append(_series(30, seed=99, flat=True))          # RSI avg_loss == 0
+    out.append(_series(12, seed=7, zero_volume=True))    # VWAP → last close
+    return out
+
+
+def test_per_indicator_parity_with_scalar_helpers(svc, ragged):
+    packed = tb.pack_ohlcv(ragged)
+    L = packed["length"]
+    c = packed["close"]
+    got = {
+        "ema9": tb.ema(c, L, 9), "ema50": tb.ema(c, L, 50),
+        "sma20": tb.tail_sma(c, L, 20), "std20": tb.tail_std(c, L, 20),
+        "rsi": tb.rsi(c, L, 14),
+        "atr": tb.atr(packed["high"], packed["low"], c, L, 14),
+        "vwap": tb.vwap(packed["high"], packed["low"], c, packed["volume"], L),
+    }
+    for i, bars in enumerate(ragged):
+        closes = [b["close"] for b in bars]
+        assert got["ema9"][i] == pytest.approx(svc._calculate_ema(closes, 9), abs=1e-9)
+        assert got["ema50"][i] == pytest.approx(svc._calculate_ema(closes, 50), abs=1e-9)
+        assert got["sma20"][i] == pytest.approx(svc._calculate_sma(closes, 20), abs=1e-9)
+        assert got["std20"][i] == pytest.approx(svc._calculate_std(closes, 20), abs=1e-9)
+        assert got["rsi"][i] == pytest.approx(svc._calculate_rsi(closes, 14), abs=1e-9)
+        assert got["atr"][i] == pytest.approx(svc._calculate_atr(bars, 14), abs=1e-9)
+        assert got["vwap"][i] == pytest.approx(svc._calculate_vwap(bars), abs=1e-9)
+
+
+def test_prior_avg_volume_matches_scalar_window(ragged):
+    packed = tb.pack_ohlcv(ragged)
+    got = tb.prior_avg_volume(packed["volume"], packed["length"])
+    for i, bars in enumerate(ragged):
+        if not bars:
+            assert got[i] == 0
+            continue
+        vols = [b["volume"] for b in (bars[-21:-1] if len(bars) > 21 else bars[:-1])]
+        expected = sum(vols) / len(vols) if vols else bars[-1]["volume"]
+        assert got[i] == pytest.approx(expected)
+
+
+@pytest.mark.parametrize("n_intraday", [0, 3, 12, 40, 78])
+def test_snapshot_parity_with_precomputed(svc, n_intraday):
+    intraday = _series(n_intraday, seed=3)
+    daily = _series(50, seed=4)
+    pre = tb.compute_batch_indicators([intraday], [daily])[0]
+    price = daily[-1]["close"] * 1.01
+    kwargs = dict(symbol="AAPL", current_price=price, intraday_bars=intraday,
+                  daily_bars=daily, quote={"price": price}, spy_change_pct=0.4)
+    scalar = dataclasses.asdict(svc._calculate_snapshot(**kwargs))
+    batch = dataclasses.asdict(svc._calculate_snapshot(**kwargs, precomputed=pre))
+    scalar.pop("timestamp"), batch.pop("timestamp")
+    assert batch == scalar
+
+
+def test_get_batch_snapshots_matches_sequential_path(svc, monkeypatch):
+    inputs = {}
+    for i, sym in enumerate(["AAPL", "MSFT", "NVDA"]):
+        daily = _series(50, seed=10 + i)
+        price = daily[-1]["close"]
+        inputs[sym] = {
+            "intraday_bars": _series(20 + i * 20, seed=20 + i),
+            "daily_bars": daily, "quote": {"price": price},
+            "current_price": price, "intraday_source": "mongo_only_caller_request",
+        }
+
+    async def fake_inputs(symbol, *, mongo_only=False, allow_stale_price=False):
+        return inputs.get(symbol)
+
+    async def fake_spy():
+        return 0.25
+
+    monkeypatch.setattr(svc, "_load_snapshot_inputs", fake_inputs)
+    monkeypatch.setattr(svc, "_get_spy_change", fake_spy)
+
+    batch = asyncio.run(svc.get_batch_snapshots(["AAPL", "MSFT", "NVDA", "ZZZZ"], mongo_only=True))
+    assert set(batch) == {"AAPL", "MSFT", "NVDA"}
+
+    svc._cache.clear()
+    monkeypatch.setenv("TECHNICALS_BATCH_ENGINE", "false")
+    seq = asyncio.run(svc.get_batch_snapshots(["AAPL", "MSFT", "NVDA", "ZZZZ"], mongo_only=True))
+    for sym in batch:
+        a, b = dataclasses.asdict(batch[sym]), dataclasses.asdict(seq[sym])
+        a.pop("timestamp"), b.pop("timestamp")
+        assert a == b
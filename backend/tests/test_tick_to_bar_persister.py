@@ -6,6 +6,7 @@ Locks the algorithm so future refactors can't silently break the
 "PARTIAL coverage" fix that this service is supposed to deliver.
 """
 
+import time
 from datetime import datetime, timezone
 from unittest.mock import MagicMock, patch
 
@@ -22,10 +23,25 @@ def _reset_singleton():
 
 
 def _fake_db():
+    """`col` is ib_historical_data; other collections (the bar catalog
+    fold) get their own mocks so they don't show up as bar upserts."""
     db = MagicMock()
-    col = MagicMock()
-    db.__getitem__.return_value = col
-    return db, col
+    cols = {"ib_historical_data": MagicMock()}
+    db.__getitem__.side_effect = lambda name: cols.setdefault(name, MagicMock())
+    return db, cols["ib_historical_data"]
+
+
+def _upserts(p, col):
+    """Flush the write-behind queue and return (filter, $set) for every
+    UpdateOne handed to bulk_write."""
+    assert p.flush(timeout=5.0)
+    out = []
+    for call in col.bulk_write.call_args_list:
+        assert call.kwargs.get("ordered") is False
+        for op in call.args[0]:
+            assert op._upsert is True
+            out.append((op._filter, op._doc["$set"]))
+    return out
 
 
 def _make_ts(year=2026, month=4, day=28, hour=14, minute=30, second=0):
@@ -48,7 +64,7 @@ def test_first_push_starts_a_bucket_no_finalize_yet():
     # Builders created for each of the 4 bar sizes.
     assert len(p._builders) == 4
     # Nothing upserted yet — we're mid-window for all 4.
-    col.update_one.assert_not_called()
+    assert _upserts(p, col) == []
 
 
 def test_window_rollover_finalizes_and_upserts_1min_bar():
@@ -85,12 +101,9 @@ def test_window_rollover_finalizes_and_upserts_1min_bar():
     assert finalized == 1, "exactly one 1-min bar should close on rollover"
 
     # Verify the upsert payload — collect all upsert calls and find the 1m one.
-    one_min_calls = [
-        c for c in col.update_one.call_args_list
-        if c.args[0].get("bar_size") == "1 min"
-    ]
+    one_min_calls = [u for u in _upserts(p, col) if u[0].get("bar_size") == "1 min"]
     assert len(one_min_calls) == 1, "exactly one 1-min bar must be upserted"
-    set_doc = one_min_calls[0].args[1]["$set"]
+    set_doc = one_min_calls[0][1]
     assert set_doc["symbol"] == "SPY"
     assert set_doc["bar_size"] == "1 min"
     assert set_doc["open"] == 500.0
@@ -155,12 +168,9 @@ def test_volume_clamps_to_zero_on_negative_delta():
         dt_mock.fromtimestamp = datetime.fromtimestamp
         p.on_push({"SPY": {"last": 501.0, "volume": 1_001_000}})
 
-    one_min = [
-        c for c in col.update_one.call_args_list
-        if c.args[0].get("bar_size") == "1 min"
-    ]
+    one_min = [u for u in _upserts(p, col) if u[0].get("bar_size") == "1 min"]
     assert len(one_min) == 1
-    set_doc = one_min[0].args[1]["$set"]
+    set_doc = one_min[0][1]
     assert set_doc["volume"] == 0  # clamped, not negative
 
 
@@ -228,3 +238,97 @@ def test_bucket_open_alignment_to_minute_boundaries():
     assert _bucket_open(t, 5 * 60) == datetime(2026, 4, 28, 14, 30, 0, tzinfo=timezone.utc)
     assert _bucket_open(t, 15 * 60) == datetime(2026, 4, 28, 14, 30, 0, tzinfo=timezone.utc)
     assert _bucket_open(t, 60 * 60) == datetime(2026, 4, 28, 14, 0, 0, tzinfo=timezone.utc)
+
+
+def _bar(sym, date="2026-04-28T14:30:00+00:00", bar_size="1 min", close=1.0):
+    return {"symbol": sym, "bar_size": bar_size, "date": date, "close": close}
+
+
+def test_write_queue_coalesces_and_bounds_memory():
+    from services.tick_to_bar_persister import _BarWriteQueue
+
+    written = []
+    q = _BarWriteQueue(lambda bars: written.extend(bars) or len(bars),
+                       max_pending=3, batch_size=100, flush_interval_s=60)
+    # Writer thread lingers (60s) so everything stays queued until flush().
+    q.put([_bar("AAA"), _bar("BBB")])
+    q.put([_bar("AAA", close=2.0)])                         # same key → replaces
+    q.put([_bar("CCC"), _bar("DDD")])                        # over the bound → oldest dropped
+    stats = q.stats()
+    assert stats["pending"] == 3 and stats["coalesced_total"] == 1
+    assert stats["dropped_total"] == 1
+    assert q.close(timeout=5.0)
+    assert [(b["symbol"], b["close"]) for b in written] == [("BBB", 1.0), ("CCC", 1.0), ("DDD", 1.0)]
+    stats = q.stats()
+    assert stats["pending"] == 0 and not stats["writer_alive"]
+    assert stats["flushes_total"] == 1 and stats["flush_ms_max"] is not None
+
+
+def test_write_queue_requeues_failed_batch():
+    from services.tick_to_bar_persister import _BarWriteQueue
+
+    calls = []
+
+    def flaky(bars):
+        calls.append([b["symbol"] for b in bars])
+        if len(calls) == 1:
+            raise RuntimeError("mongo down")
+        return len(bars)
+
+    q = _BarWriteQueue(flaky, max_pending=10, batch_size=10, flush_interval_s=60)
+    q.put([_bar("AAA"), _bar("BBB")])
+    q.flush(timeout=5.0)
+    assert q.flush(timeout=5.0)
+    assert calls == [["AAA", "BBB"], ["AAA", "BBB"]]
+    assert q.stats()["flush_errors_total"] == 1
+    q.close()
+
+
+def test_bulk_write_partial_failure_counts_only_written_bars():
+    from pymongo.errors import BulkWriteError
+
+    from services import tick_to_bar_persister as ttb
+
+    db, col = _fake_db()
+    col.bulk_write.side_effect = BulkWriteError(
+        {"writeErrors": [{"index": 1, "errmsg": "dup"}], "nUpserted": 1})
+    p = ttb.TickToBarPersister(db=db)
+    p._upsert_bars([_bar("AAA"), _bar("BBB"), _bar("AAA", bar_size="5 mins")])
+    assert p.close(timeout=5.0)
+    stats = p.stats()
+    assert stats["bars_persisted_total"] == 2
+    assert stats["bars_persisted_by_size"] == {"1 min": 1, "5 mins": 1}
+    assert stats["write_behind"]["flush_errors_total"] == 0
+    assert stats["write_behind"]["enqueue_to_write_ms_p50"] is not None
+
+
+def test_write_behind_disabled_writes_synchronously(monkeypatch):
+    from services import tick_to_bar_persister as ttb
+
+    monkeypatch.setenv("TICK_BAR_WRITE_BEHIND", "false")
+    db, col = _fake_db()
+    p = ttb.TickToBarPersister(db=db)
+    p._upsert_bars([_bar("AAA"), _bar("BBB")])
+    col.bulk_write.assert_called_once()
+    assert len(col.bulk_write.call_args.args[0]) == 2
+    assert p.stats()["write_behind"] is None
+    assert p.stats()["bars_persisted_total"] == 2
+
+
+def test_write_queue_backs_off_when_full_and_stopping():
+    from services.tick_to_bar_persister import _BarWriteQueue
+
+    calls = []
+
+    def down(bars):
+        calls.append(len(bars))
+        raise RuntimeError("mongo down")
+
+    # batch_size=1 keeps the queue "full", which used to skip the linger.
+    q = _BarWriteQueue(down, max_pending=10, batch_size=1, flush_interval_s=0)
+    q.put([_bar("AAA"), _bar("BBB")])
+    time.sleep(0.5)
+    assert len(calls) == 1
+    assert q.stats()["retry_backoff_s"] == 1.0
+    assert not q.close(timeout=0.3)
+    assert len(calls) <= 3
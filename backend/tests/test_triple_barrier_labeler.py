@@ -12,8 +12,10 @@ from backend.services.ai_modules.triple_barrier_labeler import (
     label_to_class_index,
     class_index_to_direction,
     label_distribution,
+    labels_to_class_indices,
     atr,
 )
+from backend.services.ai_modules import triple_barrier_labeler as tbl
 
 
 def _make_rising_bars(n=50, slope=0.5, noise=0.1, start=100.0):
@@ -126,5 +128,71 @@ def test_atr_produces_positive_values_after_warmup():
     assert np.all(a[14:] > 0), "ATR must be positive"
 
 
+def _loop_labels(highs, lows, closes, entries, pt, sl, max_bars, atr_period):
+    """The pre-vectorization reference: one single-entry label per entry."""
+    atr_series = atr(highs, lows, closes, period=atr_period)
+    return np.array([
+        triple_barrier_label_single(
+            highs, lows, closes, int(i), pt_atr_mult=pt, sl_atr_mult=sl,
+            max_bars=max_bars, atr_value=float(atr_series[i]) if i < len(atr_series) else None,
+        )
+        for i in entries
+    ], dtype=np.int64)
+
+
+@pytest.mark.parametrize("seed,pt,sl,max_bars,atr_period", [
+    (0, 2.0, 1.0, 20, 14), (1, 1.0, 1.0, 5, 7), (2, 0.5, 0.5, 60, 20), (3, 3.0, 1.5, 1, 14),
+])
+def test_vectorized_labels_match_single_entry_loop(seed, pt, sl, max_bars, atr_period, monkeypatch):
+    rng = np.random.default_rng(seed)
+    n = 3000
+    # Tick-rounded prices so bars that cross both barriers (the "stop
+    # first" tie) and exact barrier touches actually occur.
+    closes = np.round(100 + np.cumsum(rng.normal(0, 0.4, n)), 2)
+    highs = np.round(closes + np.abs(rng.normal(0, 0.5, n)), 2)
+    lows = np.round(closes - np.abs(rng.normal(0, 0.5, n)), 2)
+    highs[rng.integers(0, n, 20)] = np.nan  # bad bars never count as a hit
+    entries = np.concatenate([np.arange(0, n, 3), [n - 2, n - 1, n, n + 5]])
+    want = _loop_labels(highs, lows, closes, entries, pt, sl, max_bars, atr_period)
+
+    monkeypatch.setattr(tbl, "_LABEL_CHUNK_CELLS", 997)  # many uneven chunks
+    got = triple_barrier_labels(highs, lows, closes, entry_indices=entries,
+                                pt_atr_mult=pt, sl_atr_mult=sl, max_bars=max_bars,
+                                atr_period=atr_period)
+    np.testing.assert_array_equal(got, want)
+    assert set(np.unique(got)) == {-1, 0, 1}
+    # Default entry set (every bar from atr_period on).
+    np.testing.assert_array_equal(
+        triple_barrier_labels(highs, lows, closes, pt_atr_mult=pt, sl_atr_mult=sl,
+                              max_bars=max_bars, atr_period=atr_period),
+        _loop_labels(highs, lows, closes, np.arange(atr_period, n - 1), pt, sl, max_bars, atr_period),
+    )
+
+
+def test_same_bar_double_hit_is_stop_first():
+    closes = np.full(40, 100.0)
+    highs, lows = closes + 0.5, closes - 0.5
+    highs[21], lows[21] = 110.0, 90.0  # one bar spans both barriers
+    got = triple_barrier_labels(highs, lows, closes, entry_indices=np.array([20]),
+                                pt_atr_mult=2.0, sl_atr_mult=2.0, max_bars=5)
+    assert got.tolist() == [-1]
+
+
+def test_atr_matches_per_bar_mean():
+    highs, lows, closes = _make_rising_bars(n=400, noise=0.3)
+    prev = np.concatenate(([closes[0]], closes[:-1]))
+    tr = np.maximum.reduce([highs - lows, np.abs(highs - prev), np.abs(lows - prev)])
+    for period in (1, 7, 14, 50):
+        want = np.full(len(tr), np.nan)
+        for i in range(period - 1, len(tr)):
+            want[i] = np.mean(tr[i - period + 1:i + 1])
+        np.testing.assert_array_equal(atr(highs, lows, closes, period), want)
+
+
+def test_labels_to_class_indices_matches_scalar_map():
+    raw = np.array([-1, 0, 1, 1, -1, 0])
+    assert labels_to_class_indices(raw).tolist() == [label_to_class_index(v) for v in raw]
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
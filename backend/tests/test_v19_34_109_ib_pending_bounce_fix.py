@@ -143,18 +143,23 @@ class TestQueueStatusSurfacesIbPending:
 
 
 class TestIbPendingAutoExpiry:
-    """Stuck IB_PENDING rows (>10 min) get auto-rejected on the next
-    get_pending_orders() poll. This is the safety valve when IB never
-    sends a terminal state for an order."""
+    """Stuck IB_PENDING rows (>10 min) get auto-rejected by the periodic
+    sweep_stale_orders() pass (moved out of the get_pending_orders() poll).
+    This is the safety valve when IB never sends a terminal state for an
+    order."""
 
-    def test_get_pending_orders_runs_ib_pending_cleanup(self):
+    def test_get_pending_orders_is_read_only(self):
         svc = _mk_service()
-        # Stub the find cursor: must support .sort() returning iterable.
         cursor = MagicMock()
         cursor.sort.return_value = iter([])
         svc._collection.find.return_value = cursor
         svc.get_pending_orders()
-        # We expect TWO update_many calls inside get_pending_orders:
+        svc._collection.update_many.assert_not_called()
+
+    def test_sweep_runs_ib_pending_cleanup(self):
+        svc = _mk_service()
+        svc.sweep_stale_orders()
+        # We expect TWO update_many calls inside sweep_stale_orders:
         #   1. CLAIMED >5min → EXPIRED (legacy)
         #   2. IB_PENDING >10min → REJECTED (v109)
         update_many_calls = svc._collection.update_many.call_args_list
@@ -167,7 +172,7 @@ class TestIbPendingAutoExpiry:
                 ib_cleanup_call = call
                 break
         assert ib_cleanup_call is not None, (
-            "get_pending_orders MUST sweep stale IB_PENDING rows; "
+            "sweep_stale_orders MUST sweep stale IB_PENDING rows; "
             "v109 watchdog missing."
         )
         # Confirm the filter uses ib_pending_at < 10-min-cutoff
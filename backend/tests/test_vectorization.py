@@ -228,6 +228,49 @@ def test_setup_worker_produces_results():
         print(f"  setup_long_worker: {X.shape[0]} samples, shape={X.shape}, targets={dict(zip(*np.unique(y, return_counts=True)))} ✓")
 
 
+def _setup_windows(n=400, seed=7):
+    from numpy.lib.stride_tricks import sliding_window_view
+    closes, highs, lows, opens, volumes = _make_synthetic_bars(n, seed)
+    volumes[::17] = 0  # zero-volume bars hit the VWAP / ratio fallbacks
+    return [sliding_window_view(a, 50)[:, ::-1] for a in (opens, highs, lows, closes, volumes)]
+
+
+@pytest.mark.parametrize("short", [False, True])
+def test_setup_features_bulk_matches_scalar(short):
+    """Every bulk setup extractor reproduces get_(short_)setup_features row by row."""
+    if short:
+        from services.ai_modules.short_setup_features import (
+            SHORT_SETUP_FEATURE_EXTRACTORS as extractors,
+            get_short_setup_features as scalar,
+            get_short_setup_features_bulk as bulk,
+            get_short_setup_feature_names as names_for,
+        )
+    else:
+        from services.ai_modules.setup_features import (
+            SETUP_FEATURE_EXTRACTORS, get_setup_features as scalar,
+            get_setup_features_bulk as bulk, get_setup_feature_names as names_for,
+        )
+        extractors = [k for k in SETUP_FEATURE_EXTRACTORS if not k.startswith("SHORT_")]
+    wins = _setup_windows()
+    rows = np.arange(0, len(wins[0]), 2)
+    for setup_type in extractors:
+        names = names_for(setup_type)
+        expected = np.array(
+            [[scalar(setup_type, *(w[r] for w in wins)).get(k, 0.0) for k in names] for r in rows],
+            dtype=np.float32,
+        )
+        got = bulk(setup_type, *wins, rows=rows)
+        assert got.dtype == np.float32 and got.shape == (len(rows), len(names))
+        np.testing.assert_allclose(got, expected, rtol=1e-6, atol=1e-7,
+                                   err_msg=f"{setup_type} bulk features diverge")
+
+
+def test_setup_features_bulk_unknown_setup_is_empty():
+    from services.ai_modules.setup_features import get_setup_features_bulk
+    wins = _setup_windows(120)
+    assert get_setup_features_bulk("NOT_A_SETUP", *wins).shape == (len(wins[0]), 0)
+
+
 def test_exit_worker_produces_results():
     """Verify the optimized exit worker produces valid results."""
     from services.ai_modules.training_pipeline import _extract_exit_worker
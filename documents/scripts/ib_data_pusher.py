@@ -14,10 +14,13 @@ import json
 import logging
 import os
 import platform
+import queue
 import subprocess
 import tempfile
+import threading
 import time
 import random
+import struct
 import requests
 from datetime import datetime
 from typing import Dict, List, Optional
@@ -256,6 +259,28 @@ class CloudAPIClient:
         response.raise_for_status()
         return response.json()
     
+    @retry_with_backoff(max_retries=3, base_delay=5.0)
+    def post_msgpack(self, endpoint: str, body: bytes, timeout: int = 45) -> Optional[dict]:
+        """POST a pre-encoded msgpack body with retry logic"""
+        self._throttle()
+        url = f"{self.base_url}{endpoint}"
+
+        response = self.session.post(
+            url,
+            data=body,
+            headers={"Content-Type": "application/msgpack"},
+            timeout=timeout
+        )
+
+        if response.status_code == 429:
+            self.last_429_time = time.time()
+
+        if self._check_cloudflare_response(response):
+            response.raise_for_status()
+
+        response.raise_for_status()
+        return response.json()
+
     def get_safe(self, endpoint: str, timeout: int = 15) -> Optional[dict]:
         """GET request that returns None on error instead of raising"""
         try:
@@ -273,6 +298,37 @@ class CloudAPIClient:
             return None
 
 
+# Binary push format (backend services/quote_table.py QUOTE_WIRE_DTYPE):
+# one little-endian record per quote — 16-byte ASCII symbol, then
+# bid/ask/last/close/high/low/open/volume/ts as float64 (NaN = missing).
+# Opt in with IB_PUSH_FORMAT=msgpack; falls back to JSON if msgpack is not
+# installed or the backend doesn't know /api/ib/push-data-bin.
+_QUOTE_WIRE_FIELDS = ("bid", "ask", "last", "close", "high", "low", "open", "volume")
+_QUOTE_WIRE_STRUCT = struct.Struct("<16s9d")
+_PUSH_WIRE_SCHEMA = 1
+
+
+def encode_push_msgpack(payload: dict) -> bytes:
+    """Encode a push payload for /api/ib/push-data-bin."""
+    import msgpack
+    nan = float("nan")
+    blob = bytearray()
+    for sym, q in (payload.get("quotes") or {}).items():
+        q = q if isinstance(q, dict) else {}
+        vals = [q.get(f) for f in _QUOTE_WIRE_FIELDS]
+        vals = [float(v) if isinstance(v, (int, float)) and not isinstance(v, bool) else nan
+                for v in vals]
+        try:
+            ts = datetime.fromisoformat(str(q.get("timestamp"))).timestamp()
+        except ValueError:
+            ts = nan
+        blob += _QUOTE_WIRE_STRUCT.pack(sym.upper().encode("ascii", "ignore")[:16], *vals, ts)
+    body = {k: v for k, v in payload.items() if k != "quotes"}
+    body["schema"] = _PUSH_WIRE_SCHEMA
+    body["quotes"] = bytes(blob)
+    return msgpack.packb(body, use_bin_type=True)
+
+
 class IBDataPusher:
     """
     Connects to local IB Gateway and pushes data to cloud backend.
@@ -293,6 +349,8 @@ class IBDataPusher:
         self.depth_subscriptions: Dict[str, object] = {}  # symbol -> ticker object for L2
         self.last_push_time = 0
         self.push_interval = 10.0  # Push every 10 seconds to reduce Cloudflare rate limiting
+        # Compact binary quotes (POST /api/ib/push-data-bin) — opt-in.
+        self._binary_push = os.environ.get("IB_PUSH_FORMAT", "json").strip().lower() == "msgpack"
         self.level2_enabled = True  # Level 2 uses polling approach, always available
         
         # Initialize the cloud API client with Cloudflare evasion
@@ -338,6 +396,15 @@ class IBDataPusher:
         # Connection health tracking
         self.consecutive_push_failures = 0
         self.max_consecutive_failures = 10
+
+        # Event-driven order dispatch: a side thread long-polls
+        # /api/ib/orders/pending and hands batches to the main loop (IB
+        # calls must stay on this thread). Falls back to the 10s poll
+        # against backends that don't answer with a dispatch `version`.
+        self._order_long_poll = os.environ.get("IB_ORDER_LONG_POLL", "true").strip().lower() not in ("0", "false", "no", "off")
+        self._order_inbox: "queue.Queue[list]" = queue.Queue()
+        self._order_feed_live = False
+        self._order_feed_thread: Optional[threading.Thread] = None
         
     def connect(self) -> bool:
         """Connect to local IB Gateway"""
@@ -1261,7 +1328,22 @@ class IBDataPusher:
         
         try:
             # Use the CloudAPIClient with retry logic
-            result = self.api.post("/api/ib/push-data", payload, timeout=120)
+            result = None
+            if self._binary_push:
+                try:
+                    result = self.api.post_msgpack(
+                        "/api/ib/push-data-bin", encode_push_msgpack(payload), timeout=120)
+                except ImportError:
+                    logger.warning("IB_PUSH_FORMAT=msgpack but msgpack is not installed - using JSON")
+                    self._binary_push = False
+                except requests.exceptions.HTTPError as he:
+                    status = getattr(he.response, "status_code", None)
+                    if status not in (400, 404, 415):
+                        raise
+                    logger.warning(f"Binary push rejected ({status}) - falling back to JSON")
+                    self._binary_push = False
+            if result is None:
+                result = self.api.post("/api/ib/push-data", payload, timeout=120)
             
             if result and result.get("success"):
                 logger.info(f"Push OK! Cloud received: {result.get('received', {})}")
@@ -1444,6 +1526,7 @@ class IBDataPusher:
         except ValueError:
             rpc_port = 8765
         start_rpc_server(self, rpc_host, rpc_port)
+        self.start_order_feed()
         
         # Subscribe to market data
         logger.info("Subscribing to market data...")
@@ -1568,6 +1651,9 @@ class IBDataPusher:
                     
                     # Let ib_insync process events (sync - no event loop conflict)
                     self.ib.sleep(0.1)
+
+                    # Orders pushed by the long-poll feed (ms latency)
+                    self.drain_order_inbox()
                     
                     # Poll Level 2 data from subscribed tickers
                     if enable_level2 and self.level2_enabled:
@@ -1598,7 +1684,8 @@ class IBDataPusher:
                     
                     # Poll for pending orders from cloud trading bot (less frequently)
                     if current_time - last_order_poll >= order_poll_interval:
-                        self.poll_and_execute_orders()
+                        if not self._order_feed_live:
+                            self.poll_and_execute_orders()
                         self.poll_and_execute_cancellations()  # v19.34.88
                         last_order_poll = current_time
                         
@@ -1650,6 +1737,7 @@ class IBDataPusher:
         except ValueError:
             rpc_port = 8765
         start_rpc_server(self, rpc_host, rpc_port)
+        self.start_order_feed()
         
         # Subscribe to market data initially (for trading mode)
         logger.info("Subscribing to market data...")
@@ -1802,8 +1890,10 @@ class IBDataPusher:
         # Poll for orders
         if not hasattr(self, '_last_order_poll'):
             self._last_order_poll = 0
+        self.drain_order_inbox()
         if current_time - self._last_order_poll >= 10:
-            self.poll_and_execute_orders()
+            if not self._order_feed_live:
+                self.poll_and_execute_orders()
             self.poll_and_execute_cancellations()  # v19.34.88
             self._last_order_poll = current_time
         
@@ -2821,6 +2911,62 @@ class IBDataPusher:
 
 
     
+    def start_order_feed(self, wait_s: float = 25.0):
+        """Start the long-poll order feed thread (idempotent)."""
+        if not self._order_long_poll:
+            return
+        if self._order_feed_thread is not None and self._order_feed_thread.is_alive():
+            return
+        self._order_feed_thread = threading.Thread(
+            target=self._order_feed_loop, args=(wait_s,),
+            name="ib-pusher-order-feed", daemon=True,
+        )
+        self._order_feed_thread.start()
+
+    def _order_feed_loop(self, wait_s: float):
+        """Hold a long-poll on /api/ib/orders/pending. The backend answers
+        as soon as `queue_order` fires (or after `wait_s` idle), echoing a
+        dispatch version we send back so nothing queued in between is lost.
+        Runs on its own HTTP session so a held request never blocks pushes."""
+        api = CloudAPIClient(self.cloud_url)
+        version = -1
+        while self.running:
+            result = api.get_safe(
+                f"/api/ib/orders/pending?wait={wait_s:g}&version={version}",
+                timeout=int(wait_s) + 15,
+            )
+            if not result:
+                self._order_feed_live = False
+                time.sleep(2.0)
+                continue
+            if "version" not in result:
+                # Pre-long-poll backend: leave the legacy 10s poll in charge.
+                logger.info("[OrderQueue] Backend has no order long-poll — using 10s polling")
+                self._order_feed_live = False
+                return
+            if not self._order_feed_live:
+                logger.info("[OrderQueue] Long-poll order feed live")
+            self._order_feed_live = True
+            version = int(result["version"])
+            orders = result.get("orders") or []
+            if orders:
+                self._order_inbox.put(orders)
+        self._order_feed_live = False
+
+    def drain_order_inbox(self):
+        """Execute orders delivered by the long-poll feed (main thread)."""
+        while True:
+            try:
+                orders = self._order_inbox.get_nowait()
+            except queue.Empty:
+                return
+            logger.info(f"[OrderQueue] Found {len(orders)} pending orders (pushed)")
+            for order in orders:
+                try:
+                    self._execute_queued_order(order)
+                except Exception as e:
+                    logger.error(f"[OrderQueue] Execute error: {e}")
+
     def poll_and_execute_orders(self):
         """
         Poll cloud for pending orders and execute them via IB Gateway.